@@ -66,3 +66,33 @@ class CfnParameterOverridesType(click.ParamType):
             value = value.strip('"')
 
         return value.replace("\\ ", " ").replace('\\"', '"')
+
+
+class ByteSizeType(click.ParamType):
+    """
+    Custom Click options type to accept a size in bytes, with an optional unit: K, M, G or T, ex: "512M" or "10G".
+    Units are powers of 1024. Converts the value to a number of bytes
+    """
+
+    _UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+    # Regex that parses a number with an optional unit and an optional trailing "B"
+    _pattern = r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$'
+
+    name = 'size'
+
+    def convert(self, value, param, ctx):
+        if value is None or isinstance(value, int):
+            return value
+
+        match = re.match(self._pattern, str(value).upper())
+        if not match:
+            return self.fail(
+                "{} is not a valid size. It must be a number of bytes, optionally followed by K, M, G or T, "
+                "ex: '512M'".format(value),
+                param,
+                ctx
+            )
+
+        number, unit = match.groups()
+        return int(float(number) * self._UNITS[unit])
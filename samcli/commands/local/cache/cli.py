@@ -0,0 +1,90 @@
+"""
+CLI command for "local cache" command
+"""
+
+import json
+import logging
+import click
+
+from samcli.cli.main import pass_context, common_options as cli_framework_options
+from samcli.cli.types import ByteSizeType
+from samcli.commands.local.cli_common.options import get_default_layer_cache_dir
+from samcli.local.layers.layer_cache import LayerCacheManager
+from samcli.lib.telemetry.metrics import track_command
+
+
+LOG = logging.getLogger(__name__)
+
+HELP_TEXT = """
+You can use this command to see how well the layer cache works and how much space it takes.
+It reports the hit rate of the cache, the bytes it stores and the layers that were evicted from it.\n
+\b
+Report on the layer cache
+$ sam local cache\n
+\b
+Evict the layers used least recently until the cache fits in 5 gigabytes, then report
+$ sam local cache --max-size 5G
+"""
+
+
+@click.command("cache",
+               help=HELP_TEXT,
+               short_help="Reports on the layer cache and keeps it within a size.")
+@click.option('--layer-cache-basedir',
+              type=click.Path(exists=False, file_okay=False),
+              envvar="SAM_LAYER_CACHE_BASEDIR",
+              help="Specifies the location basedir where the Layers your template uses are downloaded to.",
+              default=get_default_layer_cache_dir())
+@click.option('--max-size',
+              type=ByteSizeType(),
+              help="Evict the layers used least recently until the cache fits in this size, in bytes or with a "
+                   "unit, ex: 10G. Layers mounted by running containers are kept.")
+@click.option('--json', 'as_json',
+              is_flag=True,
+              help="Print the report as JSON.")
+@cli_framework_options
+@pass_context
+@track_command
+def cli(ctx, layer_cache_basedir, max_size, as_json):
+
+    # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
+
+    do_cli(ctx, layer_cache_basedir, max_size, as_json)  # pragma: no cover
+
+
+def do_cli(ctx, layer_cache_basedir, max_size, as_json):  # pylint: disable=unused-argument
+    """
+    Implementation of the ``cli`` method, just separated out for unit testing purposes
+    """
+
+    LOG.debug("local cache command is called")
+
+    cache_manager = LayerCacheManager(layer_cache_basedir, max_size=max_size)
+
+    evicted = cache_manager.evict()
+    stats = cache_manager.stats()
+
+    if as_json:
+        click.echo(json.dumps(dict(stats, evicted=evicted), indent=2))
+        return
+
+    hit_rate = "{:.1%}".format(stats["hit_rate"]) if stats["hit_rate"] is not None else "n/a"
+
+    click.echo("Layer cache:     {}".format(layer_cache_basedir))
+    click.echo("Entries:         {}".format(stats["entries"]))
+    click.echo("Bytes stored:    {}".format(_format_size(stats["bytes_stored"])))
+    click.echo("Hit rate:        {} ({} hits, {} misses)".format(hit_rate, stats["hits"], stats["misses"]))
+    click.echo("Evictions:       {} ({} evicted)".format(stats["evictions"], _format_size(stats["evicted_bytes"])))
+
+    for name in evicted:
+        click.echo("Evicted {}".format(name))
+
+
+def _format_size(size):
+    size = float(size)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return "{:.1f} {}".format(size, unit)
+        size /= 1024
+
+    return "{:.1f} GB".format(size)
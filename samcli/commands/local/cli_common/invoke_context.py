@@ -5,16 +5,26 @@ Reads CLI arguments and performs necessary preparation to be able to run the fun
 import errno
 import json
 import os
+import sys
+import logging
 
 import samcli.lib.utils.osutils as osutils
 from samcli.lib.utils.stream_writer import StreamWriter
 from samcli.commands.local.lib.local_lambda import LocalLambdaRunner
 from samcli.commands.local.lib.debug_context import DebugContext
-from samcli.local.lambdafn.runtime import LambdaRuntime
+from samcli.local.lambdafn.runtime import LambdaRuntime, PersistentLambdaRuntime
+from samcli.local.lambdafn.scheduler import InvocationScheduler
+from samcli.local.lambdafn.extraction_cache import ExtractionCache
+from samcli.local.lambdafn.timing import TimingsWriter
 from samcli.local.docker.lambda_image import LambdaImage
 from samcli.local.docker.manager import ContainerManager
+from samcli.local.docker.warm_pool import WarmContainerPool
+from samcli.local.docker.image_cache import ImageStateCache
+from samcli.local.docker.reaper import ContainerReaper
+from samcli.local.docker.client import configure_docker_client, docker_api_stats
 from samcli.commands._utils.template import get_template_data
 from samcli.local.layers.layer_downloader import LayerDownloader
+from samcli.local.layers.layer_cache import LayerCacheManager
 from .user_exceptions import InvokeContextException, DebugContextException
 from ..lib.sam_function_provider import SamFunctionProvider
 
@@ -26,6 +36,8 @@ try:
 except ImportError:
     from pathlib2 import Path
 
+LOG = logging.getLogger(__name__)
+
 
 class InvokeContext(object):
     """
@@ -50,6 +62,7 @@ class InvokeContext(object):
                  docker_volume_basedir=None,
                  docker_network=None,
                  log_file=None,
+                 timings_file=None,
                  skip_pull_image=None,
                  debug_port=None,
                  debug_args=None,
@@ -59,6 +72,18 @@ class InvokeContext(object):
                  force_image_build=None,
                  aws_region=None,
                  aws_profile=None,
+                 warm_pool_size=None,
+                 warm_pool_ttl=None,
+                 persistent_containers=None,
+                 warm_containers=None,
+                 max_concurrency=None,
+                 max_queue_size=None,
+                 queue_timeout=None,
+                 docker_max_pool_size=None,
+                 image_refresh_interval=None,
+                 mount_layers=None,
+                 layer_cache_max_size=None,
+                 async_invocations=None,
                  ):
         """
         Initialize the context
@@ -78,6 +103,9 @@ class InvokeContext(object):
         log_file str
             Path to a file to send container output to. If the file does not exist, it will be
             created
+        timings_file str
+            Path to a file to append the timings of every invocation to, as JSON lines. If the file does not exist, it
+            will be created
         skip_pull_image bool
             Should we skip pulling the Docker container image?
         aws_profile str
@@ -96,6 +124,34 @@ class InvokeContext(object):
             Whether or not to force build the image
         aws_region str
             AWS region to use
+        warm_pool_size int
+            Maximum number of stopped containers to keep around for reuse. Containers are not reused if this is not
+            set or is zero
+        warm_pool_ttl int
+            Number of seconds a container can be kept around for reuse
+        persistent_containers bool
+            Keep function containers running between invocations and hand them events through the Lambda Runtime API
+        warm_containers int
+            Number of containers to prepare for every function before the service starts accepting requests
+        max_concurrency int
+            Maximum number of functions running at the same time. Function specific limits come from the
+            ReservedConcurrentExecutions property. No global limit if not set or 0
+        max_queue_size int
+            Maximum number of invocations waiting for a function to be within its concurrency limits
+        queue_timeout int
+            Number of seconds an invocation can wait for a function to be within its concurrency limits
+        docker_max_pool_size int
+            Maximum number of connections to the Docker daemon kept open by the shared Docker client
+        image_refresh_interval int
+            Number of seconds the presence of an image is trusted before Docker is asked again. Defaults to the
+            interval of ``ImageStateCache``
+        mount_layers bool
+            Mount the layers of functions at /opt instead of building an image with them
+        layer_cache_max_size int
+            Maximum number of bytes the layer cache may use. Layers used least recently are evicted beyond it
+        async_invocations bool
+            Run functions with a runtime that can be invoked from an asyncio event loop. Requires Python 3.6+ and
+            aiodocker. Cannot be combined with debugging
         """
         self._template_file = template_file
         self._function_identifier = function_identifier
@@ -103,6 +159,7 @@ class InvokeContext(object):
         self._docker_volume_basedir = docker_volume_basedir
         self._docker_network = docker_network
         self._log_file = log_file
+        self._timings_file = timings_file
         self._skip_pull_image = skip_pull_image
         self._debug_port = debug_port
         self._debug_args = debug_args
@@ -112,14 +169,31 @@ class InvokeContext(object):
         self._force_image_build = force_image_build
         self._aws_region = aws_region
         self._aws_profile = aws_profile
+        self._warm_pool_size = warm_pool_size
+        self._warm_pool_ttl = warm_pool_ttl
+        self._persistent_containers = persistent_containers
+        self._warm_containers = warm_containers
+        self._max_concurrency = max_concurrency
+        self._max_queue_size = max_queue_size
+        self._queue_timeout = queue_timeout
+        self._docker_max_pool_size = docker_max_pool_size
+        self._image_refresh_interval = image_refresh_interval
+        self._mount_layers = mount_layers
+        self._layer_cache_max_size = layer_cache_max_size
+        self._async_invocations = async_invocations
 
         self._template_dict = None
         self._function_provider = None
         self._env_vars_value = None
         self._log_file_handle = None
+        self._timings_file_handle = None
         self._debug_context = None
         self._layers_downloader = None
         self._container_manager = None
+        self._lambda_runtime = None
+        self._scheduler = None
+        self._code_cache = None
+        self._layer_cache_manager = None
 
     def __enter__(self):
         """
@@ -134,17 +208,31 @@ class InvokeContext(object):
 
         self._env_vars_value = self._get_env_vars_value(self._env_vars_file)
         self._log_file_handle = self._setup_log_file(self._log_file)
+        self._timings_file_handle = self._setup_timings_file(self._timings_file)
 
         self._debug_context = self._get_debug_context(self._debug_port,
                                                       self._debug_args,
                                                       self._debugger_path)
 
+        if self._async_invocations and self._debug_context:
+            raise InvokeContextException("Functions cannot be debugged when they are invoked asynchronously")
+
+        if self._docker_max_pool_size:
+            # Must happen before anything creates the shared Docker client
+            configure_docker_client(max_pool_size=self._docker_max_pool_size)
+
         self._container_manager = self._get_container_manager(self._docker_network,
-                                                              self._skip_pull_image)
+                                                              self._skip_pull_image,
+                                                              self._warm_pool_size,
+                                                              self._warm_pool_ttl,
+                                                              self._image_refresh_interval)
 
         if not self._container_manager.is_docker_reachable:
             raise InvokeContextException("Running AWS SAM projects locally requires Docker. Have you got it installed?")
 
+        # Clean up containers that crashed sessions left behind. Runs in the background like every other removal
+        self._container_manager.reaper.remove_orphans()
+
         return self
 
     def __exit__(self, *args):
@@ -156,6 +244,41 @@ class InvokeContext(object):
             self._log_file_handle.close()
             self._log_file_handle = None
 
+        if self._timings_file_handle:
+            self._timings_file_handle.close()
+            self._timings_file_handle = None
+
+        if self._scheduler:
+            self._log_scheduler_stats(self._scheduler.stats())
+            self._scheduler = None
+
+        if self._lambda_runtime:
+            # Stop the containers that are kept running between invocations
+            self._lambda_runtime.shutdown()
+            self._lambda_runtime = None
+
+        if self._container_manager and self._container_manager.warm_pool is not None:
+            # Remove the containers that were kept around for reuse
+            self._container_manager.warm_pool.drain()
+
+        if self._container_manager and self._container_manager.reaper is not None:
+            # Wait for the containers that are still being removed in the background
+            self._container_manager.reaper.drain()
+
+        if self._layer_cache_manager:
+            # Uses of cached layers are recorded in memory
+            self._layer_cache_manager.flush()
+            self._layer_cache_manager = None
+
+        if self._code_cache:
+            LOG.debug("Code extraction cache statistics: %s", self._code_cache.stats())
+            self._code_cache.close()
+            self._code_cache = None
+
+        if self._container_manager:
+            stats = docker_api_stats()
+            LOG.debug("Made %d Docker API call(s) taking %.3f seconds in total", stats["calls"], stats["total_time"])
+
     @property
     def function_name(self):
         """
@@ -191,19 +314,80 @@ class InvokeContext(object):
             locally
         """
 
-        layer_downloader = LayerDownloader(self._layer_cache_basedir, self.get_cwd())
+        if self._layer_cache_manager is None:
+            self._layer_cache_manager = LayerCacheManager(self._layer_cache_basedir,
+                                                          max_size=self._layer_cache_max_size)
+
+        layer_downloader = LayerDownloader(self._layer_cache_basedir,
+                                           self.get_cwd(),
+                                           cache_manager=self._layer_cache_manager)
         image_builder = LambdaImage(layer_downloader,
                                     self._skip_pull_image,
-                                    self._force_image_build)
-
-        lambda_runtime = LambdaRuntime(self._container_manager, image_builder)
-        return LocalLambdaRunner(local_runtime=lambda_runtime,
+                                    self._force_image_build,
+                                    mount_layers=bool(self._mount_layers))
+
+        if self._code_cache is None:
+            self._code_cache = ExtractionCache()
+
+        if self._async_invocations:
+            self._lambda_runtime = self._get_async_runtime_class()(self._container_manager,
+                                                                   image_builder,
+                                                                   code_cache=self._code_cache)
+        elif self._persistent_containers:
+            max_idle = self._warm_pool_size or None
+            if self._warm_containers:
+                # Make room for all the pre-warmed containers, otherwise they evict each other
+                prewarmed = self._warm_containers * len(list(self._function_provider.get_all()))
+                max_idle = max(max_idle or WarmContainerPool.DEFAULT_MAX_SIZE, prewarmed)
+
+            self._lambda_runtime = PersistentLambdaRuntime(self._container_manager,
+                                                           image_builder,
+                                                           max_idle=max_idle,
+                                                           idle_ttl=self._warm_pool_ttl,
+                                                           code_cache=self._code_cache)
+        else:
+            self._lambda_runtime = LambdaRuntime(self._container_manager,
+                                                 image_builder,
+                                                 warm_containers=bool(self._warm_pool_size),
+                                                 code_cache=self._code_cache)
+
+        function_limits = {function.name: function.reserved_concurrency
+                           for function in self._function_provider.get_all()
+                           if function.reserved_concurrency is not None}
+        self._scheduler = InvocationScheduler(max_concurrency=self._max_concurrency,
+                                              function_limits=function_limits,
+                                              max_queue_size=self._max_queue_size,
+                                              queue_timeout=self._queue_timeout)
+
+        timings_callback = TimingsWriter(self._timings_file_handle) if self._timings_file_handle else None
+
+        return LocalLambdaRunner(local_runtime=self._lambda_runtime,
                                  function_provider=self._function_provider,
                                  cwd=self.get_cwd(),
                                  aws_profile=self._aws_profile,
                                  aws_region=self._aws_region,
                                  env_vars_values=self._env_vars_value,
-                                 debug_context=self._debug_context)
+                                 debug_context=self._debug_context,
+                                 scheduler=self._scheduler,
+                                 timings_callback=timings_callback)
+
+    @property
+    def async_invocations(self):
+        """
+        Returns True, if the runtime of the Lambda runner can be invoked from an asyncio event loop
+
+        :return bool: True, if functions are invoked asynchronously
+        """
+        return bool(self._async_invocations)
+
+    @property
+    def warm_containers(self):
+        """
+        Returns the number of containers to prepare for every function before serving requests
+
+        :return int: Number of containers. 0 if functions should not be prepared upfront
+        """
+        return self._warm_containers or 0
 
     @property
     def stdout(self):
@@ -320,6 +504,20 @@ class InvokeContext(object):
 
         return open(log_file, 'wb')
 
+    @staticmethod
+    def _setup_timings_file(timings_file):
+        """
+        Open the file the timings of invocations are appended to, if necessary. This will create a file if it does not
+        exist
+
+        :param string timings_file: Path to a file where the timings should be written to
+        :return: Handle to the opened file, if necessary. None otherwise
+        """
+        if not timings_file:
+            return None
+
+        return open(timings_file, 'a')
+
     @staticmethod
     def _get_debug_context(debug_port, debug_args, debugger_path):
         """
@@ -361,7 +559,43 @@ class InvokeContext(object):
         return DebugContext(debug_port=debug_port, debug_args=debug_args, debugger_path=debugger_path)
 
     @staticmethod
-    def _get_container_manager(docker_network, skip_pull_image):
+    def _log_scheduler_stats(stats):
+        """
+        Prints a summary of how often invocations had to wait for, or were throttled by, concurrency limits
+        """
+        LOG.debug("Invocation scheduler statistics: %s", stats)
+
+        if stats["queued"] or stats["throttled"]:
+            LOG.info("%d invocation(s) waited for a concurrency slot (average wait %.2f seconds, max %.2f seconds, max "
+                     "queue depth %d). %d invocation(s) were throttled",
+                     stats["queued"],
+                     stats["average_wait_time"],
+                     stats["max_wait_time"],
+                     stats["max_queue_depth"],
+                     stats["throttled"])
+
+    @staticmethod
+    def _get_async_runtime_class():
+        """
+        Imports the runtime for asynchronous invocations, which only exists on Python 3
+
+        :return type: samcli.local.lambdafn.async_runtime.AsyncLambdaRuntime
+        :raises InvokeContextException: If the Python version or the installed packages don't support it
+        """
+        if sys.version_info < (3, 6):
+            raise InvokeContextException("Invoking functions asynchronously requires Python 3.6 or newer")
+
+        try:
+            from samcli.local.lambdafn.async_runtime import AsyncLambdaRuntime
+        except ImportError:
+            raise InvokeContextException("Invoking functions asynchronously requires aiohttp and aiodocker. "
+                                         "Install them with 'pip install aws-sam-cli[async]'")
+
+        return AsyncLambdaRuntime
+
+    @staticmethod
+    def _get_container_manager(docker_network, skip_pull_image, warm_pool_size=None, warm_pool_ttl=None,
+                               image_refresh_interval=None):
         """
         Creates a ContainerManager with specified options
 
@@ -371,11 +605,29 @@ class InvokeContext(object):
             Docker network identifier
         skip_pull_image bool
             Should the manager skip pulling the image
+        warm_pool_size int
+            Optional. Maximum number of containers to keep for reuse. No warm pool is created if this is not set
+        warm_pool_ttl int
+            Optional. Number of seconds a container can be kept for reuse
+        image_refresh_interval int
+            Optional. Number of seconds the presence of an image is trusted. The cache shared by the process is used
+            if this is not set
 
         Returns
         -------
         samcli.local.docker.manager.ContainerManager
             Object representing Docker container manager
         """
-
-        return ContainerManager(docker_network_id=docker_network, skip_pull_image=skip_pull_image)
+        warm_pool = None
+        if warm_pool_size:
+            warm_pool = WarmContainerPool(max_size=warm_pool_size, idle_ttl=warm_pool_ttl)
+
+        image_cache = None
+        if image_refresh_interval is not None:
+            image_cache = ImageStateCache(refresh_interval=image_refresh_interval)
+
+        return ContainerManager(docker_network_id=docker_network,
+                                skip_pull_image=skip_pull_image,
+                                warm_pool=warm_pool,
+                                image_cache=image_cache,
+                                reaper=ContainerReaper())
@@ -3,6 +3,7 @@ Common CLI options for invoke command
 """
 
 import click
+from samcli.cli.types import ByteSizeType
 from samcli.commands._utils.options import template_click_option, docker_click_options, parameter_override_click_option
 
 try:
@@ -60,7 +61,72 @@ def service_common_options(port):
                          help="Local hostname or IP address to bind to (default: '127.0.0.1')"),
             click.option("--port", "-p",
                          default=port,
-                         help="Local port number to listen on (default: '{}')".format(str(port)))
+                         help="Local port number to listen on (default: '{}')".format(str(port))),
+            click.option("--warm-pool-size",
+                         type=int,
+                         default=0,
+                         help="Maximum number of finished function containers to keep and reuse for later requests "
+                              "with the same configuration. Containers are not reused when set to 0 (default: 0)"),
+            click.option("--warm-pool-ttl",
+                         type=int,
+                         default=300,
+                         help="Number of seconds an unused function container is kept for reuse (default: 300)"),
+            click.option("--persistent-containers",
+                         is_flag=True,
+                         help="Keep function containers running between requests and pass them events through a "
+                              "local Lambda Runtime API, so function initialization only runs once per container. "
+                              "Supported for the python3.7, nodejs10.x and provided runtimes. Idle containers are "
+                              "limited by --warm-pool-size and --warm-pool-ttl"),
+            click.option("--warm-containers",
+                         type=int,
+                         default=0,
+                         help="Prepare every function in the template before accepting requests. Builds the function "
+                              "images and, with --persistent-containers, starts this many containers per function "
+                              "(default: 0)"),
+            click.option("--max-concurrency",
+                         type=int,
+                         default=0,
+                         help="Maximum number of functions running at the same time. Functions are also limited by "
+                              "their ReservedConcurrentExecutions. No global limit when set to 0 (default: 0)"),
+            click.option("--max-queue-size",
+                         type=int,
+                         default=100,
+                         help="Maximum number of requests waiting for a function to be within its concurrency "
+                              "limits. Further requests are throttled with HTTP 429 (default: 100)"),
+            click.option("--queue-timeout",
+                         type=int,
+                         default=30,
+                         help="Number of seconds a request waits for a function to be within its concurrency limits "
+                              "before it is throttled (default: 30)"),
+            click.option("--docker-max-pool-size",
+                         type=int,
+                         default=10,
+                         help="Maximum number of connections kept open to the Docker daemon. Raise it when many "
+                              "functions run at the same time (default: 10)"),
+            click.option("--image-refresh-interval",
+                         type=click.IntRange(min=0),
+                         default=600,
+                         help="Number of seconds the presence of a function image is trusted before Docker is asked "
+                              "again and, unless --skip-pull-image is set, the image is pulled again (default: 600)"),
+            click.option("--server",
+                         type=click.Choice(["werkzeug", "waitress"]),
+                         default="werkzeug",
+                         help="HTTP server to run the service on. Waitress must be installed separately "
+                              "(default: werkzeug)"),
+            click.option("--server-threads",
+                         type=click.IntRange(min=1),
+                         default=16,
+                         help="Number of requests the HTTP server handles at the same time. With werkzeug, idle "
+                              "keep-alive connections occupy a thread too (default: 16)"),
+            click.option("--server-keep-alive",
+                         type=click.IntRange(min=0),
+                         default=5,
+                         help="Number of seconds an idle connection is kept open for its next request. Set to 0 to "
+                              "close connections after every request (default: 5)"),
+            click.option("--server-backlog",
+                         type=click.IntRange(min=1),
+                         default=128,
+                         help="Maximum number of connections waiting to be accepted by the HTTP server (default: 128)")
         ]
 
         # Reverse the list to maintain ordering of options in help text printed with --help
@@ -108,12 +174,22 @@ def invoke_common_options(f):
         click.option('--log-file', '-l',
                      help="logfile to send runtime logs to."),
 
+        click.option('--timings-file',
+                     type=click.Path(dir_okay=False),
+                     help="File to append the timings of every invocation to, as one JSON object per line."),
+
         click.option('--layer-cache-basedir',
                      type=click.Path(exists=False, file_okay=False),
                      envvar="SAM_LAYER_CACHE_BASEDIR",
                      help="Specifies the location basedir where the Layers your template uses will be downloaded to.",
                      default=get_default_layer_cache_dir()),
 
+        click.option('--layer-cache-max-size',
+                     type=ByteSizeType(),
+                     envvar="SAM_LAYER_CACHE_MAX_SIZE",
+                     help="Maximum size of the layer cache, in bytes or with a unit, ex: 10G. Layers used least "
+                          "recently are removed from the cache once it grows beyond this size. No limit by default."),
+
     ] + docker_click_options() + [
 
         click.option('--force-image-build',
@@ -122,6 +198,13 @@ def invoke_common_options(f):
                      envvar='SAM_FORCE_IMAGE_BUILD',
                      default=False),
 
+        click.option('--mount-layers',
+                     is_flag=True,
+                     help='Specify whether CLI should mount the layers of functions into their containers at /opt, '
+                          'instead of building an image for every combination of layers.',
+                     envvar='SAM_MOUNT_LAYERS',
+                     default=False),
+
     ]
 
     # Reverse the list to maintain ordering of options in help text printed with --help
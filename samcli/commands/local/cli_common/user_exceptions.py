@@ -61,6 +61,13 @@ class InvalidLayerVersionArn(UserException):
     pass
 
 
+class LayerChecksumMismatch(UserException):
+    """
+    The content downloaded for a LayerVersion does not match its CodeSha256
+    """
+    pass
+
+
 class UnsupportedIntrinsic(UserException):
     """
     Value from a template has an Intrinsic that is unsupported
@@ -10,7 +10,7 @@ from samcli.commands.local.cli_common.options import invoke_common_options
 from samcli.commands.exceptions import UserException
 from samcli.commands.local.lib.exceptions import InvalidLayerReference
 from samcli.commands.local.cli_common.invoke_context import InvokeContext
-from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.local.lambdafn.exceptions import FunctionNotFound, TooManyRequests
 from samcli.commands.validate.lib.exceptions import InvalidSamDocumentException
 from samcli.commands.local.lib.exceptions import OverridesNotWellDefinedError
 from samcli.local.docker.manager import DockerImagePullFailedException
@@ -48,19 +48,20 @@ STDIN_FILE_NAME = "-"
 @pass_context
 @track_command  # pylint: disable=R0914
 def cli(ctx, function_identifier, template, event, no_event, env_vars, debug_port, debug_args, debugger_path,
-        docker_volume_basedir, docker_network, log_file, layer_cache_basedir, skip_pull_image, force_image_build,
-        parameter_overrides):
+        docker_volume_basedir, docker_network, log_file, timings_file, layer_cache_basedir, layer_cache_max_size,
+        skip_pull_image, force_image_build, mount_layers, parameter_overrides):
 
     # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
 
     do_cli(ctx, function_identifier, template, event, no_event, env_vars, debug_port, debug_args, debugger_path,
-           docker_volume_basedir, docker_network, log_file, layer_cache_basedir, skip_pull_image, force_image_build,
-           parameter_overrides)  # pragma: no cover
+           docker_volume_basedir, docker_network, log_file, timings_file, layer_cache_basedir, layer_cache_max_size,
+           skip_pull_image, force_image_build, mount_layers, parameter_overrides)  # pragma: no cover
 
 
 def do_cli(ctx, function_identifier, template, event, no_event, env_vars, debug_port,  # pylint: disable=R0914
-           debug_args, debugger_path, docker_volume_basedir, docker_network, log_file, layer_cache_basedir,
-           skip_pull_image, force_image_build, parameter_overrides):
+           debug_args, debugger_path, docker_volume_basedir, docker_network, log_file, timings_file,
+           layer_cache_basedir, layer_cache_max_size, skip_pull_image, force_image_build, mount_layers,
+           parameter_overrides):
     """
     Implementation of the ``cli`` method, just separated out for unit testing purposes
     """
@@ -85,13 +86,16 @@ def do_cli(ctx, function_identifier, template, event, no_event, env_vars, debug_
                            docker_volume_basedir=docker_volume_basedir,
                            docker_network=docker_network,
                            log_file=log_file,
+                           timings_file=timings_file,
                            skip_pull_image=skip_pull_image,
                            debug_port=debug_port,
                            debug_args=debug_args,
                            debugger_path=debugger_path,
                            parameter_overrides=parameter_overrides,
                            layer_cache_basedir=layer_cache_basedir,
+                           layer_cache_max_size=layer_cache_max_size,
                            force_image_build=force_image_build,
+                           mount_layers=mount_layers,
                            aws_region=ctx.region,
                            aws_profile=ctx.profile) as context:
 
@@ -106,7 +110,8 @@ def do_cli(ctx, function_identifier, template, event, no_event, env_vars, debug_
     except (InvalidSamDocumentException,
             OverridesNotWellDefinedError,
             InvalidLayerReference,
-            DebuggingNotSupported) as ex:
+            DebuggingNotSupported,
+            TooManyRequests) as ex:
         raise UserException(str(ex))
     except DockerImagePullFailedException as ex:
         raise UserException(str(ex))
@@ -25,6 +25,9 @@ class ApiCollector(object):
         self.binary_media_types_set = set()
         self.stage_name = None
         self.stage_variables = None
+        self.cache_cluster_enabled = False
+        self.cache_cluster_size = None
+        self.method_settings = None
 
     def __iter__(self):
         """
@@ -107,6 +110,9 @@ class ApiCollector(object):
         api.binary_media_types_set = self.binary_media_types_set
         api.stage_name = self.stage_name
         api.stage_variables = self.stage_variables
+        api.cache_cluster_enabled = self.cache_cluster_enabled
+        api.cache_cluster_size = self.cache_cluster_size
+        api.method_settings = self.method_settings
         return api
 
     @staticmethod
@@ -127,12 +133,28 @@ class ApiCollector(object):
             key = "{}-{}".format(route.function_name, route.path)
             config = grouped_routes.get(key, None)
             methods = route.methods
+            cache_key_parameters = route.cache_key_parameters
             if config:
                 methods += config.methods
+                cache_key_parameters = cache_key_parameters + config.cache_key_parameters
             sorted_methods = sorted(methods)
-            grouped_routes[key] = Route(function_name=route.function_name, path=route.path, methods=sorted_methods)
+            grouped_routes[key] = Route(function_name=route.function_name, path=route.path, methods=sorted_methods,
+                                        cache_key_parameters=cache_key_parameters)
         return list(grouped_routes.values())
 
+    def set_stage_cache(self, stage_properties):
+        """
+        Stores the configuration of the cache cluster of the stage
+
+        Parameters
+        ----------
+        stage_properties : dict
+            Properties of the AWS::Serverless::Api or AWS::ApiGateway::Stage resource
+        """
+        self.cache_cluster_enabled = stage_properties.get("CacheClusterEnabled", False)
+        self.cache_cluster_size = stage_properties.get("CacheClusterSize")
+        self.method_settings = stage_properties.get("MethodSettings")
+
     def add_binary_media_types(self, logical_id, binary_media_types):
         """
         Stores the binary media type configuration for the API with given logical ID
@@ -103,3 +103,4 @@ class CfnApiProvider(CfnBaseApiProvider):
 
         collector.stage_name = stage_name
         collector.stage_variables = stage_variables
+        collector.set_stage_cache(properties)
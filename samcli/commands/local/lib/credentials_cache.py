@@ -0,0 +1,104 @@
+"""
+Caches the AWS credentials passed to functions, so they are not resolved again for every invocation
+"""
+
+import time
+import logging
+import threading
+
+LOG = logging.getLogger(__name__)
+
+
+class CredentialsCache(object):
+    """
+    Keeps the credentials returned by a loader until shortly before they expire. Resolving credentials reads the AWS
+    config and credentials files and runs the credential provider chain, which may call STS or the instance metadata
+    service. Doing this once instead of for every invocation takes it off the path of every request.
+
+    Credentials are refreshed in the background ahead of their expiry, callers keep getting the current credentials in
+    the meantime. Only callers that find no credentials, or credentials about to expire, wait for them to be loaded.
+    Credentials that do not expire, like keys of a profile, are refreshed in the background once in a while, so changes
+    to the profile are picked up by a long running command.
+
+    This class is thread safe. Concurrent callers that need to wait for credentials share the same load.
+    """
+
+    # Seconds before expiry at which credentials are refreshed in the background
+    REFRESH_AHEAD = 5 * 60
+
+    # Credentials that expire sooner than this are not handed out anymore. Callers wait for new credentials instead
+    MIN_REMAINING = 60
+
+    # Seconds after which credentials that do not expire are refreshed in the background
+    STATIC_TTL = 15 * 60
+
+    def __init__(self, loader, clock=time.time):
+        """
+        Initialize the cache
+
+        Parameters
+        ----------
+        loader callable
+            Called without arguments to load the credentials. Returns the credentials, and their expiry time in
+            seconds since the epoch, or None if they don't expire. Exceptions raised while refreshing in the
+            background are logged, the current credentials are kept
+        clock callable
+            Optional. Returns the current time in seconds since the epoch
+        """
+        self._loader = loader
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._expires_at = None
+        self._refresh_at = None
+        self._refreshing = False
+
+    def get(self):
+        """
+        Returns the credentials, loading them first if there are none yet or they are about to expire
+
+        :return dict: Copy of the credentials
+        """
+        with self._lock:
+            now = self._clock()
+
+            expiring = self._expires_at is not None and now >= self._expires_at - self.MIN_REMAINING
+
+            if self._credentials is None or expiring:
+                LOG.debug("Loading AWS credentials")
+                self._store(*self._loader())
+
+            elif now >= self._refresh_at and not self._refreshing:
+                LOG.debug("Refreshing AWS credentials in the background")
+                self._refreshing = True
+
+                thread = threading.Thread(target=self._refresh)
+                thread.daemon = True
+                thread.start()
+
+            return dict(self._credentials)
+
+    def _refresh(self):
+        try:
+            credentials, expires_at = self._loader()
+        except Exception:  # pylint: disable=broad-except
+            LOG.debug("Failed to refresh AWS credentials, using the current ones until they expire", exc_info=True)
+            with self._lock:
+                self._refreshing = False
+            return
+
+        with self._lock:
+            self._store(credentials, expires_at)
+            self._refreshing = False
+
+    def _store(self, credentials, expires_at):
+        now = self._clock()
+
+        self._credentials = credentials or {}
+        self._expires_at = expires_at
+
+        if expires_at is None:
+            self._refresh_at = now + self.STATIC_TTL
+        else:
+            self._refresh_at = max(now, expires_at - self.REFRESH_AHEAD)
@@ -22,7 +22,9 @@ class LocalApiService(object):
                  lambda_invoke_context,
                  port,
                  host,
-                 static_dir):
+                 static_dir,
+                 server=None,
+                 coalesce_requests=False):
         """
         Initialize the local API service.
 
@@ -31,11 +33,16 @@ class LocalApiService(object):
         :param int port: Port to listen on
         :param string host: Local hostname or IP address to bind to
         :param string static_dir: Optional, directory from which static files will be mounted
+        :param samcli.local.services.http_servers.WerkzeugServer server: Optional. Server to run the service on.
+            Defaults to Flask's development server
+        :param bool coalesce_requests: Optional. Identical concurrent GET and HEAD requests share one invocation
         """
 
         self.port = port
         self.host = host
         self.static_dir = static_dir
+        self.server = server
+        self.coalesce_requests = coalesce_requests
 
         self.cwd = lambda_invoke_context.get_cwd()
         self.api_provider = ApiProvider(lambda_invoke_context.template,
@@ -43,6 +50,8 @@ class LocalApiService(object):
                                         cwd=self.cwd)
         self.lambda_runner = lambda_invoke_context.local_lambda_runner
         self.stderr_stream = lambda_invoke_context.stderr
+        self.warm_containers = lambda_invoke_context.warm_containers
+        self.async_invocations = lambda_invoke_context.async_invocations
 
     def start(self):
         """
@@ -62,15 +71,35 @@ class LocalApiService(object):
         # contains the response to the API which is sent out as HTTP response. Only stderr needs to be printed
         # to the console or a log file. stderr from Docker container contains runtime logs and output of print
         # statements from the Lambda function
-        service = LocalApigwService(api=self.api_provider.api,
-                                    lambda_runner=self.lambda_runner,
-                                    static_dir=static_dir_path,
-                                    port=self.port,
-                                    host=self.host,
-                                    stderr=self.stderr_stream)
+        if self.async_invocations:
+            if self.coalesce_requests:
+                LOG.warning("Requests are not coalesced when functions are invoked asynchronously")
+
+            # Only importable when the invoke context could create the runtime for asynchronous invocations
+            from samcli.local.apigw.async_apigw_service import AsyncLocalApigwService
+
+            service = AsyncLocalApigwService(api=self.api_provider.api,
+                                             lambda_runner=self.lambda_runner,
+                                             static_dir=static_dir_path,
+                                             port=self.port,
+                                             host=self.host,
+                                             stderr=self.stderr_stream)
+        else:
+            service = LocalApigwService(api=self.api_provider.api,
+                                        lambda_runner=self.lambda_runner,
+                                        static_dir=static_dir_path,
+                                        port=self.port,
+                                        host=self.host,
+                                        stderr=self.stderr_stream,
+                                        server=self.server,
+                                        coalesce_requests=self.coalesce_requests)
 
         service.create()
 
+        if self.warm_containers:
+            # Get the functions ready before accepting any traffic
+            self.lambda_runner.prewarm(self.warm_containers, stderr=self.stderr_stream)
+
         # Print out the list of routes that will be mounted
         self._print_routes(self.api_provider.api.routes, self.host, self.port)
         LOG.info("You can now browse to the above endpoints to invoke your functions. "
@@ -78,7 +107,39 @@ class LocalApiService(object):
                  "changes will be reflected instantly/automatically. You only need to restart "
                  "SAM CLI if you update your AWS SAM template")
 
-        service.run()
+        try:
+            service.run()
+        finally:
+            self._log_cache_stats(service.cache_stats())
+            self._log_coalescing_stats(service.coalescing_stats())
+
+    @staticmethod
+    def _log_cache_stats(stats):
+        """
+        Prints how many requests the emulated stage cache answered, if the stage has a cache cluster
+        """
+        if not stats:
+            return
+
+        LOG.debug("Stage cache statistics: %s", stats)
+        LOG.info("Stage cache: %d hit(s), %d miss(es), %d invalidation(s), %d eviction(s)",
+                 stats["hits"],
+                 stats["misses"],
+                 stats["invalidations"],
+                 stats["evictions"])
+
+    @staticmethod
+    def _log_coalescing_stats(stats):
+        """
+        Prints how many requests shared the invocation of an identical request, if requests were coalesced
+        """
+        if not stats:
+            return
+
+        LOG.debug("Request coalescing statistics: %s", stats)
+        LOG.info("%d request(s) shared the invocation of an identical request, %d invocation(s) were made",
+                 stats["coalesced"],
+                 stats["calls"])
 
     @staticmethod
     def _print_routes(routes, host, port):
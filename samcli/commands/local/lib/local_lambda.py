@@ -3,13 +3,23 @@ Implementation of Local Lambda runner
 """
 
 import os
+import json
+import time
 import logging
+import calendar
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
 
 from samcli.lib.utils.codeuri import resolve_code_path
+from samcli.local.docker.client import track_docker_api_calls
 from samcli.local.lambdafn.env_vars import EnvironmentVariables
 from samcli.local.lambdafn.config import FunctionConfig
 from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.local.lambdafn.timing import track_invoke_timings
+from samcli.commands.local.lib.credentials_cache import CredentialsCache
 from samcli.commands.local.lib.exceptions import OverridesNotWellDefinedError
 
 LOG = logging.getLogger(__name__)
@@ -21,6 +31,7 @@ class LocalLambdaRunner(object):
     of actually running the function on a Docker container.
     """
     MAX_DEBUG_TIMEOUT = 36000  # 10 hours in seconds
+    MAX_PREWARM_WORKERS = 8
 
     def __init__(self,
                  local_runtime,
@@ -29,7 +40,9 @@ class LocalLambdaRunner(object):
                  aws_profile=None,
                  aws_region=None,
                  env_vars_values=None,
-                 debug_context=None):
+                 debug_context=None,
+                 scheduler=None,
+                 timings_callback=None):
         """
         Initializes the class
 
@@ -40,6 +53,10 @@ class LocalLambdaRunner(object):
         :param dict env_vars_values: Optional. Dictionary containing values of environment variables
         :param integer debug_port: Optional. Port to bind the debugger to
         :param string debug_args: Optional. Additional arguments passed to the debugger
+        :param samcli.local.lambdafn.scheduler.InvocationScheduler scheduler: Optional. Limits the number of
+            concurrent invocations. No limits are enforced if not given
+        :param callable timings_callback: Optional. Called with the
+            ``samcli.local.lambdafn.timing.InvokeTimings`` of every invocation once it finished
         """
 
         self.local_runtime = local_runtime
@@ -49,6 +66,15 @@ class LocalLambdaRunner(object):
         self.aws_region = aws_region
         self.env_vars_values = env_vars_values or {}
         self.debug_context = debug_context
+        self.scheduler = scheduler
+        self.timings_callback = timings_callback
+
+        self._aws_creds = CredentialsCache(self._load_aws_creds)
+
+        # Function name => (function, environment variables). The variables of a function are resolved once, every
+        # invocation gets a copy of them
+        self._env_vars = {}
+        self._env_vars_lock = threading.Lock()
 
     def invoke(self, function_name, event, stdout=None, stderr=None):
         """
@@ -72,9 +98,52 @@ class LocalLambdaRunner(object):
         ------
         FunctionNotfound
             When we cannot find a function with the given name
+        TooManyRequests
+            When the invocation was throttled by the scheduler
         """
 
         # Generate the correct configuration based on given inputs
+        function = self._get_function(function_name)
+
+        LOG.info("Invoking %s (%s)", function.handler, function.runtime)
+        config = self._get_invoke_config(function)
+
+        with track_docker_api_calls() as api_calls:
+            try:
+                if not self.scheduler:
+                    self._invoke(function.name, config, event, stdout, stderr)
+                    return
+
+                # Wait for the function to be within its concurrency limits before running it
+                with self.scheduler.slot(function.name):
+                    self._invoke(function.name, config, event, stdout, stderr)
+            finally:
+                LOG.debug("Invocation of %s made %d Docker API call(s) taking %.3f seconds: %s",
+                          function.name, api_calls.calls, api_calls.total_time, api_calls.to_dict()["endpoints"])
+
+    def get_invoke_config(self, function_name):
+        """
+        Returns the configuration to invoke the Lambda function with the given name with, for callers that invoke the
+        runtime themselves
+
+        Parameters
+        ----------
+        function_name str
+            Name of the Lambda function
+
+        Returns
+        -------
+        samcli.local.lambdafn.config.FunctionConfig
+            Function configuration to pass to the Lambda runtime
+
+        Raises
+        ------
+        FunctionNotfound
+            When we cannot find a function with the given name
+        """
+        return self._get_invoke_config(self._get_function(function_name))
+
+    def _get_function(self, function_name):
         function = self.provider.get(function_name)
 
         if not function:
@@ -85,12 +154,86 @@ class LocalLambdaRunner(object):
             raise FunctionNotFound("Unable to find a Function with name '%s'", function_name)
 
         LOG.debug("Found one Lambda function with name '%s'", function_name)
+        return function
 
-        LOG.info("Invoking %s (%s)", function.handler, function.runtime)
-        config = self._get_invoke_config(function)
+    def _invoke(self, function_name, config, event, stdout, stderr):
+        """
+        Invokes the function with the runtime and reports how long each phase of the invocation took
+
+        :param string function_name: Name of the function to invoke
+        :param samcli.local.lambdafn.config.FunctionConfig config: Configuration of the function to invoke
+        :param string event: Event data passed to the function
+        :param samcli.lib.utils.stream_writer.StreamWriter stdout: Stream writer for the output of the function
+        :param samcli.lib.utils.stream_writer.StreamWriter stderr: Stream writer for the Lambda runtime logs
+        """
+        with track_invoke_timings(function_name) as timings:
+            try:
+                self.local_runtime.invoke(config, event, debug_context=self.debug_context, stdout=stdout,
+                                          stderr=stderr)
+            finally:
+                timings.finish()
+                self._report_timings(timings)
+
+    def _report_timings(self, timings):
+        LOG.info(timings.report_line())
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("Invocation timings: %s", json.dumps(timings.to_dict(), sort_keys=True, default=str))
+
+        if self.timings_callback:
+            try:
+                self.timings_callback(timings)
+            except Exception:  # pylint: disable=broad-except
+                LOG.debug("Invocation timings callback failed", exc_info=True)
+
+    def prewarm(self, count=1, stderr=None):
+        """
+        Prepares every function in the template for invocation, in parallel, so the first request to a function does
+        not pay for image builds, layer downloads and container startup. What exactly is prepared depends on the
+        runtime. See ``LambdaRuntime.prewarm``.
+
+        Failures are logged and do not stop the other functions from warming up. The function will be prepared again
+        on its first invocation.
 
-        # Invoke the function
-        self.local_runtime.invoke(config, event, debug_context=self.debug_context, stdout=stdout, stderr=stderr)
+        Parameters
+        ----------
+        count int
+            Number of containers to prepare per function
+        stderr samcli.lib.utils.stream_writer.StreamWriter
+            Stream writer to write the output of the prepared containers to
+
+        Returns
+        -------
+        dict
+            Name of every function that was warmed up successfully mapped to its warmup time in seconds
+        """
+        functions = list(self.provider.get_all())
+        if not functions:
+            return {}
+
+        LOG.info("Warming up %d function(s) with %d container(s) each", len(functions), count)
+        start = time.time()
+
+        with ThreadPoolExecutor(max_workers=min(len(functions), self.MAX_PREWARM_WORKERS)) as executor:
+            futures = [(function.name, executor.submit(self._prewarm_function, function, count, stderr))
+                       for function in functions]
+
+            durations = {}
+            for name, future in futures:
+                try:
+                    durations[name] = future.result()
+                    LOG.info("Function %s is warm (%.2f seconds)", name, durations[name])
+                except Exception as ex:  # pylint: disable=broad-except
+                    LOG.warning("Failed to warm up function %s: %s", name, ex)
+                    LOG.debug("Warmup failure of function %s", name, exc_info=True)
+
+        LOG.info("%d of %d function(s) are warm and ready (%.2f seconds)",
+                 len(durations), len(functions), time.time() - start)
+        return durations
+
+    def _prewarm_function(self, function, count, stderr):
+        start = time.time()
+        self.local_runtime.prewarm(self._get_invoke_config(function), count, stderr=stderr)
+        return time.time() - start
 
     def is_debugging(self):
         """
@@ -155,6 +298,14 @@ class LocalLambdaRunner(object):
         """
 
         name = function.name
+        aws_creds = self.get_aws_creds()
+
+        with self._env_vars_lock:
+            cached_function, env_vars = self._env_vars.get(name, (None, None))
+
+        # The function may have changed if the template was reloaded
+        if env_vars and cached_function == function:
+            return env_vars.copy(aws_creds=aws_creds)
 
         variables = None
         if function.environment and isinstance(function.environment, dict) and "Variables" in function.environment:
@@ -186,41 +337,55 @@ class LocalLambdaRunner(object):
             overrides = self.env_vars_values.get(name, None)
 
         shell_env = os.environ
-        aws_creds = self.get_aws_creds()
 
-        return EnvironmentVariables(function.memory,
-                                    function.timeout,
-                                    function.handler,
-                                    variables=variables,
-                                    shell_env_values=shell_env,
-                                    override_values=overrides,
-                                    aws_creds=aws_creds)
+        env_vars = EnvironmentVariables(function.memory,
+                                        function.timeout,
+                                        function.handler,
+                                        variables=variables,
+                                        shell_env_values=shell_env,
+                                        override_values=overrides,
+                                        aws_creds=aws_creds)
+
+        with self._env_vars_lock:
+            self._env_vars[name] = (function, env_vars)
+
+        return env_vars.copy()
 
     def get_aws_creds(self):
         """
-        Returns AWS credentials obtained from the shell environment or given profile
+        Returns AWS credentials obtained from the shell environment or given profile. Credentials are resolved once
+        and cached until shortly before they expire, see ``CredentialsCache``.
 
         :return dict: A dictionary containing credentials. This dict has the structure
              {"region": "", "key": "", "secret": "", "sessiontoken": ""}. If credentials could not be resolved,
              this returns None
         """
+        return self._aws_creds.get()
+
+    def _load_aws_creds(self):
+        """
+        Resolves AWS credentials from the shell environment or given profile
+
+        :return tuple(dict, float): Credentials in the structure returned by ``get_aws_creds``, and the time they
+            expire at in seconds since the epoch. The time is None if the credentials don't expire
+        """
         result = {}
 
         # to pass command line arguments for region & profile to setup boto3 default session
         LOG.debug("Loading AWS credentials from session with profile '%s'", self.aws_profile)
         # boto3.session.Session is not thread safe. To ensure we do not run into a race condition with start-lambda
-        # or start-api, we create the session object here on every invoke.
+        # or start-api, we create a new session object every time credentials are loaded.
         session = boto3.session.Session(profile_name=self.aws_profile, region_name=self.aws_region)
 
         if not session:
-            return result
+            return result, None
 
         # Load the credentials from profile/environment
         creds = session.get_credentials()
 
         if not creds:
             # If we were unable to load credentials, then just return empty. We will use the default
-            return result
+            return result, None
 
         # After loading credentials, region name might be available here.
         if hasattr(session, 'region_name') and session.region_name:
@@ -236,4 +401,10 @@ class LocalLambdaRunner(object):
         if hasattr(creds, 'token') and creds.token:
             result["sessiontoken"] = creds.token
 
-        return result
+        # Temporary credentials, ex: of an assumed role, are botocore RefreshableCredentials. They don't expose their
+        # expiry publicly
+        expiry = getattr(creds, '_expiry_time', None)
+        if not isinstance(expiry, datetime.datetime):
+            return result, None
+
+        return result, calendar.timegm(expiry.utctimetuple())
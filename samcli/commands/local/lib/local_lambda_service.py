@@ -17,7 +17,8 @@ class LocalLambdaService(object):
     def __init__(self,
                  lambda_invoke_context,
                  port,
-                 host):
+                 host,
+                 server=None):
         """
         Initialize the Local Lambda Invoke service.
 
@@ -25,12 +26,16 @@ class LocalLambdaService(object):
             that can help with Lambda invocation
         :param int port: Port to listen on
         :param string host: Local hostname or IP address to bind to
+        :param samcli.local.services.http_servers.WerkzeugServer server: Optional. Server to run the service on.
+            Defaults to Flask's development server
         """
 
         self.port = port
         self.host = host
+        self.server = server
         self.lambda_runner = lambda_invoke_context.local_lambda_runner
         self.stderr_stream = lambda_invoke_context.stderr
+        self.warm_containers = lambda_invoke_context.warm_containers
 
     def start(self):
         """
@@ -48,10 +53,15 @@ class LocalLambdaService(object):
         service = LocalLambdaInvokeService(lambda_runner=self.lambda_runner,
                                            port=self.port,
                                            host=self.host,
-                                           stderr=self.stderr_stream)
+                                           stderr=self.stderr_stream,
+                                           server=self.server)
 
         service.create()
 
+        if self.warm_containers:
+            # Get the functions ready before accepting any traffic
+            self.lambda_runner.prewarm(self.warm_containers, stderr=self.stderr_stream)
+
         LOG.info("Starting the Local Lambda Service. You can now invoke your Lambda Functions defined in your template"
                  " through the endpoint.")
 
@@ -38,7 +38,11 @@ Function = namedtuple("Function", [
     "rolearn",
 
     # List of Layers
-    "layers"
+    "layers",
+
+    # Maximum number of concurrent executions reserved for the function (ReservedConcurrentExecutions). None, if the
+    # function is only limited by the account-wide concurrency
+    "reserved_concurrency"
 ])
 
 
@@ -218,6 +222,11 @@ class Api(object):
         self.stage_name = None
         self.stage_variables = None
 
+        # Cache cluster of the stage. Responses are only cached for the methods the method settings enable caching for
+        self.cache_cluster_enabled = False
+        self.cache_cluster_size = None
+        self.method_settings = None
+
     def __hash__(self):
         # Other properties are not a part of the hash
         return hash(self.routes) * hash(self.cors) * hash(self.binary_media_types_set)
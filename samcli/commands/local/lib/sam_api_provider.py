@@ -20,6 +20,7 @@ class SamApiProvider(CfnBaseApiProvider):
     _FUNCTION_EVENT = "Events"
     _EVENT_PATH = "Path"
     _EVENT_METHOD = "Method"
+    _EVENT_REQUEST_PARAMETERS = "RequestParameters"
     _EVENT_TYPE = "Type"
     IMPLICIT_API_RESOURCE_ID = "ServerlessRestApi"
 
@@ -80,6 +81,9 @@ class SamApiProvider(CfnBaseApiProvider):
         stage_name = properties.get("StageName")
         stage_variables = properties.get("Variables")
 
+        # Routes of the API may also come from the events of functions, which don't need a Swagger document
+        collector.set_stage_cache(properties)
+
         if not body and not uri:
             # Swagger is not found anywhere.
             LOG.debug("Skipping resource '%s'. Swagger document not found in DefinitionBody and DefinitionUri",
@@ -161,7 +165,33 @@ class SamApiProvider(CfnBaseApiProvider):
                                               "It should either be a LogicalId string or a Ref of a Logical Id string"
                                               .format(lambda_logical_id))
 
-        return api_resource_id, Route(path=path, methods=[method], function_name=lambda_logical_id)
+        cache_key_parameters = SamApiProvider._get_cache_key_parameters(
+            event_properties.get(SamApiProvider._EVENT_REQUEST_PARAMETERS))
+
+        return api_resource_id, Route(path=path, methods=[method], function_name=lambda_logical_id,
+                                      cache_key_parameters=cache_key_parameters)
+
+    @staticmethod
+    def _get_cache_key_parameters(request_parameters):
+        """
+        Gets the request parameters of an Api event that are part of the cache key of the method. Parameters are
+        either names, which are not cached, or dictionaries of a name to its Required and Caching settings, ex:
+        [{"method.request.querystring.id": {"Caching": true}}, "method.request.header.Accept"]
+
+        :param list request_parameters: RequestParameters property of the event
+        :return list(str): Names of the parameters with Caching enabled
+        """
+        cache_key_parameters = []
+
+        for parameter in request_parameters or []:
+            if not isinstance(parameter, dict):
+                continue
+
+            for name, settings in parameter.items():
+                if isinstance(settings, dict) and str(settings.get("Caching", False)).lower() == "true":
+                    cache_key_parameters.append(name)
+
+        return cache_key_parameters
 
     @staticmethod
     def merge_routes(collector):
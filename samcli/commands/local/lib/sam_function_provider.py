@@ -132,7 +132,8 @@ class SamFunctionProvider(FunctionProvider):
             codeuri=codeuri,
             environment=resource_properties.get("Environment"),
             rolearn=resource_properties.get("Role"),
-            layers=layers
+            layers=layers,
+            reserved_concurrency=resource_properties.get("ReservedConcurrentExecutions")
         )
 
     @staticmethod
@@ -189,7 +190,8 @@ class SamFunctionProvider(FunctionProvider):
             codeuri=codeuri,
             environment=resource_properties.get("Environment"),
             rolearn=resource_properties.get("Role"),
-            layers=layers
+            layers=layers,
+            reserved_concurrency=resource_properties.get("ReservedConcurrentExecutions")
         )
 
     @staticmethod
@@ -81,7 +81,9 @@ class SwaggerParser(object):
                 if method.lower() == self._ANY_METHOD_EXTENSION_KEY:
                     # Convert to a more commonly used method notation
                     method = self._ANY_METHOD
-                route = Route(function_name, full_path, methods=[method])
+                # Function integrations are dictionaries
+                cache_key_parameters = method_config[self._INTEGRATION_KEY].get("cacheKeyParameters")
+                route = Route(function_name, full_path, methods=[method], cache_key_parameters=cache_key_parameters)
                 result.append(route)
         return result
 
@@ -14,6 +14,7 @@ from samcli.commands.local.lib.local_api_service import LocalApiService
 from samcli.commands.validate.lib.exceptions import InvalidSamDocumentException
 from samcli.commands.local.lib.exceptions import OverridesNotWellDefinedError
 from samcli.local.docker.lambda_debug_entrypoint import DebuggingNotSupported
+from samcli.local.services.http_servers import create_server, ServerNotAvailable
 from samcli.lib.telemetry.metrics import track_command
 
 
@@ -41,6 +42,17 @@ and point SAM to the directory or file containing build artifacts.
               default="public",
               help="Any static assets (e.g. CSS/Javascript/HTML) files located in this directory "
                    "will be presented at /")
+@click.option("--async-invocations",
+              is_flag=True,
+              help="Serve the API on an asyncio event loop that runs functions through the Docker API without "
+                   "blocking a thread per request. Every invocation gets a container of its own, concurrency limits "
+                   "are not enforced and debugging is not supported. Requires Python 3.6 or newer and the aiohttp and "
+                   "aiodocker packages: pip install aws-sam-cli[async]")
+@click.option("--coalesce-requests",
+              is_flag=True,
+              help="Let concurrent GET and HEAD requests with the same path, query string, body and Accept, "
+                   "Accept-Language, Authorization and Cookie headers share one invocation of the function. Every "
+                   "request gets the response of that invocation.")
 @invoke_common_options
 @cli_framework_options
 @aws_creds_options  # pylint: disable=R0914
@@ -48,21 +60,30 @@ and point SAM to the directory or file containing build artifacts.
 @track_command
 def cli(ctx,
         # start-api Specific Options
-        host, port, static_dir,
+        host, port, warm_pool_size, warm_pool_ttl, persistent_containers, warm_containers,
+        max_concurrency, max_queue_size, queue_timeout, docker_max_pool_size, image_refresh_interval, server,
+        server_threads, server_keep_alive, server_backlog, static_dir, async_invocations, coalesce_requests,
 
         # Common Options for Lambda Invoke
         template, env_vars, debug_port, debug_args, debugger_path, docker_volume_basedir,
-        docker_network, log_file, layer_cache_basedir, skip_pull_image, force_image_build, parameter_overrides):
+        docker_network, log_file, timings_file, layer_cache_basedir, layer_cache_max_size, skip_pull_image,
+        force_image_build, mount_layers, parameter_overrides):
     # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
 
     do_cli(ctx, host, port, static_dir, template, env_vars, debug_port, debug_args, debugger_path,
-           docker_volume_basedir, docker_network, log_file, layer_cache_basedir, skip_pull_image, force_image_build,
-           parameter_overrides)  # pragma: no cover
+           docker_volume_basedir, docker_network, log_file, timings_file, layer_cache_basedir, layer_cache_max_size,
+           skip_pull_image, force_image_build, mount_layers, parameter_overrides, warm_pool_size, warm_pool_ttl,
+           persistent_containers, warm_containers, max_concurrency, max_queue_size, queue_timeout, docker_max_pool_size,
+           image_refresh_interval, server, server_threads, server_keep_alive, server_backlog, async_invocations,
+           coalesce_requests)  # pragma: no cover
 
 
 def do_cli(ctx, host, port, static_dir, template, env_vars, debug_port, debug_args,  # pylint: disable=R0914
-           debugger_path, docker_volume_basedir, docker_network, log_file, layer_cache_basedir, skip_pull_image,
-           force_image_build, parameter_overrides):
+           debugger_path, docker_volume_basedir, docker_network, log_file, timings_file, layer_cache_basedir,
+           layer_cache_max_size, skip_pull_image, force_image_build, mount_layers, parameter_overrides, warm_pool_size,
+           warm_pool_ttl, persistent_containers, warm_containers, max_concurrency, max_queue_size, queue_timeout,
+           docker_max_pool_size, image_refresh_interval, server, server_threads, server_keep_alive, server_backlog,
+           async_invocations, coalesce_requests):
     """
     Implementation of the ``cli`` method, just separated out for unit testing purposes
     """
@@ -73,26 +94,44 @@ def do_cli(ctx, host, port, static_dir, template, env_vars, debug_port, debug_ar
     # Handler exception raised by the processor for invalid args and print errors
 
     try:
+        http_server = create_server(server, threads=server_threads, keep_alive=server_keep_alive,
+                                    backlog=server_backlog)
+
         with InvokeContext(template_file=template,
                            function_identifier=None,  # Don't scope to one particular function
                            env_vars_file=env_vars,
                            docker_volume_basedir=docker_volume_basedir,
                            docker_network=docker_network,
                            log_file=log_file,
+                           timings_file=timings_file,
                            skip_pull_image=skip_pull_image,
                            debug_port=debug_port,
                            debug_args=debug_args,
                            debugger_path=debugger_path,
                            parameter_overrides=parameter_overrides,
                            layer_cache_basedir=layer_cache_basedir,
+                           layer_cache_max_size=layer_cache_max_size,
                            force_image_build=force_image_build,
+                           mount_layers=mount_layers,
                            aws_region=ctx.region,
-                           aws_profile=ctx.profile) as invoke_context:
+                           aws_profile=ctx.profile,
+                           warm_pool_size=warm_pool_size,
+                           warm_pool_ttl=warm_pool_ttl,
+                           persistent_containers=persistent_containers,
+                           warm_containers=warm_containers,
+                           max_concurrency=max_concurrency,
+                           max_queue_size=max_queue_size,
+                           queue_timeout=queue_timeout,
+                           docker_max_pool_size=docker_max_pool_size,
+                           image_refresh_interval=image_refresh_interval,
+                           async_invocations=async_invocations) as invoke_context:
 
             service = LocalApiService(lambda_invoke_context=invoke_context,
                                       port=port,
                                       host=host,
-                                      static_dir=static_dir)
+                                      static_dir=static_dir,
+                                      server=http_server,
+                                      coalesce_requests=coalesce_requests)
             service.start()
 
     except NoApisDefined:
@@ -100,5 +139,6 @@ def do_cli(ctx, host, port, static_dir, template, env_vars, debug_port, debug_ar
     except (InvalidSamDocumentException,
             OverridesNotWellDefinedError,
             InvalidLayerReference,
-            DebuggingNotSupported) as ex:
+            DebuggingNotSupported,
+            ServerNotAvailable) as ex:
         raise UserException(str(ex))
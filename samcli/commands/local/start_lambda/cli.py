@@ -14,6 +14,7 @@ from samcli.commands.local.lib.local_lambda_service import LocalLambdaService
 from samcli.commands.validate.lib.exceptions import InvalidSamDocumentException
 from samcli.commands.local.lib.exceptions import OverridesNotWellDefinedError
 from samcli.local.docker.lambda_debug_entrypoint import DebuggingNotSupported
+from samcli.local.services.http_servers import create_server, ServerNotAvailable
 from samcli.lib.telemetry.metrics import track_command
 
 
@@ -62,22 +63,28 @@ Here is a Python example:
 @track_command
 def cli(ctx,  # pylint: disable=R0914
         # start-lambda Specific Options
-        host, port,
+        host, port, warm_pool_size, warm_pool_ttl, persistent_containers, warm_containers,
+        max_concurrency, max_queue_size, queue_timeout, docker_max_pool_size, image_refresh_interval, server,
+        server_threads, server_keep_alive, server_backlog,
 
         # Common Options for Lambda Invoke
         template, env_vars, debug_port, debug_args, debugger_path, docker_volume_basedir,
-        docker_network, log_file, layer_cache_basedir, skip_pull_image, force_image_build,
-        parameter_overrides):  # pylint: disable=R0914
+        docker_network, log_file, timings_file, layer_cache_basedir, layer_cache_max_size, skip_pull_image,
+        force_image_build, mount_layers, parameter_overrides):  # pylint: disable=R0914
     # All logic must be implemented in the ``do_cli`` method. This helps with easy unit testing
 
     do_cli(ctx, host, port, template, env_vars, debug_port, debug_args, debugger_path, docker_volume_basedir,
-           docker_network, log_file, layer_cache_basedir, skip_pull_image, force_image_build,
-           parameter_overrides)  # pragma: no cover
+           docker_network, log_file, timings_file, layer_cache_basedir, layer_cache_max_size, skip_pull_image,
+           force_image_build, mount_layers, parameter_overrides, warm_pool_size, warm_pool_ttl, persistent_containers,
+           warm_containers, max_concurrency, max_queue_size, queue_timeout, docker_max_pool_size,
+           image_refresh_interval, server, server_threads, server_keep_alive, server_backlog)  # pragma: no cover
 
 
 def do_cli(ctx, host, port, template, env_vars, debug_port, debug_args,  # pylint: disable=R0914
-           debugger_path, docker_volume_basedir, docker_network, log_file, layer_cache_basedir, skip_pull_image,
-           force_image_build, parameter_overrides):
+           debugger_path, docker_volume_basedir, docker_network, log_file, timings_file, layer_cache_basedir,
+           layer_cache_max_size, skip_pull_image, force_image_build, mount_layers, parameter_overrides, warm_pool_size,
+           warm_pool_ttl, persistent_containers, warm_containers, max_concurrency, max_queue_size, queue_timeout,
+           docker_max_pool_size, image_refresh_interval, server, server_threads, server_keep_alive, server_backlog):
     """
     Implementation of the ``cli`` method, just separated out for unit testing purposes
     """
@@ -88,29 +95,46 @@ def do_cli(ctx, host, port, template, env_vars, debug_port, debug_args,  # pylin
     # Handler exception raised by the processor for invalid args and print errors
 
     try:
+        http_server = create_server(server, threads=server_threads, keep_alive=server_keep_alive,
+                                    backlog=server_backlog)
+
         with InvokeContext(template_file=template,
                            function_identifier=None,  # Don't scope to one particular function
                            env_vars_file=env_vars,
                            docker_volume_basedir=docker_volume_basedir,
                            docker_network=docker_network,
                            log_file=log_file,
+                           timings_file=timings_file,
                            skip_pull_image=skip_pull_image,
                            debug_port=debug_port,
                            debug_args=debug_args,
                            debugger_path=debugger_path,
                            parameter_overrides=parameter_overrides,
                            layer_cache_basedir=layer_cache_basedir,
+                           layer_cache_max_size=layer_cache_max_size,
                            force_image_build=force_image_build,
+                           mount_layers=mount_layers,
                            aws_region=ctx.region,
-                           aws_profile=ctx.profile) as invoke_context:
+                           aws_profile=ctx.profile,
+                           warm_pool_size=warm_pool_size,
+                           warm_pool_ttl=warm_pool_ttl,
+                           persistent_containers=persistent_containers,
+                           warm_containers=warm_containers,
+                           max_concurrency=max_concurrency,
+                           max_queue_size=max_queue_size,
+                           queue_timeout=queue_timeout,
+                           docker_max_pool_size=docker_max_pool_size,
+                           image_refresh_interval=image_refresh_interval) as invoke_context:
 
             service = LocalLambdaService(lambda_invoke_context=invoke_context,
                                          port=port,
-                                         host=host)
+                                         host=host,
+                                         server=http_server)
             service.start()
 
     except (InvalidSamDocumentException,
             OverridesNotWellDefinedError,
             InvalidLayerReference,
-            DebuggingNotSupported) as ex:
+            DebuggingNotSupported,
+            ServerNotAvailable) as ex:
         raise UserException(str(ex))
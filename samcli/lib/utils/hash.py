@@ -0,0 +1,111 @@
+"""
+Hashing utilities
+"""
+
+import os
+import hashlib
+
+BLOCK_SIZE = 1024 * 1024
+
+
+def file_checksum(file_name):
+    """
+    Computes the SHA256 digest of the content of a file
+
+    Parameters
+    ----------
+    file_name str
+        Path to the file
+
+    Returns
+    -------
+    str
+        Hex digest of the content of the file
+    """
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(BLOCK_SIZE), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def dir_checksum(directory):
+    """
+    Computes a SHA256 digest of everything in a directory: the relative path, the permission bits and the content of
+    every file, and the target of every symbolic link. Files are visited in a stable order, so the digest only changes
+    when something inside the directory does. Modification times do not contribute, touching a file does not change
+    the digest.
+
+    Parameters
+    ----------
+    directory str
+        Path to the directory. If it is a file, the digest covers just this file
+
+    Returns
+    -------
+    str
+        Hex digest of the directory
+    """
+    sha256 = hashlib.sha256()
+
+    for relative_path, full_path in _walk(directory):
+        sha256.update(relative_path.encode("utf-8"))
+
+        if os.path.islink(full_path):
+            sha256.update(b"link:" + os.readlink(full_path).encode("utf-8"))
+            continue
+
+        mode = os.stat(full_path).st_mode & 0o777
+        sha256.update("{:o}:".format(mode).encode("utf-8"))
+        sha256.update(file_checksum(full_path).encode("utf-8"))
+
+    return sha256.hexdigest()
+
+
+def dir_fingerprint(directory):
+    """
+    Computes a cheap digest of the metadata of everything in a directory: relative path, size, modification time and
+    mode of every file. Unlike ``dir_checksum`` no file is read, so it can be computed often to find out if the content
+    of a directory may have changed.
+
+    Parameters
+    ----------
+    directory str
+        Path to the directory or file
+
+    Returns
+    -------
+    str
+        Hex digest of the metadata
+    """
+    sha256 = hashlib.sha256()
+
+    for relative_path, full_path in _walk(directory):
+        stat = os.lstat(full_path)
+        sha256.update("{}\0{}\0{}\0{}\n".format(relative_path, stat.st_size, stat.st_mtime, stat.st_mode)
+                      .encode("utf-8"))
+
+    return sha256.hexdigest()
+
+
+def _walk(directory):
+    """
+    Yields the path relative to the directory, with forward slashes, and the full path of every file in the directory,
+    sorted by relative path
+    """
+    if not os.path.isdir(directory):
+        yield os.path.basename(directory), directory
+        return
+
+    for root, dirs, files in os.walk(directory):
+        # Walk sub directories in a stable order too
+        dirs.sort()
+
+        # os.walk lists symbolic links to directories with the directories, without following them
+        links = [name for name in dirs if os.path.islink(os.path.join(root, name))]
+
+        for name in sorted(files + links):
+            full_path = os.path.join(root, name)
+            relative_path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+            yield relative_path, full_path
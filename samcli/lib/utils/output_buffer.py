@@ -0,0 +1,78 @@
+"""
+In-memory stream that collects the output of a container without copying it more than once
+"""
+
+
+class OutputBuffer(object):
+    """
+    Replacement for ``io.BytesIO`` to collect the output of a Lambda function. Data written to it is appended to a
+    single ``bytearray``, which grows in place, and ``getvalue`` hands this bytearray out as is. ``io.BytesIO`` on
+    the other hand makes a full copy of its content on every ``getvalue`` call, which adds up for responses that are
+    several megabytes large.
+
+    Writes accept any bytes-like object, including the ``memoryview`` chunks yielded by the Docker attach stream.
+    """
+
+    def __init__(self, initial_size=0):
+        """
+        Initialize the buffer
+
+        Parameters
+        ----------
+        initial_size int
+            Optional. Number of bytes to preallocate. Saves reallocations if the size of the output can be estimated
+        """
+        self._buffer = bytearray(initial_size)
+        self._size = 0
+
+    def write(self, data):
+        """
+        Appends the data to the buffer
+
+        Parameters
+        ----------
+        data bytes-like object
+            Bytes to append
+
+        Returns
+        -------
+        int
+            Number of bytes written
+        """
+        size = len(data)
+        end = self._size + size
+
+        if end <= len(self._buffer):
+            # Still within the preallocated space
+            self._buffer[self._size:end] = data
+        else:
+            if self._size < len(self._buffer):
+                del self._buffer[self._size:]
+            self._buffer += data
+
+        self._size = end
+        return size
+
+    def flush(self):
+        """
+        Nothing to flush, the data is kept in memory. Exists so the buffer can be wrapped in a StreamWriter
+        """
+
+    def getvalue(self):
+        """
+        Returns the content of the buffer. This is the buffer itself, not a copy, so it must not be written to while
+        the returned value is in use.
+
+        Returns
+        -------
+        bytearray
+            Data written to the buffer
+        """
+        if self._size < len(self._buffer):
+            # Give back the preallocated space that was not used
+            del self._buffer[self._size:]
+
+        return self._buffer
+
+    def __len__(self):
+        return self._size
@@ -2,6 +2,8 @@
 This class acts like a wrapper around output streams to provide any flexibility with output we need
 """
 
+import six
+
 
 class StreamWriter(object):
 
@@ -28,6 +30,10 @@ class StreamWriter(object):
         output bytes-like object
             Bytes to write
         """
+        if six.PY2 and isinstance(output, memoryview):
+            # Files and standard streams of Python 2 only accept strings
+            output = output.tobytes()
+
         self._stream.write(output)
 
         if self._auto_flush:
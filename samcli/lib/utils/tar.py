@@ -2,10 +2,22 @@
 Tarball Archive utility
 """
 
+import os
+import stat
+import logging
 import tarfile
 from tempfile import TemporaryFile
 from contextlib import contextmanager
 
+LOG = logging.getLogger(__name__)
+
+# Size of the pieces a streamed tarball is produced in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Modification time of every member of a streamed tarball. Real times would change the tarball, and invalidate the
+# build cache of Docker, every time a file is touched
+NORMALIZED_MTIME = 0
+
 
 @contextmanager
 def create_tarball(tar_paths):
@@ -35,3 +47,146 @@ def create_tarball(tar_paths):
         yield tarballfile
     finally:
         tarballfile.close()
+
+
+def stream_tarball(tar_paths, files=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Generator that produces the tarball of the Docker Context piece by piece, so it can be sent to Docker while it is
+    being created. Nothing is written to disk and at most about ``chunk_size`` bytes of it are held in memory.
+
+    The tarball only depends on the content of the files: members are sorted by path, modification times are reset
+    and ownership is left to the Dockerfile. The same content always produces the same tarball, which keeps the build
+    cache of Docker valid.
+
+    Parameters
+    ----------
+    tar_paths dict(str, str)
+        Key representing a full path to the file or directory and the Value representing the path within the tarball
+    files dict(str, bytes)
+        Optional. Path within the tarball mapped to the content of a file that does not exist on disk, ex: Dockerfile
+    chunk_size int
+        Optional. Approximate size of the pieces to yield
+
+    Yields
+    ------
+    bytes
+        Next piece of the tarball
+    """
+    buffer = bytearray()
+    produced = 0
+
+    for tarinfo, source in _tar_members(tar_paths, files or {}):
+        buffer += tarinfo.tobuf(tarfile.PAX_FORMAT, "utf-8")
+
+        if tarinfo.isreg():
+            for chunk in _read_content(source, tarinfo.size, chunk_size):
+                buffer += chunk
+
+                if len(buffer) >= chunk_size:
+                    produced += len(buffer)
+                    yield bytes(buffer)
+                    del buffer[:]
+
+            remainder = tarinfo.size % tarfile.BLOCKSIZE
+            if remainder:
+                buffer += tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+        if len(buffer) >= chunk_size:
+            produced += len(buffer)
+            yield bytes(buffer)
+            del buffer[:]
+
+    # End of archive marker: two empty blocks. Fill up the last record, like tarfile does
+    buffer += tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+    remainder = (produced + len(buffer)) % tarfile.RECORDSIZE
+    if remainder:
+        buffer += tarfile.NUL * (tarfile.RECORDSIZE - remainder)
+
+    yield bytes(buffer)
+
+
+def _tar_members(tar_paths, files):
+    """
+    Yields a normalized TarInfo for every member of the tarball, in order, with the path of the file on the system or
+    the content of the file to add
+    """
+    roots = [(arcname.lstrip("/"), path, None) for path, arcname in tar_paths.items()]
+    roots += [(arcname.lstrip("/"), None, content) for arcname, content in files.items()]
+
+    for arcname, path, content in sorted(roots, key=lambda root: root[0]):
+        if path is None:
+            tarinfo = _normalized_tarinfo(arcname, 0o644)
+            tarinfo.size = len(content)
+            yield tarinfo, content
+            continue
+
+        for member_path, member_arcname in _walk(path, arcname):
+            tarinfo = _path_tarinfo(member_path, member_arcname)
+            if tarinfo is not None:
+                yield tarinfo, member_path
+
+
+def _walk(path, arcname):
+    """
+    Yields the path and the path within the tarball of a file or directory, and of everything in the directory,
+    sorted by name. Symbolic links are not followed
+    """
+    yield path, arcname
+
+    if os.path.islink(path) or not os.path.isdir(path):
+        return
+
+    for name in sorted(os.listdir(path)):
+        for member in _walk(os.path.join(path, name), arcname + "/" + name):
+            yield member
+
+
+def _path_tarinfo(path, arcname):
+    """
+    :return tarfile.TarInfo: Normalized TarInfo of the file, directory or symbolic link. None for other kinds of
+        files, which can't be part of a Docker Context
+    """
+    stat_result = os.lstat(path)
+    tarinfo = _normalized_tarinfo(arcname, stat.S_IMODE(stat_result.st_mode))
+
+    if stat.S_ISLNK(stat_result.st_mode):
+        tarinfo.type = tarfile.SYMTYPE
+        tarinfo.linkname = os.readlink(path)
+    elif stat.S_ISDIR(stat_result.st_mode):
+        tarinfo.type = tarfile.DIRTYPE
+    elif stat.S_ISREG(stat_result.st_mode):
+        tarinfo.size = stat_result.st_size
+    else:
+        LOG.debug("Skipping %s, it is neither a file, a directory nor a symbolic link", path)
+        return None
+
+    return tarinfo
+
+
+def _normalized_tarinfo(arcname, mode):
+    tarinfo = tarfile.TarInfo(arcname)
+    tarinfo.mode = mode
+    tarinfo.mtime = NORMALIZED_MTIME
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = ""
+    return tarinfo
+
+
+def _read_content(source, size, chunk_size):
+    """
+    Yields the content of a file in pieces. ``source`` is the path of the file or its content
+    """
+    if isinstance(source, bytes):
+        yield source
+        return
+
+    remaining = size
+    with open(source, "rb") as file_handle:
+        while remaining:
+            chunk = file_handle.read(min(chunk_size, remaining))
+            if not chunk:
+                # The header already promised ``size`` bytes
+                raise IOError("{} changed while it was added to the tarball".format(source))
+
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,239 @@
+"""API Gateway Local Service running on an asyncio event loop. Requires Python 3.6+ and aiohttp"""
+import io
+import asyncio
+import logging
+from urllib.parse import unquote_to_bytes
+
+from aiohttp import web
+from flask import Flask
+from multidict import CIMultiDict
+from werkzeug.exceptions import NotFound
+from werkzeug.wrappers import Request
+
+from samcli.local.services.base_local_service import LambdaOutputParser
+from samcli.lib.utils.output_buffer import OutputBuffer
+from samcli.local.lambdafn.exceptions import FunctionNotFound
+from .local_apigw_service import LocalApigwService
+from .service_error_responses import ServiceErrorResponses
+from .route_trie import RouteTrie
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncLocalApigwService(LocalApigwService):
+    """
+    Serves the API like ``LocalApigwService`` does, on an aiohttp server instead of Flask. Requests are handled as
+    co-routines of a single event loop and functions are invoked through ``AsyncLambdaRuntime.invoke_async``, so
+    pending requests don't hold a thread each while their function runs.
+
+    Requests are routed, and turned into events and responses, by the methods of ``LocalApigwService``, so both
+    services answer requests the same way.
+    """
+
+    def __init__(self, api, lambda_runner, static_dir=None, port=None, host=None, stderr=None):
+        """
+        Creates the service
+
+        Parameters
+        ----------
+        api: Api
+           an Api object that contains the list of routes and properties
+        lambda_runner samcli.commands.local.lib.local_lambda.LocalLambdaRunner
+            The Lambda runner with the function configurations. Its runtime must be a
+            ``samcli.local.lambdafn.async_runtime.AsyncLambdaRuntime``
+        static_dir str
+            Directory from which to serve static files
+        port int
+            Optional. port for the service to start listening on
+            Defaults to 3000
+        host str
+            Optional. host to start the service on
+            Defaults to '127.0.0.1
+        stderr samcli.lib.utils.stream_writer.StreamWriter
+            Optional stream writer where the stderr from Docker container should be written to
+        """
+        super(AsyncLocalApigwService, self).__init__(api,
+                                                     lambda_runner,
+                                                     static_dir=static_dir,
+                                                     port=port,
+                                                     host=host,
+                                                     stderr=stderr)
+
+        # Error responses are built with Flask helpers, which need an application context
+        self._error_app = Flask(__name__)
+
+    def create(self):
+        """
+        Creates the aiohttp application that can be started
+        """
+        self._route_trie = RouteTrie(self.api.routes)
+
+        self._app = web.Application()
+        self._app.router.add_route("*", "/{path:.*}", self._request_handler)
+        self._app.on_cleanup.append(self._close_runtime)
+
+    def run(self):
+        """
+        Serves the application until the process is interrupted.
+        Note: This is a **blocking call**
+
+        Raises
+        ------
+        RuntimeError
+            if the service was not created
+        """
+        if not self._app:
+            raise RuntimeError("The application must be created before running")
+
+        LOG.debug("Localhost server is starting up on an asyncio event loop")
+        web.run_app(self._app, host=self.host, port=self.port, print=None)
+
+    async def _request_handler(self, http_request):  # pylint: disable=arguments-differ
+        """
+        Handles every request to the host:port. Errors Flask would answer with a HTTP 500 are answered the same way
+        as ``LocalApigwService`` does.
+
+        Parameters
+        ----------
+        http_request aiohttp.web.Request
+            Request to handle
+
+        Returns
+        -------
+        aiohttp.web.Response
+        """
+        try:
+            return await self._handle(http_request)
+        except Exception:  # pylint: disable=broad-except
+            LOG.error("Exception on %s [%s]", http_request.path, http_request.method, exc_info=True)
+            return self._error_response(ServiceErrorResponses.lambda_failure_response)
+
+    async def _handle(self, http_request):
+        body = await http_request.read()
+        request = _RoutedRequest(self._make_environ(http_request, body))
+
+        file_path = self._get_static_file(request.method, request.path)
+        if file_path:
+            return web.FileResponse(file_path)
+
+        try:
+            route = self._get_current_route(request)
+        except NotFound:
+            # Both a missing path and a method that is not allowed
+            return self._error_response(ServiceErrorResponses.route_not_found)
+
+        cache_key, cache_ttl = self._get_cache_key(route, request)
+        cached_response = self._get_cached_response(cache_key, request)
+        if cached_response:
+            return self._to_http_response(self.service_response(*cached_response))
+
+        try:
+            event = self._construct_event(request, self.port, self.api.binary_media_types, self.api.stage_name,
+                                          self.api.stage_variables)
+        except UnicodeDecodeError:
+            return self._error_response(ServiceErrorResponses.lambda_failure_response)
+
+        stdout_stream = OutputBuffer()
+        loop = asyncio.get_event_loop()
+
+        try:
+            # Resolving the configuration may load credentials. Keep it off the event loop
+            config = await loop.run_in_executor(None, self.lambda_runner.get_invoke_config, route.function_name)
+        except FunctionNotFound:
+            return self._error_response(ServiceErrorResponses.lambda_not_found_response)
+
+        await self.lambda_runner.local_runtime.invoke_async(config, event, stdout=stdout_stream, stderr=self.stderr)
+
+        lambda_response, lambda_logs, _ = LambdaOutputParser.get_lambda_output(stdout_stream)
+
+        if self.stderr and lambda_logs:
+            # Write the logs to stderr if available.
+            self.stderr.write(lambda_logs)
+
+        try:
+            (status_code, headers, body) = self._parse_lambda_output(lambda_response,
+                                                                     self.api.binary_media_types,
+                                                                     request)
+        except (KeyError, TypeError, ValueError):
+            LOG.error("Function returned an invalid response (must include one of: body, headers, multiValueHeaders or "
+                      "statusCode in the response object). Response received: %s", lambda_response)
+            return self._error_response(ServiceErrorResponses.lambda_failure_response)
+
+        self._cache_response(cache_key, cache_ttl, body, headers, status_code)
+
+        return self._to_http_response(self.service_response(body, headers, status_code))
+
+    def _make_environ(self, http_request, body):
+        """
+        Builds the WSGI environment a WSGI server would pass to Flask for this request
+
+        :param aiohttp.web.Request http_request: Request
+        :param bytes body: Body of the request
+        :return dict: WSGI environment
+        """
+        environ = {
+            "REQUEST_METHOD": http_request.method,
+            "SCRIPT_NAME": "",
+            # WSGI strings carry the raw bytes of the request, decoded as latin-1
+            "PATH_INFO": unquote_to_bytes(http_request.rel_url.raw_path).decode("latin-1"),
+            "QUERY_STRING": http_request.rel_url.raw_query_string,
+            "CONTENT_LENGTH": str(len(body)),
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": "HTTP/{}.{}".format(*http_request.version),
+            "REMOTE_ADDR": http_request.remote or "",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": http_request.scheme,
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": io.StringIO(),
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+
+        for name, value in http_request.headers.items():
+            key = name.upper().replace("-", "_")
+            if key == "CONTENT_LENGTH":
+                continue
+
+            if key != "CONTENT_TYPE":
+                key = "HTTP_" + key
+
+            # aiohttp decodes headers as UTF-8
+            value = value.encode("utf-8", "surrogateescape").decode("latin-1")
+
+            # Repeated headers are joined, like Werkzeug's server does
+            environ[key] = "{},{}".format(environ[key], value) if key in environ else value
+
+        return environ
+
+    def _error_response(self, make_response):
+        """
+        :param callable make_response: One of the methods of ``ServiceErrorResponses``
+        :return aiohttp.web.Response: The error response
+        """
+        with self._error_app.app_context():
+            return self._to_http_response(make_response())
+
+    @staticmethod
+    def _to_http_response(response):
+        """
+        Converts a Flask response to an aiohttp response. aiohttp computes the length of the body itself.
+
+        :param flask.Response response: Response to convert
+        :return aiohttp.web.Response: Converted response
+        """
+        headers = CIMultiDict((name, value) for name, value in response.headers.items()
+                              if name.lower() != "content-length")
+        return web.Response(status=response.status_code, headers=headers, body=response.get_data())
+
+    async def _close_runtime(self, app):  # pylint: disable=unused-argument
+        await self.lambda_runner.local_runtime.close()
+
+
+class _RoutedRequest(Request):
+    """
+    Request with the path and path parameters of the route it matched, like ``RoutedRequest`` has
+    """
+    endpoint = None
+    view_args = None
@@ -1,18 +1,23 @@
 """API Gateway Local Service"""
-import io
+import os
 import json
 import logging
 import base64
 
-from flask import Flask, request
+from flask import Flask, Request, request, send_file
 from werkzeug.datastructures import Headers
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
 
 from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputParser
 from samcli.lib.utils.stream_writer import StreamWriter
-from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.lib.utils.output_buffer import OutputBuffer
+from samcli.local.lambdafn.exceptions import FunctionNotFound, TooManyRequests
 from samcli.local.events.api_event import ContextIdentity, RequestContext, ApiGatewayLambdaEvent
 from .service_error_responses import ServiceErrorResponses
-from .path_converter import PathConverter
+from .request_coalescer import RequestCoalescer
+from .route_trie import RouteTrie
+from .stage_cache import StageCache
 
 LOG = logging.getLogger(__name__)
 
@@ -26,17 +31,20 @@ class Route(object):
                          "OPTIONS",
                          "PATCH"]
 
-    def __init__(self, function_name, path, methods):
+    def __init__(self, function_name, path, methods, cache_key_parameters=None):
         """
         Creates an ApiGatewayRoute
 
         :param list(str) methods: http method
         :param function_name: Name of the Lambda function this API is connected to
         :param str path: Path off the base url
+        :param list(str) cache_key_parameters: Optional. Request parameters the responses of the route are cached by,
+            ex: method.request.querystring.id
         """
         self.methods = self.normalize_method(methods)
         self.function_name = function_name
         self.path = path
+        self.cache_key_parameters = sorted(set(cache_key_parameters or []))
 
     def __eq__(self, other):
         return isinstance(other, Route) and \
@@ -67,7 +75,20 @@ class LocalApigwService(BaseLocalService):
     _DEFAULT_PORT = 3000
     _DEFAULT_HOST = '127.0.0.1'
 
-    def __init__(self, api, lambda_runner, static_dir=None, port=None, host=None, stderr=None):
+    # Sources of the request parameters that can be part of cache keys. Path parameters always are, through the path
+    _QUERY_STRING_PARAMETERS = ("method.request.querystring.", "method.request.multivaluequerystring.")
+    _HEADER_PARAMETERS = ("method.request.header.", "method.request.multivalueheader.")
+
+    # Every request is routed by the route trie of the service, through the Flask URL rules of this endpoint
+    _ROUTING_ENDPOINT = "api"
+    _STATIC_FILE_METHODS = ["GET", "HEAD"]
+
+    # Requests that can share an invocation, and the headers that must be identical for them to share it
+    _COALESCED_METHODS = ("GET", "HEAD")
+    _DEFAULT_COALESCING_HEADERS = ("Accept", "Accept-Language", "Authorization", "Cookie")
+
+    def __init__(self, api, lambda_runner, static_dir=None, port=None, host=None, stderr=None, server=None,
+                 coalesce_requests=False, coalescing_headers=None):
         """
         Creates an ApiGatewayService
 
@@ -87,52 +108,63 @@ class LocalApigwService(BaseLocalService):
             Defaults to '127.0.0.1
         stderr samcli.lib.utils.stream_writer.StreamWriter
             Optional stream writer where the stderr from Docker container should be written to
+        server samcli.local.services.http_servers.WerkzeugServer
+            Optional. Server to run the service on. Defaults to Flask's development server
+        coalesce_requests bool
+            Optional. Concurrent GET and HEAD requests with the same path, query string, body and coalescing headers
+            share one invocation of the function. Defaults to False
+        coalescing_headers list(str)
+            Optional. Headers that must be identical for requests to share an invocation. Defaults to Accept,
+            Accept-Language, Authorization and Cookie
         """
-        super(LocalApigwService, self).__init__(lambda_runner.is_debugging(), port=port, host=host)
+        super(LocalApigwService, self).__init__(lambda_runner.is_debugging(), port=port, host=host, server=server)
         self.api = api
         self.lambda_runner = lambda_runner
         self.static_dir = static_dir
-        self._dict_of_routes = {}
+        self._route_trie = RouteTrie([])
         self.stderr = stderr
+        self._stage_cache = StageCache.from_api(api)
+        self._coalescer = RequestCoalescer() if coalesce_requests else None
+        self._coalescing_headers = tuple(coalescing_headers or self._DEFAULT_COALESCING_HEADERS)
 
     def create(self):
         """
         Creates a Flask Application that can be started.
+
+        Flask passes every request to the request handler, which routes it with a trie compiled from the routes of the
+        API. Static files are served from the root '/' of the static directory.
         """
 
-        self._app = Flask(__name__,
-                          static_url_path="",  # Mount static files at root '/'
-                          static_folder=self.static_dir  # Serve static files from this directory
-                          )
+        self._app = Flask(__name__, static_folder=None)
+        self._app.request_class = RoutedRequest
+
+        self._route_trie = RouteTrie(self.api.routes)
 
-        for api_gateway_route in self.api.routes:
-            path = PathConverter.convert_path_to_flask(api_gateway_route.path)
-            for route_key in self._generate_route_keys(api_gateway_route.methods,
-                                                       path):
-                self._dict_of_routes[route_key] = api_gateway_route
-            self._app.add_url_rule(path,
-                                   endpoint=path,
+        methods = set(method for api_gateway_route in self.api.routes for method in api_gateway_route.methods)
+        if self.static_dir:
+            methods.update(self._STATIC_FILE_METHODS)
+            self._app.before_request(self._serve_static_file)
+
+        for rule in ("/", "/<path:path>"):
+            self._app.add_url_rule(rule,
+                                   endpoint=self._ROUTING_ENDPOINT,
                                    view_func=self._request_handler,
-                                   methods=api_gateway_route.methods,
+                                   methods=sorted(methods),
                                    provide_automatic_options=False)
 
         self._construct_error_handling()
 
-    def _generate_route_keys(self, methods, path):
+    def cache_stats(self):
         """
-        Generates the key to the _dict_of_routes based on the list of methods
-        and path supplied
-
-        :param list(str) methods: List of HTTP Methods
-        :param str path: Path off the base url
-        :return: str of Path:Method
+        :return dict: Statistics of the emulated stage cache, or None if the stage has no cache cluster
         """
-        for method in methods:
-            yield self._route_key(method, path)
+        return self._stage_cache.stats() if self._stage_cache else None
 
-    @staticmethod
-    def _route_key(method, path):
-        return '{}:{}'.format(path, method)
+    def coalescing_stats(self):
+        """
+        :return dict: Statistics of request coalescing, or None if requests are not coalesced
+        """
+        return self._coalescer.stats() if self._coalescer else None
 
     def _construct_error_handling(self):
         """
@@ -151,9 +183,11 @@ class LocalApigwService(BaseLocalService):
 
         * Fetch request from the Flask Global state. This is where Flask places the request and is per thread so
           multiple requests are still handled correctly
-        * Find the Lambda function to invoke by doing a look up based on the request.endpoint and method
-        * If we don't find the function, we will throw a 502 (just like the 404 and 405 responses we get
-          from Flask.
+        * Find the Lambda function to invoke by matching the path and method of the request with the routes
+        * If no route matches, we answer like API Gateway does (just like the 404 and 405 responses we get
+          from Flask)
+        * If the stage caches responses of the route, we answer with the cached response if there is one
+        * If requests are coalesced and an identical request is in progress, we wait for its response instead
         * Since we found a Lambda function to invoke, we construct the Lambda Event from the request
         * Then Invoke the Lambda function (docker container)
         * We then transform the response or errors we get from the Invoke and return the data back to
@@ -162,7 +196,8 @@ class LocalApigwService(BaseLocalService):
         Parameters
         ----------
         kwargs dict
-            Keyword Args that are passed to the function from Flask. This happens when we have path parameters
+            Keyword Args that are passed to the function from Flask. The path parameters of the route are in the
+            view_args of the request instead
 
         Returns
         -------
@@ -170,19 +205,44 @@ class LocalApigwService(BaseLocalService):
         """
         route = self._get_current_route(request)
 
+        cache_key, cache_ttl = self._get_cache_key(route, request)
+        cached_response = self._get_cached_response(cache_key, request)
+        if cached_response:
+            return self.service_response(*cached_response)
+
+        coalescing_key = self._get_coalescing_key(request)
+        if coalescing_key is None:
+            return self._invoke_route(route, cache_key, cache_ttl)
+
+        # Every request gets a response of its own, made from the response to the request that invoked the function
+        body, headers, status_code = self._coalescer.run(
+            coalescing_key, lambda: self._freeze_response(self._invoke_route(route, cache_key, cache_ttl)))
+        return self.service_response(body, Headers(headers), status_code)
+
+    def _invoke_route(self, route, cache_key, cache_ttl):
+        """
+        Invokes the function of the route with the current request, and turns its output into the response
+
+        :param Route route: Route of the request
+        :param tuple cache_key: Key to cache the response under, None if it is not cached
+        :param int cache_ttl: Seconds to cache the response
+        :return: Response object
+        """
         try:
             event = self._construct_event(request, self.port, self.api.binary_media_types, self.api.stage_name,
                                           self.api.stage_variables)
         except UnicodeDecodeError:
             return ServiceErrorResponses.lambda_failure_response()
 
-        stdout_stream = io.BytesIO()
+        stdout_stream = OutputBuffer()
         stdout_stream_writer = StreamWriter(stdout_stream, self.is_debugging)
 
         try:
             self.lambda_runner.invoke(route.function_name, event, stdout=stdout_stream_writer, stderr=self.stderr)
         except FunctionNotFound:
             return ServiceErrorResponses.lambda_not_found_response()
+        except TooManyRequests:
+            return ServiceErrorResponses.too_many_requests()
 
         lambda_response, lambda_logs, _ = LambdaOutputParser.get_lambda_output(stdout_stream)
 
@@ -199,28 +259,149 @@ class LocalApigwService(BaseLocalService):
                       "statusCode in the response object). Response received: %s", lambda_response)
             return ServiceErrorResponses.lambda_failure_response()
 
+        self._cache_response(cache_key, cache_ttl, body, headers, status_code)
+
         return self.service_response(body, headers, status_code)
 
-    def _get_current_route(self, flask_request):
+    def _get_coalescing_key(self, flask_request):
         """
-        Get the route (Route) based on the current request
+        Gets the key that identical requests share an invocation under. Only GET and HEAD requests are coalesced.
 
         :param request flask_request: Flask Request
-        :return: Route matching the endpoint and method of the request
+        :return tuple: Key of the request, None if the request is not coalesced
         """
-        endpoint = flask_request.endpoint
-        method = flask_request.method
+        if not self._coalescer or flask_request.method not in self._COALESCED_METHODS:
+            return None
+
+        headers = tuple((name, tuple(flask_request.headers.getlist(name))) for name in self._coalescing_headers)
+
+        return (flask_request.method,
+                flask_request.path,
+                flask_request.query_string,
+                headers,
+                flask_request.get_data())
+
+    @staticmethod
+    def _freeze_response(response):
+        """
+        :param flask.Response response: Response to share with other requests
+        :return tuple: Body, headers and status code of the response
+        """
+        return response.get_data(), Headers(response.headers), response.status_code
+
+    def _get_cache_key(self, route, flask_request):
+        """
+        Gets the key the stage cache stores the response to the request under. Like API Gateway, responses are cached
+        by method, path and the values of the cache key parameters of the route.
+
+        :param Route route: Route of the request
+        :param request flask_request: Flask Request
+        :return tuple: Key and TTL of the response. (None, 0) if the response is not cached
+        """
+        if not self._stage_cache:
+            return None, 0
+
+        ttl = self._stage_cache.ttl_for(flask_request.method, route.path)
+        if not ttl:
+            return None, 0
+
+        parameters = []
+        for parameter in route.cache_key_parameters:
+            if parameter.startswith(self._QUERY_STRING_PARAMETERS):
+                values = flask_request.args.getlist(parameter.split(".", 3)[3])
+            elif parameter.startswith(self._HEADER_PARAMETERS):
+                values = flask_request.headers.getlist(parameter.split(".", 3)[3])
+            else:
+                continue
+            parameters.append((parameter, values))
+
+        return StageCache.make_key(flask_request.method, flask_request.path, parameters), ttl
+
+    def _get_cached_response(self, cache_key, flask_request):
+        """
+        Gets the cached response to the request. Requests with "Cache-Control: max-age=0" invalidate it instead.
+
+        :param tuple cache_key: Key of the response, None if it is not cached
+        :param request flask_request: Flask Request
+        :return tuple: Body, headers and status code of the cached response. None if there is none
+        """
+        if cache_key is None:
+            return None
+
+        if flask_request.cache_control.max_age == 0:
+            self._stage_cache.invalidate(cache_key)
+            return None
+
+        cached_response = self._stage_cache.get(cache_key)
+        if not cached_response:
+            return None
 
-        route_key = self._route_key(method, endpoint)
-        route = self._dict_of_routes.get(route_key, None)
+        body, headers, status_code = cached_response
+        # Responses own their headers
+        return body, Headers(headers), status_code
 
-        if not route:
-            LOG.debug("Lambda function for the route not found. This should not happen because Flask is "
-                      "already configured to serve all path/methods given to the service. "
-                      "Path=%s Method=%s RouteKey=%s", endpoint, method, route_key)
-            raise KeyError("Lambda function for the route not found")
+    def _cache_response(self, cache_key, cache_ttl, body, headers, status_code):
+        """
+        Stores successful responses in the stage cache, like API Gateway does
+        """
+        if cache_key is None or not 200 <= status_code < 300:
+            return
+
+        size = len(body) + sum(len(name) + len(value) for name, value in headers.items())
+        self._stage_cache.put(cache_key, (body, Headers(headers), status_code), cache_ttl, size)
+
+    def _get_current_route(self, flask_request):
+        """
+        Get the route (Route) based on the current request. The endpoint and view_args of the request are set to the
+        path and path parameters of the route.
+
+        :param RoutedRequest flask_request: Flask Request
+        :return: Route matching the path and method of the request
+        :raises werkzeug.exceptions.NotFound: If no route matches the request
+        """
+        match = self._route_trie.match(flask_request.method, flask_request.path)
 
-        return route
+        if not match:
+            LOG.debug("No route matches the request. Path=%s Method=%s", flask_request.path, flask_request.method)
+            raise NotFound()
+
+        flask_request.endpoint = match.route.path
+        flask_request.view_args = match.path_parameters
+        return match.route
+
+    def _serve_static_file(self):
+        """
+        Answers requests for files of the static directory with the file, before they are routed
+
+        :return: Response with the file, or None if the request is not for a static file
+        """
+        file_path = self._get_static_file(request.method, request.path)
+        if not file_path:
+            return None
+
+        return send_file(file_path, conditional=True)
+
+    def _get_static_file(self, method, path):
+        """
+        Gets the file of the static directory at the path. Like static path segments of routes do, files take
+        precedence over greedy path parameters, but not over other routes.
+
+        :param string method: HTTP method of the request
+        :param string path: Path of the request
+        :return string: Path of the file, or None if the request is not for a static file
+        """
+        if not self.static_dir or method not in self._STATIC_FILE_METHODS:
+            return None
+
+        file_path = safe_join(self.static_dir, path.lstrip("/"))
+        if not file_path or not os.path.isfile(file_path):
+            return None
+
+        match = self._route_trie.match(method, path)
+        if match and not match.greedy:
+            return None
+
+        return file_path
 
     # Consider moving this out to its own class. Logic is started to get dense and looks messy @jfuss
     @staticmethod
@@ -362,7 +543,7 @@ class LocalApigwService(BaseLocalService):
 
         identity = ContextIdentity(source_ip=flask_request.remote_addr)
 
-        endpoint = PathConverter.convert_path_to_api_gateway(flask_request.endpoint)
+        endpoint = flask_request.endpoint
         method = flask_request.method
 
         request_data = flask_request.get_data()
@@ -491,3 +672,11 @@ class LocalApigwService(BaseLocalService):
 
         """
         return request_mimetype in binary_types or "*/*" in binary_types
+
+
+class RoutedRequest(Request):
+    """
+    Flask request routed by the service rather than by Flask's URL rules. The endpoint is the path of the route that
+    matched the request, and the view_args are its path parameters.
+    """
+    endpoint = None
@@ -0,0 +1,93 @@
+"""
+Lets identical concurrent requests share one Lambda invocation
+"""
+
+import logging
+import threading
+
+LOG = logging.getLogger(__name__)
+
+
+class RequestCoalescer(object):
+    """
+    Runs a function once for all the callers that call it with the same key at the same time ("single flight"). The
+    first caller runs the function, callers that arrive while it runs wait for it and get its result, or its exception.
+    Callers that arrive after it completed run the function again: results are never reused.
+
+    This class is thread safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        # Key => call in progress
+        self._calls = {}
+        self._stats = {"calls": 0, "coalesced": 0, "max_waiting": 0}
+
+    def run(self, key, func):
+        """
+        Runs the function, unless a call with the same key is in progress, in which case its result is returned
+
+        :param key: Hashable key of the call
+        :param callable func: Function to call without arguments
+        :return: Result of the function
+        :raises Exception: Exception the function raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+                is_leader = True
+            else:
+                call.waiting += 1
+                self._stats["coalesced"] += 1
+                self._stats["max_waiting"] = max(self._stats["max_waiting"], call.waiting)
+                is_leader = False
+
+        if not is_leader:
+            LOG.debug("Waiting for the identical request in progress")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error  # pylint: disable=raising-bad-type
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as ex:  # pylint: disable=broad-except
+            call.error = ex
+            raise
+        finally:
+            # Callers that arrive from now on run the function again
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self):
+        """
+        :return dict: Statistics of the coalescer: number of calls that ran the function, number of calls that waited
+            for another call instead, the largest number of calls that waited for a single call, and the share of
+            calls that were coalesced. The rate is None until the coalescer was used
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        total = stats["calls"] + stats["coalesced"]
+        stats["coalesced_rate"] = round(float(stats["coalesced"]) / total, 4) if total else None
+        return stats
+
+
+class _Call(object):
+    """
+    Call in progress
+    """
+
+    __slots__ = ("done", "result", "error", "waiting")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiting = 0
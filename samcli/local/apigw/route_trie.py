@@ -0,0 +1,148 @@
+"""
+Matches request paths to the routes of an API
+"""
+
+from collections import namedtuple
+
+# Route that matched a request, with the values of its path parameters. greedy is True if a greedy path
+# parameter, ex: {proxy+}, matched part of the path
+RouteMatch = namedtuple("RouteMatch", ["route", "path_parameters", "greedy"])
+
+
+class RouteTrie(object):
+    """
+    Routes requests the way API Gateway does. Routes are compiled into a trie of path segments once, so matching a
+    request walks the segments of its path instead of trying every route: the cost of matching grows with the depth
+    of the path, not with the number of routes.
+
+    At every segment of the path, a static segment takes precedence over a path parameter, which takes precedence
+    over a greedy path parameter, ex: for /users/me, /users/me wins over /users/{id}, which wins over /{proxy+}. If the
+    most specific route for the path does not accept the method of the request, less specific routes are tried.
+    """
+
+    def __init__(self, routes):
+        """
+        Compiles the routes
+
+        :param list(samcli.local.apigw.local_apigw_service.Route) routes: Routes of the API
+        """
+        self._root = _Node()
+
+        for route in routes:
+            self._add(route)
+
+    def match(self, method, path):
+        """
+        Finds the route of a request
+
+        :param string method: HTTP method of the request
+        :param string path: URL decoded path of the request, ex: /users/123
+        :return RouteMatch: The matching route, or None if no route matches the method and path
+        """
+        return self._match(self._root, _split(path), 0, method)
+
+    def _add(self, route):
+        node = self._root
+        parameters = []
+        greedy_parameter = None
+
+        for index, segment in enumerate(_split(route.path)):
+            if segment.startswith("{") and segment.endswith("+}"):
+                # Greedy parameters are the last segment of a path
+                greedy_parameter = (index, segment[1:-2])
+                node = node.greedy_child()
+                break
+
+            if segment.startswith("{") and segment.endswith("}"):
+                parameters.append((index, segment[1:-1]))
+                node = node.parameter_child()
+            else:
+                node = node.static_child(segment)
+
+        endpoint = (route, tuple(parameters), greedy_parameter)
+        for method in route.methods:
+            # The last route of a path and method wins
+            node.endpoints[method] = endpoint
+
+    def _match(self, node, segments, index, method):
+        """
+        Matches the segments of the path from the given index on with the subtree of the node. Recursion depth is
+        bounded by the number of segments of the path.
+        """
+        if index == len(segments):
+            endpoint = node.endpoints.get(method)
+            return self._make_match(endpoint, segments) if endpoint else None
+
+        segment = segments[index]
+
+        static = node.static.get(segment)
+        if static is not None:
+            result = self._match(static, segments, index + 1, method)
+            if result:
+                return result
+
+        # Path parameters never match an empty segment
+        if not segment:
+            return None
+
+        if node.parameter is not None:
+            result = self._match(node.parameter, segments, index + 1, method)
+            if result:
+                return result
+
+        if node.greedy is not None:
+            endpoint = node.greedy.endpoints.get(method)
+            if endpoint:
+                return self._make_match(endpoint, segments)
+
+        return None
+
+    @staticmethod
+    def _make_match(endpoint, segments):
+        route, parameters, greedy_parameter = endpoint
+
+        path_parameters = {name: segments[index] for index, name in parameters}
+        if greedy_parameter is not None:
+            index, name = greedy_parameter
+            path_parameters[name] = "/".join(segments[index:])
+
+        return RouteMatch(route, path_parameters, greedy_parameter is not None)
+
+
+class _Node(object):
+    """
+    Node of the trie for one segment of the paths of routes
+    """
+
+    __slots__ = ("static", "parameter", "greedy", "endpoints")
+
+    def __init__(self):
+        self.static = {}
+        self.parameter = None
+        self.greedy = None
+
+        # HTTP method => (route, (segment index, name) of its path parameters, (segment index, name) of its greedy
+        # parameter or None)
+        self.endpoints = {}
+
+    def static_child(self, segment):
+        if segment not in self.static:
+            self.static[segment] = _Node()
+        return self.static[segment]
+
+    def parameter_child(self):
+        if self.parameter is None:
+            self.parameter = _Node()
+        return self.parameter
+
+    def greedy_child(self):
+        if self.greedy is None:
+            self.greedy = _Node()
+        return self.greedy
+
+
+def _split(path):
+    """
+    Splits a path into its segments. The root path has none
+    """
+    return path.split("/")[1:] if path != "/" else []
@@ -0,0 +1,216 @@
+"""
+Emulates the response cache of an API Gateway stage
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+LOG = logging.getLogger(__name__)
+
+
+class StageCache(object):
+    """
+    In-memory replica of the cache API Gateway provisions for a stage with ``CacheClusterEnabled``. Responses to GET
+    requests are cached if caching is enabled for the method in the ``MethodSettings`` of the stage. They are kept for
+    the TTL of the method, and the entries used least recently are evicted once the cache grows beyond the size of the
+    cache cluster.
+
+    Like on API Gateway, responses are cached per method, path and values of the cache key parameters of the route.
+    Clients get a fresh response, which replaces the cached one, by sending ``Cache-Control: max-age=0``.
+
+    This class is thread safe.
+    """
+
+    # Defaults and limits of API Gateway
+    DEFAULT_TTL = 300
+    MAX_TTL = 3600
+    DEFAULT_CLUSTER_SIZE = "0.5"
+
+    _CACHED_METHODS = ("GET",)
+    _ANY_PATH = "/*"
+    _ANY_METHOD = "*"
+
+    def __init__(self, method_settings=None, cluster_size=None, max_size=None, clock=time.time):
+        """
+        Initialize the cache
+
+        Parameters
+        ----------
+        method_settings list(dict)
+            Optional. ``MethodSettings`` of the stage. Nothing is cached without settings that enable caching
+        cluster_size str
+            Optional. ``CacheClusterSize`` of the stage in GB. Defaults to 0.5
+        max_size int
+            Optional. Number of bytes the cached responses may use. Overrides the size of the cache cluster
+        clock callable
+            Optional. Returns the current time in seconds
+        """
+        self.max_size = max_size or int(float(cluster_size or self.DEFAULT_CLUSTER_SIZE) * 1024 ** 3)
+
+        self._method_settings = method_settings or []
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # Key => (expiry time, response, size). Ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @classmethod
+    def from_api(cls, api):
+        """
+        Creates the cache of the stage of the given API
+
+        :param samcli.commands.local.lib.provider.Api api: API with the configuration of its stage
+        :return StageCache: The cache, or None if the stage has no cache cluster
+        """
+        if not _is_true(getattr(api, "cache_cluster_enabled", False)):
+            return None
+
+        LOG.info("Caching responses like the cache cluster of stage %s", api.stage_name or "")
+        return cls(method_settings=api.method_settings, cluster_size=api.cache_cluster_size)
+
+    def ttl_for(self, method, resource_path):
+        """
+        Returns how long responses of the method are cached. Settings of a path and method override settings of all
+        paths and methods, which override the settings of the stage.
+
+        :param string method: HTTP method
+        :param string resource_path: Path of the route in API Gateway format, ex: /users/{id}
+        :return int: Seconds the responses are cached. 0, if they are not cached
+        """
+        method = method.upper()
+        if method not in self._CACHED_METHODS:
+            return 0
+
+        settings = {}
+        for path_pattern, method_pattern in ((self._ANY_PATH, self._ANY_METHOD),
+                                             (self._ANY_PATH, method),
+                                             (resource_path, self._ANY_METHOD),
+                                             (resource_path, method)):
+            for setting in self._method_settings:
+                if self._decode_path(setting.get("ResourcePath", self._ANY_PATH)) == path_pattern and \
+                        str(setting.get("HttpMethod", self._ANY_METHOD)).upper() == method_pattern:
+                    settings.update(setting)
+
+        if not _is_true(settings.get("CachingEnabled", False)):
+            return 0
+
+        try:
+            ttl = int(settings.get("CacheTtlInSeconds", self.DEFAULT_TTL))
+        except (TypeError, ValueError):
+            LOG.debug("Invalid CacheTtlInSeconds %s, using the default", settings.get("CacheTtlInSeconds"))
+            ttl = self.DEFAULT_TTL
+
+        return max(0, min(ttl, self.MAX_TTL))
+
+    @staticmethod
+    def make_key(method, path, parameters=None):
+        """
+        :param string method: HTTP method of the request
+        :param string path: Path of the request
+        :param list parameters: Optional. (name, values) of every cache key parameter of the route
+        :return tuple: Key of the cached response
+        """
+        return (method.upper(), path, tuple((name, tuple(values)) for name, values in parameters or []))
+
+    def get(self, key):
+        """
+        :param tuple key: Key of the response
+        :return: The cached response, or None if there is none or it expired
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry and entry[0] <= self._clock():
+                self._remove(entry)
+                self._stats["expirations"] += 1
+                entry = None
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            # Most recently used
+            self._entries[key] = entry
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, response, ttl, size):
+        """
+        Caches the response, evicting the responses used least recently if it doesn't fit otherwise
+
+        :param tuple key: Key of the response
+        :param response: Response to cache
+        :param int ttl: Seconds to keep the response
+        :param int size: Size of the response in bytes. Responses larger than the cache are not cached
+        """
+        if ttl <= 0 or size > self.max_size:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._remove(previous)
+
+            while self._entries and self._size + size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._remove(evicted)
+                self._stats["evictions"] += 1
+
+            self._entries[key] = (self._clock() + ttl, response, size)
+            self._size += size
+
+    def invalidate(self, key):
+        """
+        Removes the cached response, if any
+
+        :param tuple key: Key of the response
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._remove(entry)
+
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        """
+        :return dict: Statistics of the cache: hits, misses, hit rate, expirations, invalidations, evictions, entries
+            and bytes stored. The hit rate is None until the cache was used
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes_stored"] = self._size
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["max_size"] = self.max_size
+        stats["hit_rate"] = round(float(stats["hits"]) / lookups, 4) if lookups else None
+        return stats
+
+    def _remove(self, entry):
+        self._size -= entry[2]
+
+    @staticmethod
+    def _decode_path(resource_path):
+        """
+        Resource paths of method settings escape slashes, ex: /~1users~1{id} is the path /users/{id}
+        """
+        resource_path = str(resource_path)
+        if resource_path == StageCache._ANY_PATH:
+            return resource_path
+
+        return resource_path.replace("~1", "/")[1:] or "/"
+
+
+def _is_true(value):
+    """
+    Template values may be booleans or strings
+    """
+    if isinstance(value, bool):
+        return value
+
+    return str(value).lower() == "true"
@@ -2,13 +2,24 @@
 Wrapper to Docker Attach API
 """
 
+import os
+import errno
+import select
 import struct
 import logging
-from socket import timeout
-from docker.utils.socket import read, read_exactly, SocketError
+from socket import timeout, SHUT_WR
+from docker.utils.socket import SocketError, NpipeSocket
 
 LOG = logging.getLogger(__name__)
 
+# Size of the buffer the stream is read into. A frame larger than this is yielded in several chunks
+READ_BUFFER_SIZE = 256 * 1024
+
+_HEADER_SIZE = 8
+
+# Errors after which reading from the socket can simply be attempted again
+_RECOVERABLE_ERRORS = (errno.EINTR, errno.EDEADLK, errno.EWOULDBLOCK)
+
 
 def attach(docker_client, container, stdout=True, stderr=True, logs=False):
     """
@@ -38,6 +49,42 @@ def attach(docker_client, container, stdout=True, stderr=True, logs=False):
         Do you want to include the container's previous output?
     """
 
+    socket = attach_socket(docker_client, container, stdout=stdout, stderr=stderr, logs=logs)
+    return read_stream(socket)
+
+
+def attach_socket(docker_client, container, stdout=True, stderr=True, logs=False, stdin=False):
+    """
+    Attaches to a container and returns the raw socket of the connection. Read the output of the container from it
+    with ``read_stream``. If ``stdin`` is set, data written to the socket with ``write_input`` is sent to the stdin of
+    the container, which must have been created with stdin open.
+
+    Parameters
+    ----------
+    docker_client : docker.Client
+        Docker client used to talk to Docker daemon
+
+    container : docker.container
+        Instance of the container to attach to
+
+    stdout : bool
+        Do you want to get stdout data?
+
+    stderr : bool
+        Do you want to get stderr data?
+
+    logs : bool
+        Do you want to include the container's previous output?
+
+    stdin : bool
+        Do you want to send data to the stdin of the container?
+
+    Returns
+    -------
+    socket
+        Socket of the attach connection
+    """
+
     headers = {
         "Connection": "Upgrade",
         "Upgrade": "tcp"
@@ -48,7 +95,7 @@ def attach(docker_client, container, stdout=True, stderr=True, logs=False):
         "stderr": 1 if stderr else 0,
         "logs": 1 if logs else 0,
         "stream": 1,  # Yes, we always stream
-        "stdin": 0,  # We don't support stdin
+        "stdin": 1 if stdin else 0,
     }
 
     # API client is a lower level Docker client that wraps the Docker APIs. It has methods that will help us
@@ -61,12 +108,51 @@ def attach(docker_client, container, stdout=True, stderr=True, logs=False):
 
     # Send out the attach request and read the socket for response
     response = api_client._post(url, headers=headers, params=query_params, stream=True)  # pylint: disable=W0212
-    socket = api_client._get_raw_response_socket(response)  # pylint: disable=W0212
+    return api_client._get_raw_response_socket(response)  # pylint: disable=W0212
 
-    return _read_socket(socket)
 
+def supports_input(docker_client):
+    """
+    Input is sent through the attach connection, which is then half-closed so the container reads the end of its
+    stdin. Named pipes, used to reach Docker on Windows, cannot be half-closed. Neither can TLS connections, used to
+    reach remote daemons: shutting down the socket drops the TLS session, and the output could no longer be decrypted.
+
+    Parameters
+    ----------
+    docker_client : docker.Client
+        Docker client used to talk to Docker daemon
 
-def _read_socket(socket):
+    Returns
+    -------
+    bool
+        True if data can be sent to the stdin of containers through this client
+    """
+    base_url = docker_client.api.base_url
+    return not base_url.startswith("http+docker://localnpipe") and not base_url.startswith("https://")
+
+
+def write_input(socket, data):
+    """
+    Sends data to the stdin of a container and closes the writing side of the connection, so the container reads the
+    end of its input. The output of the container can still be read from the socket afterwards.
+
+    Parameters
+    ----------
+    socket
+        Socket returned by ``attach_socket`` with ``stdin`` set
+
+    data : bytes
+        Data to send
+    """
+
+    # On Python 3 the response socket is a socket.SocketIO wrapping the actual socket
+    raw_socket = getattr(socket, "_sock", socket)
+
+    raw_socket.sendall(data)
+    raw_socket.shutdown(SHUT_WR)
+
+
+def read_stream(socket, buffer_size=READ_BUFFER_SIZE):
     """
     The stdout and stderr data from the container multiplexed into one stream of response from the Docker API.
     It follows the protocol described here https://docs.docker.com/engine/api/v1.30/#operation/ContainerAttach.
@@ -80,31 +166,39 @@ def _read_socket(socket):
         Stdout => Frame Type = 1
         Stderr => Frame Type = 2
 
+    The stream is read with ``recv_into`` into one buffer that is allocated once and reused for every frame, instead
+    of allocating new bytes for every read. The data is yielded as a ``memoryview`` of this buffer, which is only
+    valid until the iterator is advanced again. Callers must consume or copy the data before asking for the next item.
 
     Parameters
     ----------
     socket
         Socket to read responses from
 
+    buffer_size : int
+        Size of the buffer to read into. Frames larger than this are yielded in several chunks
+
     Yields
     -------
     int
         Type of the stream (1 => stdout, 2 => stderr)
-    str
+    memoryview
         Data in the stream
     """
 
+    buffer = memoryview(bytearray(max(buffer_size, _HEADER_SIZE)))
+
     # Keep reading the stream until the stream terminates
     while True:
 
         try:
 
-            payload_type, payload_size = _read_header(socket)
+            payload_type, payload_size = _read_header(socket, buffer)
             if payload_size < 0:
                 # Something is wrong with the data stream. Payload size can't be less than zero
                 break
 
-            for data in _read_payload(socket, payload_size):
+            for data in _read_payload(socket, payload_size, buffer):
                 yield payload_type, data
 
         except timeout:
@@ -116,7 +210,7 @@ def _read_socket(socket):
             break
 
 
-def _read_payload(socket, payload_size):
+def _read_payload(socket, payload_size, buffer):
     """
     From the given socket, reads and yields payload of the given size. With sockets, we don't receive all data at
     once. Therefore this method will yield each time we read some data from the socket until the payload_size has
@@ -130,11 +224,12 @@ def _read_payload(socket, payload_size):
     payload_size : int
         Size of the payload to read. Exactly these many bytes are read from the socket before stopping the yield.
 
+    buffer : memoryview
+        Buffer to read the data into. It is overwritten by the next read
+
     Yields
     -------
-    int
-        Type of the stream (1 => stdout, 2 => stderr)
-    str
+    memoryview
         Data in the stream
     """
 
@@ -142,20 +237,20 @@ def _read_payload(socket, payload_size):
     while remaining > 0:
 
         # Try and read as much as possible
-        data = read(socket, remaining)
-        if data is None:
-            # ``read`` will terminate with an empty string. This is just a transient state where we didn't get any data
+        size = _read_into(socket, buffer[:min(remaining, len(buffer))])
+        if size is None:
+            # This is just a transient state where we didn't get any data
             continue
 
-        if len(data) == 0:  # pylint: disable=C1801
-            # Empty string. Socket does not have any more data. We are done here even if we haven't read full payload
+        if size == 0:
+            # Socket does not have any more data. We are done here even if we haven't read full payload
             break
 
-        remaining -= len(data)
-        yield data
+        remaining -= size
+        yield buffer[:size]
 
 
-def _read_header(socket):
+def _read_header(socket, buffer):
     """
     Reads the header from socket stream to determine the size of next frame to read. Header is 8 bytes long, where
     the first byte is the stream type and last four bytes (bigendian) is size of the payload
@@ -167,6 +262,9 @@ def _read_header(socket):
     socket
         Socket to read the responses from
 
+    buffer : memoryview
+        Buffer to read the header into
+
     Returns
     -------
     int
@@ -175,7 +273,55 @@ def _read_header(socket):
         Size of the payload
     """
 
-    data = read_exactly(socket, 8)
+    header = buffer[:_HEADER_SIZE]
+
+    received = 0
+    while received < _HEADER_SIZE:
+        size = _read_into(socket, header[received:])
+        if size == 0:
+            raise SocketError("Unexpected EOF")
+
+        received += size or 0
 
     # >BxxxL is the struct notation to unpack data in correct header format in big-endian
-    return struct.unpack('>BxxxL', data)
+    return struct.unpack_from('>BxxxL', header)
+
+
+def _read_into(socket, buffer):
+    """
+    Reads at most ``len(buffer)`` bytes from the socket into the given buffer. This is the allocation free
+    counterpart of ``docker.utils.socket.read`` and supports the same kinds of sockets.
+
+    Parameters
+    ----------
+    socket
+        Socket to read from
+
+    buffer : memoryview
+        Buffer to read into
+
+    Returns
+    -------
+    int
+        Number of bytes read. 0 if the socket is closed, None if no data was available
+    """
+
+    if not isinstance(socket, NpipeSocket):
+        select.select([socket], [], [])
+
+    try:
+        if hasattr(socket, 'recv_into'):
+            return socket.recv_into(buffer)
+
+        if hasattr(socket, 'readinto'):
+            # socket.SocketIO, what the response socket is on Python 3
+            return socket.readinto(buffer)
+
+        data = os.read(socket.fileno(), len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+    except EnvironmentError as ex:
+        if ex.errno not in _RECOVERABLE_ERRORS:
+            raise
+
+    return None
@@ -0,0 +1,164 @@
+"""
+Creates the Docker client shared by everything that talks to the Docker daemon, and keeps track of the Docker API calls
+made through it
+"""
+
+import re
+import logging
+import threading
+from contextlib import contextmanager
+
+import docker
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_MAX_POOL_SIZE = 10
+
+_lock = threading.Lock()
+_client = None
+_max_pool_size = DEFAULT_MAX_POOL_SIZE
+
+# Docker API calls made on a thread are recorded by every tracker that is active on the same thread
+_trackers = threading.local()
+
+# Matches the API version prefix and the IDs of containers, images, networks etc. in the path of a request, so
+# calls to the same endpoint are grouped together
+_VERSION_PREFIX = re.compile(r"^/v[0-9.]+")
+_OBJECT_ID = re.compile(r"/[0-9a-f]{12,64}(?=/|$)")
+
+
+class DockerApiStats(object):
+    """
+    Number of Docker API calls and the time spent waiting for their responses, in total and per endpoint
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, elapsed):
+        """
+        Records one API call
+
+        :param string endpoint: HTTP method and path of the call, ex: "GET /containers/{id}/json"
+        :param float elapsed: Seconds until the response arrived
+        """
+        with self._lock:
+            self.calls += 1
+            self.total_time += elapsed
+
+            calls, total_time = self.endpoints.get(endpoint, (0, 0.0))
+            self.endpoints[endpoint] = (calls + 1, total_time + elapsed)
+
+    def to_dict(self):
+        """
+        :return dict: Snapshot of the statistics
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "total_time": self.total_time,
+                "endpoints": {endpoint: {"calls": calls, "total_time": total_time}
+                              for endpoint, (calls, total_time) in self.endpoints.items()}
+            }
+
+
+_totals = DockerApiStats()
+
+
+def configure_docker_client(max_pool_size=None):
+    """
+    Sets the size of the connection pool of the shared client. Takes effect for clients created afterwards, so call
+    this before the first call to ``get_docker_client``.
+
+    :param int max_pool_size: Optional. Maximum number of connections kept open to the Docker daemon. Defaults to 10
+    """
+    global _max_pool_size  # pylint: disable=global-statement
+
+    with _lock:
+        _max_pool_size = max_pool_size or DEFAULT_MAX_POOL_SIZE
+
+
+def get_docker_client():
+    """
+    Returns the Docker client shared by the whole process. It is created from the environment the first time it is
+    requested. Sharing one client means sharing one pool of connections to the daemon, instead of every container and
+    image opening connections of its own. The client is safe to use from multiple threads.
+
+    :return docker.DockerClient: Shared Docker client
+    """
+    global _client  # pylint: disable=global-statement
+
+    with _lock:
+        if _client is None:
+            _client = _create_client(_max_pool_size)
+        return _client
+
+
+def reset_docker_client():
+    """
+    Closes the shared client. The next call to ``get_docker_client`` creates a new one
+    """
+    global _client  # pylint: disable=global-statement
+
+    with _lock:
+        client, _client = _client, None
+
+    if client is not None:
+        client.close()
+
+
+def docker_api_stats():
+    """
+    :return dict: Docker API calls made through the shared client since the process started
+    """
+    return _totals.to_dict()
+
+
+@contextmanager
+def track_docker_api_calls():
+    """
+    Context manager that records the Docker API calls made through the shared client by the current thread while the
+    block runs. Calls made by background threads, ex: to remove containers, are not included.
+
+    :return DockerApiStats: Statistics of the calls made within the block
+    """
+    stats = DockerApiStats()
+
+    if not hasattr(_trackers, "active"):
+        _trackers.active = []
+
+    _trackers.active.append(stats)
+    try:
+        yield stats
+    finally:
+        _trackers.active.remove(stats)
+
+
+def _create_client(max_pool_size):
+    try:
+        client = docker.from_env(max_pool_size=max_pool_size)
+    except TypeError:
+        # Docker SDK older than 4.3 does not support setting the pool size
+        LOG.debug("Docker SDK does not support configuring the connection pool size")
+        client = docker.from_env()
+
+    client.api.hooks["response"].append(_record_response)
+    return client
+
+
+def _record_response(response, *args, **kwargs):  # pylint: disable=unused-argument
+    """
+    Response hook of the requests session the Docker client is built on. Records the call in the totals and in every
+    tracker active on the current thread
+    """
+    request = response.request
+    path = _OBJECT_ID.sub("/{id}", _VERSION_PREFIX.sub("", request.path_url.split("?", 1)[0]))
+    endpoint = "{} {}".format(request.method, path)
+    elapsed = response.elapsed.total_seconds()
+
+    _totals.add(endpoint, elapsed)
+    for stats in getattr(_trackers, "active", []):
+        stats.add(endpoint, elapsed)
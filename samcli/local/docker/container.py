@@ -2,14 +2,19 @@
 Representation of a generic Docker container
 """
 
+import os
+import json
 import logging
+import hashlib
 import tarfile
 import tempfile
 
 import docker
 
-from samcli.local.docker.attach_api import attach
-from .utils import to_posix_path
+from samcli.local.docker.attach_api import attach, attach_socket, read_stream, write_input
+from samcli.local.lambdafn.timing import record_first_byte
+from .client import get_docker_client
+from .utils import to_posix_path, get_host_id
 
 LOG = logging.getLogger(__name__)
 
@@ -28,6 +33,25 @@ class Container(object):
     _STDOUT_FRAME_TYPE = 1
     _STDERR_FRAME_TYPE = 2
 
+    # Every container created by SAM CLI carries these labels. They are used to find the containers that a crashed
+    # session left behind. The PID is only meaningful on the host the container was created from
+    SAM_LABEL = "sam.cli.container"
+    PID_LABEL = "sam.cli.pid"
+    HOST_LABEL = "sam.cli.host"
+
+    # Environment variables that change between invocations of the same function. They don't make containers any
+    # less interchangeable, so they are left out of the configuration hash
+    _EVENT_ENV_VARS = ("AWS_LAMBDA_EVENT_BODY",)
+    _CREDENTIALS_ENV_VARS = ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN")
+
+    # Memory at which Lambda allocates one full vCPU, and the smallest CPU shares value Docker accepts
+    _MEMORY_MB_PER_VCPU = 1769
+    _MIN_CPU_SHARES = 2
+
+    # Options that configure the container itself in the Docker Engine API. All other options configure the host
+    _API_CONTAINER_CONFIG_ARGS = ("command", "working_dir", "tty", "labels", "environment", "stdin_open",
+                                  "entrypoint")
+
     def __init__(self,
                  image,
                  cmd,
@@ -39,7 +63,8 @@ class Container(object):
                  env_vars=None,
                  docker_client=None,
                  container_opts=None,
-                 additional_volumes=None):
+                 additional_volumes=None,
+                 stdin_open=False):
         """
         Initializes the class with given configuration. This does not automatically create or run the container.
 
@@ -52,6 +77,8 @@ class Container(object):
         :param dict exposed_ports: Optional. Dict of ports to expose
         :param list entrypoint: Optional. Entry point process for the container. Defaults to the value in Dockerfile
         :param dict env_vars: Optional. Dict of environment variables to setup in the container
+        :param bool stdin_open: Optional. Keep the stdin of the container open, so input can be passed to ``start``.
+            The container reads the end of its input once the input was sent
         """
 
         self._image = image
@@ -65,13 +92,18 @@ class Container(object):
         self._network_id = None
         self._container_opts = container_opts
         self._additional_volumes = additional_volumes
+        self._stdin_open = stdin_open
 
-        # Use the given Docker client or create new one
-        self.docker_client = docker_client or docker.from_env()
+        # Use the given Docker client or the one shared by the whole process
+        self.docker_client = docker_client or get_docker_client()
 
         # Runtime properties of the container. They won't have value until container is created or started
         self.id = None
 
+        # Set when this instance was bound to a previously created container instead of creating a new one
+        self._is_reused = False
+        self._logs_itr = None
+
     def create(self):
         """
         Calls Docker API to creates the Docker container instance. Creating the container does *not* run the container.
@@ -86,6 +118,57 @@ class Container(object):
 
         LOG.info("Mounting %s as %s:ro,delegated inside runtime container", self._host_dir, self._working_dir)
 
+        real_container = self.docker_client.containers.create(self._image, **self._create_kwargs())
+        self.id = real_container.id
+
+        if self.network_id and self.network_id != 'host':
+            network = self.docker_client.networks.get(self.network_id)
+            network.connect(self.id)
+
+        return self.id
+
+    def api_config(self):
+        """
+        Returns the configuration of this container in the format of the Docker Engine API, for clients other than
+        docker-py to create the container with. The container joins its network at creation. Proxy settings of the
+        Docker config file are not applied.
+
+        :return dict: Body of the request that creates the container
+        """
+        kwargs = self._create_kwargs()
+        kwargs.pop("use_config_proxy")
+        stdin_once = kwargs.pop("stdin_once", False)
+        ports = kwargs.pop("ports", None)
+
+        container_kwargs = {name: kwargs.pop(name) for name in self._API_CONTAINER_CONFIG_ARGS if name in kwargs}
+        if "environment" in container_kwargs:
+            container_kwargs["environment"] = docker.utils.format_environment(container_kwargs["environment"])
+
+        if self.network_id:
+            kwargs["network_mode"] = self.network_id
+
+        version = self.docker_client.api.api_version
+
+        # Everything else configures the host, like docker-py does when it creates a container
+        host_config = docker.types.HostConfig(version,
+                                              binds=kwargs.pop("volumes"),
+                                              port_bindings=ports,
+                                              **kwargs)
+
+        config = docker.types.ContainerConfig(version,
+                                              self._image,
+                                              ports=[tuple(str(port).split("/", 1)) for port in ports or {}] or None,
+                                              host_config=host_config,
+                                              **container_kwargs)
+        if stdin_once:
+            config["StdinOnce"] = True
+
+        return config
+
+    def _create_kwargs(self):
+        """
+        :return dict: Keyword arguments to create this container with docker-py
+        """
         kwargs = {
             "command": self._cmd,
             "working_dir": self._working_dir,
@@ -101,7 +184,12 @@ class Container(object):
             # We are not running an interactive shell here.
             "tty": False,
             # Set proxy configuration from global Docker config file
-            "use_config_proxy": True
+            "use_config_proxy": True,
+            "labels": {
+                self.SAM_LABEL: "true",
+                self.PID_LABEL: str(os.getpid()),
+                self.HOST_LABEL: get_host_id()
+            }
         }
 
         if self._container_opts:
@@ -116,6 +204,11 @@ class Container(object):
         if self._env_vars:
             kwargs["environment"] = self._env_vars
 
+        if self._stdin_open:
+            # Docker opens a new stdin for every start, which is closed once the attached client closed its input
+            kwargs["stdin_open"] = True
+            kwargs["stdin_once"] = True
+
         if self._exposed_ports:
             kwargs["ports"] = self._exposed_ports
 
@@ -125,18 +218,24 @@ class Container(object):
         if self._memory_limit_mb:
             # Ex: 128m => 128MB
             kwargs["mem_limit"] = "{}m".format(self._memory_limit_mb)
+            kwargs["cpu_shares"] = self.cpu_shares_for_memory(self._memory_limit_mb)
 
         if self.network_id == 'host':
             kwargs["network_mode"] = self.network_id
 
-        real_container = self.docker_client.containers.create(self._image, **kwargs)
-        self.id = real_container.id
+        return kwargs
 
-        if self.network_id and self.network_id != 'host':
-            network = self.docker_client.networks.get(self.network_id)
-            network.connect(self.id)
+    @classmethod
+    def cpu_shares_for_memory(cls, memory_mb):
+        """
+        Lambda allocates CPU in proportion to the memory of a function, one full vCPU at 1,769 MB. Docker CPU shares
+        are a relative weight where 1024 is the weight of a container with default settings. Scaling the shares the
+        same way makes containers with more memory get proportionally more CPU when containers compete for it.
 
-        return self.id
+        :param int memory_mb: Memory of the container in MB
+        :return int: CPU shares for the container
+        """
+        return max(cls._MIN_CPU_SHARES, int(round(1024.0 * memory_mb / cls._MEMORY_MB_PER_VCPU)))
 
     def delete(self):
         """
@@ -163,6 +262,7 @@ class Container(object):
                 raise ex
 
         self.id = None
+        self._is_reused = False
 
     def start(self, input_data=None):
         """
@@ -172,12 +272,13 @@ class Container(object):
 
         Parameters
         ----------
-        input_data
-            Optional. Input data sent to the container through container's stdin.
+        input_data : bytes
+            Optional. Input data sent to the container through container's stdin. The container must have been
+            created with ``stdin_open``
         """
 
-        if input_data:
-            raise ValueError("Passing input through container's stdin is not supported")
+        if input_data is not None and not self._stdin_open:
+            raise ValueError("Container was created without stdin. Cannot pass input to it")
 
         if not self.is_created():
             raise RuntimeError("Container does not exist. Cannot start this container")
@@ -185,9 +286,25 @@ class Container(object):
         # Get the underlying container instance from Docker API
         real_container = self.docker_client.containers.get(self.id)
 
+        socket = None
+        if self._is_reused or input_data is not None:
+            # A reused container already has output from its previous runs. Attach *before* starting it, without
+            # fetching previous logs, so we only read the output of this run. Input is sent through the same
+            # connection, which must exist before the container starts reading its stdin.
+            socket = attach_socket(self.docker_client,
+                                   container=real_container,
+                                   stdout=True,
+                                   stderr=True,
+                                   logs=False,
+                                   stdin=input_data is not None)
+            self._logs_itr = read_stream(socket)
+
         # Start the container
         real_container.start()
 
+        if input_data is not None:
+            write_input(socket, input_data)
+
     def wait_for_logs(self, stdout=None, stderr=None):
 
         # Return instantly if we don't have to fetch any logs
@@ -197,17 +314,77 @@ class Container(object):
         if not self.is_created():
             raise RuntimeError("Container does not exist. Cannot get logs for this container")
 
-        real_container = self.docker_client.containers.get(self.id)
+        logs_itr = self._logs_itr
+        self._logs_itr = None
+
+        if logs_itr is None:
+            real_container = self.docker_client.containers.get(self.id)
 
-        # Fetch both stdout and stderr streams from Docker as a single iterator.
-        logs_itr = attach(self.docker_client,
-                          container=real_container,
-                          stdout=True,
-                          stderr=True,
-                          logs=True)
+            # Fetch both stdout and stderr streams from Docker as a single iterator.
+            logs_itr = attach(self.docker_client,
+                              container=real_container,
+                              stdout=True,
+                              stderr=True,
+                              logs=True)
 
         self._write_container_output(logs_itr, stdout=stdout, stderr=stderr)
 
+    def adopt(self, container_id):
+        """
+        Binds this instance to a container that was created earlier, with the same configuration, and has since
+        stopped. Starting this instance will run the existing container again instead of creating a new one.
+
+        :param string container_id: ID of the existing container
+        :raise RuntimeError: If this instance is already bound to a container
+        """
+        if self.is_created():
+            raise RuntimeError("This container already exists. Cannot adopt another container.")
+
+        self.id = container_id
+        self._is_reused = True
+
+    def config_hash(self):
+        """
+        Returns a digest of the configuration this container is created with. Containers with the same digest are
+        interchangeable, which allows a stopped container to be started again to serve another request. The event and
+        the AWS credentials are not part of the configuration: see ``credentials_hash``.
+
+        :return string: SHA256 digest of the container configuration
+        """
+        volatile = self._EVENT_ENV_VARS + self._CREDENTIALS_ENV_VARS
+        env_vars = {name: value for name, value in (self._env_vars or {}).items() if name not in volatile}
+
+        config = {
+            "image": self._image,
+            "cmd": self._cmd,
+            "working_dir": self._working_dir,
+            "host_dir": self._host_dir,
+            "memory_limit_mb": self._memory_limit_mb,
+            "exposed_ports": self._exposed_ports,
+            "entrypoint": self._entrypoint,
+            "env_vars": env_vars,
+            "network_id": self._network_id,
+            "container_opts": self._container_opts,
+            "additional_volumes": self._additional_volumes,
+            "stdin_open": self._stdin_open
+        }
+
+        serialized = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+    def credentials_hash(self):
+        """
+        Returns a digest of the AWS credentials this container is created with. A stopped container keeps these
+        credentials when it is started again, so it must not be reused once the credentials have been refreshed.
+
+        :return string: SHA256 digest of the credentials
+        """
+        env_vars = self._env_vars or {}
+        credentials = {name: env_vars.get(name) for name in self._CREDENTIALS_ENV_VARS}
+
+        serialized = json.dumps(credentials, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
     def copy(self, from_container_path, to_host_path):
 
         if not self.is_created():
@@ -242,10 +419,16 @@ class Container(object):
             Stream writer to write stderr data from the Container into
         """
 
+        first_frame = True
+
         # Iterator returns a tuple of (frame_type, data) where the frame type determines which stream we write output
         # to
         for frame_type, data in output_itr:
 
+            if first_frame:
+                first_frame = False
+                record_first_byte()
+
             if frame_type == Container._STDOUT_FRAME_TYPE and stdout:
                 # Frame type 1 is stdout data.
                 stdout.write(data)
@@ -0,0 +1,119 @@
+"""
+Remembers which Docker images are available locally, so they are not looked up and pulled on every invocation
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+LOG = logging.getLogger(__name__)
+
+
+class ImageStateCache(object):
+    """
+    Thread-safe cache of the state of Docker images. For each image it records when it was last seen locally and when
+    it was last pulled. Both facts are trusted for ``refresh_interval`` seconds, after which the image is looked up
+    (and pulled) again.
+
+    It also makes sure only one thread at a time prepares a given image. Concurrent invocations of the same function
+    wait for the one pull that is in progress instead of all pulling the same image.
+    """
+
+    DEFAULT_REFRESH_INTERVAL = 600  # 10 minutes in seconds
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, refresh_interval=None, clock=time.time):
+        """
+        Initialize the cache
+
+        Parameters
+        ----------
+        refresh_interval int
+            Optional. Number of seconds the state of an image is trusted. Defaults to 600
+        clock callable
+            Optional. Returns the current time in seconds. Defaults to ``time.time``
+        """
+        self.refresh_interval = self.DEFAULT_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self._clock = clock
+
+        # Image name => (time the image was last seen locally, time the image was last pulled or None)
+        self._states = {}
+        self._lock = threading.Lock()
+        self._image_locks = {}
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the cache shared by the whole process
+
+        :return ImageStateCache: Process-wide instance of the cache
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def is_fresh(self, image_name, require_pull=False):
+        """
+        Checks if the image is known to be available locally
+
+        :param string image_name: Name of the image
+        :param bool require_pull: If True, the image must also have been pulled recently
+        :return bool: True if the image can be used without looking it up or pulling it
+        """
+        with self._lock:
+            state = self._states.get(image_name)
+
+        if not state:
+            return False
+
+        seen_at, pulled_at = state
+        now = self._clock()
+
+        if now - seen_at >= self.refresh_interval:
+            return False
+
+        if require_pull and (pulled_at is None or now - pulled_at >= self.refresh_interval):
+            return False
+
+        return True
+
+    def mark_available(self, image_name, pulled=False):
+        """
+        Records that the image is available locally
+
+        :param string image_name: Name of the image
+        :param bool pulled: True if a pull of the image was just attempted. Failed pulls count as well, so an
+            unreachable registry is not retried on every invocation
+        """
+        now = self._clock()
+
+        with self._lock:
+            _, pulled_at = self._states.get(image_name, (None, None))
+            self._states[image_name] = (now, now if pulled else pulled_at)
+
+    def invalidate(self, image_name):
+        """
+        Forgets the state of the image. Use this when the image turned out to be missing
+
+        :param string image_name: Name of the image
+        """
+        with self._lock:
+            self._states.pop(image_name, None)
+
+    @contextmanager
+    def single_flight(self, image_name):
+        """
+        Context manager that allows only one thread at a time to prepare the given image. Other threads block until
+        it is done and should check ``is_fresh`` again before doing any work.
+
+        :param string image_name: Name of the image
+        """
+        with self._lock:
+            image_lock = self._image_locks.setdefault(image_name, threading.Lock())
+
+        with image_lock:
+            yield
@@ -1,6 +1,7 @@
 """
 Represents Lambda runtime containers.
 """
+import sys
 import logging
 
 from samcli.local.docker.lambda_debug_entrypoint import LambdaDebugEntryPoint
@@ -31,6 +32,23 @@ class LambdaContainer(Container):
     # This is the dictionary that represents where the debugger_path arg is mounted in docker to as readonly.
     _DEBUGGER_VOLUME_MOUNT = {"bind": _DEBUGGER_VOLUME_MOUNT_PATH, "mode": "ro"}
 
+    # Where layers are mounted when they are not built into the image. Lambda extracts layers into /opt
+    _LAYERS_VOLUME_MOUNT = {"bind": "/opt", "mode": "ro"}
+
+    # Entry points that start the runtime's own bootstrap, which talks to the Lambda Runtime API instead of
+    # running a single event and exiting. Only runtimes whose lambci images ship such a bootstrap are supported.
+    # configs from: https://github.com/lambci/docker-lambda
+    _RUNTIME_API_ENTRYPOINTS = {
+        Runtime.python37.value: ["/var/lang/bin/python3.7", "/var/runtime/bootstrap"],
+        Runtime.nodejs10x.value: ["/var/lang/bin/node",
+                                  "--expose-gc",
+                                  "--max-http-header-size", "81920",
+                                  "/var/runtime/index.js"],
+        Runtime.provided.value: ["/bin/sh", "-c",
+                                 "if [ -x /var/task/bootstrap ]; then exec /var/task/bootstrap; "
+                                 "else exec /opt/bootstrap; fi"],
+    }
+
     def __init__(self,  # pylint: disable=R0914
                  runtime,
                  handler,
@@ -39,7 +57,9 @@ class LambdaContainer(Container):
                  image_builder,
                  memory_mb=128,
                  env_vars=None,
-                 debug_options=None):
+                 debug_options=None,
+                 runtime_api=None,
+                 stdin_open=False):
         """
         Initializes the class
 
@@ -62,18 +82,36 @@ class LambdaContainer(Container):
             Optional. Dictionary containing environment variables passed to container
         debug_options DebugContext
             Optional. Contains container debugging info (port, debugger path)
+        runtime_api str
+            Optional. host:port of a Lambda Runtime API endpoint. If set, the container keeps running and fetches
+            invocations from this endpoint instead of running one event and exiting. Cannot be combined with
+            ``debug_options``
+        stdin_open bool
+            Optional. Keep the stdin of the container open, to stream the event to the runtime through it
         """
 
         if not Runtime.has_value(runtime):
             raise ValueError("Unsupported Lambda runtime {}".format(runtime))
 
+        if runtime_api and not LambdaContainer.supports_runtime_api(runtime):
+            raise ValueError("Runtime {} cannot be used with the Lambda Runtime API".format(runtime))
+
         image = LambdaContainer._get_image(image_builder, runtime, layers)
         ports = LambdaContainer._get_exposed_ports(debug_options)
         entry = LambdaContainer._get_entry_point(runtime, debug_options)
         additional_options = LambdaContainer._get_additional_options(runtime, debug_options)
         additional_volumes = LambdaContainer._get_additional_volumes(debug_options)
+        layers_volume = LambdaContainer._get_layers_volume(image_builder, layers)
         cmd = [handler]
 
+        if layers_volume:
+            additional_volumes = dict(additional_volumes or {}, **layers_volume)
+
+        if runtime_api:
+            entry = LambdaContainer._RUNTIME_API_ENTRYPOINTS[runtime]
+            env_vars = LambdaContainer._get_runtime_api_env_vars(env_vars, handler, runtime_api)
+            additional_options = LambdaContainer._get_runtime_api_options(additional_options)
+
         super(LambdaContainer, self).__init__(image,
                                               cmd,
                                               self._WORKING_DIR,
@@ -83,7 +121,47 @@ class LambdaContainer(Container):
                                               entrypoint=entry,
                                               env_vars=env_vars,
                                               container_opts=additional_options,
-                                              additional_volumes=additional_volumes)
+                                              additional_volumes=additional_volumes,
+                                              stdin_open=stdin_open)
+
+    @staticmethod
+    def supports_runtime_api(runtime):
+        """
+        Checks if containers of the given runtime can be driven through the Lambda Runtime API
+
+        :param string runtime: Lambda function runtime name
+        :return bool: True, if the runtime can be used with ``runtime_api``
+        """
+        return runtime in LambdaContainer._RUNTIME_API_ENTRYPOINTS
+
+    @staticmethod
+    def _get_runtime_api_env_vars(env_vars, handler, runtime_api):
+        """
+        Returns the environment variables the runtime bootstraps read on AWS Lambda to find the handler and the
+        Runtime API endpoint.
+        """
+        result = dict(env_vars or {})
+        result.update({
+            "AWS_LAMBDA_RUNTIME_API": runtime_api,
+            "_HANDLER": handler,
+            "LAMBDA_TASK_ROOT": LambdaContainer._WORKING_DIR,
+            "LAMBDA_RUNTIME_DIR": "/var/runtime"
+        })
+        return result
+
+    @staticmethod
+    def _get_runtime_api_options(additional_options):
+        """
+        Returns the container options required to reach the Runtime API endpoint on the host. Docker for Mac and
+        Windows resolve ``host.docker.internal`` on their own. On Linux the name must be mapped to the host gateway
+        explicitly.
+        """
+        opts = dict(additional_options or {})
+
+        if sys.platform.startswith("linux"):
+            opts["extra_hosts"] = {"host.docker.internal": "host-gateway"}
+
+        return opts or None
 
     @staticmethod
     def _get_exposed_ports(debug_options):
@@ -139,6 +217,26 @@ class LambdaContainer(Container):
             debug_options.debugger_path: LambdaContainer._DEBUGGER_VOLUME_MOUNT
         }
 
+    @staticmethod
+    def _get_layers_volume(image_builder, layers):
+        """
+        Returns the volume that mounts the layers at /opt, if the image builder does not build them into the image
+
+        :param samcli.local.docker.lambda_image.LambdaImage image_builder: LambdaImage that prepares the layers
+        :param list layers: List of layers
+        :return dict: Volume map passed to container creation. None if the layers are part of the image
+        """
+        if not layers:
+            return None
+
+        layers_dir = image_builder.get_layers_mount(layers)
+        if not layers_dir:
+            return None
+
+        return {
+            layers_dir: LambdaContainer._LAYERS_VOLUME_MOUNT
+        }
+
     @staticmethod
     def _get_image(image_builder, runtime, layers):
         """
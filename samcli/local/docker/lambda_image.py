@@ -2,20 +2,18 @@
 Generates a Docker Image to be used for invoking a function locally
 """
 from enum import Enum
-import uuid
 import logging
 import hashlib
+import threading
 
 import docker
 
 from samcli.commands.local.cli_common.user_exceptions import ImageBuildException
-from samcli.lib.utils.tar import create_tarball
-
-try:
-    from pathlib import Path
-except ImportError:
-    from pathlib2 import Path
-
+from samcli.lib.utils.tar import stream_tarball
+from samcli.lib.utils.hash import dir_checksum, dir_fingerprint
+from samcli.local.lambdafn.timing import record_phase
+from samcli.local.layers.layer_overlay import LayerOverlay
+from .client import get_docker_client
 
 LOG = logging.getLogger(__name__)
 
@@ -52,7 +50,12 @@ class LambdaImage(object):
     _DOCKER_LAMBDA_REPO_NAME = "lambci/lambda"
     _SAM_CLI_REPO_NAME = "samcli/lambda"
 
-    def __init__(self, layer_downloader, skip_pull_image, force_image_build, docker_client=None):
+    # Path of a layer directory => (fingerprint of its metadata, digest of its content). Layers are only hashed again
+    # when their metadata changes
+    _layer_digests = {}
+    _layer_digests_lock = threading.Lock()
+
+    def __init__(self, layer_downloader, skip_pull_image, force_image_build, docker_client=None, mount_layers=False):
         """
 
         Parameters
@@ -64,12 +67,17 @@ class LambdaImage(object):
         force_image_build bool
             True to download the layer and rebuild the image even if it exists already on the system
         docker_client docker.DockerClient
-            Optional docker client object
+            Optional docker client object. Defaults to the client shared by the whole process
+        mount_layers bool
+            Optional. True to mount the layers into the container of the function instead of building an image with
+            them. See ``get_layers_mount``
         """
         self.layer_downloader = layer_downloader
         self.skip_pull_image = skip_pull_image
         self.force_image_build = force_image_build
-        self.docker_client = docker_client or docker.from_env()
+        self.docker_client = docker_client or get_docker_client()
+        self.mount_layers = mount_layers
+        self._layer_overlay = None
 
     def build(self, runtime, layers):
         """
@@ -94,29 +102,75 @@ class LambdaImage(object):
             LOG.debug("Skipping building an image since no layers were defined")
             return base_image
 
-        downloaded_layers = self.layer_downloader.download_all(layers, self.force_image_build)
+        if self.mount_layers:
+            LOG.debug("Skipping building an image since layers are mounted into the container")
+            return base_image
+
+        with self.layer_downloader.in_use(layers):
+            with record_phase("layer_download"):
+                downloaded_layers = self.layer_downloader.download_all(layers, self.force_image_build)
 
-        docker_image_version = self._generate_docker_image_version(downloaded_layers, runtime)
+            with record_phase("image_build"):
+                return self._get_or_build_image(base_image, runtime, downloaded_layers)
+
+    def _get_or_build_image(self, base_image, runtime, downloaded_layers):
+        """
+        Builds the image of the layers, unless it exists already
+
+        :return str: The image to be used (REPOSITORY:TAG)
+        """
+        # The tag is a digest of the base image and the content of the layers. An image with this tag is always
+        # up to date, even for layers defined in the template that change between invocations
+        base_image_id = self._get_image_id(base_image)
+        docker_image_version = self._generate_docker_image_version(downloaded_layers, runtime, base_image_id)
         image_tag = "{}:{}".format(self._SAM_CLI_REPO_NAME, docker_image_version)
 
         image_not_found = False
-
         try:
             self.docker_client.images.get(image_tag)
         except docker.errors.ImageNotFound:
             LOG.info("Image was not found.")
             image_not_found = True
 
-        if self.force_image_build or \
-                image_not_found or \
-                any(layer.is_defined_within_template for layer in downloaded_layers):
+        if self.force_image_build or image_not_found:
             LOG.info("Building image...")
             self._build_image(base_image, image_tag, downloaded_layers)
+            image_tag = self._retag_if_base_image_changed(image_tag, base_image, base_image_id, downloaded_layers,
+                                                          runtime)
 
         return image_tag
 
+    def get_layers_mount(self, layers):
+        """
+        When layers are mounted instead of built into the image, downloads the layers and merges them into one
+        directory to mount at /opt. Merged layers are reused by all functions with the same layers, until the content
+        of a layer changes.
+
+        Parameters
+        ----------
+        layers list(samcli.commands.local.lib.provider.Layer)
+            List of layers
+
+        Returns
+        -------
+        str
+            Directory to mount at /opt, read only. None if there are no layers or they are built into the image
+        """
+        if not self.mount_layers or not layers:
+            return None
+
+        with record_phase("layer_download"), self.layer_downloader.in_use(layers):
+            downloaded_layers = self.layer_downloader.download_all(layers, self.force_image_build)
+
+            if self._layer_overlay is None:
+                self._layer_overlay = LayerOverlay(self.layer_downloader.layer_cache,
+                                                   cache_manager=self.layer_downloader.cache_manager)
+
+            return self._layer_overlay.merge(self._generate_docker_image_version(downloaded_layers, "opt"),
+                                             downloaded_layers)
+
     @staticmethod
-    def _generate_docker_image_version(layers, runtime):
+    def _generate_docker_image_version(layers, runtime, base_image_id=None):
         """
         Generate the Docker TAG that will be used to create the image
 
@@ -128,6 +182,9 @@ class LambdaImage(object):
         runtime str
             Runtime of the image to create
 
+        base_image_id str
+            Optional. ID of the base image the image is built from, if it is available locally
+
         Returns
         -------
         str
@@ -139,8 +196,86 @@ class LambdaImage(object):
         # specified in the template. This will allow reuse of the runtime and layers across different
         # functions that are defined. If two functions use the same runtime with the same layers (in the
         # same order), SAM CLI will only produce one image and use this image across both functions for invoke.
-        return runtime + '-' + hashlib.sha256(
-            "-".join([layer.name for layer in layers]).encode('utf-8')).hexdigest()[0:25]
+        #
+        # Layers defined in the template can change at any time, so their content is part of the TAG. Layers that
+        # were downloaded are immutable, their name already includes their version. When the base image is updated,
+        # its ID changes and so does the TAG.
+        parts = [layer.name for layer in layers]
+        parts.extend(LambdaImage._get_layer_digest(layer.codeuri)
+                     for layer in layers if layer.is_defined_within_template)
+        if base_image_id:
+            parts.append(base_image_id)
+
+        return runtime + '-' + hashlib.sha256("-".join(parts).encode('utf-8')).hexdigest()[0:25]
+
+    @classmethod
+    def _get_layer_digest(cls, layer_path):
+        """
+        Returns the digest of the content of a layer directory. The content is only hashed again if the metadata of a
+        file in the directory changed since the last time.
+
+        Parameters
+        ----------
+        layer_path str
+            Path to the layer directory
+
+        Returns
+        -------
+        str
+            Hex digest of the content of the layer
+        """
+        fingerprint = dir_fingerprint(layer_path)
+
+        with cls._layer_digests_lock:
+            known = cls._layer_digests.get(layer_path)
+
+        if known and known[0] == fingerprint:
+            return known[1]
+
+        digest = dir_checksum(layer_path)
+
+        with cls._layer_digests_lock:
+            cls._layer_digests[layer_path] = (fingerprint, digest)
+
+        return digest
+
+    def _retag_if_base_image_changed(self, image_tag, base_image, base_image_id, layers, runtime):
+        """
+        The build pulls the base image if it is missing or outdated. The image then has to be found under the TAG
+        derived from the base image it was actually built from, or the next invocation would build it again.
+
+        Returns
+        -------
+        str
+            The tag of the built image (REPOSITORY:TAG)
+        """
+        new_base_image_id = self._get_image_id(base_image)
+        if new_base_image_id == base_image_id:
+            return image_tag
+
+        docker_image_version = self._generate_docker_image_version(layers, runtime, new_base_image_id)
+        self.docker_client.images.get(image_tag).tag(self._SAM_CLI_REPO_NAME, tag=docker_image_version)
+
+        return "{}:{}".format(self._SAM_CLI_REPO_NAME, docker_image_version)
+
+    def _get_image_id(self, image_name):
+        """
+        Returns the ID of an image, which is the digest of its configuration
+
+        Parameters
+        ----------
+        image_name str
+            Name of the image
+
+        Returns
+        -------
+        str
+            ID of the image or None if it is not available locally
+        """
+        try:
+            return self.docker_client.images.get(image_name).id
+        except docker.errors.ImageNotFound:
+            return None
 
     def _build_image(self, base_image, docker_tag, layers):
         """
@@ -166,31 +301,22 @@ class LambdaImage(object):
         """
         dockerfile_content = self._generate_dockerfile(base_image, layers)
 
-        # Create dockerfile in the same directory of the layer cache
-        dockerfile_name = "dockerfile_" + str(uuid.uuid4())
-        full_dockerfile_path = Path(self.layer_downloader.layer_cache, dockerfile_name)
+        tar_paths = {}
+        for layer in layers:
+            tar_paths[layer.codeuri] = '/' + layer.name
+
+        # The context is produced while Docker reads it. Neither it nor the Dockerfile are written to disk first
+        build_context = stream_tarball(tar_paths, files={"Dockerfile": dockerfile_content.encode("utf-8")})
 
         try:
-            with open(str(full_dockerfile_path), "w") as dockerfile:
-                dockerfile.write(dockerfile_content)
-
-            tar_paths = {str(full_dockerfile_path): "Dockerfile"}
-            for layer in layers:
-                tar_paths[layer.codeuri] = '/' + layer.name
-
-            with create_tarball(tar_paths) as tarballfile:
-                try:
-                    self.docker_client.images.build(fileobj=tarballfile,
-                                                    custom_context=True,
-                                                    rm=True,
-                                                    tag=docker_tag,
-                                                    pull=not self.skip_pull_image)
-                except (docker.errors.BuildError, docker.errors.APIError):
-                    LOG.exception("Failed to build Docker Image")
-                    raise ImageBuildException("Building Image failed.")
-        finally:
-            if full_dockerfile_path.exists():
-                full_dockerfile_path.unlink()
+            self.docker_client.images.build(fileobj=build_context,
+                                            custom_context=True,
+                                            rm=True,
+                                            tag=docker_tag,
+                                            pull=not self.skip_pull_image)
+        except (docker.errors.BuildError, docker.errors.APIError):
+            LOG.exception("Failed to build Docker Image")
+            raise ImageBuildException("Building Image failed.")
 
     @staticmethod
     def _generate_dockerfile(base_image, layers):
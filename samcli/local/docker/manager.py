@@ -5,10 +5,14 @@ Provides classes that interface with Docker to create, execute and manage contai
 import logging
 
 import sys
+import threading
 import docker
 import requests
 
 from samcli.lib.utils.stream_writer import StreamWriter
+from samcli.local.lambdafn.timing import record_phase
+from .client import get_docker_client
+from .image_cache import ImageStateCache
 
 LOG = logging.getLogger(__name__)
 
@@ -23,18 +27,38 @@ class ContainerManager(object):
     def __init__(self,
                  docker_network_id=None,
                  docker_client=None,
-                 skip_pull_image=False):
+                 skip_pull_image=False,
+                 warm_pool=None,
+                 image_cache=None,
+                 reaper=None):
         """
         Instantiate the container manager
 
         :param docker_network_id: Optional Docker network to run this container in.
-        :param docker_client: Optional docker client object
+        :param docker_client: Optional docker client object. Defaults to the client shared by the whole process
         :param bool skip_pull_image: Should we pull new Docker container image?
+        :param samcli.local.docker.warm_pool.WarmContainerPool warm_pool: Optional. Pool of stopped containers that
+            can be started again instead of creating new ones. Warm containers are not supported without it.
+        :param samcli.local.docker.image_cache.ImageStateCache image_cache: Optional. Cache of the images known to be
+            available locally. Defaults to the cache shared by the whole process
+        :param samcli.local.docker.reaper.ContainerReaper reaper: Optional. Removes containers in the background.
+            Containers are removed synchronously without it.
         """
 
         self.skip_pull_image = skip_pull_image
         self.docker_network_id = docker_network_id
-        self.docker_client = docker_client or docker.from_env()
+        self.docker_client = docker_client or get_docker_client()
+        self.warm_pool = warm_pool
+        self.image_cache = image_cache or ImageStateCache.shared()
+        self.reaper = reaper
+
+        # ID of a container in the warm pool => digest of the AWS credentials it was created with
+        self._warm_credentials = {}
+        self._warm_lock = threading.Lock()
+
+        if self.warm_pool is not None:
+            # Containers evicted from the pool are no longer needed
+            self.warm_pool.on_evict = self._evict_warm_container
 
     @property
     def is_docker_reachable(self):
@@ -67,18 +91,91 @@ class ContainerManager(object):
         :raises DockerImagePullFailedException: If the Docker image was not available in the server
         """
 
-        if warm:
+        if warm and self.warm_pool is None:
             raise ValueError("The facility to invoke warm container does not exist")
 
+        # Network is part of the container's configuration. Set it before looking for a warm container
+        container.network_id = self.docker_network_id
+
+        if warm and not container.is_created():
+            warm_container_id = self._acquire_warm_container(container)
+            if warm_container_id:
+                # Image was already available when the warm container was created. Skip straight to starting it.
+                container.adopt(warm_container_id)
+                try:
+                    with record_phase("start"):
+                        container.start(input_data=input_data)
+                    return
+                except docker.errors.APIError:
+                    # Someone removed the container while it was in the pool, or what it mounts, ex: code directories
+                    # and merged layers evicted from their caches. Fall back to creating a new one
+                    LOG.debug("Failed to start warm container %s", warm_container_id, exc_info=True)
+                    container.delete()
+
         image_name = container.image
+        with record_phase("image_build"):
+            self._prepare_image(image_name)
+
+        if not container.is_created():
+            # Create the container first before running.
+            # Create the container in appropriate Docker network
+            try:
+                with record_phase("create"):
+                    container.create()
+            except docker.errors.ImageNotFound:
+                # The image was removed since we last saw it. Forget about it and prepare it again
+                LOG.debug("Image %s is no longer available", image_name)
+                self.image_cache.invalidate(image_name)
+                with record_phase("image_build"):
+                    self._prepare_image(image_name)
+                with record_phase("create"):
+                    container.create()
+
+        with record_phase("start"):
+            container.start(input_data=input_data)
+
+    def prepare(self, container):
+        """
+        Makes sure everything the container needs exists, for clients that create and start the container themselves:
+        the image is available and the container is configured to join the network of this manager.
+
+        :param samcli.local.docker.container.Container container: Container to prepare
+        :raises DockerImagePullFailedException: If the Docker image was not available in the server
+        """
+        container.network_id = self.docker_network_id
 
-        is_image_local = self.has_image(image_name)
+        with record_phase("image_build"):
+            self._prepare_image(container.image)
+
+    def _prepare_image(self, image_name):
+        """
+        Makes sure the image is available locally, pulling it if required. The outcome is cached, so subsequent
+        invocations skip the Docker API calls entirely until the cached state expires.
+
+        :param string image_name: Name of the image
+        :raises DockerImagePullFailedException: If the image is not available locally and could not be pulled
+        """
+        # Images built by SAM CLI only exist locally. There is nothing to pull.
+        require_pull = not self.skip_pull_image and not image_name.startswith('samcli/lambda')
+
+        if self.image_cache.is_fresh(image_name, require_pull=require_pull):
+            return
+
+        with self.image_cache.single_flight(image_name):
+            # Another thread might have prepared the image while we were waiting
+            if self.image_cache.is_fresh(image_name, require_pull=require_pull):
+                return
+
+            is_image_local = self.has_image(image_name)
+
+            # Skip Pulling a new image if: a) Image name is samcli/lambda OR b) Image is available AND
+            # c) We are asked to skip pulling the image
+            if (is_image_local and self.skip_pull_image) or image_name.startswith('samcli/lambda'):
+                LOG.info("Requested to skip pulling images ...\n")
+                if is_image_local:
+                    self.image_cache.mark_available(image_name)
+                return
 
-        # Skip Pulling a new image if: a) Image name is samcli/lambda OR b) Image is available AND
-        # c) We are asked to skip pulling the image
-        if (is_image_local and self.skip_pull_image) or image_name.startswith('samcli/lambda'):
-            LOG.info("Requested to skip pulling images ...\n")
-        else:
             try:
                 self.pull_image(image_name)
             except DockerImagePullFailedException:
@@ -89,22 +186,85 @@ class ContainerManager(object):
                 LOG.info(
                     "Failed to download a new %s image. Invoking with the already downloaded image.", image_name)
 
-        if not container.is_created():
-            # Create the container first before running.
-            # Create the container in appropriate Docker network
-            container.network_id = self.docker_network_id
-            container.create()
+            self.image_cache.mark_available(image_name, pulled=True)
 
-        container.start(input_data=input_data)
-
-    def stop(self, container):
+    def stop(self, container, warm=False):
         """
         Stop and delete the container
 
         :param samcli.local.docker.container.Container container: Container to stop
+        :param bool warm: Indicates if the container has finished running and can be kept in the warm pool to serve
+            subsequent requests instead of being deleted. Defaults False.
         """
+        if warm and self.warm_pool is not None and container.is_created():
+            with self._warm_lock:
+                self._warm_credentials[container.id] = container.credentials_hash()
+            self.warm_pool.release(container.config_hash(), container.id)
+
+            # The container now belongs to the pool. Detach it so this instance can't delete it anymore.
+            container.id = None
+            return
+
+        if self.reaper is not None and container.is_created():
+            # Nobody waits for the container to be removed. Let the reaper do it in the background
+            self.reaper.schedule(container.id)
+            container.id = None
+            return
+
         container.delete()
 
+    def _acquire_warm_container(self, container):
+        """
+        Takes a stopped container with the configuration of the given container out of the warm pool. Warm containers
+        created with AWS credentials that have been refreshed since are removed instead of being reused.
+
+        :param samcli.local.docker.container.Container container: Container that is about to run
+        :return string: ID of the warm container, or None if the pool has no usable container
+        """
+        config_hash = container.config_hash()
+        credentials_hash = container.credentials_hash()
+
+        while True:
+            container_id = self.warm_pool.acquire(config_hash)
+            if not container_id:
+                return None
+
+            with self._warm_lock:
+                warm_credentials_hash = self._warm_credentials.pop(container_id, None)
+
+            if warm_credentials_hash == credentials_hash:
+                return container_id
+
+            LOG.debug("Warm container %s was created with outdated credentials", container_id)
+            self.remove_container(container_id)
+
+    def _evict_warm_container(self, container_id):
+        """
+        Removes a container the warm pool evicted
+
+        :param string container_id: ID of the container
+        """
+        with self._warm_lock:
+            self._warm_credentials.pop(container_id, None)
+
+        self.remove_container(container_id)
+
+    def remove_container(self, container_id):
+        """
+        Delete a container with given ID, even if it is running. Used to clean up containers evicted from the
+        warm pool.
+
+        :param string container_id: ID of the container to delete
+        """
+        if self.reaper is not None:
+            self.reaper.schedule(container_id)
+            return
+
+        try:
+            self.docker_client.containers.get(container_id).remove(force=True)
+        except docker.errors.NotFound:
+            LOG.debug("Container with ID %s does not exist. Skipping deletion", container_id)
+
     def pull_image(self, image_name, stream=None):
         """
         Ask Docker to pull the container image with given name.
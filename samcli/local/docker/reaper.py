@@ -0,0 +1,203 @@
+"""
+Removes containers in the background so invocations don't wait for Docker to delete them
+"""
+
+import os
+import time
+import errno
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import docker
+
+from .client import get_docker_client
+from .container import Container
+from .utils import get_host_id
+
+LOG = logging.getLogger(__name__)
+
+
+class ContainerReaper(object):
+    """
+    Deletes containers on a small pool of background threads. Removing a container can take a few hundred milliseconds
+    and nothing depends on it, so the invocation returns as soon as the container is handed over to the reaper.
+
+    Removals that fail with a transient Docker error are retried a few times. ``drain`` waits for every pending removal
+    and must be called before the process exits, otherwise containers are left behind. Containers left behind by a
+    session that crashed are found through the labels every container is created with, see ``remove_orphans``.
+    """
+
+    # States of containers that are not running. Only these are ever treated as orphans
+    ORPHAN_STATES = ["created", "exited"]
+
+    DEFAULT_MAX_WORKERS = 4
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_RETRY_DELAY = 0.5  # seconds
+
+    def __init__(self,
+                 docker_client=None,
+                 max_workers=None,
+                 max_retries=None,
+                 retry_delay=None,
+                 sleep=time.sleep):
+        """
+        Initialize the reaper
+
+        Parameters
+        ----------
+        docker_client docker.DockerClient
+            Optional. Docker client used to remove the containers. Defaults to the shared client
+        max_workers int
+            Optional. Maximum number of containers removed in parallel. Defaults to 4
+        max_retries int
+            Optional. Number of times a failed removal is retried. Defaults to 3
+        retry_delay float
+            Optional. Seconds to wait before the first retry. The delay doubles with every retry. Defaults to 0.5
+        sleep callable
+            Optional. Waits for the given number of seconds. Defaults to ``time.sleep``
+        """
+        self.docker_client = docker_client or get_docker_client()
+        self.max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self.max_retries = self.DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay = self.DEFAULT_RETRY_DELAY if retry_delay is None else retry_delay
+        self._sleep = sleep
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def schedule(self, container_id):
+        """
+        Removes the container with the given ID in the background. After ``drain`` was called, the container is
+        removed right away on the calling thread instead.
+
+        :param string container_id: ID of the container to remove
+        """
+        future = None
+        with self._lock:
+            if not self._closed:
+                future = self._executor.submit(self._remove, container_id)
+                self._pending.add(future)
+
+        if future is None:
+            self._remove(container_id)
+            return
+
+        # Runs right away if the removal already finished, so it must be registered outside of the lock
+        future.add_done_callback(self._discard)
+
+    def drain(self, timeout=None):
+        """
+        Waits for all pending removals to finish and stops the background threads. Containers scheduled afterwards
+        are removed synchronously.
+
+        :param float timeout: Optional. Maximum number of seconds to wait. Waits until everything is removed if not
+            set
+        :return bool: True if every pending removal finished
+        """
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending)
+
+        if pending:
+            LOG.debug("Waiting for %d container(s) to be removed", len(pending))
+
+        _, not_done = wait(pending, timeout=timeout)
+        self._executor.shutdown(wait=not not_done)
+
+        if not_done:
+            LOG.warning("%d container(s) could not be removed in time. You may have to remove them manually",
+                        len(not_done))
+
+        return not not_done
+
+    def remove_orphans(self):
+        """
+        Schedules the removal of stopped containers created by SAM CLI processes that are no longer running.
+        Containers of this process and of other running sessions are left alone. Only containers created from this
+        host are considered, because other hosts sharing the Docker daemon have processes of their own. Containers
+        that are still running are never removed.
+
+        :return list: IDs of the orphaned containers
+        """
+        filters = {
+            "label": [Container.SAM_LABEL, "{}={}".format(Container.HOST_LABEL, get_host_id())],
+            "status": self.ORPHAN_STATES
+        }
+
+        try:
+            containers = self.docker_client.containers.list(all=True, filters=filters)
+        except docker.errors.APIError:
+            LOG.debug("Failed to list containers created by SAM CLI", exc_info=True)
+            return []
+
+        orphans = [container.id for container in containers
+                   if not self._is_process_running(container.labels.get(Container.PID_LABEL))]
+
+        if orphans:
+            LOG.debug("Removing %d container(s) left behind by previous sessions", len(orphans))
+
+        for container_id in orphans:
+            self.schedule(container_id)
+
+        return orphans
+
+    def _remove(self, container_id):
+        delay = self.retry_delay
+        attempt = 0
+
+        while True:
+            try:
+                self.docker_client.containers.get(container_id).remove(force=True)
+                LOG.debug("Removed container %s", container_id)
+                return True
+            except docker.errors.NotFound:
+                LOG.debug("Container with ID %s does not exist. Skipping deletion", container_id)
+                return True
+            except docker.errors.APIError as ex:
+                msg = str(ex)
+                if ("removal of container" in msg) and ("is already in progress" in msg):
+                    # Someone else is removing the container already
+                    return True
+
+                if attempt >= self.max_retries:
+                    LOG.warning("Failed to remove container %s: %s", container_id, msg)
+                    return False
+
+                LOG.debug("Failed to remove container %s. Retrying in %s seconds", container_id, delay, exc_info=True)
+
+            attempt += 1
+            self._sleep(delay)
+            delay *= 2
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    @staticmethod
+    def _is_process_running(pid):
+        """
+        Checks if the process that created a container is still alive. Containers without a valid PID label are
+        treated as orphans.
+        """
+        try:
+            pid = int(pid)
+        except (TypeError, ValueError):
+            return False
+
+        if pid == os.getpid():
+            return True
+
+        if os.name == "nt":
+            # There is no side effect free way to probe a process on Windows. Never treat containers as orphans there
+            return True
+
+        try:
+            os.kill(pid, 0)
+        except OSError as ex:
+            # EPERM means the process exists but belongs to someone else
+            return ex.errno == errno.EPERM
+
+        return True
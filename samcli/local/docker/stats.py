@@ -0,0 +1,159 @@
+"""
+Samples the resource usage of a running container through the Docker stats API
+"""
+
+import socket
+import logging
+import threading
+
+import docker
+import requests
+
+from .client import get_docker_client
+
+LOG = logging.getLogger(__name__)
+
+
+class ResourceUsage(object):
+    """
+    Peak memory and CPU time a container used, as seen in the samples of its cgroup statistics
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.max_memory_bytes = 0
+        self.peak_rss_bytes = 0
+        self.cpu_seconds = 0.0
+
+    def add_sample(self, stats):
+        """
+        Updates the usage with one sample of the Docker stats API. Works with both cgroup v1 and v2 statistics.
+
+        :param dict stats: Decoded sample
+        """
+        memory_stats = stats.get("memory_stats") or {}
+        cpu_usage = (stats.get("cpu_stats") or {}).get("cpu_usage") or {}
+
+        if not memory_stats and not cpu_usage:
+            # Samples of a container that is not running are empty
+            return
+
+        self.samples += 1
+
+        # cgroup v1 tracks the peak itself. v2 only reports the current usage, so the peak is what we sampled
+        self.max_memory_bytes = max(self.max_memory_bytes,
+                                    memory_stats.get("max_usage") or 0,
+                                    memory_stats.get("usage") or 0)
+
+        detailed = memory_stats.get("stats") or {}
+        rss = detailed.get("total_rss", detailed.get("rss", detailed.get("anon"))) or 0
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+
+        # Total CPU time of the cgroup in nanoseconds. It only grows, so the latest sample is the total
+        self.cpu_seconds = max(self.cpu_seconds, (cpu_usage.get("total_usage") or 0) / 1e9)
+
+    def to_dict(self):
+        """
+        :return dict: Usage in megabytes and seconds
+        """
+        return {
+            "samples": self.samples,
+            "max_memory_used_mb": _to_mb(self.max_memory_bytes),
+            "peak_rss_mb": _to_mb(self.peak_rss_bytes),
+            "cpu_seconds": round(self.cpu_seconds, 3)
+        }
+
+
+class ContainerStatsSampler(object):
+    """
+    Follows the stats stream of a container on a background thread while the container runs. Docker publishes a
+    sample about once a second, so a function that finishes sooner might not be sampled at all.
+
+    Stopping the sampler aborts the stream instead of waiting for its next sample, so it never delays the invocation.
+    """
+
+    def __init__(self, container_id, docker_client=None):
+        """
+        Initialize the sampler
+
+        Parameters
+        ----------
+        container_id str
+            ID of the container to sample
+        docker_client docker.DockerClient
+            Optional. Docker client to read the stats with. Defaults to the shared client
+        """
+        self.container_id = container_id
+        self.usage = ResourceUsage()
+
+        self._docker_client = docker_client or get_docker_client()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._response = None
+        self._thread = None
+
+    def start(self):
+        """
+        Starts sampling in the background
+        """
+        self._thread = threading.Thread(target=self._sample, name="sam-container-stats")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sampling and aborts the stats stream. Returns right away, with the samples that arrived so far.
+
+        :return ResourceUsage: Usage seen in the samples. None if no sample arrived
+        """
+        with self._lock:
+            self._stopped.set()
+            response = self._response
+
+        if response is not None:
+            self._abort(response)
+
+        return self.usage if self.usage.samples else None
+
+    def _sample(self):
+        api = self._docker_client.api
+        response = None
+
+        try:
+            # Same request as APIClient.stats, but the response is kept so the stream can be aborted
+            response = api._get(api._url("/containers/{0}/stats", self.container_id),  # pylint: disable=W0212
+                                stream=True)
+            with self._lock:
+                if self._stopped.is_set():
+                    return
+                self._response = response
+
+            api._raise_for_status(response)  # pylint: disable=W0212
+            for stats in api._stream_helper(response, decode=True):  # pylint: disable=W0212
+                self.usage.add_sample(stats)
+        except Exception:  # pylint: disable=broad-except
+            # Reading fails once the stream is aborted. Anything else is worth a note
+            if not self._stopped.is_set():
+                LOG.debug("Failed to read the stats of container %s", self.container_id, exc_info=True)
+        finally:
+            if response is not None:
+                response.close()
+
+    def _abort(self, response):
+        """
+        Shuts the connection of the stats stream down, which wakes up the thread blocked reading it. Closing the
+        response alone does not interrupt a read in progress.
+        """
+        try:
+            sock = self._docker_client.api._get_raw_response_socket(response)  # pylint: disable=W0212
+
+            # On Python 3 the response socket is a socket.SocketIO wrapping the actual socket
+            getattr(sock, "_sock", sock).shutdown(socket.SHUT_RDWR)
+        except (docker.errors.APIError, requests.exceptions.RequestException, AttributeError, socket.error):
+            LOG.debug("Failed to abort the stats stream of container %s", self.container_id, exc_info=True)
+
+        response.close()
+
+
+def _to_mb(size):
+    return int(round(size / (1024.0 * 1024.0)))
@@ -4,6 +4,8 @@ Helper methods that aid with changing the mount path to unix style.
 
 import os
 import re
+import socket
+import hashlib
 import posixpath
 try:
     import pathlib
@@ -34,3 +36,34 @@ def to_posix_path(code_path):
     return re.sub("^([A-Za-z])+:",
                   lambda match: posixpath.sep + match.group().replace(":", "").lower(),
                   pathlib.PureWindowsPath(code_path).as_posix()) if os.name == "nt" else code_path
+
+
+_HOST_ID = None
+
+
+def get_host_id():
+    """
+    Returns an ID of the machine, and of the PID namespace, this process runs in. Process IDs are only meaningful
+    among processes with the same host ID: several machines, or containers, can share the same Docker daemon.
+
+    Returns
+    -------
+    str
+        Hex digest of the host name, the boot ID and the PID namespace, as far as they are known on this platform
+    """
+    global _HOST_ID  # pylint: disable=global-statement
+
+    if _HOST_ID is None:
+        parts = [socket.gethostname()]
+
+        try:
+            with open("/proc/sys/kernel/random/boot_id") as boot_id:
+                parts.append(boot_id.read().strip())
+            parts.append(os.readlink("/proc/self/ns/pid"))
+        except (IOError, OSError):
+            # Not on Linux
+            pass
+
+        _HOST_ID = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+    return _HOST_ID
@@ -0,0 +1,173 @@
+"""
+Keeps a pool of idle containers that can be reused to serve subsequent invocations
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+LOG = logging.getLogger(__name__)
+
+
+class WarmContainerPool(object):
+    """
+    Thread-safe pool of idle ("warm") containers grouped by a key that identifies the configuration the container was
+    created with. Only containers with the exact same key are interchangeable.
+
+    The pool never talks to Docker directly. It only keeps track of the idle items and calls the ``on_evict`` callback
+    whenever an item has to be thrown away, either because it was idle for longer than ``idle_ttl`` seconds or because
+    the pool grew beyond ``max_size`` items. The callback is responsible for actually removing the container.
+    """
+
+    DEFAULT_MAX_SIZE = 10
+    DEFAULT_IDLE_TTL = 300  # 5 minutes in seconds
+
+    def __init__(self, max_size=None, idle_ttl=None, on_evict=None, clock=time.time):
+        """
+        Initialize the pool
+
+        Parameters
+        ----------
+        max_size int
+            Optional. Maximum number of idle containers to keep across all keys. Defaults to 10
+        idle_ttl int
+            Optional. Number of seconds a container can be idle before it is evicted. Defaults to 300
+        on_evict callable
+            Optional. Called with the evicted item whenever an item is removed from the pool
+        clock callable
+            Optional. Returns the current time in seconds. Defaults to ``time.time``
+        """
+        self.max_size = self.DEFAULT_MAX_SIZE if max_size is None else max_size
+        self.idle_ttl = self.DEFAULT_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.on_evict = on_evict
+        self._clock = clock
+
+        # Ordered from the least recently released to the most recently released item. Each value is a tuple of
+        # (key, item, release time) and the dictionary key is a monotonically increasing sequence number.
+        self._idle = OrderedDict()
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+        self._reaper = None
+        self._closed = threading.Event()
+
+    def acquire(self, key):
+        """
+        Take an idle item with the given key out of the pool. The most recently released item is returned first
+        because it is the most likely one to still have warm caches.
+
+        Parameters
+        ----------
+        key str
+            Configuration key of the container
+
+        Returns
+        -------
+        Item that was released with this key earlier, or None if there is no idle item
+        """
+        self.evict_expired()
+
+        with self._lock:
+            for sequence in reversed(self._idle):
+                item_key, item, _ = self._idle[sequence]
+                if item_key == key:
+                    del self._idle[sequence]
+                    LOG.debug("Reusing warm container %s", item)
+                    return item
+
+        return None
+
+    def release(self, key, item):
+        """
+        Put an item back into the pool so it can be acquired by a subsequent invocation. If the pool is already full,
+        the least recently used idle item is evicted.
+
+        Parameters
+        ----------
+        key str
+            Configuration key of the container
+        item
+            Item to keep in the pool. Usually the ID of the container
+        """
+        if self._closed.is_set() or self.max_size <= 0:
+            self._evict([item])
+            return
+
+        evicted = []
+        with self._lock:
+            self._sequence += 1
+            self._idle[self._sequence] = (key, item, self._clock())
+
+            while len(self._idle) > self.max_size:
+                _, (_, oldest, _) = self._idle.popitem(last=False)
+                evicted.append(oldest)
+
+        self._evict(evicted)
+        self._start_reaper()
+
+    def evict_expired(self):
+        """
+        Evict every item that has been idle for longer than the configured TTL
+        """
+        now = self._clock()
+        evicted = []
+
+        with self._lock:
+            for sequence in list(self._idle):
+                _, item, released_at = self._idle[sequence]
+                if now - released_at < self.idle_ttl:
+                    # Items are ordered by release time. Everything after this one is younger.
+                    break
+                del self._idle[sequence]
+                evicted.append(item)
+
+        self._evict(evicted)
+
+    def drain(self):
+        """
+        Evict all idle items and stop accepting new ones. Call this before the process exits so no containers are
+        left behind.
+        """
+        self._closed.set()
+
+        with self._lock:
+            evicted = [item for _, item, _ in self._idle.values()]
+            self._idle.clear()
+
+        self._evict(evicted)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle)
+
+    def _evict(self, items):
+        # Runs outside of the lock. Eviction usually removes a Docker container which could take a while
+        for item in items:
+            LOG.debug("Evicting warm container %s", item)
+            if not self.on_evict:
+                continue
+
+            try:
+                self.on_evict(item)
+            except Exception:  # pylint: disable=broad-except
+                LOG.debug("Failed to evict warm container %s", item, exc_info=True)
+
+    def _start_reaper(self):
+        """
+        Starts a daemon thread that periodically evicts expired items so idle containers don't outlive the TTL when
+        there is no traffic to trigger the eviction
+        """
+        with self._lock:
+            if self._reaper:
+                return
+
+            self._reaper = threading.Thread(target=self._reap, name="sam-warm-pool-reaper")
+            self._reaper.daemon = True
+
+        self._reaper.start()
+
+    def _reap(self):
+        interval = max(1, min(self.idle_ttl, 30))
+        while not self._closed.wait(interval):
+            self.evict_expired()
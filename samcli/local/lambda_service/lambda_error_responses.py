@@ -22,6 +22,9 @@ class LambdaErrorResponses(object):
 
     NotImplementedException = ('NotImplemented', 501)
 
+    # The function is running at its concurrency limit and the request could not be queued.
+    TooManyRequestsException = ('TooManyRequests', 429)
+
     PathNotFoundException = ('PathNotFoundLocally', 404)
 
     MethodNotAllowedException = ('MethodNotAllowedLocally', 405)
@@ -61,6 +64,29 @@ class LambdaErrorResponses(object):
             exception_tuple[1]
         )
 
+    @staticmethod
+    def too_many_requests(message):
+        """
+        Creates a Lambda Service TooManyRequests Response
+
+        Parameters
+        ----------
+        message str
+            Message to be added to the body of the response
+
+        Returns
+        -------
+        Flask.Response
+            A response object representing the TooManyRequests Error
+        """
+        exception_tuple = LambdaErrorResponses.TooManyRequestsException
+
+        return BaseLocalService.service_response(
+            LambdaErrorResponses._construct_error_response_body(LambdaErrorResponses.USER_ERROR, message),
+            LambdaErrorResponses._construct_headers(exception_tuple[0]),
+            exception_tuple[1]
+        )
+
     @staticmethod
     def invalid_request_content(message):
         """
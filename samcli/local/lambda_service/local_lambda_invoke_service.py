@@ -2,13 +2,13 @@
 
 import json
 import logging
-import io
 
 from flask import Flask, request
 
 from samcli.lib.utils.stream_writer import StreamWriter
+from samcli.lib.utils.output_buffer import OutputBuffer
 from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputParser
-from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.local.lambdafn.exceptions import FunctionNotFound, TooManyRequests
 from .lambda_error_responses import LambdaErrorResponses
 
 LOG = logging.getLogger(__name__)
@@ -16,7 +16,7 @@ LOG = logging.getLogger(__name__)
 
 class LocalLambdaInvokeService(BaseLocalService):
 
-    def __init__(self, lambda_runner, port, host, stderr=None):
+    def __init__(self, lambda_runner, port, host, stderr=None, server=None):
         """
         Creates a Local Lambda Service that will only response to invoking a function
 
@@ -30,8 +30,11 @@ class LocalLambdaInvokeService(BaseLocalService):
             Optional. host to start the service on
         stderr io.BaseIO
             Optional stream where the stderr from Docker container should be written to
+        server samcli.local.services.http_servers.WerkzeugServer
+            Optional. Server to run the service on. Defaults to Flask's development server
         """
-        super(LocalLambdaInvokeService, self).__init__(lambda_runner.is_debugging(), port=port, host=host)
+        super(LocalLambdaInvokeService, self).__init__(lambda_runner.is_debugging(), port=port, host=host,
+                                                       server=server)
         self.lambda_runner = lambda_runner
         self.stderr = stderr
 
@@ -138,7 +141,7 @@ class LocalLambdaInvokeService(BaseLocalService):
 
         request_data = request_data.decode('utf-8')
 
-        stdout_stream = io.BytesIO()
+        stdout_stream = OutputBuffer()
         stdout_stream_writer = StreamWriter(stdout_stream, self.is_debugging)
 
         try:
@@ -146,6 +149,9 @@ class LocalLambdaInvokeService(BaseLocalService):
         except FunctionNotFound:
             LOG.debug('%s was not found to invoke.', function_name)
             return LambdaErrorResponses.resource_not_found(function_name)
+        except TooManyRequests as ex:
+            LOG.debug('Invocation of %s was throttled: %s', function_name, ex)
+            return LambdaErrorResponses.too_many_requests(str(ex))
 
         lambda_response, lambda_logs, is_lambda_user_error_response = \
             LambdaOutputParser.get_lambda_output(stdout_stream)
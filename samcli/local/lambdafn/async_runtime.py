@@ -0,0 +1,140 @@
+"""
+Lambda runtime whose invocations run as co-routines on an asyncio event loop. Requires Python 3.6+ and aiodocker.
+"""
+
+import asyncio
+import logging
+
+import aiodocker
+
+from samcli.local.docker.lambda_container import LambdaContainer
+from .runtime import LambdaRuntime
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncLambdaRuntime(LambdaRuntime):
+    """
+    Lambda runtime that can be invoked from an asyncio event loop. ``invoke_async`` creates, starts, attaches to and
+    removes the function container through the Docker API without blocking the loop, so a single thread can wait for
+    any number of invocations at the same time. Only the preparation of an invocation, which mostly hits caches, runs
+    in the default executor of the loop: building the image, extracting the code and resolving the environment.
+
+    The event is passed to the container through its environment and every invocation runs in a container of its own.
+    Debugging is not supported. ``invoke`` still runs functions the blocking way.
+    """
+
+    # This frame type value is coming directly from Docker Attach Stream API spec
+    _STDOUT_FRAME_TYPE = 1
+    _STDERR_FRAME_TYPE = 2
+
+    def __init__(self, container_manager, image_builder, code_cache=None, docker=None):
+        """
+        Initialize the runtime
+
+        Parameters
+        ----------
+        container_manager samcli.local.docker.manager.ContainerManager
+            Instance of the ContainerManager class that prepares the images and networks of the containers
+        image_builder samcli.local.docker.lambda_image.LambdaImage
+            Instance of the LambdaImage class that can create am image
+        code_cache samcli.local.lambdafn.extraction_cache.ExtractionCache
+            Optional. Keeps zip/jar code archives extracted between invocations
+        docker aiodocker.Docker
+            Optional. Docker client to run the containers with. Created on the first invocation, in the event loop
+            of the invocation, if not given
+        """
+        super(AsyncLambdaRuntime, self).__init__(container_manager, image_builder, code_cache=code_cache)
+        self._docker = docker
+
+    async def invoke_async(self, function_config, event, stdout=None, stderr=None):
+        """
+        Invoke the given Lambda function locally. The co-routine completes once the function completed or timed out.
+
+        :param FunctionConfig function_config: Configuration of the function to invoke
+        :param event: String input event passed to Lambda function
+        :param io.IOBase stdout: Optional. IO Stream to that receives stdout text from container.
+        :param io.IOBase stderr: Optional. IO Stream that receives stderr text from container
+        """
+        loop = asyncio.get_event_loop()
+
+        environ = function_config.env_vars
+        environ.add_lambda_event_body(event)
+        env_vars = environ.resolve()
+
+        code_dir_context = self._get_code_dir(function_config.code_abs_path)
+        code_dir = await loop.run_in_executor(None, code_dir_context.__enter__)  # pylint: disable=no-member
+        try:
+            container = await loop.run_in_executor(None, self._prepare_container, function_config, code_dir, env_vars)
+            await self._run(container, function_config, stdout, stderr)
+        finally:
+            await loop.run_in_executor(None, code_dir_context.__exit__, None, None, None)  # pylint: disable=no-member
+
+    async def close(self):
+        """
+        Closes the connections to Docker. Call this from the event loop of the invocations once the runtime is no
+        longer used.
+        """
+        if self._docker is not None:
+            await self._docker.close()
+            self._docker = None
+
+    def _prepare_container(self, function_config, code_dir, env_vars):
+        """
+        Builds the image of the function and configures its container. This is a blocking call.
+
+        :return samcli.local.docker.lambda_container.LambdaContainer: Container to run the invocation in
+        """
+        container = LambdaContainer(function_config.runtime,
+                                    function_config.handler,
+                                    code_dir,
+                                    function_config.layers,
+                                    self._image_builder,
+                                    memory_mb=function_config.memory,
+                                    env_vars=env_vars)
+
+        self._container_manager.prepare(container)
+        return container
+
+    async def _run(self, container, function_config, stdout, stderr):
+        """
+        Runs the container and writes its output to the streams, until it exits or the function timed out. The
+        container is removed in any case.
+        """
+        if self._docker is None:
+            self._docker = aiodocker.Docker()
+
+        real_container = await self._docker.containers.create(container.api_config())
+        try:
+            # Attach before starting, so no output is missed
+            async with real_container.attach(stdout=True, stderr=True, logs=False) as stream:
+                await real_container.start()
+
+                try:
+                    await asyncio.wait_for(self._write_container_output(stream, stdout, stderr),
+                                           function_config.timeout)
+                except asyncio.TimeoutError:
+                    LOG.info("Function '%s' timed out after %d seconds", function_config.name, function_config.timeout)
+        finally:
+            try:
+                await real_container.delete(force=True)
+            except aiodocker.DockerError:
+                LOG.debug("Failed to remove container %s", real_container.id, exc_info=True)
+
+    @classmethod
+    async def _write_container_output(cls, stream, stdout, stderr):
+        """
+        Writes the frames of the attach stream to the matching output stream until the container exits
+        """
+        while True:
+            message = await stream.read_out()
+            if message is None:
+                return
+
+            if message.stream == cls._STDOUT_FRAME_TYPE and stdout:
+                stdout.write(message.data)
+            elif message.stream == cls._STDERR_FRAME_TYPE and stderr:
+                stderr.write(message.data)
+            else:
+                LOG.debug("Dropping Docker container output because of unconfigured frame type. "
+                          "Frame Type: %s. Data: %s", message.stream, message.data)
@@ -74,6 +74,10 @@ class EnvironmentVariables(object):
         self.override_values = override_values or {}
         self.aws_creds = aws_creds or {}
 
+        # Resolved values of ``variables``. They only depend on the configuration of the function and the shell
+        # environment, so they are resolved once and shared with copies
+        self._resolved_variables = None
+
     def resolve(self):
         """
         Resolves the values from different sources and returns a dict of environment variables to use when running
@@ -86,28 +90,49 @@ class EnvironmentVariables(object):
         # AWS_* variables must always be passed to the function, but user has the choice to override them
         result = self._get_aws_variables()
 
-        # Default value for the variable gets lowest priority
-        for name, value in self.variables.items():
-
-            # Shell environment values, second priority
-            if name in self.shell_env_values:
-                value = self.shell_env_values[name]
+        # Variables of the function. Their values are resolved once, from the highest priority source defining them
+        if self._resolved_variables is None:
+            self._resolved_variables = {name: self._resolve_value(name, value)
+                                        for name, value in self.variables.items()}
 
-            # Overridden values, highest priority
-            if name in self.override_values:
-                value = self.override_values[name]
+        result.update(self._resolved_variables)
+        return result
 
-            # Any value must be a string when passed to Lambda runtime.
-            # Runtime expects a Map<String, String> for environment variables
-            result[name] = self._stringify_value(value)
+    def copy(self, aws_creds=None):
+        """
+        Returns a copy of these environment variables that values of a single invocation, like its event, can be added
+        to. Values resolved so far are shared with the copy instead of being resolved again.
 
+        :param dict aws_creds: Optional. Credentials of the copy. Defaults to the credentials of this instance
+        :return EnvironmentVariables: Copy of the environment variables
+        """
+        self.resolve()
+
+        result = EnvironmentVariables(self.memory,
+                                      self.timeout,
+                                      self.handler,
+                                      variables=dict(self.variables),
+                                      shell_env_values=self.shell_env_values,
+                                      override_values=self.override_values,
+                                      aws_creds=self.aws_creds if aws_creds is None else aws_creds)
+        result._resolved_variables = dict(self._resolved_variables)  # pylint: disable=protected-access
         return result
 
     def add_lambda_event_body(self, value):
         """
         Adds the value of AWS_LAMBDA_EVENT_BODY environment variable.
         """
-        self.variables["AWS_LAMBDA_EVENT_BODY"] = value
+        self._set_variable("AWS_LAMBDA_EVENT_BODY", value)
+
+    def add_lambda_event_stdin(self):
+        """
+        Makes the runtime read the event from its stdin instead of the AWS_LAMBDA_EVENT_BODY environment variable.
+        """
+        self.variables.pop("AWS_LAMBDA_EVENT_BODY", None)
+        if self._resolved_variables is not None:
+            self._resolved_variables.pop("AWS_LAMBDA_EVENT_BODY", None)
+
+        self._set_variable("DOCKER_LAMBDA_USE_STDIN", "1")
 
     @property
     def timeout(self):
@@ -172,6 +197,28 @@ class EnvironmentVariables(object):
 
         return result
 
+    def _set_variable(self, name, value):
+        self.variables[name] = value
+        if self._resolved_variables is not None:
+            self._resolved_variables[name] = self._resolve_value(name, value)
+
+    def _resolve_value(self, name, value):
+        """
+        Returns the value of a variable, given its default value, from the highest priority source that defines it
+        """
+
+        # Shell environment values, second priority
+        if name in self.shell_env_values:
+            value = self.shell_env_values[name]
+
+        # Overridden values, highest priority
+        if name in self.override_values:
+            value = self.override_values[name]
+
+        # Any value must be a string when passed to Lambda runtime.
+        # Runtime expects a Map<String, String> for environment variables
+        return self._stringify_value(value)
+
     def _stringify_value(self, value):
         """
         This method stringifies values of environment variables. If the value of the method is a list or dictionary,
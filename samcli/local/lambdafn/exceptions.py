@@ -8,3 +8,11 @@ class FunctionNotFound(Exception):
     Raised when the requested Lambda function is not found
     """
     pass
+
+
+class TooManyRequests(Exception):
+    """
+    Raised when an invocation is throttled because the function is already running at its concurrency limit and no
+    more invocations can be queued
+    """
+    pass
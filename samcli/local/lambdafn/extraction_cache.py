@@ -0,0 +1,318 @@
+"""
+Keeps function code archives (zip/jar) extracted between invocations
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .zip import unzip
+
+LOG = logging.getLogger(__name__)
+
+
+class ExtractionCache(object):
+    """
+    Thread-safe cache of extracted code archives. Without it, the archive of a function is extracted into a new
+    directory for every invocation and deleted right after, which costs seconds per request for large jars.
+
+    Extracted directories are content addressed: they are named after the SHA256 digest of the archive. The digest of
+    an archive is only recomputed when its size or modification time changes, so an unchanged archive is never read
+    again. When an archive does change, the directory of its previous content is dropped as soon as no invocation is
+    using it anymore.
+
+    Every ``acquire`` must be paired with a ``release``. Directories are reference counted so concurrent invocations
+    share one directory, and a directory is never deleted while a container is using it. Directories that are not in
+    use are evicted, least recently used first, once the extracted content exceeds ``max_size`` bytes.
+    """
+
+    DEFAULT_MAX_SIZE = 1024 * 1024 * 1024  # 1 GiB
+
+    _HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, cache_dir=None, max_size=None, extract=unzip):
+        """
+        Initialize the cache
+
+        Parameters
+        ----------
+        cache_dir str
+            Optional. Directory to extract the archives to. A temporary directory, deleted by ``close``, is used if
+            not set
+        max_size int
+            Optional. Number of bytes of extracted content to keep. Defaults to 1 GiB
+        extract callable
+            Optional. Called with the archive path and the output directory to extract an archive. Defaults to
+            ``samcli.local.lambdafn.zip.unzip``
+        """
+        self._owns_cache_dir = cache_dir is None
+        if self._owns_cache_dir:
+            cache_dir = tempfile.mkdtemp(prefix="sam-code-")
+
+        # The directory that Python returns might have symlinks. The Docker File sharing settings will not resolve
+        # symlinks. Hence get the real path before passing to Docker.
+        self.cache_dir = os.path.realpath(cache_dir)
+        self.max_size = self.DEFAULT_MAX_SIZE if max_size is None else max_size
+        self._extract = extract
+
+        self._lock = threading.Lock()
+
+        # Path of the archive => (size, modification time, digest)
+        self._digests = {}
+
+        # Digest => _Entry. Ordered from the least recently used to the most recently used entry
+        self._entries = OrderedDict()
+
+        # Digest => lock held while the archive with this digest is extracted
+        self._extracting = {}
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+
+    def acquire(self, archive_path):
+        """
+        Returns a directory with the extracted content of the archive, extracting it first if necessary. The directory
+        must be given back with ``release`` when the invocation is done with it.
+
+        :param string archive_path: Path to the zip or jar file
+        :return string: Directory with the content of the archive
+        """
+        archive_path = os.path.realpath(archive_path)
+        digest = self._get_digest(archive_path)
+
+        with self._lock:
+            directory = self._use_entry(digest)
+            if directory:
+                return directory
+
+            extracting = self._extracting.setdefault(digest, threading.Lock())
+
+        # Only one thread extracts a given archive. Others wait for it and use its result
+        with extracting:
+            with self._lock:
+                directory = self._use_entry(digest)
+                if directory:
+                    return directory
+
+            directory, size = self._extract_archive(archive_path, digest)
+
+            with self._lock:
+                entry = _Entry(directory, size)
+                entry.refs = 1
+                self._entries[digest] = entry
+                self._extracting.pop(digest, None)
+                self._stats["misses"] += 1
+
+                evicted = self._pick_evictions()
+
+        self._delete(evicted)
+        return directory
+
+    def release(self, directory):
+        """
+        Gives back a directory returned by ``acquire``
+
+        :param string directory: Directory returned by ``acquire``
+        """
+        evicted = []
+
+        with self._lock:
+            for digest, entry in self._entries.items():
+                if entry.directory == directory:
+                    entry.refs -= 1
+                    if entry.refs <= 0 and entry.stale:
+                        del self._entries[digest]
+                        evicted.append(entry)
+                    break
+
+            evicted.extend(self._pick_evictions())
+
+        self._delete(evicted)
+
+    def stats(self):
+        """
+        :return dict: Number of cache hits, misses, evictions and invalidations, along with the number of extracted
+            archives and their total size in bytes
+        """
+        with self._lock:
+            result = dict(self._stats)
+            result["entries"] = len(self._entries)
+            result["bytes"] = sum(entry.size for entry in self._entries.values())
+
+        return result
+
+    def close(self):
+        """
+        Deletes every extracted directory. Call this when no container is using them anymore.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._digests.clear()
+
+        self._delete(entries)
+
+        if self._owns_cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _use_entry(self, digest):
+        """
+        Takes a reference on the entry with the given digest. Must be called with the lock held
+
+        :return string: Directory of the entry or None if there is no entry for the digest
+        """
+        entry = self._entries.get(digest)
+        if not entry:
+            return None
+
+        entry.refs += 1
+
+        # Move to the end, it is now the most recently used entry
+        self._entries[digest] = self._entries.pop(digest)
+        self._stats["hits"] += 1
+        return entry.directory
+
+    def _get_digest(self, archive_path):
+        """
+        Returns the SHA256 digest of the archive. The digest is only computed again if the size or the modification
+        time of the archive changed since the last time. If the content did change, the directory of the previous
+        content is invalidated.
+        """
+        stat = os.stat(archive_path)
+
+        with self._lock:
+            known = self._digests.get(archive_path)
+
+        if known and known[:2] == (stat.st_size, stat.st_mtime):
+            return known[2]
+
+        sha256 = hashlib.sha256()
+        with open(archive_path, "rb") as archive:
+            for chunk in iter(lambda: archive.read(self._HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+
+        evicted = []
+        with self._lock:
+            self._digests[archive_path] = (stat.st_size, stat.st_mtime, digest)
+
+            if known and known[2] != digest:
+                LOG.debug("%s changed since it was extracted", archive_path)
+                evicted = self._invalidate(known[2])
+
+        self._delete(evicted)
+        return digest
+
+    def _invalidate(self, digest):
+        """
+        Marks the entry of an archive content that is no longer current. It is deleted right away if it is not in use,
+        or when the last invocation using it releases it. Must be called with the lock held.
+        """
+        if any(known[2] == digest for known in self._digests.values()):
+            # Another archive has the same content
+            return []
+
+        entry = self._entries.get(digest)
+        if not entry:
+            return []
+
+        self._stats["invalidations"] += 1
+        entry.stale = True
+        if entry.refs > 0:
+            return []
+
+        del self._entries[digest]
+        return [entry]
+
+    def _pick_evictions(self):
+        """
+        Removes the least recently used entries that are not in use until the cache is within its size. Must be
+        called with the lock held
+
+        :return list: Evicted entries. Their directories must be deleted outside of the lock
+        """
+        total = sum(entry.size for entry in self._entries.values())
+        evicted = []
+
+        for digest in list(self._entries):
+            if total <= self.max_size:
+                break
+
+            entry = self._entries[digest]
+            if entry.refs > 0:
+                continue
+
+            del self._entries[digest]
+            total -= entry.size
+            evicted.append(entry)
+            self._stats["evictions"] += 1
+
+        if total > self.max_size:
+            LOG.debug("Extracted code takes %d bytes, which is above the limit of %d bytes, but all of it is in use",
+                      total, self.max_size)
+
+        return evicted
+
+    def _extract_archive(self, archive_path, digest):
+        """
+        Extracts the archive into a temporary directory first, then moves it to its final place. A directory named
+        after a digest is therefore always complete.
+
+        :return tuple: Directory with the content of the archive and the size of the content in bytes
+        """
+        LOG.info("Decompressing %s", archive_path)
+
+        temp_dir = tempfile.mkdtemp(prefix=".extracting-", dir=self.cache_dir)
+        try:
+            if os.name == 'posix':
+                os.chmod(temp_dir, 0o755)
+
+            self._extract(archive_path, temp_dir)
+
+            directory = os.path.join(self.cache_dir, digest)
+            if os.path.exists(directory):
+                # Left over from an extraction that was interrupted
+                shutil.rmtree(directory)
+            os.rename(temp_dir, directory)
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        return directory, _get_directory_size(directory)
+
+    @staticmethod
+    def _delete(entries):
+        # Runs outside of the lock. Deleting a large directory can take a while
+        for entry in entries:
+            LOG.debug("Deleting extracted code %s", entry.directory)
+            shutil.rmtree(entry.directory, ignore_errors=True)
+
+
+class _Entry(object):
+    """
+    Directory with the extracted content of an archive
+    """
+
+    def __init__(self, directory, size):
+        self.directory = directory
+        self.size = size
+        self.refs = 0
+
+        # Set when the archive changed. The directory is deleted once it is no longer in use
+        self.stale = False
+
+
+def _get_directory_size(directory):
+    size = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            size += os.lstat(os.path.join(root, name)).st_size
+    return size
@@ -3,14 +3,23 @@ Classes representing a local Lambda runtime
 """
 
 import os
+import json
 import shutil
+import hashlib
 import tempfile
 import signal
 import logging
 import threading
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
+from samcli.local.docker.attach_api import supports_input
 from samcli.local.docker.lambda_container import LambdaContainer
+from samcli.local.docker.stats import ContainerStatsSampler
+from samcli.local.docker.warm_pool import WarmContainerPool
+from .runtime_api import RuntimeApiEndpoint, get_bind_host
+from .timing import record_phase, record_resource_usage, current_timings
+from .timeout_scheduler import TimeoutScheduler
 from .zip import unzip
 
 LOG = logging.getLogger(__name__)
@@ -25,7 +34,12 @@ class LambdaRuntime(object):
 
     SUPPORTED_ARCHIVE_EXTENSIONS = (".zip", ".jar", ".ZIP", ".JAR")
 
-    def __init__(self, container_manager, image_builder):
+    # Events up to this size are passed to the container in the AWS_LAMBDA_EVENT_BODY environment variable. Larger
+    # events are streamed to the stdin of the container, instead of being copied into the request that creates it
+    EVENT_ENV_VAR_MAX_SIZE = 1024
+
+    def __init__(self, container_manager, image_builder, warm_containers=False, code_cache=None,
+                 timeout_scheduler=None):
         """
         Initialize the Local Lambda runtime
 
@@ -35,9 +49,20 @@ class LambdaRuntime(object):
             Instance of the ContainerManager class that can run a local Docker container
         image_builder samcli.local.docker.lambda_image.LambdaImage
             Instance of the LambdaImage class that can create am image
+        warm_containers bool
+            Optional. Should containers be reused across invocations? Requires the container manager to have a warm
+            pool. Defaults to False
+        code_cache samcli.local.lambdafn.extraction_cache.ExtractionCache
+            Optional. Keeps zip/jar code archives extracted between invocations. Archives are extracted for every
+            invocation without it
+        timeout_scheduler samcli.local.lambdafn.timeout_scheduler.TimeoutScheduler
+            Optional. Enforces the timeouts of the functions. Defaults to the scheduler shared by the process
         """
         self._container_manager = container_manager
         self._image_builder = image_builder
+        self._warm_containers = warm_containers
+        self._code_cache = code_cache
+        self._timeout_scheduler = timeout_scheduler or TimeoutScheduler.shared()
 
     def invoke(self,
                function_config,
@@ -53,7 +78,8 @@ class LambdaRuntime(object):
         A blocking call will block the thread preventing any other operations from happening. If you are using this
         method in a web-server or in contexts where your application needs to be responsive when function is running,
         take care to invoke the function in a separate thread. Co-Routines or micro-threads might not perform well
-        because the underlying implementation essentially blocks on a socket, which is synchronous.
+        because the underlying implementation essentially blocks on a socket, which is synchronous. Co-routines can
+        use ``samcli.local.lambdafn.async_runtime.AsyncLambdaRuntime`` instead.
 
         :param FunctionConfig function_config: Configuration of the function to invoke
         :param event: String input event passed to Lambda function
@@ -63,10 +89,22 @@ class LambdaRuntime(object):
         :raises Keyboard
         """
         timer = None
+        sampler = None
+        completed = False
+
+        # Containers being debugged are bound to the debugger port. Never reuse them. Reused containers are started
+        # with the environment they were created with, so they can only be reused if the event goes through stdin
+        warm = self._warm_containers and not debug_context \
+            and supports_input(self._container_manager.docker_client)
 
         # Update with event input
         environ = function_config.env_vars
-        environ.add_lambda_event_body(event)
+        input_data = None
+        if self._is_sent_through_stdin(event, warm):
+            environ.add_lambda_event_stdin()
+            input_data = event if isinstance(event, bytes) else (event or "").encode("utf-8")
+        else:
+            environ.add_lambda_event_body(event)
         # Generate a dictionary of environment variable key:values
         env_vars = environ.resolve()
 
@@ -78,12 +116,19 @@ class LambdaRuntime(object):
                                         self._image_builder,
                                         memory_mb=function_config.memory,
                                         env_vars=env_vars,
-                                        debug_options=debug_context)
+                                        debug_options=debug_context,
+                                        stdin_open=input_data is not None)
 
             try:
 
                 # Start the container. This call returns immediately after the container starts
-                self._container_manager.run(container)
+                self._container_manager.run(container, input_data=input_data, warm=warm)
+
+                # Sample the memory and CPU usage of the container while the function runs, if anybody is
+                # interested in the timings of this invocation
+                if current_timings() is not None:
+                    sampler = ContainerStatsSampler(container.id, container.docker_client)
+                    sampler.start()
 
                 # Setup appropriate interrupt - timeout or Ctrl+C - before function starts executing.
                 #
@@ -98,7 +143,9 @@ class LambdaRuntime(object):
                 # NOTE: BLOCKING METHOD
                 # Block the thread waiting to fetch logs from the container. This method will return after container
                 # terminates, either successfully or killed by one of the interrupt handlers above.
-                container.wait_for_logs(stdout=stdout, stderr=stderr)
+                with record_phase("run"):
+                    container.wait_for_logs(stdout=stdout, stderr=stderr)
+                completed = True
 
             except KeyboardInterrupt:
                 # When user presses Ctrl+C, we receive a Keyboard Interrupt. This is especially very common when
@@ -113,7 +160,49 @@ class LambdaRuntime(object):
                 # If we are in debugging mode, timer would not be created. So skip cleanup of the timer
                 if timer:
                     timer.cancel()
-                self._container_manager.stop(container)
+
+                if sampler:
+                    record_resource_usage(sampler.stop())
+
+                # Only a container that ran to completion can be put back in the warm pool. If it was killed by the
+                # timeout, it is already deleted and the container manager will skip it.
+                with record_phase("delete"):
+                    self._container_manager.stop(container, warm=warm and completed)
+
+    def prewarm(self, function_config, count=1, stderr=None):
+        """
+        Prepares everything that can be prepared before the first invocation of the function. Containers of this
+        runtime carry the event they run, so they cannot be created ahead of time. Only the image of the function,
+        including its layers, is built.
+
+        :param FunctionConfig function_config: Configuration of the function to prepare
+        :param int count: Number of invocations to prepare for. Unused by this runtime
+        :param io.IOBase stderr: Optional. IO Stream that receives the output of prepared containers. Unused by this
+            runtime
+        """
+        self._image_builder.build(function_config.runtime, function_config.layers)
+
+    def shutdown(self):
+        """
+        Releases any resources held across invocations. Call this once the runtime is no longer used.
+        """
+        pass
+
+    def _is_sent_through_stdin(self, event, warm=False):
+        """
+        Environment variables are limited in size by the operating system, and the Docker API encodes them once more
+        in the request that creates the container. Only tiny events are passed this way, and never to warm containers
+        which would replay the event they were created with.
+
+        :param string event: Event of the invocation
+        :param bool warm: True, if the container can be reused
+        :return bool: True, if the event is streamed to the stdin of the container
+        """
+        if warm:
+            return True
+
+        return bool(event) and len(event) > self.EVENT_ENV_VAR_MAX_SIZE \
+            and supports_input(self._container_manager.docker_client)
 
     def _configure_interrupt(self, function_name, timeout, container, is_debugging):
         """
@@ -125,7 +214,8 @@ class LambdaRuntime(object):
         :param integer timeout: Timeout in seconds
         :param samcli.local.docker.container.Container container: Instance of a container to terminate
         :param bool is_debugging: Are we debugging?
-        :return threading.Timer: Timer object, if we setup a timer. None otherwise
+        :return samcli.local.lambdafn.timeout_scheduler.ScheduledTimeout: Timeout that can be cancelled, if we setup
+            a timer. None otherwise
         """
 
         def timer_handler():
@@ -142,11 +232,10 @@ class LambdaRuntime(object):
             LOG.debug("Setting up SIGTERM interrupt handler")
             signal.signal(signal.SIGTERM, signal_handler)
         else:
-            # Start a timer, we'll use this to abort the function if it runs beyond the specified timeout
+            # Schedule a timeout, we'll use this to abort the function if it runs beyond the specified timeout. All
+            # invocations share the thread of the scheduler instead of starting a timer thread each
             LOG.debug("Starting a timer for %s seconds for function '%s'", timeout, function_name)
-            timer = threading.Timer(timeout, timer_handler, ())
-            timer.start()
-            return timer
+            return self._timeout_scheduler.schedule(timeout, timer_handler)
 
     @contextmanager
     def _get_code_dir(self, code_path):
@@ -155,7 +244,8 @@ class LambdaRuntime(object):
         be mounted directly inside the Docker container.
 
         This method handles a few different cases for ``code_path``:
-            - ``code_path``is a existent zip/jar file: Unzip in a temp directory and return the temp directory
+            - ``code_path``is a existent zip/jar file: Unzip in a temp directory and return the temp directory. If
+                there is a code cache, return the directory the cache extracted the file to instead
             - ``code_path`` is a existent directory: Return this immediately
             - ``code_path`` is a file/dir that does not exist: Return it as is. May be this method is not clever to
                 detect the existence of the path
@@ -166,10 +256,16 @@ class LambdaRuntime(object):
         """
 
         decompressed_dir = None
+        cached_dir = None
 
         try:
             if os.path.isfile(code_path) and code_path.endswith(self.SUPPORTED_ARCHIVE_EXTENSIONS):
 
+                if self._code_cache:
+                    cached_dir = self._code_cache.acquire(code_path)
+                    yield cached_dir
+                    return
+
                 decompressed_dir = _unzip_file(code_path)
                 yield decompressed_dir
 
@@ -180,6 +276,266 @@ class LambdaRuntime(object):
             if decompressed_dir:
                 shutil.rmtree(decompressed_dir)
 
+            if cached_dir:
+                self._code_cache.release(cached_dir)
+
+
+class PersistentLambdaRuntime(LambdaRuntime):
+    """
+    Lambda runtime that keeps function containers running between invocations, just like AWS Lambda does. Containers
+    run the runtime's own bootstrap which fetches invocations from a local Lambda Runtime API endpoint. The first
+    invocation pays for container startup and function initialization, subsequent invocations are handed to the
+    already running process.
+
+    Runtimes without a Runtime API bootstrap in their lambci image, and invocations with a debugger attached, fall
+    back to running one container per invocation.
+    """
+
+    def __init__(self, container_manager, image_builder, max_idle=None, idle_ttl=None, code_cache=None,
+                 timeout_scheduler=None):
+        """
+        Initialize the runtime
+
+        Parameters
+        ----------
+        container_manager samcli.local.docker.manager.ContainerManager
+            Instance of the ContainerManager class that can run a local Docker container
+        image_builder samcli.local.docker.lambda_image.LambdaImage
+            Instance of the LambdaImage class that can create am image
+        max_idle int
+            Optional. Maximum number of idle containers to keep running
+        idle_ttl int
+            Optional. Number of seconds an idle container is kept running
+        code_cache samcli.local.lambdafn.extraction_cache.ExtractionCache
+            Optional. Keeps zip/jar code archives extracted between invocations
+        timeout_scheduler samcli.local.lambdafn.timeout_scheduler.TimeoutScheduler
+            Optional. Enforces the timeouts of invocations that run in a container of their own
+        """
+        super(PersistentLambdaRuntime, self).__init__(container_manager,
+                                                      image_builder,
+                                                      code_cache=code_cache,
+                                                      timeout_scheduler=timeout_scheduler)
+        self._environments = WarmContainerPool(max_size=max_idle,
+                                               idle_ttl=idle_ttl,
+                                               on_evict=self._stop_environment)
+
+        # Interface the Runtime API endpoints listen on. Looked up when the first container starts
+        self._bind_host = None
+
+    def invoke(self,
+               function_config,
+               event,
+               debug_context=None,
+               stdout=None,
+               stderr=None):
+        """
+        Invoke the given Lambda function in a long-lived container. See ``LambdaRuntime.invoke`` for the parameters.
+        """
+        if debug_context or not LambdaContainer.supports_runtime_api(function_config.runtime):
+            return super(PersistentLambdaRuntime, self).invoke(function_config,
+                                                               event,
+                                                               debug_context=debug_context,
+                                                               stdout=stdout,
+                                                               stderr=stderr)
+
+        key = self._get_environment_key(function_config)
+        environment = self._environments.acquire(key)
+        if not environment or environment.endpoint.is_closed:
+            if environment:
+                self._stop_environment(environment)
+            environment = self._start_environment(function_config, stderr)
+
+        try:
+            with record_phase("run"):
+                invocation = environment.endpoint.invoke(event, function_config.timeout)
+        except KeyboardInterrupt:
+            LOG.debug("Ctrl+C was pressed. Aborting Lambda execution")
+            self._stop_environment(environment)
+            return
+
+        if not invocation:
+            # The process inside the container is still busy with this event. There is no way to abort just the
+            # invocation, so the container has to go.
+            LOG.info("Function '%s' timed out after %d seconds", function_config.name, function_config.timeout)
+            self._stop_environment(environment)
+            return
+
+        if stdout:
+            stdout.write(self._format_response(invocation.response))
+            stdout.flush()
+
+        if environment.endpoint.is_closed:
+            self._stop_environment(environment)
+        else:
+            self._environments.release(key, environment)
+
+    def prewarm(self, function_config, count=1, stderr=None):
+        """
+        Starts ``count`` containers for the function in parallel and keeps them idle, ready to serve invocations.
+        Functions that cannot run in a long-lived container only get their image built.
+
+        :param FunctionConfig function_config: Configuration of the function to prepare
+        :param int count: Number of containers to start
+        :param io.IOBase stderr: Optional. IO Stream that receives the output of the containers
+        """
+        if not LambdaContainer.supports_runtime_api(function_config.runtime):
+            super(PersistentLambdaRuntime, self).prewarm(function_config, count, stderr)
+            return
+
+        # Build the image once upfront. Concurrent builds of the same image would all do the same work
+        self._image_builder.build(function_config.runtime, function_config.layers)
+
+        key = self._get_environment_key(function_config)
+        error = None
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(self._start_environment, function_config, stderr) for _ in range(count)]
+
+            for future in futures:
+                try:
+                    self._environments.release(key, future.result())
+                except Exception as ex:  # pylint: disable=broad-except
+                    # Keep the containers that did start. They are just as useful.
+                    error = error or ex
+
+        if error:
+            raise error
+
+    def shutdown(self):
+        """
+        Stops every container that is kept running
+        """
+        self._environments.drain()
+
+    def _start_environment(self, function_config, stderr):
+        """
+        Starts a new container for the function along with the Runtime API endpoint it polls
+
+        :param FunctionConfig function_config: Configuration of the function to invoke
+        :param io.IOBase stderr: Optional. IO Stream that receives the output of the container
+        :return _RuntimeEnvironment: The running environment
+        """
+        if self._bind_host is None:
+            self._bind_host = get_bind_host(self._container_manager.docker_client)
+
+        endpoint = RuntimeApiEndpoint(self._get_function_arn(function_config), bind_host=self._bind_host)
+        endpoint.start()
+
+        environment = _RuntimeEnvironment(endpoint, self._get_code_dir(function_config.code_abs_path))
+        try:
+            code_dir = environment.open_code_dir()
+
+            environment.container = LambdaContainer(function_config.runtime,
+                                                    function_config.handler,
+                                                    code_dir,
+                                                    function_config.layers,
+                                                    self._image_builder,
+                                                    memory_mb=function_config.memory,
+                                                    env_vars=function_config.env_vars.resolve(),
+                                                    runtime_api=endpoint.address)
+
+            self._container_manager.run(environment.container)
+        except BaseException:
+            self._stop_environment(environment)
+            raise
+
+        environment.follow_logs(stderr)
+        return environment
+
+    def _stop_environment(self, environment):
+        """
+        Stops the container and the Runtime API endpoint of the environment and cleans up the code directory
+
+        :param _RuntimeEnvironment environment: Environment to stop
+        """
+        environment.endpoint.shutdown("Container was stopped")
+
+        if environment.container:
+            self._container_manager.stop(environment.container)
+
+        environment.close_code_dir()
+
+    @staticmethod
+    def _get_environment_key(function_config):
+        """
+        Computes a key for the configuration a container was started with. Only containers with the same key can
+        serve an invocation.
+
+        :param FunctionConfig function_config: Configuration of the function
+        :return string: Key of the configuration
+        """
+        config = {
+            "name": function_config.name,
+            "runtime": function_config.runtime,
+            "handler": function_config.handler,
+            "code": function_config.code_abs_path,
+            "layers": [getattr(layer, "full_path", layer) for layer in function_config.layers or []],
+            "memory": function_config.memory,
+            "timeout": function_config.timeout,
+            "env_vars": function_config.env_vars.resolve()
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _get_function_arn(function_config):
+        region = function_config.env_vars.resolve().get("AWS_REGION", "us-east-1")
+        return "arn:aws:lambda:{}:123456789012:function:{}".format(region, function_config.name)
+
+    @staticmethod
+    def _format_response(response):
+        """
+        Runtimes may post their response with any formatting. Print valid JSON in compact form so it looks the same
+        as the output of a container that ran a single event.
+        """
+        try:
+            return json.dumps(json.loads(response.decode("utf-8"))).encode("utf-8")
+        except ValueError:
+            # Not JSON. Print as is
+            return response
+
+
+class _RuntimeEnvironment(object):
+    """
+    Everything a long-lived function container needs to stay alive between invocations
+    """
+
+    def __init__(self, endpoint, code_dir_context):
+        self.endpoint = endpoint
+        self.container = None
+        self._code_dir_context = code_dir_context
+        self._code_dir_open = False
+        self._log_thread = None
+
+    def open_code_dir(self):
+        # The code directory must exist for as long as the container is running, not just for one invocation
+        code_dir = self._code_dir_context.__enter__()  # pylint: disable=no-member
+        self._code_dir_open = True
+        return code_dir
+
+    def close_code_dir(self):
+        if self._code_dir_open:
+            self._code_dir_open = False
+            self._code_dir_context.__exit__(None, None, None)  # pylint: disable=no-member
+
+    def follow_logs(self, stream):
+        """
+        Streams the container output in the background. Lambda runtimes print the function logs to stdout and stderr,
+        while the result is posted to the Runtime API, so all the output of the container goes to ``stream``.
+        """
+
+        def follow():
+            try:
+                self.container.wait_for_logs(stdout=stream, stderr=stream)
+            except Exception:  # pylint: disable=broad-except
+                LOG.debug("Failed to stream logs of container %s", self.container.id, exc_info=True)
+            finally:
+                # The logs end when the container exits. Invocations it did not finish will never complete.
+                self.endpoint.close("Runtime exited without providing a reason")
+
+        self._log_thread = threading.Thread(target=follow, name="sam-runtime-logs")
+        self._log_thread.daemon = True
+        self._log_thread.start()
+
 
 def _unzip_file(filepath):
     """
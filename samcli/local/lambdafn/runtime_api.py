@@ -0,0 +1,339 @@
+"""
+Local implementation of the Lambda Runtime API that long-lived function containers poll for invocations
+"""
+
+import sys
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+
+import docker
+import requests
+from six.moves import queue
+from flask import Flask, Response, request
+from werkzeug.serving import make_server
+
+LOG = logging.getLogger(__name__)
+
+LOCALHOST = "127.0.0.1"
+
+
+def get_bind_host(docker_client):
+    """
+    Returns the interface Runtime API endpoints listen on. The API is not authenticated, so it is never exposed on all
+    interfaces. Docker for Mac and Windows forward ``host.docker.internal`` to the loopback interface of the host. On
+    Linux, ``host.docker.internal`` is mapped to the gateway of the default bridge network, which is an address of the
+    host that only containers and the host itself can reach.
+
+    Parameters
+    ----------
+    docker_client docker.DockerClient
+        Client of the Docker daemon that runs the containers
+
+    Returns
+    -------
+    str
+        Address to listen on. Falls back to the loopback interface if the bridge gateway cannot be used
+    """
+    if not sys.platform.startswith("linux"):
+        return LOCALHOST
+
+    try:
+        gateway = docker_client.networks.get("bridge").attrs["IPAM"]["Config"][0]["Gateway"]
+
+        # The gateway might live in another network namespace, ex: with rootless Docker
+        probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            probe.bind((gateway, 0))
+        finally:
+            probe.close()
+
+        return gateway
+    except (docker.errors.APIError, requests.exceptions.RequestException, socket.error,
+            KeyError, IndexError, TypeError, ValueError):
+        LOG.debug("Cannot listen on the gateway of the Docker bridge network. Using %s", LOCALHOST, exc_info=True)
+        return LOCALHOST
+
+
+class Invocation(object):
+    """
+    A single invocation handed out to a runtime container through the Runtime API
+    """
+
+    def __init__(self, event, timeout, request_id=None):
+        """
+        Parameters
+        ----------
+        event str
+            Event passed to the function
+        timeout int
+            Function timeout in seconds. Used to compute the invocation deadline
+        request_id str
+            Optional. ID of the request. A random UUID is generated if not given
+        """
+        self.request_id = request_id or str(uuid.uuid4())
+        self.event = event
+        self.deadline_ms = int((time.time() + timeout) * 1000)
+
+        # Populated when the runtime posts a response or an error
+        self.response = None
+        self.is_error = False
+        self._done = threading.Event()
+
+    def complete(self, response, is_error=False):
+        self.response = response
+        self.is_error = is_error
+        self._done.set()
+
+    def wait(self, timeout):
+        """
+        Blocks until the runtime posted a result for this invocation
+
+        :param int timeout: Seconds to wait
+        :return bool: True if a result is available, False if the wait timed out
+        """
+        return self._done.wait(timeout)
+
+
+class RuntimeApiEndpoint(object):
+    """
+    Serves the Lambda Runtime API (https://docs.aws.amazon.com/lambda/latest/dg/runtimes-api.html) for one function
+    container. The container stays alive and repeatedly calls ``/invocation/next`` to fetch the next event, exactly
+    like it does on AWS Lambda. This means the runtime's initialization (module imports, JVM startup, DB connections,
+    etc) happens only once per container instead of once per request.
+
+    Every container gets its own endpoint, listening on a separate port, so an invocation can always be traced back to
+    the container that is processing it.
+    """
+
+    _API_VERSION = "2018-06-01"
+
+    # How often a blocked ``/invocation/next`` call checks if the endpoint was shut down
+    _POLL_INTERVAL = 1
+
+    # Hostname that resolves to the Docker host from within a container
+    DOCKER_HOST_ALIAS = "host.docker.internal"
+
+    def __init__(self, function_arn, bind_host=LOCALHOST, advertised_host=DOCKER_HOST_ALIAS):
+        """
+        Parameters
+        ----------
+        function_arn str
+            ARN passed to the runtime as the invoked function ARN
+        bind_host str
+            Optional. Interface to listen on. Must be reachable from the containers. Defaults to the loopback
+            interface. See ``get_bind_host``
+        advertised_host str
+            Optional. Host name the container uses to reach this endpoint
+        """
+        self.function_arn = function_arn
+        self.bind_host = bind_host
+        self.advertised_host = advertised_host
+
+        self._queue = queue.Queue()
+        self._invocations = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._close_error = None
+
+        self._server = None
+        self._thread = None
+        self._app = self._create_app()
+
+    @property
+    def address(self):
+        """
+        Value for the ``AWS_LAMBDA_RUNTIME_API`` environment variable of the container
+
+        :return string: host:port where the container can reach this endpoint
+        """
+        if not self._server:
+            raise RuntimeError("The endpoint must be started first")
+
+        return "{}:{}".format(self.advertised_host, self._server.server_port)
+
+    @property
+    def is_closed(self):
+        return self._closed.is_set()
+
+    def start(self):
+        """
+        Starts serving the API on a free port in a background thread
+        """
+        self._server = make_server(self.bind_host, 0, self._app, threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sam-runtime-api")
+        self._thread.daemon = True
+        self._thread.start()
+
+        LOG.debug("Runtime API for %s listening on port %s", self.function_arn, self._server.server_port)
+
+    def shutdown(self, reason="Runtime API endpoint was shut down"):
+        """
+        Stops the server and fails every invocation that is still pending
+
+        :param string reason: Error message passed to pending invocations
+        """
+        self.close(reason)
+
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def close(self, reason):
+        """
+        Stops handing out invocations and fails the pending ones. Call this when the container exited.
+
+        :param string reason: Error message passed to pending invocations
+        """
+        self._close_with(self._error_payload("Runtime.ExitError", reason))
+
+    def invoke(self, event, timeout):
+        """
+        Hands the event over to the container and waits for the result.
+
+        Parameters
+        ----------
+        event str
+            Event passed to the function
+        timeout int
+            Seconds to wait for the function to respond
+
+        Returns
+        -------
+        Invocation
+            The completed invocation, or None if the function did not respond within the timeout
+        """
+        invocation = Invocation(event, timeout)
+
+        with self._lock:
+            if self._closed.is_set():
+                invocation.complete(self._close_error, is_error=True)
+                return invocation
+
+            self._invocations[invocation.request_id] = invocation
+
+        self._queue.put(invocation)
+
+        if not invocation.wait(timeout):
+            with self._lock:
+                self._invocations.pop(invocation.request_id, None)
+            return None
+
+        return invocation
+
+    def _create_app(self):
+        app = Flask(__name__)
+        prefix = "/{}/runtime".format(self._API_VERSION)
+
+        app.add_url_rule(prefix + "/invocation/next",
+                         endpoint="next",
+                         view_func=self._next_handler,
+                         methods=["GET"])
+        app.add_url_rule(prefix + "/invocation/<request_id>/response",
+                         endpoint="response",
+                         view_func=self._response_handler,
+                         methods=["POST"])
+        app.add_url_rule(prefix + "/invocation/<request_id>/error",
+                         endpoint="error",
+                         view_func=self._error_handler,
+                         methods=["POST"])
+        app.add_url_rule(prefix + "/init/error",
+                         endpoint="init_error",
+                         view_func=self._init_error_handler,
+                         methods=["POST"])
+
+        return app
+
+    def _next_handler(self):
+        # Long poll. The runtime keeps this connection open until there is something to process
+        while True:
+            try:
+                invocation = self._queue.get(timeout=self._POLL_INTERVAL)
+                break
+            except queue.Empty:
+                if self._closed.is_set():
+                    return self._accepted(status=410)
+
+        headers = {
+            "Lambda-Runtime-Aws-Request-Id": invocation.request_id,
+            "Lambda-Runtime-Deadline-Ms": str(invocation.deadline_ms),
+            "Lambda-Runtime-Invoked-Function-Arn": self.function_arn,
+            "Lambda-Runtime-Trace-Id": "Root=1-{}".format(uuid.uuid4().hex),
+            "Content-Type": "application/json"
+        }
+        return Response(invocation.event, status=200, headers=headers)
+
+    def _response_handler(self, request_id):
+        return self._complete(request_id, request.get_data(), is_error=False)
+
+    def _error_handler(self, request_id):
+        error = self._normalize_error(request.get_data(), request.headers.get("Lambda-Runtime-Function-Error-Type"))
+        return self._complete(request_id, error, is_error=True)
+
+    def _init_error_handler(self):
+        error = self._normalize_error(request.get_data(), request.headers.get("Lambda-Runtime-Function-Error-Type"))
+        LOG.debug("Runtime for %s failed to initialize: %s", self.function_arn, error)
+
+        # The runtime exits after reporting an init error. Every invocation this container was going to serve fails
+        # with the same error.
+        self._close_with(error)
+        return self._accepted()
+
+    def _close_with(self, error):
+        with self._lock:
+            if not self._closed.is_set():
+                self._close_error = error
+                self._closed.set()
+
+            pending = list(self._invocations.values())
+            self._invocations.clear()
+
+        for invocation in pending:
+            invocation.complete(self._close_error, is_error=True)
+
+    def _complete(self, request_id, payload, is_error):
+        with self._lock:
+            invocation = self._invocations.pop(request_id, None)
+
+        if not invocation:
+            LOG.debug("Received a result for unknown or expired request %s", request_id)
+            return self._accepted(status=400)
+
+        invocation.complete(payload, is_error=is_error)
+        return self._accepted()
+
+    @staticmethod
+    def _normalize_error(payload, error_type=None):
+        """
+        Converts an error posted by the runtime into the error shape Lambda returns to the caller, which always has
+        errorMessage, errorType and stackTrace properties.
+        """
+        try:
+            error = json.loads(payload.decode("utf-8"))
+        except ValueError:
+            error = None
+
+        if not isinstance(error, dict):
+            error = {"errorMessage": payload.decode("utf-8", "replace")}
+
+        normalized = {
+            "errorMessage": error.get("errorMessage", ""),
+            "errorType": error.get("errorType") or error_type or "Unhandled",
+            "stackTrace": error.get("stackTrace") or []
+        }
+        return json.dumps(normalized).encode("utf-8")
+
+    @staticmethod
+    def _error_payload(error_type, message):
+        return json.dumps({
+            "errorMessage": message,
+            "errorType": error_type,
+            "stackTrace": []
+        }).encode("utf-8")
+
+    @staticmethod
+    def _accepted(status=202):
+        return Response(json.dumps({"status": "OK"}), status=status, mimetype="application/json")
@@ -0,0 +1,226 @@
+"""
+Limits the number of functions that run concurrently and queues the invocations that have to wait
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from .exceptions import TooManyRequests
+
+LOG = logging.getLogger(__name__)
+
+
+class InvocationScheduler(object):
+    """
+    Emulates the concurrency limits of AWS Lambda. Every invocation must acquire a slot before its container is
+    started. A slot is available if both the global limit and the limit of the function (ReservedConcurrentExecutions)
+    have room for one more running invocation.
+
+    Invocations that cannot run right away wait in a bounded FIFO queue. An invocation that waits for longer than
+    ``queue_timeout`` seconds, or that finds the queue full, is throttled with a ``TooManyRequests`` error. Waiting
+    invocations are started in the order they arrived, except that an invocation of a function that is at its own limit
+    does not hold back invocations of other functions.
+
+    Functions with a limit of 0 are always throttled, just like on AWS Lambda.
+    """
+
+    DEFAULT_MAX_QUEUE_SIZE = 100
+    DEFAULT_QUEUE_TIMEOUT = 30  # seconds
+
+    def __init__(self,
+                 max_concurrency=None,
+                 function_limits=None,
+                 max_queue_size=None,
+                 queue_timeout=None,
+                 clock=time.time):
+        """
+        Initialize the scheduler
+
+        Parameters
+        ----------
+        max_concurrency int
+            Optional. Maximum number of invocations running at the same time across all functions. No limit if not
+            set or 0
+        function_limits dict
+            Optional. Name of the function mapped to the maximum number of concurrent invocations of this function.
+            Limits that are not integers, ex: unresolved intrinsic functions, are ignored
+        max_queue_size int
+            Optional. Maximum number of invocations waiting for a slot. Defaults to 100
+        queue_timeout int
+            Optional. Number of seconds an invocation can wait for a slot. Defaults to 30
+        clock callable
+            Optional. Returns the current time in seconds. Defaults to ``time.time``
+        """
+        self.max_concurrency = max_concurrency or None
+        self.function_limits = self._parse_limits(function_limits or {})
+        self.max_queue_size = self.DEFAULT_MAX_QUEUE_SIZE if max_queue_size is None else max_queue_size
+        self.queue_timeout = self.DEFAULT_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self._clock = clock
+
+        self._condition = threading.Condition()
+        self._waiting = deque()
+        self._running = {}
+        self._total_running = 0
+
+        self._stats = {
+            "invocations": 0,
+            "queued": 0,
+            "throttled": 0,
+            "timed_out": 0,
+            "max_queue_depth": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0
+        }
+
+    @staticmethod
+    def _parse_limits(function_limits):
+        """
+        ReservedConcurrentExecutions comes straight from the template. It can be a string, or an intrinsic function
+        SAM CLI could not resolve. Only keep the limits that are integers.
+        """
+        result = {}
+        for function_name, limit in function_limits.items():
+            try:
+                result[function_name] = int(limit)
+            except (TypeError, ValueError):
+                LOG.debug("Ignoring concurrency limit %s of function %s. It is not an integer", limit, function_name)
+
+        return result
+
+    @contextmanager
+    def slot(self, function_name):
+        """
+        Context manager that holds a slot for the function while the block runs
+
+        :param string function_name: Name of the function to invoke
+        :raises TooManyRequests: If the invocation was throttled
+        """
+        self.acquire(function_name)
+        try:
+            yield
+        finally:
+            self.release(function_name)
+
+    def acquire(self, function_name):
+        """
+        Blocks until the function can be invoked. Every successful call must be paired with a call to ``release``.
+
+        :param string function_name: Name of the function to invoke
+        :raises TooManyRequests: If the queue is full, the wait timed out or the function can never run
+        """
+        limit = self.function_limits.get(function_name)
+
+        with self._condition:
+            if limit == 0:
+                self._stats["throttled"] += 1
+                raise TooManyRequests("Function {} has no concurrency available".format(function_name))
+
+            if not self._waiting and self._has_capacity(function_name):
+                self._start(function_name, 0)
+                return
+
+            if len(self._waiting) >= self.max_queue_size:
+                self._stats["throttled"] += 1
+                LOG.debug("Throttling invocation of %s. %d invocations are already waiting",
+                          function_name, len(self._waiting))
+                raise TooManyRequests("Rate Exceeded")
+
+            ticket = _Ticket(function_name)
+            self._waiting.append(ticket)
+            self._stats["queued"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._waiting))
+
+            LOG.debug("Function %s is at its concurrency limit. Waiting for a slot (queue depth: %d)",
+                      function_name, len(self._waiting))
+
+            enqueued_at = self._clock()
+            deadline = enqueued_at + self.queue_timeout
+
+            while self._next_runnable() is not ticket:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._stats["throttled"] += 1
+                    self._stats["timed_out"] += 1
+
+                    # This ticket may have been the one holding back others
+                    self._condition.notify_all()
+                    raise TooManyRequests("Rate Exceeded")
+
+                self._condition.wait(remaining)
+
+            self._waiting.remove(ticket)
+            self._start(function_name, self._clock() - enqueued_at)
+
+            # Other waiters might be able to run too
+            self._condition.notify_all()
+
+    def release(self, function_name):
+        """
+        Gives back the slot acquired for the function
+
+        :param string function_name: Name of the function that finished running
+        """
+        with self._condition:
+            self._running[function_name] -= 1
+            self._total_running -= 1
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Returns a snapshot of the scheduler statistics
+
+        :return dict: Current number of running and queued invocations, overall and per function, along with the
+            number of throttled invocations and the time invocations spent waiting in the queue
+        """
+        with self._condition:
+            result = dict(self._stats)
+            result["running"] = self._total_running
+            result["queue_depth"] = len(self._waiting)
+            result["running_per_function"] = {name: count for name, count in self._running.items() if count}
+
+            queued_per_function = {}
+            for ticket in self._waiting:
+                queued_per_function[ticket.function_name] = queued_per_function.get(ticket.function_name, 0) + 1
+            result["queued_per_function"] = queued_per_function
+
+        result["average_wait_time"] = result["total_wait_time"] / result["queued"] if result["queued"] else 0.0
+        return result
+
+    def _start(self, function_name, wait_time):
+        self._running[function_name] = self._running.get(function_name, 0) + 1
+        self._total_running += 1
+
+        self._stats["invocations"] += 1
+        self._stats["total_wait_time"] += wait_time
+        self._stats["max_wait_time"] = max(self._stats["max_wait_time"], wait_time)
+
+    def _has_capacity(self, function_name):
+        if self.max_concurrency and self._total_running >= self.max_concurrency:
+            return False
+
+        limit = self.function_limits.get(function_name)
+        return limit is None or self._running.get(function_name, 0) < limit
+
+    def _next_runnable(self):
+        """
+        Returns the oldest waiting ticket that can run now, or None if no ticket can run
+        """
+        for ticket in self._waiting:
+            if self._has_capacity(ticket.function_name):
+                return ticket
+
+        return None
+
+
+class _Ticket(object):
+    """
+    Place of an invocation in the queue. Tickets are compared by identity, so two invocations of the same function
+    have different tickets.
+    """
+
+    def __init__(self, function_name):
+        self.function_name = function_name
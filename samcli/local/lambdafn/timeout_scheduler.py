@@ -0,0 +1,212 @@
+"""
+Enforces the timeouts of all running invocations from a single thread
+"""
+
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+LOG = logging.getLogger(__name__)
+
+# Deadlines must not move when the wall clock is adjusted. Python 2 has no monotonic clock, so fall back to time.time
+_monotonic = getattr(time, "monotonic", time.time)
+
+
+class TimeoutScheduler(object):
+    """
+    Runs callbacks once their deadline passed. All deadlines are kept in a heap that one background thread waits on,
+    instead of starting a ``threading.Timer`` thread per invocation. Scheduling and cancelling are O(log n), so
+    thousands of concurrent invocations cost one thread and a few bytes each.
+
+    Callbacks run on a small pool of threads, so a callback that takes a while, ex: stopping a container, does not
+    delay the deadlines that follow it.
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+
+    # Cancelled timeouts are only dropped from the heap when they reach its top. The heap is rebuilt without them
+    # once they outnumber the live ones
+    _MIN_COMPACT_SIZE = 64
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_workers=None, clock=_monotonic):
+        """
+        Initialize the scheduler. The background thread starts with the first scheduled timeout
+
+        Parameters
+        ----------
+        max_workers int
+            Optional. Maximum number of callbacks that run at the same time. Defaults to 4
+        clock callable
+            Optional. Returns the current time in seconds. Defaults to a monotonic clock
+        """
+        self.max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self._clock = clock
+
+        self._condition = threading.Condition()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._cancelled = 0
+        self._thread = None
+        self._executor = None
+        self._closed = False
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the scheduler shared by the whole process
+
+        :return TimeoutScheduler: Process-wide instance of the scheduler
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def schedule(self, delay, callback, *args):
+        """
+        Calls ``callback(*args)`` once ``delay`` seconds passed, unless the returned timeout is cancelled before
+
+        :param float delay: Seconds to wait
+        :param callable callback: Function to call
+        :return ScheduledTimeout: Handle to cancel the timeout with
+        :raise RuntimeError: If the scheduler was shut down
+        """
+        timeout = ScheduledTimeout(self, self._clock() + delay, callback, args)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Timeout scheduler was shut down")
+
+            heapq.heappush(self._heap, (timeout.deadline, next(self._sequence), timeout))
+
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                self._thread = threading.Thread(target=self._run, name="sam-timeouts")
+                self._thread.daemon = True
+                self._thread.start()
+
+            elif self._heap[0][2] is timeout:
+                # The new timeout is due before everything else. Wake the thread up so it waits for this one instead
+                self._condition.notify()
+
+        return timeout
+
+    def pending(self):
+        """
+        :return int: Number of timeouts that are neither cancelled nor fired yet
+        """
+        with self._condition:
+            return len(self._heap) - self._cancelled
+
+    def shutdown(self):
+        """
+        Stops the background thread. Pending timeouts never fire, callbacks that already fired are waited for.
+        """
+        with self._condition:
+            self._closed = True
+            for _, _, timeout in self._heap:
+                timeout.state = ScheduledTimeout.CANCELLED
+            self._heap = []
+            self._cancelled = 0
+            self._condition.notify()
+
+            thread, executor = self._thread, self._executor
+
+        if thread:
+            thread.join()
+            executor.shutdown(wait=True)
+
+    def _cancel(self, timeout):
+        with self._condition:
+            if timeout.state != ScheduledTimeout.PENDING:
+                return False
+
+            timeout.state = ScheduledTimeout.CANCELLED
+            self._cancelled += 1
+
+            if self._cancelled > self._MIN_COMPACT_SIZE and self._cancelled * 2 > len(self._heap):
+                self._heap = [item for item in self._heap if item[2].state == ScheduledTimeout.PENDING]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+            return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                timeout = self._next_due()
+
+            if timeout is None:
+                return
+
+            try:
+                self._executor.submit(timeout.fire)
+            except RuntimeError:
+                # The executor was shut down in the meantime
+                return
+
+    def _next_due(self):
+        """
+        Waits until the earliest pending timeout is due and takes it off the heap. Must be called with the condition
+        held
+
+        :return ScheduledTimeout: Timeout to fire. None if the scheduler was shut down
+        """
+        while not self._closed:
+            if not self._heap:
+                self._condition.wait()
+                continue
+
+            deadline, _, timeout = self._heap[0]
+            if timeout.state == ScheduledTimeout.CANCELLED:
+                heapq.heappop(self._heap)
+                self._cancelled -= 1
+                continue
+
+            remaining = deadline - self._clock()
+            if remaining > 0:
+                self._condition.wait(remaining)
+                continue
+
+            heapq.heappop(self._heap)
+            timeout.state = ScheduledTimeout.FIRED
+            return timeout
+
+        return None
+
+
+class ScheduledTimeout(object):
+    """
+    Handle of a timeout. Has the same ``cancel`` method as ``threading.Timer``
+    """
+
+    PENDING = "pending"
+    CANCELLED = "cancelled"
+    FIRED = "fired"
+
+    def __init__(self, scheduler, deadline, callback, args):
+        self.deadline = deadline
+        self.state = self.PENDING
+        self._scheduler = scheduler
+        self._callback = callback
+        self._args = args
+
+    def cancel(self):
+        """
+        Makes sure the callback is not called, unless it was already
+
+        :return bool: True if the timeout was cancelled before it fired
+        """
+        return self._scheduler._cancel(self)  # pylint: disable=protected-access
+
+    def fire(self):
+        try:
+            self._callback(*self._args)
+        except Exception:  # pylint: disable=broad-except
+            LOG.debug("Timeout callback failed", exc_info=True)
@@ -0,0 +1,253 @@
+"""
+Measures where the time of a local invocation goes, phase by phase
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Invocations being timed on a thread. Phases measured on a thread are recorded by the innermost one
+_active = threading.local()
+
+
+class InvokeTimings(object):
+    """
+    Durations of the phases of one invocation. Phases are recorded in seconds and reported in milliseconds, like
+    Lambda does. A phase that happens more than once, ex: ``create`` when a container is created again after its
+    image disappeared, accumulates.
+
+    Phases:
+        image_build     Pulling the base image and building the image with the layers of the function
+        layer_download  Downloading and extracting the layers of the function
+        create          Creating the container
+        start           Starting the container
+        first_byte      From the container being started until its first output arrived
+        run             From the container being started until the function finished
+        delete          Stopping the container and handing it over for removal
+
+    The init duration is the time spent before the function could run: image build, layer download, create and start.
+    The duration is the time the function ran. Everything else that happened during the invocation, ex: extracting
+    the code or removing the container, is overhead.
+    """
+
+    PHASES = ("image_build", "layer_download", "create", "start", "first_byte", "run", "delete")
+
+    INIT_PHASES = ("image_build", "layer_download", "create", "start")
+
+    def __init__(self, function_name, clock=time.time):
+        """
+        Initialize the timings. The clock of the invocation starts right away
+
+        Parameters
+        ----------
+        function_name str
+            Name of the function that is invoked
+        clock callable
+            Optional. Returns the current time in seconds. Defaults to ``time.time``
+        """
+        self.function_name = function_name
+        self.phases = {}
+
+        # samcli.local.docker.stats.ResourceUsage of the container, if it was sampled
+        self.resource_usage = None
+
+        self._clock = clock
+        self._start_time = clock()
+        self._end_time = None
+        self._running_since = None
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager that measures the time the block takes as the given phase. The ``start`` phase also starts
+        the clock for ``first_byte``.
+
+        :param string name: Name of the phase
+        """
+        start = self._clock()
+        try:
+            yield
+        finally:
+            end = self._clock()
+            self.record(name, end - start)
+
+            if name == "start":
+                self._running_since = end
+
+    def record(self, name, duration):
+        """
+        Adds the given duration to a phase
+
+        :param string name: Name of the phase
+        :param float duration: Duration in seconds
+        """
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def first_byte(self):
+        """
+        Records the time since the container was started as the ``first_byte`` phase. Only the first call after the
+        container was started counts.
+        """
+        if self._running_since is not None and "first_byte" not in self.phases:
+            self.record("first_byte", self._clock() - self._running_since)
+
+    def finish(self):
+        """
+        Stops the clock of the invocation
+        """
+        if self._end_time is None:
+            self._end_time = self._clock()
+
+    @property
+    def total(self):
+        """
+        :return float: Seconds since the invocation started, until it finished if it did
+        """
+        end = self._end_time if self._end_time is not None else self._clock()
+        return end - self._start_time
+
+    @property
+    def init_duration(self):
+        """
+        :return float: Seconds spent getting the container ready to run the function
+        """
+        return sum(self.phases.get(name, 0.0) for name in self.INIT_PHASES)
+
+    @property
+    def duration(self):
+        """
+        :return float: Seconds the function ran
+        """
+        return self.phases.get("run", 0.0)
+
+    @property
+    def overhead(self):
+        """
+        :return float: Seconds of the invocation spent outside of init and the function itself
+        """
+        return max(self.total - self.init_duration - self.duration, 0.0)
+
+    def to_dict(self):
+        """
+        :return dict: Timings in milliseconds, with the name of the function. Phases that did not happen are None
+        """
+        return {
+            "function": self.function_name,
+            "total_ms": _to_ms(self.total),
+            "init_duration_ms": _to_ms(self.init_duration),
+            "duration_ms": _to_ms(self.duration),
+            "overhead_ms": _to_ms(self.overhead),
+            "phases_ms": {name: _to_ms(self.phases[name]) if name in self.phases else None for name in self.PHASES},
+            "resource_usage": self.resource_usage.to_dict() if self.resource_usage else None
+        }
+
+    def report_line(self):
+        """
+        :return string: Summary of the timings, formatted like the REPORT line Lambda prints after an invocation. The
+            resource usage is included when the container was sampled
+        """
+        line = "REPORT Function: {}\tInit Duration: {:.2f} ms\tDuration: {:.2f} ms\tOverhead: {:.2f} ms".format(
+            self.function_name, _to_ms(self.init_duration), _to_ms(self.duration), _to_ms(self.overhead))
+
+        if self.resource_usage:
+            usage = self.resource_usage.to_dict()
+            line += "\tMax Memory Used: {} MB\tPeak RSS: {} MB\tCPU Time: {:.3f} s".format(
+                usage["max_memory_used_mb"], usage["peak_rss_mb"], usage["cpu_seconds"])
+
+        return line
+
+
+@contextmanager
+def track_invoke_timings(function_name):
+    """
+    Context manager that times the invocation run by the current thread within the block. Phases measured with
+    ``record_phase`` on this thread while the block runs are recorded in the returned timings.
+
+    :param string function_name: Name of the function that is invoked
+    :return InvokeTimings: Timings of the invocation. Finished when the block exits
+    """
+    timings = InvokeTimings(function_name)
+
+    if not hasattr(_active, "timings"):
+        _active.timings = []
+
+    _active.timings.append(timings)
+    try:
+        yield timings
+    finally:
+        timings.finish()
+        _active.timings.remove(timings)
+
+
+def current_timings():
+    """
+    :return InvokeTimings: Timings of the invocation being timed on the current thread. None if there is none
+    """
+    timings = getattr(_active, "timings", None)
+    return timings[-1] if timings else None
+
+
+@contextmanager
+def record_phase(name):
+    """
+    Context manager that measures the block as a phase of the invocation timed on the current thread. Does nothing if
+    no invocation is being timed, ex: when images are built ahead of time.
+
+    :param string name: Name of the phase, one of ``InvokeTimings.PHASES``
+    """
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+
+    with timings.phase(name):
+        yield
+
+
+def record_first_byte():
+    """
+    Records the arrival of the first output of the container of the invocation timed on the current thread
+    """
+    timings = current_timings()
+    if timings is not None:
+        timings.first_byte()
+
+
+def record_resource_usage(usage):
+    """
+    Records the resource usage of the container of the invocation timed on the current thread
+
+    :param samcli.local.docker.stats.ResourceUsage usage: Usage of the container. Ignored if None
+    """
+    timings = current_timings()
+    if timings is not None and usage is not None:
+        timings.resource_usage = usage
+
+
+class TimingsWriter(object):
+    """
+    Writes the timings of invocations to a stream, one JSON object per line. Invocations of a service run in parallel,
+    so writes are serialized. Use an instance as the ``timings_callback`` of a LocalLambdaRunner.
+    """
+
+    def __init__(self, stream):
+        """
+        :param io.IOBase stream: Text stream to write the timings to
+        """
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, timings):
+        """
+        :param InvokeTimings timings: Timings of a finished invocation
+        """
+        line = json.dumps(timings.to_dict(), sort_keys=True, default=str)
+
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+
+def _to_ms(seconds):
+    return round(seconds * 1000.0, 2)
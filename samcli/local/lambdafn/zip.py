@@ -4,8 +4,14 @@ this feature natively (https://bugs.python.org/issue15795).
 """
 
 import os
+import zlib
+import hashlib
+import struct
 import zipfile
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
@@ -19,11 +25,23 @@ except ImportError:
 
 LOG = logging.getLogger(__name__)
 
+# Archives with fewer files are extracted on a single thread. Starting threads would take longer than extracting them
+PARALLEL_UNZIP_MIN_FILES = 64
 
-def unzip(zip_file_path, output_dir, permission=None):
+# Never more threads than CPUs. Decompression is CPU bound
+UNZIP_MAX_WORKERS = 8
+
+# Size of the pieces downloads are read and written in
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def unzip(zip_file_path, output_dir, permission=None, skip=None):
     """
     Unzip the given file into the given directory while preserving file permissions in the process.
 
+    Large archives are extracted in parallel on a pool of threads. Permissions are set in one pass once every file is
+    extracted, so read-only directories don't get in the way of extracting the files they contain.
+
     Parameters
     ----------
     zip_file_path : str
@@ -34,23 +52,116 @@ def unzip(zip_file_path, output_dir, permission=None):
 
     permission : octal int
         Permission to set
+
+    skip : dict
+        Optional. Name of the files that were already extracted mapped to their (CRC, size). Files whose CRC and size
+        match the archive are not extracted again
     """
 
+    skip = skip or {}
+
     with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        infolist = zip_ref.infolist()
 
-        # For each item in the zip file, extract the file and set permissions if available
-        for file_info in zip_ref.infolist():
-            name = file_info.filename
-            extracted_path = os.path.join(output_dir, name)
+    members = [file_info for file_info in infolist
+               if skip.get(file_info.filename) != (file_info.CRC, file_info.file_size)]
+    _extract_members(zip_file_path, members, output_dir)
 
-            zip_ref.extract(name, output_dir)
-            _set_permissions(file_info, extracted_path)
+    # Set permissions of the deepest paths first. Once a directory is made read-only, the files within it can no
+    # longer be changed
+    for file_info in sorted(infolist, key=lambda info: info.filename.rstrip("/").count("/"), reverse=True):
+        extracted_path = os.path.join(output_dir, file_info.filename)
 
+        if permission:
+            # Permissions of the archive would be overridden anyway
             _override_permissions(extracted_path, permission)
+        else:
+            _set_permissions(file_info, extracted_path)
 
     _override_permissions(output_dir, permission)
 
 
+def _extract_members(zip_file_path, members, output_dir):
+    """
+    Extracts the given members of the archive. Regular files are spread over a pool of threads, each reading the
+    archive through its own file handle, if there are enough of them to make it worthwhile.
+
+    Parameters
+    ----------
+    zip_file_path str
+        Path to the zip file
+    members list(zipfile.ZipInfo)
+        Members of the archive to extract
+    output_dir str
+        Path to the directory to extract the members to
+    """
+    files = []
+    serial = []
+
+    for file_info in members:
+        if not _is_safe_name(file_info.filename):
+            # zipfile sanitizes these names on its own. Leave them to it, on a single thread
+            serial.append(file_info)
+        elif file_info.filename.endswith("/"):
+            _makedirs(os.path.join(output_dir, file_info.filename))
+        else:
+            files.append(file_info)
+
+    workers = min(UNZIP_MAX_WORKERS, _cpu_count())
+    if len(files) < PARALLEL_UNZIP_MIN_FILES or workers < 2:
+        _extract_chunk(zip_file_path, files + serial, output_dir)
+        return
+
+    # Create every parent directory up front, so threads never race to create the same directory
+    for parent in {os.path.dirname(os.path.join(output_dir, file_info.filename)) for file_info in files}:
+        _makedirs(parent)
+
+    # Deal the files out largest first, so every thread gets about the same amount of data to extract
+    files.sort(key=lambda file_info: file_info.file_size, reverse=True)
+    chunks = [files[index::workers] for index in range(workers)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the results so errors raised by the threads are raised here
+        list(executor.map(lambda chunk: _extract_chunk(zip_file_path, chunk, output_dir), chunks))
+
+    _extract_chunk(zip_file_path, serial, output_dir)
+
+
+def _extract_chunk(zip_file_path, members, output_dir):
+    if not members:
+        return
+
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        for file_info in members:
+            zip_ref.extract(file_info, output_dir)
+
+
+def _is_safe_name(name):
+    """
+    Checks if the member name maps to a path within the output directory as is, without the sanitization zipfile
+    applies to absolute paths, parent directory references and characters that are invalid on Windows
+    """
+    if os.path.isabs(name) or os.path.splitdrive(name)[0] or ".." in name.split("/"):
+        return False
+
+    return os.name != "nt" or not any(char in name for char in '\\:<>|"?*')
+
+
+def _cpu_count():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+
+
 def _override_permissions(path, permission):
     """
     Forcefully override the permissions on the path
@@ -91,9 +202,10 @@ def _set_permissions(zip_file_info, extracted_path):
     os.chmod(extracted_path, permission)
 
 
-def unzip_from_uri(uri, layer_zip_path, unzip_output_dir, progressbar_label):
+def unzip_from_uri(uri, layer_zip_path, unzip_output_dir, progressbar_label, resume=False):
     """
-    Download the LayerVersion Zip to the Layer Pkg Cache
+    Download the LayerVersion Zip to the Layer Pkg Cache. Files are extracted while the download is still in progress,
+    as soon as all of their data has arrived.
 
     Parameters
     ----------
@@ -105,26 +217,253 @@ def unzip_from_uri(uri, layer_zip_path, unzip_output_dir, progressbar_label):
         Path to unzip the zip to
     progressbar_label str
         Label to use in the Progressbar
+    resume bool
+        Optional. True to continue a previous download whose data is still at ``layer_zip_path``, only requesting the
+        rest of the archive. The partial archive is kept if the download is interrupted again. Only use this if the
+        uri is known to serve the same archive the partial one came from
+
+    Returns
+    -------
+    str
+        Hex digest of the SHA256 of the whole archive
     """
+    streaming_unzipper = None
+    completed = False
+    sha256 = hashlib.sha256()
     try:
-        get_request = requests.get(uri, stream=True, verify=os.environ.get('AWS_CA_BUNDLE', True))
+        verify = os.environ.get('AWS_CA_BUNDLE', True)
+        offset = _hash_partial_download(layer_zip_path, sha256) if resume else 0
 
-        with open(layer_zip_path, 'wb') as local_layer_file:
-            file_length = int(get_request.headers['Content-length'])
+        if offset:
+            get_request = requests.get(uri, stream=True, verify=verify, headers={"Range": "bytes={}-".format(offset)})
+
+            if get_request.status_code != 206:
+                # The server ignored the range, or the partial archive is not a prefix of this one. Start over
+                LOG.debug("Could not resume the download of %s (status %s)", layer_zip_path, get_request.status_code)
+                offset = 0
+                sha256 = hashlib.sha256()
+
+                if get_request.status_code != 200:
+                    get_request.close()
+                    get_request = requests.get(uri, stream=True, verify=verify)
+        else:
+            get_request = requests.get(uri, stream=True, verify=verify)
+
+        with open(layer_zip_path, 'ab' if offset else 'wb') as local_layer_file:
+            file_length = offset + int(get_request.headers['Content-length'])
+
+            streaming_unzipper = _StreamingUnzipper(layer_zip_path, unzip_output_dir)
+            streaming_unzipper.start()
 
             with progressbar(file_length, progressbar_label) as p_bar:
-                # Set the chunk size to None. Since we are streaming the request, None will allow the data to be
-                # read as it arrives in whatever size the chunks are received.
-                for data in get_request.iter_content(chunk_size=None):
+                if offset:
+                    streaming_unzipper.feed(offset)
+                    p_bar.update(offset)
+
+                # Read in fixed size chunks. A chunk size of None makes urllib3 read the whole response before
+                # returning anything, which defeats extracting while downloading and loses everything received so far
+                # when the connection breaks
+                for data in get_request.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                     local_layer_file.write(data)
+                    sha256.update(data)
+
+                    # Make the data visible to the streaming unzipper
+                    local_layer_file.flush()
+                    streaming_unzipper.feed(len(data))
+
                     p_bar.update(len(data))
 
-        # Forcefully set the permissions to 700 on files and directories. This is to ensure the owner
-        # of the files is the only one that can read, write, or execute the files.
-        unzip(layer_zip_path, unzip_output_dir, permission=0o700)
+        extracted = streaming_unzipper.finish()
+
+        # Extract whatever could not be extracted while downloading. Forcefully set the permissions to 700 on files
+        # and directories. This is to ensure the owner of the files is the only one that can read, write, or execute
+        # the files.
+        unzip(layer_zip_path, unzip_output_dir, permission=0o700, skip=extracted)
+        completed = True
 
     finally:
-        # Remove the downloaded zip file
+        if streaming_unzipper:
+            streaming_unzipper.finish()
+
+        # Remove the downloaded zip file, unless it can be used to resume the download later
         path_to_layer = Path(layer_zip_path)
-        if path_to_layer.exists():
+        if (completed or not resume) and path_to_layer.exists():
             path_to_layer.unlink()
+
+    return sha256.hexdigest()
+
+
+def _hash_partial_download(zip_file_path, sha256):
+    """
+    Feeds the data of a previous, partial download to the hash
+
+    :return int: Number of bytes already downloaded
+    """
+    if not os.path.isfile(zip_file_path):
+        return 0
+
+    size = 0
+    with open(zip_file_path, 'rb') as partial_file:
+        for chunk in iter(lambda: partial_file.read(1024 * 1024), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+
+    return size
+
+
+class _StreamingUnzipper(object):
+    """
+    Extracts the files of a zip archive that is still being downloaded, in a background thread.
+
+    The central directory of a zip archive is at its very end, but every file is also preceded by a local header that
+    has its name and size. The unzipper walks through the local headers as the data arrives and extracts every file
+    whose data is complete. It stops at the first file it cannot handle this way (encrypted files, files whose size is
+    only known after their data, unsupported compression methods) or at any error, leaving the rest of the archive to
+    be extracted with ``unzip`` once the download finished. Permissions are only stored in the central directory, so
+    they are set by ``unzip`` as well.
+    """
+
+    _LOCAL_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+    _LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+
+    _FLAG_ENCRYPTED = 0x1
+    _FLAG_DATA_DESCRIPTOR = 0x8
+    _FLAG_UTF8 = 0x800
+
+    _CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, zip_file_path, output_dir):
+        self.zip_file_path = zip_file_path
+        self.output_dir = output_dir
+
+        # Name of the extracted files mapped to their (CRC, size)
+        self.extracted = {}
+
+        self._available = 0
+        self._done = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sam-streaming-unzip")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def feed(self, length):
+        """
+        Tells the unzipper that ``length`` more bytes were written to the archive
+        """
+        with self._condition:
+            self._available += length
+            self._condition.notify_all()
+
+    def finish(self):
+        """
+        Tells the unzipper that the download is over and waits for it to stop
+
+        :return dict: Name of the extracted files mapped to their (CRC, size)
+        """
+        with self._condition:
+            self._done = True
+            self._condition.notify_all()
+
+        if self._thread:
+            self._thread.join()
+
+        return self.extracted
+
+    def _run(self):
+        try:
+            with open(self.zip_file_path, 'rb') as archive:
+                offset = 0
+                while offset is not None:
+                    offset = self._extract_next(archive, offset)
+        except Exception:  # pylint: disable=broad-except
+            LOG.debug("Stopped extracting %s while downloading it", self.zip_file_path, exc_info=True)
+
+    def _extract_next(self, archive, offset):
+        """
+        Extracts the file whose local header starts at ``offset``
+
+        :return int: Offset of the next local header, or None if the unzipper must stop
+        """
+        header = self._read(archive, offset, self._LOCAL_FILE_HEADER.size)
+        if not header or header[:4] != self._LOCAL_FILE_HEADER_SIGNATURE:
+            # Reached the central directory
+            return None
+
+        (_, _, _, flags, method, _, _, crc, compressed_size, size, name_length, extra_length) = \
+            self._LOCAL_FILE_HEADER.unpack(header)
+
+        if flags & (self._FLAG_ENCRYPTED | self._FLAG_DATA_DESCRIPTOR) or compressed_size == 0xFFFFFFFF or \
+                method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            return None
+
+        raw_name = self._read(archive, offset + self._LOCAL_FILE_HEADER.size, name_length)
+        if raw_name is None:
+            return None
+
+        name = raw_name.decode("utf-8" if flags & self._FLAG_UTF8 else "cp437")
+        data_offset = offset + self._LOCAL_FILE_HEADER.size + name_length + extra_length
+
+        if not _is_safe_name(name):
+            return None
+
+        path = os.path.join(self.output_dir, name)
+        if name.endswith("/"):
+            _makedirs(path)
+        else:
+            _makedirs(os.path.dirname(path))
+            if not self._extract_data(archive, data_offset, compressed_size, method, crc, path):
+                return None
+
+        self.extracted[name] = (crc, size)
+        return data_offset + compressed_size
+
+    def _extract_data(self, archive, offset, compressed_size, method, crc, path):
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if method == zipfile.ZIP_DEFLATED else None
+        actual_crc = 0
+
+        with open(path, 'wb') as output:
+            remaining = compressed_size
+            while remaining:
+                chunk = self._read(archive, offset, min(remaining, self._CHUNK_SIZE))
+                if chunk is None:
+                    break
+
+                offset += len(chunk)
+                remaining -= len(chunk)
+
+                if decompressor:
+                    chunk = decompressor.decompress(chunk)
+
+                actual_crc = zlib.crc32(chunk, actual_crc)
+                output.write(chunk)
+
+            if decompressor and not remaining:
+                chunk = decompressor.flush()
+                actual_crc = zlib.crc32(chunk, actual_crc)
+                output.write(chunk)
+
+        if remaining or (actual_crc & 0xFFFFFFFF) != crc:
+            # Incomplete or corrupt. ``unzip`` will extract it again
+            os.remove(path)
+            return False
+
+        return True
+
+    def _read(self, archive, offset, length):
+        """
+        Reads ``length`` bytes at ``offset``, waiting for them to be downloaded if necessary
+
+        :return bytes: The data, or None if the download finished without providing it
+        """
+        with self._condition:
+            while self._available < offset + length and not self._done:
+                self._condition.wait()
+
+            if self._available < offset + length:
+                return None
+
+        archive.seek(offset)
+        return archive.read(length)
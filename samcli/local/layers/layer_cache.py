@@ -0,0 +1,410 @@
+"""
+Keeps the size of the layer cache within a budget by evicting the layers used least recently
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import docker
+import requests
+
+from samcli.local.docker.client import get_docker_client
+from samcli.local.docker.container import Container
+from samcli.local.layers.layer_overlay import LayerOverlay
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LOG = logging.getLogger(__name__)
+
+
+class LayerCacheManager(object):
+    """
+    Tracks the size and the last use of every entry of the layer cache: downloaded layer versions and the merged
+    layers that are mounted into containers. Once the cache grows beyond its budget, the entries used least recently
+    are evicted, except for entries in use. An entry is in use if the caller says so, if an invocation of this process
+    uses it (see ``in_use``), or if a container of SAM CLI mounts it, even a stopped one.
+
+    The index and the statistics are stored in the cache itself, so they are shared by every command that uses the
+    same cache. Uses are recorded in memory and merged into the index at most every ``FLUSH_INTERVAL`` seconds, before
+    an eviction and on ``flush``. Processes merge their updates while holding a lock on the index, where the platform
+    supports file locks.
+    """
+
+    INDEX_FILE = ".index.json"
+    LOCK_FILE = ".index.lock"
+
+    FLUSH_INTERVAL = 30
+
+    # (cache directory, entry name) => number of invocations of this process using the entry. Shared by all managers
+    _in_use = Counter()
+    _in_use_lock = threading.Lock()
+
+    def __init__(self, layer_cache, max_size=None, docker_client=None):
+        """
+        Initialize the manager
+
+        Parameters
+        ----------
+        layer_cache str
+            Directory the layers are cached in
+        max_size int
+            Optional. Number of bytes the cache may use. Nothing is evicted if not set
+        docker_client docker.DockerClient
+            Optional. Docker client to find the entries mounted by running containers with. Defaults to the shared
+            client
+        """
+        self.layer_cache = layer_cache
+        self.max_size = max_size
+
+        self._docker_client = docker_client
+        self._lock = threading.Lock()
+
+        # Updates not merged into the index yet
+        self._pending_stats = Counter()
+        self._pending_uses = {}
+        self._pending_sizes = {}
+        self._last_flush = 0
+
+    def record_hit(self, name):
+        """
+        Records that a cached entry was used as is
+
+        :param string name: Name of the entry
+        """
+        with self._lock:
+            self._pending_stats["hits"] += 1
+            self._record_use(name)
+
+    def record_miss(self, name):
+        """
+        Records that an entry had to be downloaded, or downloaded again, and measures its size
+
+        :param string name: Name of the entry
+        """
+        size = _disk_usage(os.path.join(self.layer_cache, name))
+
+        with self._lock:
+            self._pending_stats["misses"] += 1
+            self._pending_sizes[name] = size
+            self._record_use(name)
+
+    def touch(self, name):
+        """
+        Records the use of an entry without counting it as a hit or miss, ex: merged layers being mounted
+
+        :param string name: Name of the entry. Merged layers are named ``.overlays/<key>``
+        """
+        with self._lock:
+            self._record_use(name)
+
+    def flush(self):
+        """
+        Merges the uses recorded in memory into the index
+        """
+        with self._lock:
+            if not self._pending_uses and not self._pending_stats:
+                return
+
+            with self._locked_index():
+                pass
+
+    @contextmanager
+    def in_use(self, names):
+        """
+        Keeps entries from being evicted, by any manager of this process, while the block runs
+
+        :param list names: Names of the entries
+        """
+        keys = [(self._cache_key, name) for name in names]
+
+        with self._in_use_lock:
+            self._in_use.update(keys)
+
+        try:
+            yield
+        finally:
+            with self._in_use_lock:
+                for key in keys:
+                    self._in_use[key] -= 1
+                    if self._in_use[key] <= 0:
+                        del self._in_use[key]
+
+    def evict(self, in_use=None):
+        """
+        Evicts the entries used least recently until the cache fits in its budget
+
+        :param list in_use: Names of entries that must not be evicted
+        :return list: Names of the evicted entries
+        """
+        if self.max_size is None:
+            return []
+
+        with self._lock, self._locked_index() as index:
+            self._sync(index)
+
+            size = sum(entry["size"] for entry in index["entries"].values())
+            if size <= self.max_size:
+                return []
+
+            protected = set(in_use or []) | self._pinned()
+            mounted = self._mounted_paths()
+
+            evicted = []
+            for name, entry in sorted(index["entries"].items(), key=lambda item: item[1]["last_used"]):
+                if size <= self.max_size:
+                    break
+
+                if name in protected or self._is_mounted(name, mounted):
+                    LOG.debug("Not evicting %s from the layer cache, it is in use", name)
+                    continue
+
+                LOG.info("Evicting %s from the layer cache", name)
+                if not self._remove(name):
+                    continue
+
+                del index["entries"][name]
+                size -= entry["size"]
+                index["stats"]["evictions"] += 1
+                index["stats"]["evicted_bytes"] += entry["size"]
+                evicted.append(name)
+
+            if size > self.max_size:
+                LOG.warning("Layer cache %s uses %d bytes, more than its budget of %d bytes. Everything else is in use",
+                            self.layer_cache, size, self.max_size)
+
+            return evicted
+
+    def stats(self):
+        """
+        :return dict: Statistics of the cache: entries, bytes stored, hits, misses, hit rate, evictions and bytes
+            evicted. The hit rate is None until the cache was used
+        """
+        with self._lock, self._locked_index() as index:
+            self._sync(index)
+
+        stats = dict(index["stats"])
+        lookups = stats["hits"] + stats["misses"]
+
+        stats.update({
+            "entries": len(index["entries"]),
+            "bytes_stored": sum(entry["size"] for entry in index["entries"].values()),
+            "max_size": self.max_size,
+            "hit_rate": round(float(stats["hits"]) / lookups, 4) if lookups else None
+        })
+        return stats
+
+    def _record_use(self, name):
+        """
+        Records the use of an entry in memory. Must be called with the lock held
+        """
+        now = time.time()
+        self._pending_uses[name] = now
+
+        if now - self._last_flush >= self.FLUSH_INTERVAL:
+            with self._locked_index():
+                pass
+
+    @contextmanager
+    def _locked_index(self):
+        """
+        Loads the index with the updates recorded in memory merged into it, and saves it once the block completes.
+        Other processes can't update the index meanwhile. Must be called with the lock held
+        """
+        with self._index_lock():
+            index = self._load()
+            self._merge(index)
+            yield index
+            self._save(index)
+
+        self._last_flush = time.time()
+
+    @contextmanager
+    def _index_lock(self):
+        """
+        Serializes the updates of the index between processes. Updates are not serialized where file locks are not
+        available
+        """
+        if fcntl is None or not os.path.isdir(self.layer_cache):
+            yield
+            return
+
+        with open(os.path.join(self.layer_cache, self.LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _merge(self, index):
+        """
+        Merges the updates recorded in memory into the index. Entries new to the index are measured
+        """
+        for counter, value in self._pending_stats.items():
+            index["stats"][counter] += value
+
+        for name, last_used in self._pending_uses.items():
+            entry = index["entries"].setdefault(name, {})
+            if name in self._pending_sizes:
+                entry["size"] = self._pending_sizes[name]
+            elif "size" not in entry:
+                entry["size"] = _disk_usage(os.path.join(self.layer_cache, name))
+
+            # Another process may have used the entry more recently
+            entry["last_used"] = max(entry.get("last_used", 0), last_used)
+
+        self._pending_stats.clear()
+        self._pending_uses.clear()
+        self._pending_sizes.clear()
+
+    @property
+    def _cache_key(self):
+        return os.path.realpath(self.layer_cache)
+
+    def _pinned(self):
+        """
+        :return set: Names of the entries used by invocations of this process
+        """
+        with self._in_use_lock:
+            return {name for cache_key, name in self._in_use if cache_key == self._cache_key}
+
+    def _sync(self, index):
+        """
+        Makes the index match the entries on disk. Entries that were cached before the index existed, or by a process
+        whose update was lost, are added with their modification time as last use
+        """
+        on_disk = set(self._list_entries())
+
+        for name in set(index["entries"]) - on_disk:
+            del index["entries"][name]
+
+        for name in on_disk - set(index["entries"]):
+            path = os.path.join(self.layer_cache, name)
+            index["entries"][name] = {"size": _disk_usage(path), "last_used": os.path.getmtime(path)}
+
+    def _list_entries(self):
+        """
+        Yields the names of the layers and merged layers in the cache. Files and hidden directories are bookkeeping:
+        hashes, partial downloads and layers being extracted
+        """
+        overlay_dir = os.path.join(self.layer_cache, LayerOverlay.OVERLAYS_DIR)
+
+        for directory, prefix in ((self.layer_cache, ""), (overlay_dir, LayerOverlay.OVERLAYS_DIR + "/")):
+            if not os.path.isdir(directory):
+                continue
+
+            for name in os.listdir(directory):
+                if not name.startswith(".") and os.path.isdir(os.path.join(directory, name)):
+                    yield prefix + name
+
+    def _remove(self, name):
+        path = os.path.join(self.layer_cache, name)
+
+        # Move the entry out of the way first, so nobody finds it half deleted
+        trash = os.path.join(os.path.dirname(path), ".evicted-{}-{}".format(os.path.basename(path), os.getpid()))
+        try:
+            os.rename(path, trash)
+        except OSError:
+            LOG.debug("Failed to evict %s", path, exc_info=True)
+            return False
+
+        shutil.rmtree(trash, ignore_errors=True)
+
+        # Hash and partial downloads of a layer: <name>.zip, or <name>.<first 16 characters of the SHA256>.zip
+        own_files = re.compile(r"^(\.{0}\.sha256|{0}(\.[0-9a-f]{{16}})?\.zip)$".format(re.escape(name)))
+        for file_name in os.listdir(self.layer_cache):
+            if own_files.match(file_name):
+                try:
+                    os.remove(os.path.join(self.layer_cache, file_name))
+                except OSError:
+                    LOG.debug("Failed to remove %s", file_name, exc_info=True)
+
+        return True
+
+    def _mounted_paths(self):
+        """
+        :return list: Host paths mounted by containers of SAM CLI, including stopped containers that are kept to be
+            started again. Empty if Docker can't be reached
+        """
+        try:
+            if self._docker_client is None:
+                self._docker_client = get_docker_client()
+
+            containers = self._docker_client.containers.list(all=True, filters={"label": Container.SAM_LABEL})
+        except (docker.errors.DockerException, requests.exceptions.RequestException):
+            LOG.debug("Failed to list the running containers", exc_info=True)
+            return []
+
+        return [os.path.realpath(mount["Source"])
+                for container in containers
+                for mount in container.attrs.get("Mounts") or []
+                if mount.get("Source")]
+
+    def _is_mounted(self, name, mounted):
+        path = os.path.realpath(os.path.join(self.layer_cache, name))
+        return any(source == path or source.startswith(path + os.sep) for source in mounted)
+
+    def _index_path(self):
+        return os.path.join(self.layer_cache, self.INDEX_FILE)
+
+    def _load(self):
+        index = None
+        try:
+            with open(self._index_path()) as index_file:
+                index = json.load(index_file)
+        except (IOError, OSError, ValueError):
+            pass
+
+        if not isinstance(index, dict):
+            index = {}
+
+        index.setdefault("entries", {})
+        stats = index.setdefault("stats", {})
+        for counter in ("hits", "misses", "evictions", "evicted_bytes"):
+            stats.setdefault(counter, 0)
+
+        return index
+
+    def _save(self, index):
+        if not os.path.isdir(self.layer_cache):
+            return
+
+        # Write to a temporary file first, readers never see a partially written index
+        temp_path = "{}.{}".format(self._index_path(), os.getpid())
+        try:
+            with open(temp_path, "w") as index_file:
+                json.dump(index, index_file)
+
+            if os.path.exists(self._index_path()) and os.name == "nt":
+                os.remove(self._index_path())
+            os.rename(temp_path, self._index_path())
+        except (IOError, OSError):
+            LOG.debug("Failed to save the index of the layer cache", exc_info=True)
+
+
+def _disk_usage(path):
+    """
+    Bytes used by the files in a directory. Hard links to the same file are counted once
+    """
+    seen = set()
+    size = 0
+
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            stat = os.lstat(os.path.join(root, name))
+            if (stat.st_dev, stat.st_ino) in seen:
+                continue
+
+            seen.add((stat.st_dev, stat.st_ino))
+            size += stat.st_size
+
+    return size
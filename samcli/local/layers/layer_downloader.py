@@ -2,14 +2,23 @@
 Downloads Layers locally
 """
 
+import os
+import base64
+import shutil
 import logging
+import binascii
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 
 from samcli.lib.utils.codeuri import resolve_code_path
 from samcli.local.lambdafn.zip import unzip_from_uri
-from samcli.commands.local.cli_common.user_exceptions import CredentialsRequired, ResourceNotFound
+from samcli.commands.local.cli_common.user_exceptions import CredentialsRequired, ResourceNotFound, \
+    LayerChecksumMismatch
 
 try:
     from pathlib import Path
@@ -19,10 +28,13 @@ except ImportError:
 
 LOG = logging.getLogger(__name__)
 
+# Downloads are bound by the network, not the CPU. A few at a time is enough to fill the bandwidth of most connections
+DOWNLOAD_MAX_WORKERS = 4
+
 
 class LayerDownloader(object):
 
-    def __init__(self, layer_cache, cwd, lambda_client=None):
+    def __init__(self, layer_cache, cwd, lambda_client=None, max_workers=None, cache_manager=None):
         """
 
         Parameters
@@ -33,15 +45,34 @@ class LayerDownloader(object):
             Current working directory
         lambda_client boto3.client('lambda')
             Boto3 Client for AWS Lambda
+        max_workers int
+            Optional. Maximum number of layers downloaded at the same time. Defaults to 4
+        cache_manager samcli.local.layers.layer_cache.LayerCacheManager
+            Optional. Records the use of cached layers and keeps the cache within its budget
         """
         self._layer_cache = layer_cache
         self.cwd = cwd
         self._lambda_client = lambda_client
+        self.max_workers = max_workers or DOWNLOAD_MAX_WORKERS
+        self.cache_manager = cache_manager
+
+        self._lock = threading.Lock()
+        self._client_lock = threading.Lock()
+
+        # Layer name => lock held while the layer is downloaded. Locks are kept, there is one per layer at most
+        self._layer_locks = {}
 
     @property
     def lambda_client(self):
-        self._lambda_client = self._lambda_client or boto3.client('lambda')
-        return self._lambda_client
+        """
+        Client for AWS Lambda, created the first time a layer has to be fetched. Layers are downloaded on several
+        threads: the client is created once, from a session of its own, because the default session of boto3 is not
+        thread safe. Clients themselves are.
+        """
+        with self._client_lock:
+            if self._lambda_client is None:
+                self._lambda_client = boto3.session.Session().client('lambda')
+            return self._lambda_client
 
     @property
     def layer_cache(self):
@@ -58,7 +89,7 @@ class LayerDownloader(object):
 
     def download_all(self, layers, force=False):
         """
-        Download a list of layers to the cache
+        Download a list of layers to the cache. Layers are downloaded in parallel, at most ``max_workers`` at a time
 
         Parameters
         ----------
@@ -72,15 +103,41 @@ class LayerDownloader(object):
         List(Path)
             List of Paths to where the layer was cached
         """
-        layer_dirs = []
-        for layer in layers:
-            layer_dirs.append(self.download(layer, force))
+        if len(layers) < 2 or self.max_workers < 2:
+            layer_dirs = [self.download(layer, force) for layer in layers]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(layers))) as executor:
+                # Results come back in the order of the layers. Errors raised by a download are raised here
+                layer_dirs = list(executor.map(lambda layer: self.download(layer, force), layers))
+
+        if self.cache_manager:
+            # Make room for what was just downloaded, without evicting the layers about to be used
+            self.cache_manager.evict(in_use=[layer.name for layer in layers if not layer.is_defined_within_template])
 
         return layer_dirs
 
+    @contextmanager
+    def in_use(self, layers):
+        """
+        Keeps the layers from being evicted from the cache while the block runs, ex: while an image is built from them
+
+        Parameters
+        ----------
+        layers list(samcli.commands.local.lib.provider.Layer)
+            Layers in use
+        """
+        if not self.cache_manager:
+            yield
+            return
+
+        with self.cache_manager.in_use([layer.name for layer in layers if not layer.is_defined_within_template]):
+            yield
+
     def download(self, layer, force=False):
         """
-        Download a given layer to the local cache.
+        Download a given layer to the local cache. Safe to call from several threads: a layer is only downloaded by one
+        of them at a time, the others wait and use its result. The layer is extracted next to the cache and moved into
+        place once complete, so the cache never holds a partially extracted layer.
 
         Parameters
         ----------
@@ -101,25 +158,146 @@ class LayerDownloader(object):
 
         # disabling no-member due to https://github.com/PyCQA/pylint/issues/1660
         layer_path = Path(self.layer_cache).joinpath(layer.name).resolve()  # pylint: disable=no-member
-        is_layer_downloaded = self._is_layer_cached(layer_path)
         layer.codeuri = str(layer_path)
 
-        if is_layer_downloaded and not force:
-            LOG.info("%s is already cached. Skipping download", layer.arn)
-            return layer
+        with self._layer_lock(layer.name):
+            is_layer_downloaded = self._is_layer_cached(layer_path)
+
+            if is_layer_downloaded and not force:
+                LOG.info("%s is already cached. Skipping download", layer.arn)
+                self._record_use(layer.name, hit=True)
+                return layer
+
+            content = self._fetch_layer_content(layer)
+            code_sha256 = self._decode_code_sha256(content.get("CodeSha256"))
+
+            if is_layer_downloaded and code_sha256 and self._read_code_sha256(layer.name) == code_sha256:
+                LOG.info("%s is already cached and unchanged. Skipping download", layer.arn)
+                self._record_use(layer.name, hit=True)
+                return layer
 
-        layer_zip_path = layer.codeuri + '.zip'
-        layer_zip_uri = self._fetch_layer_uri(layer)
-        unzip_from_uri(layer_zip_uri,
-                       layer_zip_path,
-                       unzip_output_dir=layer.codeuri,
-                       progressbar_label='Downloading {}'.format(layer.layer_arn))
+            self._download_layer(layer, layer_path, content.get("Location"), code_sha256)
+            self._record_use(layer.name, hit=False)
 
         return layer
 
-    def _fetch_layer_uri(self, layer):
+    def _record_use(self, name, hit):
+        if not self.cache_manager:
+            return
+
+        if hit:
+            self.cache_manager.record_hit(name)
+        else:
+            self.cache_manager.record_miss(name)
+
+    def _download_layer(self, layer, layer_path, layer_zip_uri, code_sha256):
         """
-        Fetch the Layer Uri based on the LayerVersion Arn
+        Downloads and extracts a layer into a temporary directory, verifies it and moves it into the cache
+
+        Parameters
+        ----------
+        layer samcli.commands.local.lib.provider.Layer
+            Layer to download
+        layer_path Path
+            Where the layer is cached
+        layer_zip_uri str
+            Uri to download the content of the layer from
+        code_sha256 str
+            Hex digest of the SHA256 of the content. None if unknown
+
+        Raises
+        ------
+        samcli.commands.local.cli_common.user_exceptions.LayerChecksumMismatch
+            When the downloaded content does not match the SHA256
+        """
+        layer_cache = self.layer_cache
+
+        # A download of this exact content that was interrupted is continued. Without the SHA256, there is no telling
+        # whether a partial download belongs to the same content, so it starts over
+        if code_sha256:
+            layer_zip_path = os.path.join(layer_cache, "{}.{}.zip".format(layer.name, code_sha256[:16]))
+        else:
+            layer_zip_path = os.path.join(layer_cache, "{}.zip".format(layer.name))
+
+        extract_dir = tempfile.mkdtemp(prefix=".{}.".format(layer.name), dir=layer_cache)
+        try:
+            actual_sha256 = unzip_from_uri(layer_zip_uri,
+                                           layer_zip_path,
+                                           unzip_output_dir=extract_dir,
+                                           progressbar_label='Downloading {}'.format(layer.layer_arn),
+                                           resume=bool(code_sha256))
+
+            if code_sha256 and actual_sha256 != code_sha256:
+                raise LayerChecksumMismatch("Content downloaded for {} does not match its CodeSha256. Expected {} but "
+                                            "got {}".format(layer.arn, code_sha256, actual_sha256))
+
+            self._move_into_cache(extract_dir, str(layer_path))
+        finally:
+            if os.path.exists(extract_dir):
+                shutil.rmtree(extract_dir, ignore_errors=True)
+
+        if code_sha256:
+            self._write_code_sha256(layer.name, code_sha256)
+
+    @staticmethod
+    def _move_into_cache(extract_dir, layer_dir):
+        """
+        Atomically replaces the cached layer with the extracted one
+        """
+        if not os.path.exists(layer_dir):
+            try:
+                os.rename(extract_dir, layer_dir)
+                return
+            except OSError:
+                if not os.path.exists(layer_dir):
+                    raise
+
+        # Move the old layer aside first, renaming onto an existing directory fails
+        old_dir = extract_dir + ".old"
+        os.rename(layer_dir, old_dir)
+        os.rename(extract_dir, layer_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _layer_lock(self, name):
+        with self._lock:
+            return self._layer_locks.setdefault(name, threading.Lock())
+
+    def _code_sha256_path(self, name):
+        return os.path.join(self.layer_cache, ".{}.sha256".format(name))
+
+    def _read_code_sha256(self, name):
+        """
+        :return str: SHA256 of the content the cached layer was extracted from. None if unknown
+        """
+        try:
+            with open(self._code_sha256_path(name)) as sha256_file:
+                return sha256_file.read().strip()
+        except (IOError, OSError):
+            return None
+
+    def _write_code_sha256(self, name, code_sha256):
+        with open(self._code_sha256_path(name), "w") as sha256_file:
+            sha256_file.write(code_sha256)
+
+    @staticmethod
+    def _decode_code_sha256(code_sha256):
+        """
+        Lambda returns the SHA256 of the content of a LayerVersion base64 encoded
+
+        :return str: Hex digest of the SHA256. None if there is none or it can't be decoded
+        """
+        if not code_sha256:
+            return None
+
+        try:
+            return binascii.hexlify(base64.b64decode(code_sha256)).decode("ascii")
+        except (TypeError, ValueError):
+            LOG.debug("Ignoring invalid CodeSha256 %s", code_sha256)
+            return None
+
+    def _fetch_layer_content(self, layer):
+        """
+        Fetch the location and SHA256 of the Layer content based on the LayerVersion Arn
 
         Parameters
         ----------
@@ -128,8 +306,9 @@ class LayerDownloader(object):
 
         Returns
         -------
-        str
-            The Uri to download the LayerVersion Content from
+        dict
+            Content of the LayerVersion, with the Uri to download it from in ``Location`` and the base64 encoded
+            SHA256 of it in ``CodeSha256``
 
         Raises
         ------
@@ -156,7 +335,7 @@ class LayerDownloader(object):
             # If it was not 'AccessDeniedException' or 'ResourceNotFoundException' re-raise
             raise e
 
-        return layer_version_response.get("Content").get("Location")
+        return layer_version_response.get("Content")
 
     def _is_layer_cached(self, layer_path):
         """
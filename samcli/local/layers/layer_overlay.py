@@ -0,0 +1,194 @@
+"""
+Merges the layers of a function into one directory that can be mounted at /opt
+"""
+
+import os
+import stat
+import shutil
+import logging
+import tempfile
+import threading
+
+LOG = logging.getLogger(__name__)
+
+
+class LayerOverlay(object):
+    """
+    Merges layers into a directory with the same content /opt has on AWS Lambda: the layers are extracted on top of
+    each other, in order, so files of later layers replace files of earlier ones. Mounting this directory into a
+    container makes the layers available without building an image for every combination of layers.
+
+    Merged directories are kept between invocations and named after a key that identifies the content of the layers.
+    A directory with a given key is only ever created once, and completely, before it is used.
+    """
+
+    OVERLAYS_DIR = ".overlays"
+
+    def __init__(self, layer_cache, cache_manager=None):
+        """
+        Initialize the overlay
+
+        Parameters
+        ----------
+        layer_cache str
+            Directory the layers are cached in. Merged layers are stored in a sub directory of it
+        cache_manager samcli.local.layers.layer_cache.LayerCacheManager
+            Optional. Records the use of merged layers, so they are evicted from the cache like layers are
+        """
+        self.overlay_dir = os.path.join(layer_cache, self.OVERLAYS_DIR)
+        self.cache_manager = cache_manager
+
+        self._lock = threading.Lock()
+
+        # Key => lock held while the layers with this key are merged
+        self._merging = {}
+
+    def merge(self, key, layers):
+        """
+        Returns a directory with the merged content of the layers, merging them first if necessary
+
+        Parameters
+        ----------
+        key str
+            Identifies the content of the layers. Layers with the same key must have the same content
+        layers list(samcli.commands.local.lib.provider.Layer)
+            Downloaded layers, in the order they are applied
+
+        Returns
+        -------
+        str
+            Directory with the merged layers
+        """
+        directory = os.path.join(self.overlay_dir, key)
+
+        if not os.path.isdir(directory):
+            with self._lock:
+                merging = self._merging.setdefault(key, threading.Lock())
+
+            # Only one thread merges a given combination of layers. Others wait for it and use its result
+            with merging:
+                if not os.path.isdir(directory):
+                    self._merge_into(directory, layers)
+
+            with self._lock:
+                self._merging.pop(key, None)
+
+        if self.cache_manager:
+            self.cache_manager.touch("{}/{}".format(self.OVERLAYS_DIR, key))
+
+        return directory
+
+    def _merge_into(self, directory, layers):
+        """
+        Merges the layers into a temporary directory first, then moves it to its final place
+        """
+        if not os.path.isdir(self.overlay_dir):
+            try:
+                os.makedirs(self.overlay_dir)
+            except OSError:
+                # Created by another process in the meantime
+                if not os.path.isdir(self.overlay_dir):
+                    raise
+
+        LOG.info("Merging %d layer(s) to mount them at /opt", len(layers))
+
+        temp_dir = tempfile.mkdtemp(prefix=".merging-", dir=self.overlay_dir)
+        try:
+            for layer in layers:
+                _copy_tree(layer.codeuri, temp_dir, link=not layer.is_defined_within_template)
+
+            _make_readable(temp_dir)
+
+            try:
+                os.rename(temp_dir, directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+                # Another process merged the same layers first
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+
+def _copy_tree(source, destination, link=False):
+    """
+    Copies everything in the source directory into the destination directory, replacing files that already exist.
+    Symbolic links are copied as links. Files are hard linked instead of copied if ``link`` is set and the file system
+    supports it. A hard link shares the permissions of the file it links to, so files that ``_make_readable`` would
+    have to change are always copied.
+    """
+    for root, dirs, files in os.walk(source):
+        target_root = os.path.join(destination, os.path.relpath(root, source))
+
+        for name in dirs:
+            source_path = os.path.join(root, name)
+            target_path = os.path.join(target_root, name)
+
+            if os.path.islink(source_path):
+                _replace(target_path)
+                os.symlink(os.readlink(source_path), target_path)
+            elif not os.path.isdir(target_path):
+                _replace(target_path)
+                os.makedirs(target_path)
+
+        for name in files:
+            source_path = os.path.join(root, name)
+            target_path = os.path.join(target_root, name)
+            _replace(target_path)
+
+            if os.path.islink(source_path):
+                os.symlink(os.readlink(source_path), target_path)
+                continue
+
+            mode = os.stat(source_path).st_mode
+            if link and _readable_mode(mode) == mode:
+                try:
+                    os.link(source_path, target_path)
+                    continue
+                except (OSError, AttributeError):
+                    # Different file system, or no hard links on this platform
+                    link = False
+
+            shutil.copy2(source_path, target_path)
+
+
+def _replace(path):
+    """
+    Removes what is at the given path, if anything, so a file of a later layer can take its place
+    """
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+def _make_readable(directory):
+    """
+    Functions do not run as root inside the container. Give everybody read access to files, and access to directories
+    and executables, like the --chown of the image build does.
+    """
+    for root, dirs, files in os.walk(directory):
+        for name in dirs + files:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                continue
+
+            mode = os.stat(path).st_mode
+            readable_mode = _readable_mode(mode)
+            if readable_mode != mode:
+                os.chmod(path, readable_mode)
+
+    os.chmod(directory, 0o755)
+
+
+def _readable_mode(mode):
+    """
+    Returns the mode that gives everybody read access to a file, and access to a directory or executable
+    """
+    extra = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+    if stat.S_ISDIR(mode) or mode & stat.S_IXUSR:
+        extra |= stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+
+    return mode | extra
@@ -1,6 +1,7 @@
 """Base class for all Services that interact with Local Lambda"""
 
 import json
+import codecs
 import logging
 import os
 
@@ -11,7 +12,7 @@ LOG = logging.getLogger(__name__)
 
 class BaseLocalService(object):
 
-    def __init__(self, is_debugging, port, host):
+    def __init__(self, is_debugging, port, host, server=None):
         """
         Creates a BaseLocalService class
 
@@ -23,10 +24,14 @@ class BaseLocalService(object):
             Optional. port for the service to start listening on Defaults to 3000
         host str
             Optional. host to start the service on Defaults to '127.0.0.1
+        server samcli.local.services.http_servers.WerkzeugServer
+            Optional. Server to run the application on, any object with a ``serve(app, host, port)`` method. Defaults
+            to Flask's development server
         """
         self.is_debugging = is_debugging
         self.port = port
         self.host = host
+        self.server = server
         self._app = None
 
     def create(self):
@@ -55,6 +60,10 @@ class BaseLocalService(object):
         # kill the container gracefully (Ctrl+C can be handled only by the main thread)
         multi_threaded = not self.is_debugging
 
+        if self.server and multi_threaded:
+            self.server.serve(self._app, self.host, self.port)
+            return
+
         LOG.debug("Localhost server is starting up. Multi-threading = %s", multi_threaded)
 
         # This environ signifies we are running a main function for Flask. This is true, since we are using it within
@@ -90,38 +99,49 @@ class LambdaOutputParser(object):
 
         Parameters
         ----------
-        stdout_stream : io.BaseIO
-            Stream to fetch data from
+        stdout_stream : samcli.lib.utils.output_buffer.OutputBuffer
+            Stream to fetch data from. Its ``getvalue`` must return a bytes-like object, as ``io.BytesIO`` does
 
         Returns
         -------
         str
             String data containing response from Lambda function
-        str
-            String data containng logs statements, if any.
+        bytes
+            Data containing logs statements, if any
         bool
             If the response is an error/exception from the container
         """
         # We only want the last line of stdout, because it's possible that
         # the function may have written directly to stdout using
-        # System.out.println or similar, before docker-lambda output the result
-        stdout_data = stdout_stream.getvalue().rstrip(b'\n')
+        # System.out.println or similar, before docker-lambda output the result.
+        # The output can be several megabytes large, so it is only scanned for the positions of the lines. The
+        # response is then decoded from a view of the output, without copying it.
+        stdout_data = stdout_stream.getvalue()
+        stdout_view = memoryview(stdout_data)
+
+        end = len(stdout_data)
+        while end > 0 and stdout_data[end - 1:end] == b'\n':
+            end -= 1
 
         # Usually the output is just one line and contains response as JSON string, but if the Lambda function
         # wrote anything directly to stdout, there will be additional lines. So just extract the last line as
         # response and everything else as log output.
-        lambda_response = stdout_data
+        start = 0
         lambda_logs = None
 
-        last_line_position = stdout_data.rfind(b'\n')
+        last_line_position = stdout_data.rfind(b'\n', 0, end)
         if last_line_position >= 0:
             # So there are multiple lines. Separate them out.
             # Everything but the last line are logs
-            lambda_logs = stdout_data[:last_line_position]
-            # Last line is Lambda response. Make sure to strip() so we get rid of extra whitespaces & newlines around
-            lambda_response = stdout_data[last_line_position:].strip()
-
-        lambda_response = lambda_response.decode('utf-8')
+            lambda_logs = stdout_view[:last_line_position].tobytes()
+            # Last line is Lambda response. Make sure to strip so we get rid of extra whitespaces & newlines around
+            start = last_line_position
+            while start < end and stdout_data[start:start + 1].isspace():
+                start += 1
+            while end > start and stdout_data[end - 1:end].isspace():
+                end -= 1
+
+        lambda_response = codecs.decode(stdout_view[start:end], 'utf-8')
 
         # When the Lambda Function returns an Error/Exception, the output is added to the stdout of the container. From
         # our perspective, the container returned some value, which is not always true. Since the output is the only
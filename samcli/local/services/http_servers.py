@@ -0,0 +1,203 @@
+"""
+HTTP servers the local services can run on
+"""
+
+import logging
+import threading
+
+from six.moves import queue
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+LOG = logging.getLogger(__name__)
+
+
+class ServerNotAvailable(Exception):
+    """
+    Raised when the package of a server is not installed
+    """
+    pass
+
+
+class WerkzeugServer(object):
+    """
+    Runs the application on Werkzeug, like ``Flask.run`` does, with a fixed number of threads instead of a new thread
+    for every connection. Connections are kept alive between requests and the size of the listen backlog is
+    configurable.
+    """
+
+    def __init__(self, threads=16, keep_alive=5, backlog=128):
+        """
+        Parameters
+        ----------
+        threads int
+            Number of requests served at the same time. Connections that are kept alive occupy a thread while they
+            wait for their next request
+        keep_alive int
+            Seconds an idle connection is kept open for its next request. Every connection is closed after one
+            request when set to 0
+        backlog int
+            Maximum number of connections waiting to be accepted
+        """
+        self.threads = threads
+        self.keep_alive = keep_alive
+        self.backlog = backlog
+
+    def serve(self, app, host, port):
+        """
+        Serves the application until the process is interrupted. This is a **blocking call**
+
+        :param app: WSGI application
+        :param string host: Hostname or IP address to bind to
+        :param int port: Port to listen on
+        """
+        server = _ThreadPoolWSGIServer(host, port, app,
+                                       handler=_request_handler(self.keep_alive),
+                                       threads=self.threads,
+                                       backlog=self.backlog)
+
+        LOG.debug("Serving on Werkzeug with %d thread(s), keep-alive of %d second(s) and backlog of %d",
+                  self.threads, self.keep_alive, self.backlog)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+
+class WaitressServer(object):
+    """
+    Runs the application on Waitress, a production WSGI server. Waitress must be installed separately
+    """
+
+    def __init__(self, threads=16, keep_alive=5, backlog=128):
+        """
+        Parameters
+        ----------
+        threads int
+            Number of requests served at the same time. Unlike Werkzeug, idle connections do not occupy a thread
+        keep_alive int
+            Seconds an idle connection is kept open for its next request
+        backlog int
+            Maximum number of connections waiting to be accepted
+
+        Raises
+        ------
+        ServerNotAvailable
+            If Waitress is not installed
+        """
+        try:
+            import waitress  # pylint: disable=import-error
+        except ImportError:
+            raise ServerNotAvailable("Waitress is not installed. Install it with 'pip install waitress'")
+
+        self.threads = threads
+        self.keep_alive = keep_alive
+        self.backlog = backlog
+        self._waitress = waitress
+
+    def serve(self, app, host, port):
+        """
+        Serves the application until the process is interrupted. This is a **blocking call**
+
+        :param app: WSGI application
+        :param string host: Hostname or IP address to bind to
+        :param int port: Port to listen on
+        """
+        LOG.debug("Serving on Waitress with %d thread(s), keep-alive of %d second(s) and backlog of %d",
+                  self.threads, self.keep_alive, self.backlog)
+
+        self._waitress.serve(app,
+                             host=host,
+                             port=port,
+                             threads=self.threads,
+                             # Waitress closes connections that are idle for this long, between requests or not
+                             channel_timeout=max(self.keep_alive, 1),
+                             backlog=self.backlog,
+                             _quiet=True)
+
+
+SERVERS = {
+    "werkzeug": WerkzeugServer,
+    "waitress": WaitressServer,
+}
+
+
+def create_server(name, threads=16, keep_alive=5, backlog=128):
+    """
+    Creates the server with the given name
+
+    :param string name: Name of the server, one of ``SERVERS``
+    :param int threads: Number of requests served at the same time
+    :param int keep_alive: Seconds an idle connection is kept open for its next request
+    :param int backlog: Maximum number of connections waiting to be accepted
+    :return: Server with a ``serve(app, host, port)`` method
+    :raise ValueError: If there is no server with this name
+    :raise ServerNotAvailable: If the package of the server is not installed
+    """
+    if name not in SERVERS:
+        raise ValueError("Unknown server {}. Supported servers are {}".format(name, ", ".join(sorted(SERVERS))))
+
+    return SERVERS[name](threads=threads, keep_alive=keep_alive, backlog=backlog)
+
+
+class _ThreadPoolWSGIServer(BaseWSGIServer):
+    """
+    Werkzeug server that hands every accepted connection to a fixed pool of threads. Like the threads of Werkzeug's
+    threaded server, they are daemon threads that don't keep the process alive once the server was interrupted.
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, app, handler, threads, backlog):
+        # The base class starts listening while it is initialized
+        self.request_queue_size = backlog
+        self._connections = queue.Queue()
+
+        super(_ThreadPoolWSGIServer, self).__init__(host, port, app, handler=handler)
+
+        self._threads = []
+        for _ in range(threads):
+            thread = threading.Thread(target=self._process_connections)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def process_request(self, request, client_address):
+        self._connections.put((request, client_address))
+
+    def _process_connections(self):
+        while True:
+            connection = self._connections.get()
+            if connection is None:
+                return
+
+            request, client_address = connection
+            try:
+                self.finish_request(request, client_address)
+            except Exception:  # pylint: disable=broad-except
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super(_ThreadPoolWSGIServer, self).server_close()
+
+        # Threads stop once they are done with the connections accepted so far
+        for _ in self._threads:
+            self._connections.put(None)
+
+
+def _request_handler(keep_alive):
+    """
+    Returns a request handler that keeps connections open for the given number of seconds
+    """
+    if not keep_alive:
+        return WSGIRequestHandler
+
+    class KeepAliveRequestHandler(WSGIRequestHandler):
+        # HTTP/1.1 connections are persistent unless the client asks to close them
+        protocol_version = "HTTP/1.1"
+
+        # Idle connections time out reading their next request
+        timeout = keep_alive
+
+    return KeepAliveRequestHandler
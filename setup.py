@@ -54,7 +54,8 @@ setup(
     },
     install_requires=read_requirements('base.txt'),
     extras_require={
-        'dev': read_requirements('dev.txt')
+        'dev': read_requirements('dev.txt'),
+        'async': read_requirements('async.txt')
     },
     include_package_data=True,
     classifiers=[
@@ -50,7 +50,7 @@ class TestFunctionalLocalLambda(TestCase):
         self.function = provider.Function(name=self.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                           handler="index.handler", codeuri=self.code_uri,
                                           environment={"Variables": self.variables},
-                                          rolearn=None, layers=[])
+                                          rolearn=None, layers=[], reserved_concurrency=None)
 
         self.mock_function_provider = Mock()
         self.mock_function_provider.get.return_value = self.function
@@ -32,7 +32,7 @@ class TestService_InvalidResponses(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
@@ -78,11 +78,11 @@ class TestService_ContentType(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.base64_response_function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                                         rolearn=None, layers=[])
+                                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
@@ -131,11 +131,11 @@ class TestService_EventSerialization(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.base64_response_function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                                         rolearn=None, layers=[])
+                                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
@@ -349,7 +349,7 @@ class TestService_ProxyAtBasePath(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
@@ -408,7 +408,7 @@ class TestService_Binary(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.echoimagehandler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
@@ -485,7 +485,7 @@ class TestService_PostingBinary(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.base54request", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
@@ -565,11 +565,11 @@ class TestService_FlaskDefaultOptionsDisabled(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.base64_response_function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                                         rolearn=None, layers=[])
+                                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
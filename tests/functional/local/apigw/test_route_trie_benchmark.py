@@ -0,0 +1,96 @@
+"""
+Microbenchmark of routing requests with the route trie of the local API Gateway, compared to matching Werkzeug URL
+rules like Flask does. Timings depend on the host, so it only runs if SAM_CLI_RUN_BENCHMARKS is set. Run with
+"pytest -s" to print the timings.
+"""
+import os
+import timeit
+from unittest import TestCase, skipIf
+
+from werkzeug.routing import Map, Rule
+
+from samcli.local.apigw.local_apigw_service import Route
+from samcli.local.apigw.path_converter import PathConverter
+from samcli.local.apigw.route_trie import RouteTrie
+
+RUN_BENCHMARKS = os.environ.get("SAM_CLI_RUN_BENCHMARKS", False)
+
+
+@skipIf(not RUN_BENCHMARKS, "Set SAM_CLI_RUN_BENCHMARKS to run benchmarks")
+class TestRouteTrieBenchmark(TestCase):
+
+    ROUTE_COUNTS = [10, 100, 1000]
+    MATCHES = 2000
+
+    # Matching is expected to cost about the same for any number of routes. Allow for noise of shared CI hosts
+    MAX_SLOWDOWN = 3
+
+    @staticmethod
+    def make_routes(count):
+        """
+        Makes an API with the given number of routes, mostly parameterized and greedy paths
+        """
+        routes = []
+        for index in range(count):
+            kind = index % 4
+            if kind == 0:
+                path = "/service{}/items/{{id}}".format(index)
+            elif kind == 1:
+                path = "/service{}/items/{{id}}/children/{{child}}".format(index)
+            elif kind == 2:
+                path = "/service{}/{{proxy+}}".format(index)
+            else:
+                path = "/service{}/status".format(index)
+            routes.append(Route(methods=["GET"], function_name="Function{}".format(index), path=path))
+
+        return routes
+
+    @staticmethod
+    def request_paths(count):
+        """
+        Makes requests for the routes added last, which Werkzeug tries last among rules of the same weight
+        """
+        paths = []
+        for index in range(count - 4, count):
+            path = "/service{}".format(index)
+            paths.append(path + ["/items/123", "/items/123/children/abc", "/a/b/c", "/status"][index % 4])
+
+        return paths
+
+    def time_per_match(self, match, paths):
+        def run():
+            for path in paths:
+                match(path)
+
+        runs = self.MATCHES // len(paths)
+        return min(timeit.repeat(run, number=runs, repeat=5)) / (runs * len(paths))
+
+    def time_trie(self, count):
+        trie = RouteTrie(self.make_routes(count))
+        paths = self.request_paths(count)
+
+        for path in paths:
+            self.assertIsNotNone(trie.match("GET", path))
+
+        return self.time_per_match(lambda path: trie.match("GET", path), paths)
+
+    def time_werkzeug(self, count):
+        url_map = Map([Rule(PathConverter.convert_path_to_flask(route.path),
+                            endpoint=route.path,
+                            methods=route.methods) for route in self.make_routes(count)])
+        adapter = url_map.bind("localhost")
+
+        return self.time_per_match(lambda path: adapter.match(path, method="GET"), self.request_paths(count))
+
+    def test_routing_cost_must_not_grow_with_route_count(self):
+        trie_timings = []
+
+        print("\nroutes  trie (us/request)  werkzeug (us/request)")
+        for count in self.ROUTE_COUNTS:
+            trie_time = self.time_trie(count)
+            werkzeug_time = self.time_werkzeug(count)
+            trie_timings.append(trie_time)
+
+            print("{:6d}  {:17.2f}  {:21.2f}".format(count, trie_time * 1e6, werkzeug_time * 1e6))
+
+        self.assertLess(trie_timings[-1], trie_timings[0] * self.MAX_SLOWDOWN)
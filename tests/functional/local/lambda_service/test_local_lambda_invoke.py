@@ -48,14 +48,15 @@ class TestLocalLambdaService(TestCase):
 
         cls.hello_world_function = provider.Function(name=cls.hello_world_function_name, runtime="nodejs4.3",
                                                      memory=256, timeout=5, handler="index.handler",
-                                                     codeuri=cls.code_uri, environment=None, rolearn=None, layers=[])
+                                                     codeuri=cls.code_uri, environment=None, rolearn=None, layers=[],
+                                                     reserved_concurrency=None)
 
         cls.throw_error_function_name = "ThrowError"
 
         cls.throw_error_function = provider.Function(name=cls.throw_error_function_name, runtime="nodejs4.3",
                                                      memory=256, timeout=5, handler="index.handler",
                                                      codeuri=cls.code_uri_for_throw_error, environment=None,
-                                                     rolearn=None, layers=[])
+                                                     rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.side_effect = cls.mocked_function_provider
@@ -125,7 +126,7 @@ class TestLocalEchoLambdaService(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
@@ -189,7 +190,7 @@ class TestLocalLambdaService_NotSupportedRequests(TestCase):
 
         cls.function = provider.Function(name=cls.function_name, runtime="nodejs4.3", memory=256, timeout=5,
                                          handler="index.handler", codeuri=cls.code_uri, environment=None,
-                                         rolearn=None, layers=[])
+                                         rolearn=None, layers=[], reserved_concurrency=None)
 
         cls.mock_function_provider = Mock()
         cls.mock_function_provider.get.return_value = cls.function
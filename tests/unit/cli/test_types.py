@@ -3,7 +3,7 @@ from unittest import TestCase
 from mock import Mock, ANY
 from nose_parameterized import parameterized
 
-from samcli.cli.types import CfnParameterOverridesType
+from samcli.cli.types import CfnParameterOverridesType, ByteSizeType
 
 
 class TestCfnParameterOverridesType(TestCase):
@@ -95,3 +95,40 @@ class TestCfnParameterOverridesType(TestCase):
     def test_successful_parsing(self, input, expected):
         result = self.param_type.convert(input, None, None)
         self.assertEquals(result, expected, msg="Failed with Input = " + input)
+
+
+class TestByteSizeType(TestCase):
+
+    def setUp(self):
+        self.param_type = ByteSizeType()
+
+    @parameterized.expand([
+        ("some string"),
+
+        # Negative sizes
+        ("-10M"),
+
+        # Unknown unit
+        ("10X"),
+
+        # No number
+        ("G")
+    ])
+    def test_must_fail_on_invalid_format(self, input):
+        self.param_type.fail = Mock()
+        self.param_type.convert(input, "param", "ctx")
+
+        self.param_type.fail.assert_called_with(ANY, "param", "ctx")
+
+    @parameterized.expand([
+        ("1024", 1024),
+        ("0", 0),
+        ("512K", 512 * 1024),
+        ("512m", 512 * 1024 * 1024),
+        ("1.5G", 3 * 512 * 1024 * 1024),
+        ("2 GB", 2 * 1024 * 1024 * 1024),
+        ("1T", 1024 ** 4),
+        (100, 100)
+    ])
+    def test_successful_parsing(self, input, expected):
+        self.assertEquals(self.param_type.convert(input, None, None), expected)
@@ -0,0 +1,55 @@
+import json
+from unittest import TestCase
+from mock import patch, Mock
+
+from samcli.commands.local.cache.cli import do_cli as cache_cli
+
+
+class TestCli(TestCase):
+
+    def setUp(self):
+        self.ctx_mock = Mock()
+        self.layer_cache_basedir = "/some/layers/path"
+        self.stats = {
+            "hits": 3,
+            "misses": 1,
+            "hit_rate": 0.75,
+            "entries": 2,
+            "bytes_stored": 3 * 1024 * 1024,
+            "max_size": None,
+            "evictions": 1,
+            "evicted_bytes": 2048
+        }
+
+    @patch("samcli.commands.local.cache.cli.click")
+    @patch("samcli.commands.local.cache.cli.LayerCacheManager")
+    def test_must_report_statistics(self, layer_cache_manager_mock, click_mock):
+        manager_mock = layer_cache_manager_mock.return_value
+        manager_mock.evict.return_value = []
+        manager_mock.stats.return_value = self.stats
+
+        cache_cli(self.ctx_mock, self.layer_cache_basedir, None, False)
+
+        layer_cache_manager_mock.assert_called_with(self.layer_cache_basedir, max_size=None)
+        output = "\n".join(call[0][0] for call in click_mock.echo.call_args_list)
+
+        self.assertIn("Entries:         2", output)
+        self.assertIn("Bytes stored:    3.0 MB", output)
+        self.assertIn("Hit rate:        75.0% (3 hits, 1 misses)", output)
+        self.assertIn("Evictions:       1 (2.0 KB evicted)", output)
+
+    @patch("samcli.commands.local.cache.cli.click")
+    @patch("samcli.commands.local.cache.cli.LayerCacheManager")
+    def test_must_evict_to_max_size_and_report_json(self, layer_cache_manager_mock, click_mock):
+        manager_mock = layer_cache_manager_mock.return_value
+        manager_mock.evict.return_value = ["layer1"]
+        manager_mock.stats.return_value = self.stats
+
+        cache_cli(self.ctx_mock, self.layer_cache_basedir, 1024, True)
+
+        layer_cache_manager_mock.assert_called_with(self.layer_cache_basedir, max_size=1024)
+        manager_mock.evict.assert_called_with()
+
+        report = json.loads(click_mock.echo.call_args[0][0])
+        self.assertEquals(report["evicted"], ["layer1"])
+        self.assertEquals(report["hit_rate"], 0.75)
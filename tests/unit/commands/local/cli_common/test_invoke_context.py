@@ -8,7 +8,7 @@ from samcli.commands.local.cli_common.user_exceptions import InvokeContextExcept
 from samcli.commands.local.cli_common.invoke_context import InvokeContext
 
 from unittest import TestCase
-from mock import Mock, PropertyMock, patch, ANY, mock_open
+from mock import Mock, PropertyMock, patch, ANY, call, mock_open
 
 
 class TestInvokeContext__enter__(TestCase):
@@ -35,7 +35,8 @@ class TestInvokeContext__enter__(TestCase):
                                        debug_args='args',
                                        parameter_overrides={},
                                        aws_region="region",
-                                       aws_profile="profile")
+                                       aws_profile="profile",
+                                       image_refresh_interval=120)
 
         template_dict = "template_dict"
         invoke_context._get_template_data = Mock()
@@ -73,7 +74,30 @@ class TestInvokeContext__enter__(TestCase):
         invoke_context._get_env_vars_value.assert_called_with(env_vars_file)
         invoke_context._setup_log_file.assert_called_with(log_file)
         invoke_context._get_debug_context.assert_called_once_with(1111, "args", "path-to-debugger")
-        invoke_context._get_container_manager.assert_called_once_with("network", True)
+        invoke_context._get_container_manager.assert_called_once_with("network", True, None, None, 120)
+        container_manager_mock.reaper.remove_orphans.assert_called_once_with()
+
+    @patch("samcli.commands.local.cli_common.invoke_context.configure_docker_client")
+    @patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider")
+    def test_must_configure_docker_client_before_creating_container_manager(self, SamFunctionProviderMock,
+                                                                            configure_docker_client_mock):
+        invoke_context = InvokeContext("template-file", docker_max_pool_size=30)
+
+        invoke_context._get_template_data = Mock()
+        invoke_context._get_env_vars_value = Mock()
+        invoke_context._setup_log_file = Mock()
+        invoke_context._get_debug_context = Mock()
+        invoke_context._get_container_manager = Mock()
+
+        def get_container_manager(*args):
+            configure_docker_client_mock.assert_called_once_with(max_pool_size=30)
+            return Mock()
+
+        invoke_context._get_container_manager.side_effect = get_container_manager
+
+        invoke_context.__enter__()
+
+        invoke_context._get_container_manager.assert_called_once_with(None, None, None, None, None)
 
     @patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider")
     def test_must_use_container_manager_to_check_docker_connectivity(self, SamFunctionProviderMock):
@@ -131,6 +155,16 @@ class TestInvokeContext__exit__(TestCase):
         handle_mock.close.assert_called_with()
         self.assertIsNone(context._log_file_handle)
 
+    def test_must_close_opened_timings_file(self):
+        context = InvokeContext(template_file="template")
+        handle_mock = Mock()
+        context._timings_file_handle = handle_mock
+
+        context.__exit__()
+
+        handle_mock.close.assert_called_with()
+        self.assertIsNone(context._timings_file_handle)
+
     def test_must_ignore_if_handle_is_absent(self):
         context = InvokeContext(template_file="template")
         context._log_file_handle = None
@@ -138,6 +172,68 @@ class TestInvokeContext__exit__(TestCase):
         context.__exit__()
         self.assertIsNone(context._log_file_handle)
 
+    def test_must_drain_warm_pool(self):
+        context = InvokeContext(template_file="template")
+        container_manager_mock = Mock()
+        context._container_manager = container_manager_mock
+
+        context.__exit__()
+
+        container_manager_mock.warm_pool.drain.assert_called_with()
+
+    def test_must_drain_reaper_after_warm_pool(self):
+        context = InvokeContext(template_file="template")
+        container_manager_mock = Mock()
+        context._container_manager = container_manager_mock
+
+        context.__exit__()
+
+        # Containers evicted from the pool are removed by the reaper. It must be drained last
+        self.assertEquals(container_manager_mock.mock_calls[-2:], [call.warm_pool.drain(), call.reaper.drain()])
+
+    def test_must_flush_layer_cache_manager(self):
+        context = InvokeContext(template_file="template")
+        cache_manager_mock = Mock()
+        context._layer_cache_manager = cache_manager_mock
+
+        context.__exit__()
+
+        cache_manager_mock.flush.assert_called_with()
+        self.assertIsNone(context._layer_cache_manager)
+
+    def test_must_close_code_cache(self):
+        context = InvokeContext(template_file="template")
+        code_cache_mock = Mock()
+        context._code_cache = code_cache_mock
+
+        context.__exit__()
+
+        code_cache_mock.close.assert_called_with()
+        self.assertIsNone(context._code_cache)
+
+    def test_must_shutdown_lambda_runtime(self):
+        context = InvokeContext(template_file="template")
+        runtime_mock = Mock()
+        context._lambda_runtime = runtime_mock
+
+        context.__exit__()
+
+        runtime_mock.shutdown.assert_called_with()
+        self.assertIsNone(context._lambda_runtime)
+
+    @patch("samcli.commands.local.cli_common.invoke_context.LOG")
+    def test_must_log_scheduler_stats(self, log_mock):
+        context = InvokeContext(template_file="template")
+        scheduler_mock = Mock()
+        scheduler_mock.stats.return_value = {"queued": 2, "throttled": 1, "average_wait_time": 0.5,
+                                             "max_wait_time": 1.0, "max_queue_depth": 2}
+        context._scheduler = scheduler_mock
+
+        context.__exit__()
+
+        log_mock.info.assert_called_once_with(ANY, 2, 0.5, 1.0, 2, 1)
+        self.assertIsNone(context._scheduler)
+
 
 class TestInvokeContextAsContextManager(TestCase):
     """
@@ -213,6 +309,7 @@ class TestInvokeContext_local_lambda_runner(TestCase):
                                      aws_profile="profile",
                                      aws_region="region")
 
+    @patch("samcli.commands.local.cli_common.invoke_context.ExtractionCache")
     @patch("samcli.commands.local.cli_common.invoke_context.LambdaImage")
     @patch("samcli.commands.local.cli_common.invoke_context.LayerDownloader")
     @patch("samcli.commands.local.cli_common.invoke_context.LambdaRuntime")
@@ -223,7 +320,8 @@ class TestInvokeContext_local_lambda_runner(TestCase):
                                 LocalLambdaMock,
                                 LambdaRuntimeMock,
                                 download_layers_mock,
-                                lambda_image_patch):
+                                lambda_image_patch,
+                                ExtractionCacheMock):
 
         runtime_mock = Mock()
         LambdaRuntimeMock.return_value = runtime_mock
@@ -254,15 +352,206 @@ class TestInvokeContext_local_lambda_runner(TestCase):
             result = self.context.local_lambda_runner
             self.assertEquals(result, runner_mock)
 
-            LambdaRuntimeMock.assert_called_with(container_manager_mock, image_mock)
-            lambda_image_patch.assert_called_once_with(download_mock, True, True)
+            LambdaRuntimeMock.assert_called_with(container_manager_mock,
+                                                 image_mock,
+                                                 warm_containers=False,
+                                                 code_cache=ExtractionCacheMock.return_value)
+            lambda_image_patch.assert_called_once_with(download_mock, True, True, mount_layers=False)
             LocalLambdaMock.assert_called_with(local_runtime=runtime_mock,
                                                function_provider=ANY,
                                                cwd=cwd,
                                                debug_context=None,
                                                env_vars_values=ANY,
                                                aws_profile="profile",
-                                               aws_region="region")
+                                               aws_region="region",
+                                               scheduler=ANY,
+                                               timings_callback=None)
+
+    @patch("samcli.commands.local.cli_common.invoke_context.TimingsWriter")
+    @patch("samcli.commands.local.cli_common.invoke_context.ExtractionCache")
+    @patch("samcli.commands.local.cli_common.invoke_context.LambdaImage")
+    @patch("samcli.commands.local.cli_common.invoke_context.LayerDownloader")
+    @patch("samcli.commands.local.cli_common.invoke_context.LambdaRuntime")
+    @patch("samcli.commands.local.cli_common.invoke_context.LocalLambdaRunner")
+    def test_must_write_timings_to_timings_file(self,
+                                                LocalLambdaMock,
+                                                LambdaRuntimeMock,
+                                                download_layers_mock,
+                                                lambda_image_patch,
+                                                ExtractionCacheMock,
+                                                TimingsWriterMock):
+        context = InvokeContext(template_file="template_file")
+        context.get_cwd = Mock(return_value="cwd")
+        context._container_manager = Mock()
+        context._function_provider = Mock()
+        context._function_provider.get_all.return_value = []
+        context._timings_file_handle = Mock()
+
+        context.local_lambda_runner
+
+        TimingsWriterMock.assert_called_with(context._timings_file_handle)
+        self.assertEquals(LocalLambdaMock.call_args[1]["timings_callback"], TimingsWriterMock.return_value)
+
+    @patch("samcli.commands.local.cli_common.invoke_context.ExtractionCache")
+    @patch("samcli.commands.local.cli_common.invoke_context.LambdaImage")
+    @patch("samcli.commands.local.cli_common.invoke_context.LayerDownloader")
+    @patch("samcli.commands.local.cli_common.invoke_context.PersistentLambdaRuntime")
+    @patch("samcli.commands.local.cli_common.invoke_context.LocalLambdaRunner")
+    def test_must_create_runner_with_persistent_runtime(self,
+                                                        LocalLambdaMock,
+                                                        PersistentLambdaRuntimeMock,
+                                                        download_layers_mock,
+                                                        lambda_image_patch,
+                                                        ExtractionCacheMock):
+        context = InvokeContext(template_file="template_file",
+                                warm_pool_size=4,
+                                warm_pool_ttl=60,
+                                persistent_containers=True)
+        context.get_cwd = Mock(return_value="cwd")
+        container_manager_mock = Mock()
+        context._container_manager = container_manager_mock
+        context._function_provider = Mock()
+        context._function_provider.get_all.return_value = []
+
+        context.local_lambda_runner
+
+        PersistentLambdaRuntimeMock.assert_called_with(container_manager_mock,
+                                                       lambda_image_patch.return_value,
+                                                       max_idle=4,
+                                                       idle_ttl=60,
+                                                       code_cache=ExtractionCacheMock.return_value)
+        LocalLambdaMock.assert_called_with(local_runtime=PersistentLambdaRuntimeMock.return_value,
+                                           function_provider=ANY,
+                                           cwd="cwd",
+                                           debug_context=ANY,
+                                           env_vars_values=ANY,
+                                           aws_profile=ANY,
+                                           aws_region=ANY,
+                                           scheduler=ANY,
+                                           timings_callback=None)
+        self.assertEquals(context._lambda_runtime, PersistentLambdaRuntimeMock.return_value)
+
+    @patch("samcli.commands.local.cli_common.invoke_context.ExtractionCache")
+    @patch("samcli.commands.local.cli_common.invoke_context.LambdaImage")
+    @patch("samcli.commands.local.cli_common.invoke_context.LayerDownloader")
+    @patch("samcli.commands.local.cli_common.invoke_context.PersistentLambdaRuntime")
+    @patch("samcli.commands.local.cli_common.invoke_context.LocalLambdaRunner")
+    def test_must_make_room_for_prewarmed_containers(self,
+                                                     LocalLambdaMock,
+                                                     PersistentLambdaRuntimeMock,
+                                                     download_layers_mock,
+                                                     lambda_image_patch,
+                                                     ExtractionCacheMock):
+        context = InvokeContext(template_file="template_file",
+                                warm_pool_ttl=60,
+                                persistent_containers=True,
+                                warm_containers=3)
+        context.get_cwd = Mock(return_value="cwd")
+        context._container_manager = Mock()
+        context._function_provider = Mock()
+        context._function_provider.get_all.return_value = [Mock(reserved_concurrency=None) for _ in range(4)]
+
+        context.local_lambda_runner
+
+        PersistentLambdaRuntimeMock.assert_called_with(ANY, ANY, max_idle=12, idle_ttl=60, code_cache=ANY)
+
+    @patch("samcli.commands.local.cli_common.invoke_context.ExtractionCache")
+    @patch("samcli.commands.local.cli_common.invoke_context.LambdaImage")
+    @patch("samcli.commands.local.cli_common.invoke_context.LayerDownloader")
+    @patch("samcli.commands.local.cli_common.invoke_context.LambdaRuntime")
+    @patch("samcli.commands.local.cli_common.invoke_context.LocalLambdaRunner")
+    @patch("samcli.commands.local.cli_common.invoke_context.InvocationScheduler")
+    def test_must_create_scheduler_with_reserved_concurrency(self,
+                                                             InvocationSchedulerMock,
+                                                             LocalLambdaMock,
+                                                             LambdaRuntimeMock,
+                                                             download_layers_mock,
+                                                             lambda_image_patch,
+                                                             ExtractionCacheMock):
+        context = InvokeContext(template_file="template_file",
+                                max_concurrency=10,
+                                max_queue_size=20,
+                                queue_timeout=5)
+        context.get_cwd = Mock(return_value="cwd")
+        context._container_manager = Mock()
+
+        function1 = Mock(reserved_concurrency=2)
+        function1.name = "function1"
+        function2 = Mock(reserved_concurrency=None)
+        function2.name = "function2"
+        context._function_provider = Mock()
+        context._function_provider.get_all.return_value = [function1, function2]
+
+        context.local_lambda_runner
+
+        InvocationSchedulerMock.assert_called_with(max_concurrency=10,
+                                                   function_limits={"function1": 2},
+                                                   max_queue_size=20,
+                                                   queue_timeout=5)
+        self.assertEquals(LocalLambdaMock.call_args[1]["scheduler"], InvocationSchedulerMock.return_value)
+
+
+class TestInvokeContext_async_invocations(TestCase):
+
+    @patch("samcli.commands.local.cli_common.invoke_context.ExtractionCache")
+    @patch("samcli.commands.local.cli_common.invoke_context.LambdaImage")
+    @patch("samcli.commands.local.cli_common.invoke_context.LayerDownloader")
+    @patch("samcli.commands.local.cli_common.invoke_context.LocalLambdaRunner")
+    def test_must_create_runner_with_async_runtime(self,
+                                                   LocalLambdaMock,
+                                                   download_layers_mock,
+                                                   lambda_image_patch,
+                                                   ExtractionCacheMock):
+        context = InvokeContext(template_file="template_file", async_invocations=True)
+        context.get_cwd = Mock(return_value="cwd")
+        context._container_manager = Mock()
+        context._function_provider = Mock()
+        context._function_provider.get_all.return_value = []
+
+        AsyncLambdaRuntimeMock = Mock()
+        context._get_async_runtime_class = Mock(return_value=AsyncLambdaRuntimeMock)
+
+        context.local_lambda_runner
+
+        AsyncLambdaRuntimeMock.assert_called_with(context._container_manager,
+                                                  lambda_image_patch.return_value,
+                                                  code_cache=ExtractionCacheMock.return_value)
+        self.assertEquals(context._lambda_runtime, AsyncLambdaRuntimeMock.return_value)
+        self.assertTrue(context.async_invocations)
+
+    def test_async_invocations_cannot_be_debugged(self):
+        context = InvokeContext(template_file="template_file", debug_port=1111, async_invocations=True)
+        context._get_template_data = Mock()
+        context._get_env_vars_value = Mock()
+        context._setup_log_file = Mock()
+        context._get_debug_context = Mock()
+
+        with patch("samcli.commands.local.cli_common.invoke_context.SamFunctionProvider"):
+            with self.assertRaises(InvokeContextException):
+                context.__enter__()
+
+    @patch("samcli.commands.local.cli_common.invoke_context.sys")
+    def test_async_runtime_requires_python_3(self, sys_mock):
+        sys_mock.version_info = (2, 7, 16)
+
+        with self.assertRaises(InvokeContextException):
+            InvokeContext._get_async_runtime_class()
+
+    @patch.dict("sys.modules", {"samcli.local.lambdafn.async_runtime": None})
+    def test_async_runtime_must_tell_how_to_install_its_requirements(self):
+        with self.assertRaises(InvokeContextException) as ctx:
+            InvokeContext._get_async_runtime_class()
+
+        self.assertIn("pip install aws-sam-cli[async]", str(ctx.exception))
+
+
+class TestInvokeContext_warm_containers_property(TestCase):
+
+    def test_must_return_value(self):
+        self.assertEquals(InvokeContext(template_file="template", warm_containers=2).warm_containers, 2)
+
+    def test_must_default_to_zero(self):
+        self.assertEquals(InvokeContext(template_file="template").warm_containers, 0)
 
 
 class TestInvokeContext_stdout_property(TestCase):
@@ -553,6 +842,20 @@ class TestInvokeContext_setup_log_file(TestCase):
         m.assert_called_with(filename, 'wb')
 
 
+class TestInvokeContext_setup_timings_file(TestCase):
+
+    def test_must_return_if_file_not_given(self):
+        self.assertIsNone(InvokeContext._setup_timings_file(timings_file=None))
+
+    def test_must_open_file_for_appending(self):
+        m = mock_open()
+
+        with patch("samcli.commands.local.cli_common.invoke_context.open", m):
+            InvokeContext._setup_timings_file("timings.jsonl")
+
+        m.assert_called_with("timings.jsonl", 'a')
+
+
 class TestInvokeContext_get_debug_context(TestCase):
 
     @patch("samcli.commands.local.cli_common.invoke_context.Path")
@@ -620,3 +923,50 @@ class TestInvokeContext_get_debug_context(TestCase):
         resolve_path_mock.is_dir.assert_called_once()
         pathlib_path_mock.resolve.assert_called_once_with(strict=True)
         pathlib_mock.assert_called_once_with("./path")
+
+
+class TestInvokeContext_get_container_manager(TestCase):
+
+    @patch("samcli.commands.local.cli_common.invoke_context.ContainerReaper")
+    @patch("samcli.commands.local.cli_common.invoke_context.ContainerManager")
+    def test_must_create_container_manager_without_warm_pool(self, ContainerManagerMock, ContainerReaperMock):
+        manager = InvokeContext._get_container_manager("network", True)
+
+        self.assertEquals(manager, ContainerManagerMock.return_value)
+        ContainerManagerMock.assert_called_with(docker_network_id="network",
+                                                skip_pull_image=True,
+                                                warm_pool=None,
+                                                image_cache=None,
+                                                reaper=ContainerReaperMock.return_value)
+
+    @patch("samcli.commands.local.cli_common.invoke_context.ContainerReaper")
+    @patch("samcli.commands.local.cli_common.invoke_context.WarmContainerPool")
+    @patch("samcli.commands.local.cli_common.invoke_context.ContainerManager")
+    def test_must_create_container_manager_with_warm_pool(self,
+                                                          ContainerManagerMock,
+                                                          WarmContainerPoolMock,
+                                                          ContainerReaperMock):
+        InvokeContext._get_container_manager("network", False, 5, 60)
+
+        WarmContainerPoolMock.assert_called_with(max_size=5, idle_ttl=60)
+        ContainerManagerMock.assert_called_with(docker_network_id="network",
+                                                skip_pull_image=False,
+                                                warm_pool=WarmContainerPoolMock.return_value,
+                                                image_cache=None,
+                                                reaper=ContainerReaperMock.return_value)
+
+    @patch("samcli.commands.local.cli_common.invoke_context.ContainerReaper")
+    @patch("samcli.commands.local.cli_common.invoke_context.ImageStateCache")
+    @patch("samcli.commands.local.cli_common.invoke_context.ContainerManager")
+    def test_must_create_container_manager_with_image_refresh_interval(self,
+                                                                       ContainerManagerMock,
+                                                                       ImageStateCacheMock,
+                                                                       ContainerReaperMock):
+        InvokeContext._get_container_manager("network", False, image_refresh_interval=30)
+
+        ImageStateCacheMock.assert_called_with(refresh_interval=30)
+        ContainerManagerMock.assert_called_with(docker_network_id="network",
+                                                skip_pull_image=False,
+                                                warm_pool=None,
+                                                image_cache=ImageStateCacheMock.return_value,
+                                                reaper=ContainerReaperMock.return_value)
@@ -6,7 +6,7 @@ from unittest import TestCase
 from mock import patch, Mock
 from parameterized import parameterized, param
 
-from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.local.lambdafn.exceptions import FunctionNotFound, TooManyRequests
 from samcli.commands.local.lib.exceptions import InvalidLayerReference
 from samcli.commands.validate.lib.exceptions import InvalidSamDocumentException
 from samcli.commands.exceptions import UserException
@@ -32,11 +32,14 @@ class TestCli(TestCase):
         self.docker_volume_basedir = "basedir"
         self.docker_network = "network"
         self.log_file = "logfile"
+        self.timings_file = "timings.jsonl"
         self.skip_pull_image = True
         self.no_event = False
         self.parameter_overrides = {}
         self.layer_cache_basedir = "/some/layers/path"
+        self.layer_cache_max_size = 1024
         self.force_image_build = True
+        self.mount_layers = True
         self.region_name = "region"
         self.profile = "profile"
 
@@ -66,10 +69,13 @@ class TestCli(TestCase):
                    docker_volume_basedir=self.docker_volume_basedir,
                    docker_network=self.docker_network,
                    log_file=self.log_file,
+                   timings_file=self.timings_file,
                    skip_pull_image=self.skip_pull_image,
                    parameter_overrides=self.parameter_overrides,
                    layer_cache_basedir=self.layer_cache_basedir,
-                   force_image_build=self.force_image_build)
+                   layer_cache_max_size=self.layer_cache_max_size,
+                   force_image_build=self.force_image_build,
+                   mount_layers=self.mount_layers)
 
         InvokeContextMock.assert_called_with(template_file=self.template,
                                              function_identifier=self.function_id,
@@ -77,13 +83,16 @@ class TestCli(TestCase):
                                              docker_volume_basedir=self.docker_volume_basedir,
                                              docker_network=self.docker_network,
                                              log_file=self.log_file,
+                                             timings_file=self.timings_file,
                                              skip_pull_image=self.skip_pull_image,
                                              debug_port=self.debug_port,
                                              debug_args=self.debug_args,
                                              debugger_path=self.debugger_path,
                                              parameter_overrides=self.parameter_overrides,
                                              layer_cache_basedir=self.layer_cache_basedir,
+                                             layer_cache_max_size=self.layer_cache_max_size,
                                              force_image_build=self.force_image_build,
+                                             mount_layers=self.mount_layers,
                                              aws_region=self.region_name,
                                              aws_profile=self.profile)
 
@@ -117,10 +126,13 @@ class TestCli(TestCase):
                    docker_volume_basedir=self.docker_volume_basedir,
                    docker_network=self.docker_network,
                    log_file=self.log_file,
+                   timings_file=self.timings_file,
                    skip_pull_image=self.skip_pull_image,
                    parameter_overrides=self.parameter_overrides,
                    layer_cache_basedir=self.layer_cache_basedir,
-                   force_image_build=self.force_image_build)
+                   layer_cache_max_size=self.layer_cache_max_size,
+                   force_image_build=self.force_image_build,
+                   mount_layers=self.mount_layers)
 
         InvokeContextMock.assert_called_with(template_file=self.template,
                                              function_identifier=self.function_id,
@@ -128,13 +140,16 @@ class TestCli(TestCase):
                                              docker_volume_basedir=self.docker_volume_basedir,
                                              docker_network=self.docker_network,
                                              log_file=self.log_file,
+                                             timings_file=self.timings_file,
                                              skip_pull_image=self.skip_pull_image,
                                              debug_port=self.debug_port,
                                              debug_args=self.debug_args,
                                              debugger_path=self.debugger_path,
                                              parameter_overrides=self.parameter_overrides,
                                              layer_cache_basedir=self.layer_cache_basedir,
+                                             layer_cache_max_size=self.layer_cache_max_size,
                                              force_image_build=self.force_image_build,
+                                             mount_layers=self.mount_layers,
                                              aws_region=self.region_name,
                                              aws_profile=self.profile)
 
@@ -167,10 +182,13 @@ class TestCli(TestCase):
                        docker_volume_basedir=self.docker_volume_basedir,
                        docker_network=self.docker_network,
                        log_file=self.log_file,
+                       timings_file=self.timings_file,
                        skip_pull_image=self.skip_pull_image,
                        parameter_overrides=self.parameter_overrides,
                        layer_cache_basedir=self.layer_cache_basedir,
-                       force_image_build=self.force_image_build)
+                       layer_cache_max_size=self.layer_cache_max_size,
+                       force_image_build=self.force_image_build,
+                       mount_layers=self.mount_layers)
 
         msg = str(ex_ctx.exception)
         self.assertEquals(msg, "no_event and event cannot be used together. Please provide only one.")
@@ -213,10 +231,13 @@ class TestCli(TestCase):
                        docker_volume_basedir=self.docker_volume_basedir,
                        docker_network=self.docker_network,
                        log_file=self.log_file,
+                       timings_file=self.timings_file,
                        skip_pull_image=self.skip_pull_image,
                        parameter_overrides=self.parameter_overrides,
                        layer_cache_basedir=self.layer_cache_basedir,
-                       force_image_build=self.force_image_build)
+                       layer_cache_max_size=self.layer_cache_max_size,
+                       force_image_build=self.force_image_build,
+                       mount_layers=self.mount_layers)
 
         msg = str(ex_ctx.exception)
         self.assertEquals(msg, expected_exectpion_message)
@@ -224,7 +245,8 @@ class TestCli(TestCase):
     @parameterized.expand([(InvalidSamDocumentException("bad template"), "bad template"),
                            (InvalidLayerReference(), "Layer References need to be of type "
                                                      "'AWS::Serverless::LayerVersion' or 'AWS::Lambda::LayerVersion'"),
-                           (DebuggingNotSupported("Debugging not supported"), "Debugging not supported")
+                           (DebuggingNotSupported("Debugging not supported"), "Debugging not supported"),
+                           (TooManyRequests("Rate Exceeded"), "Rate Exceeded")
                            ])
     @patch("samcli.commands.local.invoke.cli.InvokeContext")
     @patch("samcli.commands.local.invoke.cli._get_event")
@@ -256,10 +278,13 @@ class TestCli(TestCase):
                        docker_volume_basedir=self.docker_volume_basedir,
                        docker_network=self.docker_network,
                        log_file=self.log_file,
+                       timings_file=self.timings_file,
                        skip_pull_image=self.skip_pull_image,
                        parameter_overrides=self.parameter_overrides,
                        layer_cache_basedir=self.layer_cache_basedir,
-                       force_image_build=self.force_image_build)
+                       layer_cache_max_size=self.layer_cache_max_size,
+                       force_image_build=self.force_image_build,
+                       mount_layers=self.mount_layers)
 
         msg = str(ex_ctx.exception)
         self.assertEquals(msg, execption_message)
@@ -290,10 +315,13 @@ class TestCli(TestCase):
                        docker_volume_basedir=self.docker_volume_basedir,
                        docker_network=self.docker_network,
                        log_file=self.log_file,
+                       timings_file=self.timings_file,
                        skip_pull_image=self.skip_pull_image,
                        parameter_overrides=self.parameter_overrides,
                        layer_cache_basedir=self.layer_cache_basedir,
-                       force_image_build=self.force_image_build)
+                       layer_cache_max_size=self.layer_cache_max_size,
+                       force_image_build=self.force_image_build,
+                       mount_layers=self.mount_layers)
 
         msg = str(ex_ctx.exception)
         self.assertEquals(msg, "bad env vars")
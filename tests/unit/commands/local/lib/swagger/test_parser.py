@@ -42,6 +42,29 @@ class TestSwaggerParser_get_apis(TestCase):
             }
         })
 
+    def test_with_cache_key_parameters(self):
+        swagger = {
+            "paths": {
+                "/path1": {
+                    "get": {
+                        "x-amazon-apigateway-integration": {
+                            "type": "aws_proxy",
+                            "uri": "someuri",
+                            "cacheKeyParameters": ["method.request.querystring.id"]
+                        }
+                    }
+                }
+            }
+        }
+
+        parser = SwaggerParser(swagger)
+        parser._get_integration_function_name = Mock()
+        parser._get_integration_function_name.return_value = "myfunction"
+
+        result = parser.get_routes()
+
+        self.assertEquals(result[0].cache_key_parameters, ["method.request.querystring.id"])
+
     def test_with_combination_of_paths_methods(self):
         function_name = "myfunction"
         swagger = {
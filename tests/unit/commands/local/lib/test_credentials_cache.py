@@ -0,0 +1,114 @@
+import threading
+from unittest import TestCase
+from mock import Mock
+
+from samcli.commands.local.lib.credentials_cache import CredentialsCache
+
+
+class TestCredentialsCache(TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.loader = Mock()
+        self.cache = CredentialsCache(self.loader, clock=lambda: self.now)
+
+    def wait_for_refresh(self):
+        # The background refresh is done once the cache isn't refreshing anymore
+        for _ in range(500):
+            if not self.cache._refreshing:
+                return
+            threading.Event().wait(0.01)
+        self.fail("Credentials were not refreshed")
+
+    def test_must_load_once(self):
+        self.loader.return_value = ({"key": "key"}, None)
+
+        self.assertEquals(self.cache.get(), {"key": "key"})
+        self.assertEquals(self.cache.get(), {"key": "key"})
+
+        self.loader.assert_called_once_with()
+
+    def test_must_return_copies(self):
+        self.loader.return_value = ({"key": "key"}, None)
+
+        self.cache.get()["key"] = "changed"
+
+        self.assertEquals(self.cache.get(), {"key": "key"})
+
+    def test_concurrent_callers_must_share_load(self):
+        loading = threading.Event()
+        release = threading.Event()
+
+        def loader():
+            loading.set()
+            release.wait(5)
+            return {"key": "key"}, None
+
+        self.loader.side_effect = loader
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        loading.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(results, [{"key": "key"}] * 4)
+        self.loader.assert_called_once_with()
+
+    def test_must_refresh_in_background_ahead_of_expiry(self):
+        self.loader.return_value = ({"key": "old"}, self.now + 3600)
+        self.cache.get()
+
+        self.loader.return_value = ({"key": "new"}, self.now + 7200)
+        self.now += 3600 - CredentialsCache.REFRESH_AHEAD
+
+        # Current credentials are still valid and handed out while refreshing
+        self.assertEquals(self.cache.get(), {"key": "old"})
+        self.wait_for_refresh()
+
+        self.assertEquals(self.cache.get(), {"key": "new"})
+        self.assertEquals(self.loader.call_count, 2)
+
+    def test_must_load_again_when_about_to_expire(self):
+        self.loader.return_value = ({"key": "old"}, self.now + 3600)
+        self.cache.get()
+
+        self.loader.return_value = ({"key": "new"}, self.now + 7200)
+        self.now += 3600 - CredentialsCache.MIN_REMAINING
+
+        self.assertEquals(self.cache.get(), {"key": "new"})
+
+    def test_must_refresh_static_credentials_once_in_a_while(self):
+        self.loader.return_value = ({"key": "old"}, None)
+        self.cache.get()
+
+        self.loader.return_value = ({"key": "new"}, None)
+        self.now += CredentialsCache.STATIC_TTL - 1
+        self.assertEquals(self.cache.get(), {"key": "old"})
+        self.loader.assert_called_once_with()
+
+        self.now += 1
+        self.cache.get()
+        self.wait_for_refresh()
+
+        self.assertEquals(self.cache.get(), {"key": "new"})
+
+    def test_must_keep_credentials_if_refresh_fails(self):
+        self.loader.return_value = ({"key": "old"}, None)
+        self.cache.get()
+
+        self.loader.side_effect = ValueError("failed")
+        self.now += CredentialsCache.STATIC_TTL
+        self.cache.get()
+        self.wait_for_refresh()
+
+        self.assertEquals(self.cache.get(), {"key": "old"})
+
+    def test_must_raise_if_load_fails(self):
+        self.loader.side_effect = ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            self.cache.get()
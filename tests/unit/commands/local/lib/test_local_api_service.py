@@ -2,10 +2,15 @@
 Unit test for local API service
 """
 
-from unittest import TestCase
+from unittest import TestCase, skipIf
 
 from mock import Mock, patch
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 from samcli.commands.local.lib.provider import Api
 from samcli.commands.local.lib.api_collector import ApiCollector
 from samcli.commands.local.lib.api_provider import ApiProvider
@@ -27,6 +32,8 @@ class TestLocalApiService_start(TestCase):
         self.lambda_runner_mock = Mock()
         self.api_provider_mock = Mock()
         self.apigw_service = Mock()
+        self.apigw_service.cache_stats.return_value = None
+        self.apigw_service.coalescing_stats.return_value = None
         self.stderr_mock = Mock()
 
         self.lambda_invoke_context_mock.template = self.template
@@ -34,6 +41,8 @@ class TestLocalApiService_start(TestCase):
         self.lambda_invoke_context_mock.get_cwd = Mock()
         self.lambda_invoke_context_mock.get_cwd.return_value = self.cwd
         self.lambda_invoke_context_mock.stderr = self.stderr_mock
+        self.lambda_invoke_context_mock.warm_containers = 0
+        self.lambda_invoke_context_mock.async_invocations = False
 
     @patch("samcli.commands.local.lib.local_api_service.LocalApigwService")
     @patch("samcli.commands.local.lib.local_api_service.ApiProvider")
@@ -69,10 +78,90 @@ class TestLocalApiService_start(TestCase):
                                             static_dir=static_dir_path,
                                             port=self.port,
                                             host=self.host,
-                                            stderr=self.stderr_mock)
+                                            stderr=self.stderr_mock,
+                                            server=None,
+                                            coalesce_requests=False)
 
         self.apigw_service.create.assert_called_with()
         self.apigw_service.run.assert_called_with()
+        self.lambda_runner_mock.prewarm.assert_not_called()
+
+    @patch("samcli.commands.local.lib.local_api_service.LocalApigwService")
+    @patch("samcli.commands.local.lib.local_api_service.ApiProvider")
+    @patch.object(LocalApiService, "_make_static_dir_path")
+    @patch.object(LocalApiService, "_print_routes")
+    def test_must_prewarm_functions_before_starting_service(self,
+                                                            log_routes_mock,
+                                                            make_static_dir_mock,
+                                                            SamApiProviderMock,
+                                                            ApiGwServiceMock):
+        self.lambda_invoke_context_mock.warm_containers = 2
+        ApiGwServiceMock.return_value = self.apigw_service
+
+        local_service = LocalApiService(self.lambda_invoke_context_mock, self.port, self.host, self.static_dir)
+        local_service.api_provider.api.routes = [1]
+        local_service.start()
+
+        self.lambda_runner_mock.prewarm.assert_called_with(2, stderr=self.stderr_mock)
+        self.apigw_service.run.assert_called_with()
+
+    @patch("samcli.commands.local.lib.local_api_service.LocalApigwService")
+    @patch("samcli.commands.local.lib.local_api_service.ApiProvider")
+    @patch.object(LocalApiService, "_make_static_dir_path")
+    @patch.object(LocalApiService, "_print_routes")
+    @patch.object(LocalApiService, "_log_cache_stats")
+    @patch.object(LocalApiService, "_log_coalescing_stats")
+    def test_must_log_stats_when_service_stops(self,
+                                               log_coalescing_stats_mock,
+                                               log_cache_stats_mock,
+                                               log_routes_mock,
+                                               make_static_dir_mock,
+                                               SamApiProviderMock,
+                                               ApiGwServiceMock):
+        ApiGwServiceMock.return_value = self.apigw_service
+        self.apigw_service.run.side_effect = KeyboardInterrupt()
+        self.apigw_service.cache_stats.return_value = {"hits": 1}
+        self.apigw_service.coalescing_stats.return_value = {"coalesced": 2}
+
+        local_service = LocalApiService(self.lambda_invoke_context_mock, self.port, self.host, self.static_dir,
+                                        coalesce_requests=True)
+        local_service.api_provider.api.routes = [1]
+
+        with self.assertRaises(KeyboardInterrupt):
+            local_service.start()
+
+        self.assertTrue(ApiGwServiceMock.call_args[1]["coalesce_requests"])
+        log_cache_stats_mock.assert_called_with({"hits": 1})
+        log_coalescing_stats_mock.assert_called_with({"coalesced": 2})
+
+    @skipIf(aiohttp is None, "aiohttp is not installed")
+    @patch("samcli.local.apigw.async_apigw_service.AsyncLocalApigwService")
+    @patch("samcli.commands.local.lib.local_api_service.LocalApigwService")
+    @patch("samcli.commands.local.lib.local_api_service.ApiProvider")
+    @patch.object(LocalApiService, "_make_static_dir_path")
+    @patch.object(LocalApiService, "_print_routes")
+    def test_must_start_async_service_for_async_invocations(self,
+                                                            log_routes_mock,
+                                                            make_static_dir_mock,
+                                                            SamApiProviderMock,
+                                                            ApiGwServiceMock,
+                                                            AsyncApiGwServiceMock):
+        self.lambda_invoke_context_mock.async_invocations = True
+        make_static_dir_mock.return_value = "/foo/bar"
+        AsyncApiGwServiceMock.return_value = self.apigw_service
+
+        local_service = LocalApiService(self.lambda_invoke_context_mock, self.port, self.host, self.static_dir)
+        local_service.api_provider.api.routes = [1]
+        local_service.start()
+
+        ApiGwServiceMock.assert_not_called()
+        AsyncApiGwServiceMock.assert_called_with(api=local_service.api_provider.api,
+                                                 lambda_runner=self.lambda_runner_mock,
+                                                 static_dir="/foo/bar",
+                                                 port=self.port,
+                                                 host=self.host,
+                                                 stderr=self.stderr_mock)
+        self.apigw_service.run.assert_called_with()
 
     @patch("samcli.commands.local.lib.local_api_service.LocalApigwService")
     @patch("samcli.commands.local.lib.local_api_service.ApiProvider")
@@ -122,6 +211,24 @@ class TestLocalApiService_print_routes(TestCase):
         self.assertEquals(expected, set(actual))
 
 
+class TestApiCollector_dedupe_function_routes(TestCase):
+
+    def test_must_merge_cache_key_parameters(self):
+        routes = [
+            Route(path="/1", methods=["GET"], function_name="name1",
+                  cache_key_parameters=["method.request.querystring.id"]),
+            Route(path="/1", methods=["POST"], function_name="name1",
+                  cache_key_parameters=["method.request.header.Accept"]),
+        ]
+
+        result = ApiCollector.dedupe_function_routes(routes)
+
+        self.assertEquals(len(result), 1)
+        self.assertEquals(result[0].methods, ["GET", "POST"])
+        self.assertEquals(result[0].cache_key_parameters,
+                          ["method.request.header.Accept", "method.request.querystring.id"])
+
+
 class TestLocalApiService_make_static_dir_path(TestCase):
 
     def test_must_skip_if_none(self):
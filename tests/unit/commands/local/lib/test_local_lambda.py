@@ -1,13 +1,16 @@
 """
 Testing local lambda runner
 """
+import datetime
 from unittest import TestCase
-from mock import Mock, patch
+from mock import Mock, MagicMock, patch
+from dateutil.tz import tzutc
 from parameterized import parameterized, param
 
 from samcli.commands.local.lib.local_lambda import LocalLambdaRunner
 from samcli.commands.local.lib.provider import Function
-from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.local.lambdafn.exceptions import FunctionNotFound, TooManyRequests
+from samcli.local.lambdafn.timing import record_phase
 from samcli.commands.local.lib.exceptions import OverridesNotWellDefinedError
 
 
@@ -181,6 +184,48 @@ class TestLocalLambda_get_aws_creds(TestCase):
 
         boto3_mock.session.Session.assert_called()
 
+    @patch("samcli.commands.local.lib.local_lambda.boto3")
+    def test_must_resolve_credentials_once(self, boto3_mock):
+        mock_session = Mock()
+        mock_session.region_name = self.region
+        mock_session.get_credentials.return_value = Mock(access_key=self.key, secret_key=self.secret, token=None)
+        boto3_mock.session.Session.return_value = mock_session
+
+        first = self.local_lambda.get_aws_creds()
+        second = self.local_lambda.get_aws_creds()
+
+        self.assertEquals(first, second)
+        boto3_mock.session.Session.assert_called_once_with(profile_name=self.aws_profile,
+                                                           region_name=self.aws_region)
+
+    @patch("samcli.commands.local.lib.local_lambda.boto3")
+    def test_must_return_expiry_of_temporary_credentials(self, boto3_mock):
+        creds = Mock(access_key=self.key, secret_key=self.secret, token=self.token)
+        creds._expiry_time = datetime.datetime(2019, 1, 1, tzinfo=tzutc())
+
+        mock_session = Mock()
+        mock_session.region_name = self.region
+        mock_session.get_credentials.return_value = creds
+        boto3_mock.session.Session.return_value = mock_session
+
+        _, expiry = self.local_lambda._load_aws_creds()
+
+        self.assertEquals(expiry, 1546300800)
+
+    @patch("samcli.commands.local.lib.local_lambda.boto3")
+    def test_static_credentials_do_not_expire(self, boto3_mock):
+        creds = Mock(spec=["access_key", "secret_key", "token"], access_key=self.key, secret_key=self.secret,
+                     token=None)
+
+        mock_session = Mock()
+        mock_session.region_name = self.region
+        mock_session.get_credentials.return_value = creds
+        boto3_mock.session.Session.return_value = mock_session
+
+        _, expiry = self.local_lambda._load_aws_creds()
+
+        self.assertIsNone(expiry)
+
 
 class TestLocalLambda_make_env_vars(TestCase):
 
@@ -234,7 +279,8 @@ class TestLocalLambda_make_env_vars(TestCase):
                             codeuri="codeuri",
                             environment=self.environ,
                             rolearn=None,
-                            layers=[])
+                            layers=[],
+                            reserved_concurrency=None)
 
         self.local_lambda.env_vars_values = env_vars_values
 
@@ -269,7 +315,8 @@ class TestLocalLambda_make_env_vars(TestCase):
                             codeuri="codeuri",
                             environment=self.environ,
                             rolearn=None,
-                            layers=[])
+                            layers=[],
+                            reserved_concurrency=None)
 
         self.local_lambda.env_vars_values = env_vars_values
 
@@ -295,7 +342,8 @@ class TestLocalLambda_make_env_vars(TestCase):
                             codeuri="codeuri",
                             environment=environment_variable,
                             rolearn=None,
-                            layers=[])
+                            layers=[],
+                            reserved_concurrency=None)
 
         self.local_lambda.env_vars_values = {}
 
@@ -309,6 +357,48 @@ class TestLocalLambda_make_env_vars(TestCase):
                                                     override_values=None,
                                                     aws_creds=self.aws_creds)
 
+    def test_must_resolve_variables_of_function_once(self):
+        function = Function(name="function_name",
+                            runtime="runtime",
+                            memory=1234,
+                            timeout=12,
+                            handler="handler",
+                            codeuri="codeuri",
+                            environment=self.environ,
+                            rolearn=None,
+                            layers=[],
+                            reserved_concurrency=None)
+
+        first = self.local_lambda._make_env_vars(function)
+        first.add_lambda_event_body("event")
+
+        with patch("samcli.commands.local.lib.local_lambda.EnvironmentVariables") as EnvironmentVariablesMock:
+            self.local_lambda.get_aws_creds.return_value = {"key": "newkey"}
+            second = self.local_lambda._make_env_vars(function)
+
+        EnvironmentVariablesMock.assert_not_called()
+        self.assertIsNot(first, second)
+        self.assertEquals(second.resolve()["var1"], "value1")
+        self.assertEquals(second.resolve()["AWS_ACCESS_KEY_ID"], "newkey")
+        self.assertNotIn("AWS_LAMBDA_EVENT_BODY", second.resolve())
+
+    def test_must_resolve_variables_again_when_function_changes(self):
+        function = Function(name="function_name",
+                            runtime="runtime",
+                            memory=1234,
+                            timeout=12,
+                            handler="handler",
+                            codeuri="codeuri",
+                            environment=self.environ,
+                            rolearn=None,
+                            layers=[],
+                            reserved_concurrency=None)
+        self.local_lambda._make_env_vars(function)
+
+        changed = function._replace(environment={"Variables": {"var1": "changed"}})
+
+        self.assertEquals(self.local_lambda._make_env_vars(changed).resolve()["var1"], "changed")
+
 
 class TestLocalLambda_get_invoke_config(TestCase):
 
@@ -350,7 +440,8 @@ class TestLocalLambda_get_invoke_config(TestCase):
                             codeuri="codeuri",
                             environment=None,
                             rolearn=None,
-                            layers=layers)
+                            layers=layers,
+                            reserved_concurrency=None)
 
         config = "someconfig"
         FunctionConfigMock.return_value = config
@@ -390,7 +481,8 @@ class TestLocalLambda_get_invoke_config(TestCase):
                             codeuri="codeuri",
                             environment=None,
                             rolearn=None,
-                            layers=[])
+                            layers=[],
+                            reserved_concurrency=None)
 
         config = "someconfig"
         FunctionConfigMock.return_value = config
@@ -410,6 +502,29 @@ class TestLocalLambda_get_invoke_config(TestCase):
         self.local_lambda._make_env_vars.assert_called_with(function)
 
 
+class TestLocalLambda_get_invoke_config_by_name(TestCase):
+
+    def setUp(self):
+        self.function_provider_mock = Mock()
+        self.local_lambda = LocalLambdaRunner(Mock(), self.function_provider_mock, "cwd")
+
+    def test_must_return_config_of_function(self):
+        self.local_lambda._get_invoke_config = Mock()
+
+        result = self.local_lambda.get_invoke_config("name")
+
+        self.assertEquals(result, self.local_lambda._get_invoke_config.return_value)
+        self.function_provider_mock.get.assert_called_with("name")
+        self.local_lambda._get_invoke_config.assert_called_with(self.function_provider_mock.get.return_value)
+
+    def test_must_raise_if_function_not_found(self):
+        self.function_provider_mock.get.return_value = None
+        self.function_provider_mock.get_all.return_value = []
+
+        with self.assertRaises(FunctionNotFound):
+            self.local_lambda.get_invoke_config("name")
+
+
 class TestLocalLambda_invoke(TestCase):
 
     def setUp(self):
@@ -445,6 +560,72 @@ class TestLocalLambda_invoke(TestCase):
                                                     debug_context=None,
                                                     stdout=stdout, stderr=stderr)
 
+    def test_must_invoke_within_scheduler_slot(self):
+        function = Mock()
+        function.name = "name"
+        scheduler_mock = MagicMock()
+        self.local_lambda.scheduler = scheduler_mock
+
+        self.function_provider_mock.get.return_value = function
+        self.local_lambda._get_invoke_config = Mock(return_value="config")
+
+        self.local_lambda.invoke("name", "event", "stdout", "stderr")
+
+        scheduler_mock.slot.assert_called_with("name")
+        scheduler_mock.slot.return_value.__enter__.assert_called_with()
+        self.runtime_mock.invoke.assert_called_with("config", "event", debug_context=None,
+                                                    stdout="stdout", stderr="stderr")
+
+    def test_must_report_timings_of_invocation(self):
+        function = Mock()
+        function.name = "name"
+        callback = Mock()
+        self.local_lambda.timings_callback = callback
+
+        self.function_provider_mock.get.return_value = function
+        self.local_lambda._get_invoke_config = Mock(return_value="config")
+
+        def invoke(*args, **kwargs):
+            with record_phase("create"):
+                pass
+            with record_phase("run"):
+                pass
+
+        self.runtime_mock.invoke.side_effect = invoke
+
+        self.local_lambda.invoke("name", "event", "stdout", "stderr")
+
+        callback.assert_called_once()
+        timings = callback.call_args[0][0]
+        self.assertEquals(timings.function_name, "name")
+        self.assertEquals(set(timings.phases.keys()), {"create", "run"})
+
+    def test_must_report_timings_of_failed_invocation(self):
+        function = Mock()
+        function.name = "name"
+        callback = Mock(side_effect=ValueError("callback failed"))
+        self.local_lambda.timings_callback = callback
+
+        self.function_provider_mock.get.return_value = function
+        self.local_lambda._get_invoke_config = Mock(return_value="config")
+        self.runtime_mock.invoke.side_effect = KeyError("invoke failed")
+
+        with self.assertRaises(KeyError):
+            self.local_lambda.invoke("name", "event")
+
+        callback.assert_called_once()
+
+    def test_must_not_invoke_if_throttled(self):
+        scheduler_mock = MagicMock()
+        scheduler_mock.slot.return_value.__enter__.side_effect = TooManyRequests()
+        self.local_lambda.scheduler = scheduler_mock
+        self.local_lambda._get_invoke_config = Mock()
+
+        with self.assertRaises(TooManyRequests):
+            self.local_lambda.invoke("name", "event")
+
+        self.runtime_mock.invoke.assert_not_called()
+
     def test_must_raise_if_function_not_found(self):
         function = Mock()
         function.name = 'FunctionLogicalId'
@@ -455,6 +636,46 @@ class TestLocalLambda_invoke(TestCase):
             self.local_lambda.invoke("name", "event")
 
 
+class TestLocalLambda_prewarm(TestCase):
+
+    def setUp(self):
+        self.runtime_mock = Mock()
+        self.function_provider_mock = Mock()
+
+        self.function1 = Mock()
+        self.function1.name = "function1"
+        self.function2 = Mock()
+        self.function2.name = "function2"
+        self.function_provider_mock.get_all.return_value = [self.function1, self.function2]
+
+        self.local_lambda = LocalLambdaRunner(self.runtime_mock, self.function_provider_mock, "cwd")
+        self.local_lambda._get_invoke_config = Mock(side_effect=lambda function: function.name + "-config")
+
+    def test_must_prewarm_every_function(self):
+        result = self.local_lambda.prewarm(2, stderr="stderr")
+
+        self.assertEquals(set(result.keys()), {"function1", "function2"})
+        self.runtime_mock.prewarm.assert_any_call("function1-config", 2, stderr="stderr")
+        self.runtime_mock.prewarm.assert_any_call("function2-config", 2, stderr="stderr")
+
+    def test_must_skip_functions_that_fail_to_warm_up(self):
+        def prewarm(config, count, stderr=None):
+            if config == "function1-config":
+                raise ValueError("image build failed")
+
+        self.runtime_mock.prewarm.side_effect = prewarm
+
+        result = self.local_lambda.prewarm()
+
+        self.assertEquals(list(result.keys()), ["function2"])
+
+    def test_must_do_nothing_without_functions(self):
+        self.function_provider_mock.get_all.return_value = []
+
+        self.assertEquals(self.local_lambda.prewarm(), {})
+        self.runtime_mock.prewarm.assert_not_called()
+
+
 class TestLocalLambda_is_debugging(TestCase):
 
     def setUp(self):
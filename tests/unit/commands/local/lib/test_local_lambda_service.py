@@ -32,6 +32,7 @@ class TestLocalLambdaService(TestCase):
 
         lambda_invoke_context_mock.local_lambda_runner = lambda_runner_mock
         lambda_invoke_context_mock.stderr = stderr_mock
+        lambda_invoke_context_mock.warm_containers = 0
 
         service = LocalLambdaService(lambda_invoke_context=lambda_invoke_context_mock, port=3000, host='localhost')
 
@@ -40,6 +41,21 @@ class TestLocalLambdaService(TestCase):
         local_lambda_invoke_service_mock.assert_called_once_with(lambda_runner=lambda_runner_mock,
                                                                  port=3000,
                                                                  host='localhost',
-                                                                 stderr=stderr_mock)
+                                                                 stderr=stderr_mock,
+                                                                 server=None)
         lambda_context_mock.create.assert_called_once()
         lambda_context_mock.run.assert_called_once()
+        lambda_runner_mock.prewarm.assert_not_called()
+
+    @patch('samcli.commands.local.lib.local_lambda_service.LocalLambdaInvokeService')
+    def test_start_must_prewarm_functions(self, local_lambda_invoke_service_mock):
+        lambda_invoke_context_mock = Mock()
+        lambda_invoke_context_mock.warm_containers = 2
+
+        service = LocalLambdaService(lambda_invoke_context=lambda_invoke_context_mock, port=3000, host='localhost')
+
+        service.start()
+
+        lambda_invoke_context_mock.local_lambda_runner.prewarm.assert_called_once_with(
+            2, stderr=lambda_invoke_context_mock.stderr)
+        local_lambda_invoke_service_mock.return_value.run.assert_called_once()
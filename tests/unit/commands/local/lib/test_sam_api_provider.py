@@ -1121,3 +1121,68 @@ def make_swagger(routes, binary_media_types=None):
         swagger["x-amazon-apigateway-binary-media-types"] = binary_media_types
 
     return swagger
+
+
+class TestSamStageCache(TestCase):
+
+    def setUp(self):
+        self.template = {
+            "Resources": {
+                "TestApi": {
+                    "Type": "AWS::Serverless::Api",
+                    "Properties": {
+                        "StageName": "dev",
+                        "CacheClusterEnabled": True,
+                        "CacheClusterSize": "1.6",
+                        "MethodSettings": [{
+                            "ResourcePath": "/*",
+                            "HttpMethod": "*",
+                            "CachingEnabled": True,
+                            "CacheTtlInSeconds": 60
+                        }]
+                    }
+                },
+                "Function": {
+                    "Type": "AWS::Serverless::Function",
+                    "Properties": {
+                        "CodeUri": "/usr/foo/bar",
+                        "Runtime": "nodejs4.3",
+                        "Handler": "index.handler",
+                        "Events": {
+                            "Event1": {
+                                "Type": "Api",
+                                "Properties": {
+                                    "Path": "/path",
+                                    "Method": "GET",
+                                    "RestApiId": {"Ref": "TestApi"},
+                                    "RequestParameters": [
+                                        "method.request.header.Authorization",
+                                        {"method.request.querystring.id": {"Required": True, "Caching": True}},
+                                        {"method.request.querystring.page": {"Caching": False}}
+                                    ]
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
+    def test_provider_must_read_cache_cluster_of_api_without_swagger(self):
+        provider = ApiProvider(self.template)
+
+        self.assertTrue(provider.api.cache_cluster_enabled)
+        self.assertEquals(provider.api.cache_cluster_size, "1.6")
+        self.assertEquals(provider.api.method_settings[0]["CacheTtlInSeconds"], 60)
+
+    def test_provider_must_read_cache_key_parameters_of_events(self):
+        provider = ApiProvider(self.template)
+
+        self.assertEquals(provider.routes[0].cache_key_parameters, ["method.request.querystring.id"])
+
+    def test_provider_must_not_enable_cache_cluster_by_default(self):
+        del self.template["Resources"]["TestApi"]["Properties"]["CacheClusterEnabled"]
+
+        provider = ApiProvider(self.template)
+
+        self.assertFalse(provider.api.cache_cluster_enabled)
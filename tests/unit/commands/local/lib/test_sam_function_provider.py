@@ -90,7 +90,8 @@ class TestSamFunctionProviderEndToEnd(TestCase):
             timeout=None,
             environment=None,
             rolearn=None,
-            layers=[]
+            layers=[],
+            reserved_concurrency=None
         )),
         ("SamFunc2", Function(
             name="SamFunc2",
@@ -101,7 +102,8 @@ class TestSamFunctionProviderEndToEnd(TestCase):
             timeout=None,
             environment=None,
             rolearn=None,
-            layers=[]
+            layers=[],
+            reserved_concurrency=None
         )),
         ("SamFunc3", Function(
             name="SamFunc3",
@@ -112,7 +114,8 @@ class TestSamFunctionProviderEndToEnd(TestCase):
             timeout=None,
             environment=None,
             rolearn=None,
-            layers=[]
+            layers=[],
+            reserved_concurrency=None
         )),
         ("LambdaFunc1", Function(
             name="LambdaFunc1",
@@ -123,7 +126,8 @@ class TestSamFunctionProviderEndToEnd(TestCase):
             timeout=None,
             environment=None,
             rolearn=None,
-            layers=[]
+            layers=[],
+            reserved_concurrency=None
         )),
         ("LambdaFuncWithLocalPath", Function(
             name="LambdaFuncWithLocalPath",
@@ -134,7 +138,8 @@ class TestSamFunctionProviderEndToEnd(TestCase):
             timeout=None,
             environment=None,
             rolearn=None,
-            layers=[]
+            layers=[],
+            reserved_concurrency=None
         ))
     ])
     def test_get_must_return_each_function(self, name, expected_output):
@@ -273,7 +278,8 @@ class TestSamFunctionProvider_convert_sam_function_resource(TestCase):
             "Handler": "myhandler",
             "Environment": "myenvironment",
             "Role": "myrole",
-            "Layers": ["Layer1", "Layer2"]
+            "Layers": ["Layer1", "Layer2"],
+            "ReservedConcurrentExecutions": 5
         }
 
         expected = Function(
@@ -285,7 +291,8 @@ class TestSamFunctionProvider_convert_sam_function_resource(TestCase):
             codeuri="/usr/local",
             environment="myenvironment",
             rolearn="myrole",
-            layers=["Layer1", "Layer2"]
+            layers=["Layer1", "Layer2"],
+            reserved_concurrency=5
         )
 
         result = SamFunctionProvider._convert_sam_function_resource(name, properties, ["Layer1", "Layer2"])
@@ -308,7 +315,8 @@ class TestSamFunctionProvider_convert_sam_function_resource(TestCase):
             codeuri="/usr/local",
             environment=None,
             rolearn=None,
-            layers=[]
+            layers=[],
+            reserved_concurrency=None
         )
 
         result = SamFunctionProvider._convert_sam_function_resource(name, properties, [])
@@ -364,7 +372,8 @@ class TestSamFunctionProvider_convert_lambda_function_resource(TestCase):
             "Handler": "myhandler",
             "Environment": "myenvironment",
             "Role": "myrole",
-            "Layers": ["Layer1", "Layer2"]
+            "Layers": ["Layer1", "Layer2"],
+            "ReservedConcurrentExecutions": 5
         }
 
         expected = Function(
@@ -376,7 +385,8 @@ class TestSamFunctionProvider_convert_lambda_function_resource(TestCase):
             codeuri=".",
             environment="myenvironment",
             rolearn="myrole",
-            layers=["Layer1", "Layer2"]
+            layers=["Layer1", "Layer2"],
+            reserved_concurrency=5
         )
 
         result = SamFunctionProvider._convert_lambda_function_resource(name, properties, ["Layer1", "Layer2"])
@@ -401,7 +411,8 @@ class TestSamFunctionProvider_convert_lambda_function_resource(TestCase):
             codeuri=".",
             environment=None,
             rolearn=None,
-            layers=[]
+            layers=[],
+            reserved_concurrency=None
         )
 
         result = SamFunctionProvider._convert_lambda_function_resource(name, properties, [])
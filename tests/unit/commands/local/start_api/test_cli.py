@@ -13,6 +13,7 @@ from samcli.commands.exceptions import UserException
 from samcli.commands.validate.lib.exceptions import InvalidSamDocumentException
 from samcli.commands.local.lib.exceptions import OverridesNotWellDefinedError
 from samcli.local.docker.lambda_debug_entrypoint import DebuggingNotSupported
+from samcli.local.services.http_servers import ServerNotAvailable
 
 
 class TestCli(TestCase):
@@ -26,12 +27,30 @@ class TestCli(TestCase):
         self.docker_volume_basedir = "basedir"
         self.docker_network = "network"
         self.log_file = "logfile"
+        self.timings_file = "timings.jsonl"
         self.skip_pull_image = True
         self.parameter_overrides = {}
         self.layer_cache_basedir = "/some/layers/path"
+        self.layer_cache_max_size = 1024
         self.force_image_build = True
+        self.mount_layers = True
         self.region_name = "region"
         self.profile = "profile"
+        self.warm_pool_size = 5
+        self.warm_pool_ttl = 60
+        self.persistent_containers = True
+        self.warm_containers = 2
+        self.max_concurrency = 4
+        self.max_queue_size = 10
+        self.queue_timeout = 5
+        self.docker_max_pool_size = 20
+        self.image_refresh_interval = 120
+        self.server = "werkzeug"
+        self.server_threads = 8
+        self.server_keep_alive = 10
+        self.server_backlog = 64
+        self.async_invocations = True
+        self.coalesce_requests = True
 
         self.ctx_mock = Mock()
         self.ctx_mock.region = self.region_name
@@ -41,10 +60,11 @@ class TestCli(TestCase):
         self.port = 123
         self.static_dir = "staticdir"
 
+    @patch("samcli.commands.local.start_api.cli.create_server")
     @patch("samcli.commands.local.start_api.cli.InvokeContext")
     @patch("samcli.commands.local.start_api.cli.LocalApiService")
     def test_cli_must_setup_context_and_start_service(self, local_api_service_mock,
-                                                      invoke_context_mock):
+                                                      invoke_context_mock, create_server_mock):
         # Mock the __enter__ method to return a object inside a context manager
         context_mock = Mock()
         invoke_context_mock.return_value.__enter__.return_value = context_mock
@@ -60,21 +80,38 @@ class TestCli(TestCase):
                                                docker_volume_basedir=self.docker_volume_basedir,
                                                docker_network=self.docker_network,
                                                log_file=self.log_file,
+                                               timings_file=self.timings_file,
                                                skip_pull_image=self.skip_pull_image,
                                                debug_port=self.debug_port,
                                                debug_args=self.debug_args,
                                                debugger_path=self.debugger_path,
                                                parameter_overrides=self.parameter_overrides,
                                                layer_cache_basedir=self.layer_cache_basedir,
+                                               layer_cache_max_size=self.layer_cache_max_size,
                                                force_image_build=self.force_image_build,
+                                               mount_layers=self.mount_layers,
                                                aws_region=self.region_name,
-                                               aws_profile=self.profile)
+                                               aws_profile=self.profile,
+                                               warm_pool_size=self.warm_pool_size,
+                                               warm_pool_ttl=self.warm_pool_ttl,
+                                               persistent_containers=self.persistent_containers,
+                                               warm_containers=self.warm_containers,
+                                               max_concurrency=self.max_concurrency,
+                                               max_queue_size=self.max_queue_size,
+                                               queue_timeout=self.queue_timeout,
+                                               docker_max_pool_size=self.docker_max_pool_size,
+                                               image_refresh_interval=self.image_refresh_interval,
+                                               async_invocations=self.async_invocations)
 
         local_api_service_mock.assert_called_with(lambda_invoke_context=context_mock,
                                                   port=self.port,
                                                   host=self.host,
-                                                  static_dir=self.static_dir)
+                                                  static_dir=self.static_dir,
+                                                  server=create_server_mock.return_value,
+                                                  coalesce_requests=self.coalesce_requests)
 
+        create_server_mock.assert_called_with(self.server, threads=self.server_threads,
+                                              keep_alive=self.server_keep_alive, backlog=self.server_backlog)
         service_mock.start.assert_called_with()
 
     @patch("samcli.commands.local.start_api.cli.InvokeContext")
@@ -116,6 +153,15 @@ class TestCli(TestCase):
         expected = execption_message
         self.assertEquals(msg, expected)
 
+    @patch("samcli.commands.local.start_api.cli.create_server")
+    def test_must_raise_user_exception_if_server_is_not_installed(self, create_server_mock):
+        create_server_mock.side_effect = ServerNotAvailable("Waitress is not installed")
+
+        with self.assertRaises(UserException) as context:
+            self.call_cli()
+
+        self.assertEquals(str(context.exception), "Waitress is not installed")
+
     @patch("samcli.commands.local.start_api.cli.InvokeContext")
     def test_must_raise_user_exception_on_invalid_env_vars(self, invoke_context_mock):
         invoke_context_mock.side_effect = OverridesNotWellDefinedError("bad env vars")
@@ -140,7 +186,25 @@ class TestCli(TestCase):
                       docker_volume_basedir=self.docker_volume_basedir,
                       docker_network=self.docker_network,
                       log_file=self.log_file,
+                      timings_file=self.timings_file,
                       skip_pull_image=self.skip_pull_image,
                       parameter_overrides=self.parameter_overrides,
                       layer_cache_basedir=self.layer_cache_basedir,
-                      force_image_build=self.force_image_build)
+                      layer_cache_max_size=self.layer_cache_max_size,
+                      force_image_build=self.force_image_build,
+                      mount_layers=self.mount_layers,
+                      warm_pool_size=self.warm_pool_size,
+                      warm_pool_ttl=self.warm_pool_ttl,
+                      persistent_containers=self.persistent_containers,
+                      warm_containers=self.warm_containers,
+                      max_concurrency=self.max_concurrency,
+                      max_queue_size=self.max_queue_size,
+                      queue_timeout=self.queue_timeout,
+                      docker_max_pool_size=self.docker_max_pool_size,
+                      image_refresh_interval=self.image_refresh_interval,
+                      server=self.server,
+                      server_threads=self.server_threads,
+                      server_keep_alive=self.server_keep_alive,
+                      server_backlog=self.server_backlog,
+                      async_invocations=self.async_invocations,
+                      coalesce_requests=self.coalesce_requests)
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from samcli.lib.utils.hash import file_checksum, dir_checksum, dir_fingerprint
+
+
+class TestHash(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, "sub"))
+        self._write("a.txt", "a")
+        self._write(os.path.join("sub", "b.txt"), "b")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(content)
+
+    def test_file_checksum(self):
+        self.assertEquals(file_checksum(os.path.join(self.directory, "a.txt")),
+                          "ca978112ca1bbdcafac231b39a23dc4da786eff8147c4e72b9807785afee48bb")
+
+    def test_dir_checksum_must_change_with_content(self):
+        checksum = dir_checksum(self.directory)
+
+        self._write(os.path.join("sub", "b.txt"), "c")
+
+        self.assertNotEqual(dir_checksum(self.directory), checksum)
+
+    def test_dir_checksum_must_not_change_with_modification_time(self):
+        checksum = dir_checksum(self.directory)
+        fingerprint = dir_fingerprint(self.directory)
+
+        os.utime(os.path.join(self.directory, "a.txt"), (1, 1))
+
+        self.assertEquals(dir_checksum(self.directory), checksum)
+        self.assertNotEqual(dir_fingerprint(self.directory), fingerprint)
+
+    def test_dir_checksum_must_change_with_new_file(self):
+        checksum = dir_checksum(self.directory)
+
+        self._write("new.txt", "")
+
+        self.assertNotEqual(dir_checksum(self.directory), checksum)
+
+    def test_dir_checksum_of_file(self):
+        self.assertEquals(dir_checksum(os.path.join(self.directory, "a.txt")),
+                          dir_checksum(os.path.join(self.directory, "a.txt")))
@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from samcli.lib.utils.output_buffer import OutputBuffer
+from samcli.lib.utils.stream_writer import StreamWriter
+
+
+class TestOutputBuffer(TestCase):
+
+    def test_must_collect_bytes_like_objects(self):
+        buffer = OutputBuffer()
+
+        StreamWriter(buffer).write(b"abc")
+        buffer.write(memoryview(b"def"))
+        buffer.write(bytearray(b"gh"))
+
+        self.assertEquals(buffer.getvalue(), b"abcdefgh")
+        self.assertEquals(len(buffer), 8)
+
+    def test_must_not_copy_value(self):
+        buffer = OutputBuffer()
+        buffer.write(b"abc")
+
+        self.assertIs(buffer.getvalue(), buffer.getvalue())
+
+    def test_must_fill_preallocated_space_first(self):
+        buffer = OutputBuffer(initial_size=4)
+
+        self.assertEquals(buffer.getvalue(), b"")
+
+        buffer.write(b"ab")
+        buffer.write(b"cdef")
+
+        self.assertEquals(buffer.getvalue(), b"abcdef")
@@ -6,7 +6,7 @@ from unittest import TestCase
 
 from samcli.lib.utils.stream_writer import StreamWriter
 
-from mock import Mock
+from mock import Mock, patch
 
 
 class TestStreamWriter(TestCase):
@@ -20,6 +20,25 @@ class TestStreamWriter(TestCase):
 
         stream_mock.write.assert_called_once_with(buffer)
 
+    @patch("samcli.lib.utils.stream_writer.six")
+    def test_must_write_bytes_of_memoryview_on_python2(self, six_mock):
+        six_mock.PY2 = True
+        stream_mock = Mock()
+
+        StreamWriter(stream_mock).write(memoryview(b"something"))
+
+        stream_mock.write.assert_called_once_with(b"something")
+
+    @patch("samcli.lib.utils.stream_writer.six")
+    def test_must_write_memoryview_as_is_on_python3(self, six_mock):
+        six_mock.PY2 = False
+        stream_mock = Mock()
+        data = memoryview(b"something")
+
+        StreamWriter(stream_mock).write(data)
+
+        stream_mock.write.assert_called_once_with(data)
+
     def test_must_flush_underlying_stream(self):
         stream_mock = Mock()
         writer = StreamWriter(stream_mock)
@@ -1,7 +1,13 @@
+import io
+import os
+import time
+import shutil
+import tarfile
+import tempfile
 from unittest import TestCase
 from mock import Mock, patch, call
 
-from samcli.lib.utils.tar import create_tarball
+from samcli.lib.utils.tar import create_tarball, stream_tarball
 
 
 class TestTar(TestCase):
@@ -26,3 +32,98 @@ class TestTar(TestCase):
         temp_file_mock.seek.assert_called_once_with(0)
         temp_file_mock.close.assert_called_once()
         tarfile_open_patch.assert_called_once_with(fileobj=temp_file_mock, mode='w')
+
+
+class TestStreamTarball(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.layer = os.path.join(self.directory, "layer")
+
+        os.makedirs(os.path.join(self.layer, "python", "lib"))
+        self._write("python/lib/module.py", b"print('hello')")
+        self._write("python/data.bin", os.urandom(300 * 1024))
+        self._write("python/app.py", b"import lib")
+        os.chmod(os.path.join(self.layer, "python", "app.py"), 0o755)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, relative_path, content):
+        with open(os.path.join(self.layer, relative_path), "wb") as f:
+            f.write(content)
+
+    def _stream(self, **kwargs):
+        return b"".join(stream_tarball({self.layer: "/layer1"}, files={"Dockerfile": b"FROM python"}, **kwargs))
+
+    def test_must_stream_complete_tarball(self):
+        data = self._stream()
+
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            self.assertEquals(archive.getnames(), ["Dockerfile",
+                                                   "layer1",
+                                                   "layer1/python",
+                                                   "layer1/python/app.py",
+                                                   "layer1/python/data.bin",
+                                                   "layer1/python/lib",
+                                                   "layer1/python/lib/module.py"])
+
+            with open(os.path.join(self.layer, "python", "data.bin"), "rb") as f:
+                self.assertEquals(archive.extractfile("layer1/python/data.bin").read(), f.read())
+            self.assertEquals(archive.extractfile("Dockerfile").read(), b"FROM python")
+
+        self.assertEquals(len(data) % tarfile.RECORDSIZE, 0)
+
+    def test_must_normalize_metadata(self):
+        with tarfile.open(fileobj=io.BytesIO(self._stream())) as archive:
+            for member in archive.getmembers():
+                self.assertEquals((member.mtime, member.uid, member.gid, member.uname, member.gname),
+                                  (0, 0, 0, "", ""))
+
+            self.assertEquals(archive.getmember("layer1/python/app.py").mode, 0o755)
+
+    def test_same_content_must_produce_same_tarball(self):
+        first = self._stream()
+
+        # Touch every file
+        later = time.time() + 100
+        for root, dirs, files in os.walk(self.layer):
+            for name in dirs + files:
+                os.utime(os.path.join(root, name), (later, later))
+
+        self.assertEquals(self._stream(), first)
+
+    def test_different_content_must_produce_different_tarball(self):
+        first = self._stream()
+
+        self._write("python/app.py", b"import other")
+
+        self.assertNotEquals(self._stream(), first)
+
+    def test_must_keep_symbolic_links(self):
+        os.symlink("lib/module.py", os.path.join(self.layer, "python", "link.py"))
+
+        with tarfile.open(fileobj=io.BytesIO(self._stream())) as archive:
+            link = archive.getmember("layer1/python/link.py")
+
+        self.assertTrue(link.issym())
+        self.assertEquals(link.linkname, "lib/module.py")
+
+    def test_must_produce_tarball_in_bounded_pieces(self):
+        chunks = list(stream_tarball({self.layer: "/layer1"}, chunk_size=16 * 1024))
+
+        self.assertTrue(len(chunks) > 10)
+        self.assertTrue(all(len(chunk) < 2 * 16 * 1024 + tarfile.RECORDSIZE for chunk in chunks))
+
+    def test_must_fail_if_file_shrinks_while_streaming(self):
+        chunks = stream_tarball({self.layer: "/layer1"}, chunk_size=1024)
+
+        # Stream until the middle of data.bin
+        produced = 0
+        while produced < 16 * 1024:
+            produced += len(next(chunks))
+
+        self._write("python/data.bin", b"")
+
+        with self.assertRaises(IOError):
+            list(chunks)
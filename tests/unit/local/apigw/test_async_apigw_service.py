@@ -0,0 +1,147 @@
+import os
+import json
+import shutil
+import tempfile
+from unittest import TestCase, skipIf
+
+from mock import Mock
+
+from samcli.commands.local.lib.provider import Api
+from samcli.local.apigw.local_apigw_service import Route
+from samcli.local.lambdafn.exceptions import FunctionNotFound
+
+try:
+    import asyncio
+    from mock import AsyncMock
+    from aiohttp import web
+    from aiohttp.test_utils import make_mocked_request
+    from samcli.local.apigw.async_apigw_service import AsyncLocalApigwService
+except (ImportError, SyntaxError):
+    AsyncLocalApigwService = None
+
+
+@skipIf(AsyncLocalApigwService is None, "Requires Python 3 and aiohttp")
+class TestAsyncLocalApigwService(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.static_dir = tempfile.mkdtemp()
+
+        self.lambda_runner = Mock()
+        self.lambda_runner.is_debugging.return_value = False
+        self.runtime = self.lambda_runner.local_runtime
+        self.runtime.invoke_async = AsyncMock(side_effect=self.fake_invoke)
+
+        self.events = []
+        self.lambda_output = json.dumps({"statusCode": 200, "body": "hello", "headers": {"Content-Type": "text/plain"}})
+
+        routes = [Route(methods=["GET"], function_name="HelloFunction", path="/hello/{name}"),
+                  Route(methods=["POST"], function_name="EchoFunction", path="/echo")]
+        self.stderr = Mock()
+        self.service = AsyncLocalApigwService(Api(routes=routes),
+                                              self.lambda_runner,
+                                              static_dir=self.static_dir,
+                                              port=3000,
+                                              host="127.0.0.1",
+                                              stderr=self.stderr)
+        self.service.create()
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.static_dir)
+
+    def fake_invoke(self, config, event, stdout=None, stderr=None):
+        self.events.append(json.loads(event))
+        stdout.write(b"function log\n" + self.lambda_output.encode("utf-8"))
+
+    def request(self, method, path, headers=None, body=b""):
+        payload = Mock()
+        payload.readany = AsyncMock(side_effect=[body, b""])
+        http_request = make_mocked_request(method, path, headers=headers, payload=payload)
+        return self.loop.run_until_complete(self.service._request_handler(http_request))
+
+    def test_must_invoke_function_of_route(self):
+        response = self.request("GET", "/hello/world?greeting=hi", headers={"X-Custom": "value"})
+
+        self.assertEquals(response.status, 200)
+        self.assertEquals(response.body, b"hello")
+        self.assertEquals(response.headers["Content-Type"], "text/plain")
+
+        self.lambda_runner.get_invoke_config.assert_called_with("HelloFunction")
+        self.runtime.invoke_async.assert_called_once()
+        self.assertEquals(self.runtime.invoke_async.call_args[0][0], self.lambda_runner.get_invoke_config.return_value)
+
+        event = self.events[0]
+        self.assertEquals(event["resource"], "/hello/{name}")
+        self.assertEquals(event["path"], "/hello/world")
+        self.assertEquals(event["httpMethod"], "GET")
+        self.assertEquals(event["pathParameters"], {"name": "world"})
+        self.assertEquals(event["queryStringParameters"], {"greeting": "hi"})
+        self.assertEquals(event["headers"]["X-Custom"], "value")
+
+        self.stderr.write.assert_called_once()
+
+    def test_must_pass_body_and_repeated_headers(self):
+        self.request("POST", "/echo", headers=[("Content-Type", "application/json"), ("X-Tag", "a"), ("X-Tag", "b")],
+                     body=b'{"a": 1}')
+
+        event = self.events[0]
+        self.assertEquals(event["body"], '{"a": 1}')
+        self.assertEquals(event["multiValueHeaders"]["X-Tag"], ["a,b"])
+
+    def test_must_answer_unknown_routes_like_api_gateway(self):
+        for method, path in (("GET", "/unknown"), ("PUT", "/echo")):
+            response = self.request(method, path)
+
+            self.assertEquals(response.status, 403)
+            self.assertEquals(json.loads(response.body.decode("utf-8")), {"message": "Missing Authentication Token"})
+
+        self.runtime.invoke_async.assert_not_called()
+
+    def test_must_answer_with_bad_gateway_if_function_does_not_exist(self):
+        self.lambda_runner.get_invoke_config.side_effect = FunctionNotFound()
+
+        response = self.request("GET", "/hello/world")
+
+        self.assertEquals(response.status, 502)
+        self.runtime.invoke_async.assert_not_called()
+
+    def test_must_answer_with_bad_gateway_if_function_returned_invalid_response(self):
+        self.lambda_output = "not json"
+
+        self.assertEquals(self.request("GET", "/hello/world").status, 502)
+
+    def test_must_answer_with_bad_gateway_if_invocation_failed(self):
+        self.runtime.invoke_async.side_effect = RuntimeError("Docker is gone")
+
+        self.assertEquals(self.request("GET", "/hello/world").status, 502)
+
+    def test_must_serve_static_files(self):
+        with open(os.path.join(self.static_dir, "index.html"), "w") as f:
+            f.write("<html/>")
+
+        response = self.request("GET", "/index.html")
+
+        self.assertIsInstance(response, web.FileResponse)
+        self.assertEquals(self.request("GET", "/missing.html").status, 403)
+
+    def test_must_answer_with_cached_response(self):
+        api = Api(routes=[Route(methods=["GET"], function_name="HelloFunction", path="/hello/{name}")])
+        api.cache_cluster_enabled = True
+        api.method_settings = [{"CachingEnabled": True}]
+        self.service = AsyncLocalApigwService(api, self.lambda_runner, port=3000, host="127.0.0.1")
+        self.service.create()
+
+        first = self.request("GET", "/hello/world")
+        second = self.request("GET", "/hello/world")
+
+        self.assertEquals(second.body, first.body)
+        self.assertEquals(second.headers["Content-Type"], "text/plain")
+        self.runtime.invoke_async.assert_called_once()
+        self.assertEquals(self.service.cache_stats()["hits"], 1)
+
+    def test_run_requires_create(self):
+        service = AsyncLocalApigwService(Api(routes=[]), self.lambda_runner)
+
+        with self.assertRaises(RuntimeError):
+            service.run()
@@ -1,15 +1,23 @@
+import os
 import copy
+import time
+import shutil
+import tempfile
+import threading
 from unittest import TestCase
-from mock import Mock, patch, ANY
+from mock import Mock, patch, ANY, call
 import json
 import base64
 
+from flask import request
 from parameterized import parameterized, param
 from werkzeug.datastructures import Headers
+from werkzeug.exceptions import NotFound
 
 from samcli.commands.local.lib.provider import Api
 from samcli.local.apigw.local_apigw_service import LocalApigwService, Route
-from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.local.apigw.route_trie import RouteTrie
+from samcli.local.lambdafn.exceptions import FunctionNotFound, TooManyRequests
 
 
 class TestApiGatewayService(TestCase):
@@ -102,7 +110,7 @@ class TestApiGatewayService(TestCase):
 
         self.assertEquals(result, make_response_mock)
 
-    def test_create_creates_dict_of_routes(self):
+    def test_create_compiles_routes(self):
         function_name_1 = Mock()
         function_name_2 = Mock()
         api_gateway_route_1 = Route(methods=["GET"], function_name=function_name_1, path='/')
@@ -117,9 +125,9 @@ class TestApiGatewayService(TestCase):
 
         service.create()
 
-        self.assertEquals(service._dict_of_routes, {'/:GET': api_gateway_route_1,
-                                                    '/:POST': api_gateway_route_2
-                                                    })
+        self.assertEquals(service._route_trie.match("GET", "/").route, api_gateway_route_1)
+        self.assertEquals(service._route_trie.match("POST", "/").route, api_gateway_route_2)
+        self.assertIsNone(service._route_trie.match("PUT", "/"))
 
     @patch('samcli.local.apigw.local_apigw_service.Flask')
     def test_create_creates_flask_app_with_url_rules(self, flask):
@@ -130,11 +138,24 @@ class TestApiGatewayService(TestCase):
 
         self.service.create()
 
-        app_mock.add_url_rule.assert_called_once_with('/',
-                                                      endpoint='/',
-                                                      view_func=self.service._request_handler,
-                                                      methods=['GET'],
-                                                      provide_automatic_options=False)
+        flask.assert_called_with(ANY, static_folder=None)
+        app_mock.add_url_rule.assert_has_calls([
+            call(rule, endpoint='api', view_func=self.service._request_handler, methods=['GET'],
+                 provide_automatic_options=False)
+            for rule in ('/', '/<path:path>')
+        ])
+        app_mock.before_request.assert_not_called()
+
+    @patch('samcli.local.apigw.local_apigw_service.Flask')
+    def test_create_serves_static_files_before_routing(self, flask):
+        app_mock = Mock()
+        flask.return_value = app_mock
+        self.service.static_dir = "static"
+
+        self.service.create()
+
+        app_mock.before_request.assert_called_with(self.service._serve_static_file)
+        self.assertEquals(app_mock.add_url_rule.call_args[1]["methods"], ['GET', 'HEAD'])
 
     def test_initalize_creates_default_values(self):
         self.assertEquals(self.service.port, 3000)
@@ -165,6 +186,19 @@ class TestApiGatewayService(TestCase):
 
         self.assertEquals(response, not_found_response_mock)
 
+    @patch('samcli.local.apigw.local_apigw_service.ServiceErrorResponses')
+    def test_request_handles_error_when_invoke_is_throttled(self, service_error_responses_patch):
+        throttled_response_mock = Mock()
+        self.service._construct_event = Mock()
+        self.service._get_current_route = Mock()
+        service_error_responses_patch.too_many_requests.return_value = throttled_response_mock
+
+        self.lambda_runner.invoke.side_effect = TooManyRequests()
+
+        response = self.service._request_handler()
+
+        self.assertEquals(response, throttled_response_mock)
+
     def test_request_throws_when_invoke_fails(self):
         self.lambda_runner.invoke.side_effect = Exception()
 
@@ -213,41 +247,213 @@ class TestApiGatewayService(TestCase):
         result = self.service._request_handler()
         self.assertEquals(result, failure_mock)
 
-    @patch('samcli.local.apigw.local_apigw_service.request')
-    def test_get_current_route(self, request_patch):
-        request_mock = Mock()
-        request_mock.endpoint = "path"
-        request_mock.method = "method"
-
-        request_patch.return_value = request_mock
+    def test_get_current_route(self):
+        route = Route(methods=["GET"], function_name="function", path="/users/{id}")
+        self.service._route_trie = RouteTrie([route])
 
-        route_key_method_mock = Mock()
-        route_key_method_mock.return_value = "method:path"
-        self.service._route_key = route_key_method_mock
-        self.service._dict_of_routes = {"method:path": "function"}
+        request_mock = Mock()
+        request_mock.path = "/users/123"
+        request_mock.method = "GET"
 
-        self.assertEquals(self.service._get_current_route(request_mock), "function")
+        self.assertEquals(self.service._get_current_route(request_mock), route)
+        self.assertEquals(request_mock.endpoint, "/users/{id}")
+        self.assertEquals(request_mock.view_args, {"id": "123"})
 
-    @patch('samcli.local.apigw.local_apigw_service.request')
-    def test_get_current_route_keyerror(self, request_patch):
+    def test_get_current_route_not_found(self):
         """
-        When the a HTTP request for given method+path combination is allowed by Flask but not in the list of routes,
-        something is messed up. Flask should be configured only from the list of routes.
+        Requests no route matches are answered like Flask answers requests for unknown paths
         """
+        self.service._route_trie = RouteTrie([Route(methods=["GET"], function_name="function", path="/users/{id}")])
 
         request_mock = Mock()
-        request_mock.endpoint = "path"
-        request_mock.method = "method"
+        request_mock.path = "/users/123"
+        request_mock.method = "POST"
 
-        request_patch.return_value = request_mock
+        with self.assertRaises(NotFound):
+            self.service._get_current_route(request_mock)
 
-        route_key_method_mock = Mock()
-        route_key_method_mock.return_value = "method:path"
-        self.service._route_key = route_key_method_mock
-        self.service._dict_of_routes = {"a": "b"}
 
-        with self.assertRaises(KeyError):
-            self.service._get_current_route(request_mock)
+class TestApiGatewayService_static_files(TestCase):
+
+    def setUp(self):
+        self.static_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.static_dir, "index.html"), "w") as f:
+            f.write("<html/>")
+
+        self.lambda_runner = Mock()
+        self.lambda_runner.is_debugging.return_value = False
+        self.lambda_runner.invoke.side_effect = self.fake_invoke
+
+        routes = [Route(methods=["GET"], function_name="ProxyFunction", path="/{proxy+}"),
+                  Route(methods=["GET"], function_name="PageFunction", path="/{page}")]
+        self.service = LocalApigwService(Api(routes=routes), self.lambda_runner, static_dir=self.static_dir)
+        self.service.create()
+        self.client = self.service._app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.static_dir)
+
+    def fake_invoke(self, function_name, event, stdout=None, stderr=None):
+        stdout.write(json.dumps({"body": function_name}).encode("utf-8"))
+
+    def test_must_serve_file_over_greedy_route(self):
+        os.mkdir(os.path.join(self.static_dir, "assets"))
+        with open(os.path.join(self.static_dir, "assets", "app.js"), "w") as f:
+            f.write("app")
+
+        self.assertEquals(self.client.get("/assets/app.js").get_data(), b"app")
+        self.assertEquals(self.client.get("/assets/missing.js").get_data(), b"ProxyFunction")
+
+    def test_must_route_to_more_specific_route_than_file(self):
+        self.assertEquals(self.client.get("/index.html").get_data(), b"PageFunction")
+
+    def test_must_not_serve_files_outside_static_dir(self):
+        self.assertIsNone(self.service._get_static_file("GET", "/../" + os.path.basename(self.static_dir)))
+        self.assertIsNone(self.service._get_static_file("POST", "/index.html"))
+
+
+class TestApiGatewayService_stage_cache(TestCase):
+
+    def setUp(self):
+        routes = [Route(methods=["GET", "POST"], function_name="HelloFunction", path="/hello/{name}",
+                        cache_key_parameters=["method.request.querystring.lang", "method.request.header.Accept"]),
+                  Route(methods=["GET"], function_name="OtherFunction", path="/other")]
+
+        api = Api(routes=routes)
+        api.cache_cluster_enabled = True
+        api.method_settings = [{"ResourcePath": "/~1hello~1{name}", "HttpMethod": "*", "CachingEnabled": True}]
+
+        self.status_code = 200
+        self.lambda_runner = Mock()
+        self.lambda_runner.is_debugging.return_value = False
+        self.lambda_runner.invoke.side_effect = self.fake_invoke
+
+        self.service = LocalApigwService(api, self.lambda_runner, port=3000, host="127.0.0.1")
+        self.service.create()
+        self.client = self.service._app.test_client()
+
+    def fake_invoke(self, function_name, event, stdout=None, stderr=None):
+        body = "{} {}".format(function_name, self.lambda_runner.invoke.call_count)
+        stdout.write(json.dumps({"statusCode": self.status_code, "body": body}).encode("utf-8"))
+
+    def test_must_answer_with_cached_response(self):
+        first = self.client.get("/hello/world?lang=en", headers={"Accept": "text/plain"})
+        second = self.client.get("/hello/world?lang=en&page=2", headers={"Accept": "text/plain"})
+
+        self.assertEquals(first.get_data(), b"HelloFunction 1")
+        self.assertEquals(second.get_data(), b"HelloFunction 1")
+        self.assertEquals(second.headers["Content-Type"], "application/json")
+        self.assertEquals(self.lambda_runner.invoke.call_count, 1)
+        self.assertEquals(self.service.cache_stats()["hits"], 1)
+        self.assertEquals(self.service.cache_stats()["misses"], 1)
+
+    @parameterized.expand([
+        ("/hello/moon?lang=en", {"Accept": "text/plain"}),
+        ("/hello/world?lang=fr", {"Accept": "text/plain"}),
+        ("/hello/world?lang=en", {"Accept": "text/html"}),
+    ])
+    def test_must_cache_by_path_and_cache_key_parameters(self, path, headers):
+        self.client.get("/hello/world?lang=en", headers={"Accept": "text/plain"})
+
+        self.assertEquals(self.client.get(path, headers=headers).get_data(), b"HelloFunction 2")
+
+    def test_must_not_cache_routes_without_caching_enabled(self):
+        self.client.get("/other")
+
+        self.assertEquals(self.client.get("/other").get_data(), b"OtherFunction 2")
+        self.assertEquals(self.service.cache_stats()["misses"], 0)
+
+    def test_must_not_cache_other_methods(self):
+        self.client.post("/hello/world")
+
+        self.assertEquals(self.client.post("/hello/world").get_data(), b"HelloFunction 2")
+
+    def test_must_not_cache_unsuccessful_responses(self):
+        self.status_code = 500
+        self.client.get("/hello/world")
+        self.status_code = 200
+
+        self.assertEquals(self.client.get("/hello/world").get_data(), b"HelloFunction 2")
+
+    def test_must_refresh_cached_response_on_max_age_zero(self):
+        self.client.get("/hello/world")
+
+        refreshed = self.client.get("/hello/world", headers={"Cache-Control": "max-age=0"})
+
+        self.assertEquals(refreshed.get_data(), b"HelloFunction 2")
+        self.assertEquals(self.client.get("/hello/world").get_data(), b"HelloFunction 2")
+        self.assertEquals(self.service.cache_stats()["invalidations"], 1)
+
+    def test_cache_stats_must_be_none_without_cache_cluster(self):
+        service = LocalApigwService(Api(routes=[]), self.lambda_runner)
+
+        self.assertIsNone(service.cache_stats())
+
+
+class TestApiGatewayService_coalescing(TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.lambda_runner = Mock()
+        self.lambda_runner.is_debugging.return_value = False
+        self.lambda_runner.invoke.side_effect = self.fake_invoke
+
+        routes = [Route(methods=["GET", "POST"], function_name="HelloFunction", path="/hello")]
+        self.service = LocalApigwService(Api(routes=routes), self.lambda_runner, coalesce_requests=True)
+        self.service.create()
+
+    def fake_invoke(self, function_name, event, stdout=None, stderr=None):
+        self.release.wait(5)
+        body = "response {}".format(self.lambda_runner.invoke.call_count)
+        stdout.write(json.dumps({"body": body, "headers": {"X-Custom": "value"}}).encode("utf-8"))
+
+    def test_identical_concurrent_requests_must_share_invocation(self):
+        responses = []
+
+        def get():
+            response = self.service._app.test_client().get("/hello?a=1", headers={"Accept": "text/plain"})
+            responses.append((response.status_code, response.get_data(), response.headers["X-Custom"]))
+
+        threads = [threading.Thread(target=get) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+
+        deadline = time.time() + 5
+        while self.service.coalescing_stats()["coalesced"] < 2 and time.time() < deadline:
+            time.sleep(0.001)
+        self.release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(responses, [(200, b"response 1", "value")] * 3)
+        self.assertEquals(self.lambda_runner.invoke.call_count, 1)
+        self.assertEquals(self.service.coalescing_stats()["coalesced"], 2)
+
+    @parameterized.expand([
+        ("POST", "/hello", {}, b""),
+        ("GET", "/hello?a=2", {}, b""),
+        ("GET", "/hello", {"Accept": "text/html"}, b""),
+        ("GET", "/hello", {}, b"body"),
+    ])
+    def test_coalescing_key_must_identify_request(self, method, path, headers, data):
+        app = self.service._app
+        with app.test_request_context("/hello?a=1", method="GET", headers={"Accept": "text/plain"}):
+            key = self.service._get_coalescing_key(request)
+
+        with app.test_request_context(path, method=method, headers=headers, data=data):
+            other_key = self.service._get_coalescing_key(request)
+
+        self.assertIsNotNone(key)
+        self.assertNotEquals(key, other_key)
+
+    def test_requests_must_not_be_coalesced_by_default(self):
+        service = LocalApigwService(Api(routes=[]), self.lambda_runner)
+        service.create()
+
+        with service._app.test_request_context("/hello"):
+            self.assertIsNone(service._get_coalescing_key(request))
+        self.assertIsNone(service.coalescing_stats())
 
 
 class TestApiGatewayModel(TestCase):
@@ -260,6 +466,14 @@ class TestApiGatewayModel(TestCase):
         self.assertEquals(self.api_gateway.methods, ['POST'])
         self.assertEquals(self.api_gateway.function_name, self.function_name)
         self.assertEquals(self.api_gateway.path, '/')
+        self.assertEquals(self.api_gateway.cache_key_parameters, [])
+
+    def test_cache_key_parameters_must_not_affect_equality(self):
+        route = Route(function_name=self.function_name, methods=["POST"], path="/",
+                      cache_key_parameters=["method.request.header.Accept", "method.request.header.Accept"])
+
+        self.assertEquals(route.cache_key_parameters, ["method.request.header.Accept"])
+        self.assertEquals(route, self.api_gateway)
 
 
 class TestLambdaHeaderDictionaryMerge(TestCase):
@@ -0,0 +1,82 @@
+import time
+import threading
+from unittest import TestCase
+
+from mock import Mock
+
+from samcli.local.apigw.request_coalescer import RequestCoalescer
+
+
+class TestRequestCoalescer_run(TestCase):
+
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.release = threading.Event()
+        self.results = []
+
+    def start_callers(self, count, key, func):
+        threads = [threading.Thread(target=lambda: self.results.append(self.run_safely(key, func)))
+                   for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def run_safely(self, key, func):
+        try:
+            return self.coalescer.run(key, func)
+        except RuntimeError as ex:
+            return ex
+
+    def wait_for_coalesced(self, count):
+        deadline = time.time() + 5
+        while self.coalescer.stats()["coalesced"] < count and time.time() < deadline:
+            time.sleep(0.001)
+
+    def test_concurrent_calls_must_share_result(self):
+        func = Mock(side_effect=lambda: self.release.wait() and "response")
+
+        threads = self.start_callers(4, "key", func)
+        self.wait_for_coalesced(3)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(self.results, ["response"] * 4)
+        func.assert_called_once_with()
+
+        stats = self.coalescer.stats()
+        self.assertEquals(stats["calls"], 1)
+        self.assertEquals(stats["coalesced"], 3)
+        self.assertEquals(stats["max_waiting"], 3)
+        self.assertEquals(stats["coalesced_rate"], 0.75)
+
+    def test_concurrent_calls_must_share_exception(self):
+        error = RuntimeError("failed")
+
+        def fail():
+            self.release.wait()
+            raise error
+
+        threads = self.start_callers(2, "key", fail)
+        self.wait_for_coalesced(1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(self.results, [error, error])
+
+    def test_calls_with_different_keys_must_not_be_coalesced(self):
+        self.assertEquals(self.coalescer.run("a", lambda: 1), 1)
+        self.assertEquals(self.coalescer.run("b", lambda: 2), 2)
+
+        self.assertEquals(self.coalescer.stats()["calls"], 2)
+
+    def test_completed_calls_must_not_be_reused(self):
+        func = Mock(side_effect=[1, 2])
+
+        self.assertEquals(self.coalescer.run("key", func), 1)
+        self.assertEquals(self.coalescer.run("key", func), 2)
+        self.assertEquals(self.coalescer.stats()["coalesced"], 0)
+
+    def test_coalesced_rate_must_be_none_before_any_call(self):
+        self.assertIsNone(self.coalescer.stats()["coalesced_rate"])
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from samcli.local.apigw.local_apigw_service import Route
+from samcli.local.apigw.route_trie import RouteTrie
+
+
+class TestRouteTrie_match(TestCase):
+
+    def setUp(self):
+        self.routes = {
+            "root": Route(methods=["GET"], function_name="root", path="/"),
+            "me": Route(methods=["GET"], function_name="me", path="/users/me"),
+            "user": Route(methods=["GET", "DELETE"], function_name="user", path="/users/{id}"),
+            "posts": Route(methods=["GET"], function_name="posts", path="/users/{id}/posts/{post}"),
+            "files": Route(methods=["ANY"], function_name="files", path="/users/{id}/files/{proxy+}"),
+            "proxy": Route(methods=["GET", "POST"], function_name="proxy", path="/{proxy+}"),
+        }
+        self.trie = RouteTrie(self.routes.values())
+
+    @parameterized.expand([
+        ("GET", "/", "root", {}),
+        ("GET", "/users/me", "me", {}),
+        ("GET", "/users/123", "user", {"id": "123"}),
+        ("GET", "/users/123/posts/9", "posts", {"id": "123", "post": "9"}),
+        ("PUT", "/users/123/files/a/b.txt", "files", {"id": "123", "proxy": "a/b.txt"}),
+        ("GET", "/anything/else/", "proxy", {"proxy": "anything/else/"}),
+    ])
+    def test_must_match_most_specific_route(self, method, path, expected_route, expected_parameters):
+        match = self.trie.match(method, path)
+
+        self.assertEquals(match.route, self.routes[expected_route])
+        self.assertEquals(match.path_parameters, expected_parameters)
+        self.assertEquals(match.greedy, expected_route in ("files", "proxy"))
+
+    def test_must_fall_back_to_less_specific_route_for_method(self):
+        # /users/me and /users/{id} don't accept POST
+        self.assertEquals(self.trie.match("POST", "/users/me").route, self.routes["proxy"])
+        self.assertEquals(self.trie.match("DELETE", "/users/me").route, self.routes["user"])
+
+    @parameterized.expand([
+        ("PUT", "/users/me"),
+        ("DELETE", "/"),
+        ("PUT", "/users/123/files/"),
+        ("GET", "//"),
+    ])
+    def test_must_not_match(self, method, path):
+        self.assertIsNone(self.trie.match(method, path))
+
+    def test_greedy_parameter_must_not_match_root(self):
+        trie = RouteTrie([Route(methods=["GET"], function_name="proxy", path="/{proxy+}")])
+
+        self.assertIsNone(trie.match("GET", "/"))
+
+    def test_last_route_of_path_and_method_must_win(self):
+        first = Route(methods=["GET"], function_name="first", path="/path")
+        second = Route(methods=["GET"], function_name="second", path="/path")
+
+        self.assertEquals(RouteTrie([first, second]).match("GET", "/path").route, second)
@@ -46,3 +46,16 @@ class TestServiceErrorResponses(TestCase):
 
         jsonify_patch.assert_called_with({"message": "Missing Authentication Token"})
         make_response_patch.assert_called_with({"json": "Response"}, 403)
+
+    @patch('samcli.local.apigw.service_error_responses.make_response')
+    @patch('samcli.local.apigw.service_error_responses.jsonify')
+    def test_too_many_requests(self, jsonify_patch, make_response_patch):
+        jsonify_patch.return_value = {"json": "Response"}
+        make_response_patch.return_value = {"Some Response"}
+
+        response = ServiceErrorResponses.too_many_requests()
+
+        self.assertEquals(response, {"Some Response"})
+
+        jsonify_patch.assert_called_with({"message": "Too Many Requests"})
+        make_response_patch.assert_called_with({"json": "Response"}, 429)
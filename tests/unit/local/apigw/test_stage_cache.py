@@ -0,0 +1,138 @@
+from unittest import TestCase
+
+from mock import Mock
+from parameterized import parameterized
+
+from samcli.commands.local.lib.provider import Api
+from samcli.local.apigw.stage_cache import StageCache
+
+
+class TestStageCache_ttl_for(TestCase):
+
+    def test_must_not_cache_without_method_settings(self):
+        self.assertEquals(StageCache().ttl_for("GET", "/hello"), 0)
+
+    @parameterized.expand([
+        ("POST", "/hello"),
+        ("HEAD", "/hello"),
+    ])
+    def test_must_only_cache_get_requests(self, method, path):
+        cache = StageCache(method_settings=[{"ResourcePath": "/*", "HttpMethod": "*", "CachingEnabled": True}])
+
+        self.assertEquals(cache.ttl_for(method, path), 0)
+
+    def test_must_use_default_ttl(self):
+        cache = StageCache(method_settings=[{"ResourcePath": "/*", "HttpMethod": "*", "CachingEnabled": "true"}])
+
+        self.assertEquals(cache.ttl_for("get", "/hello"), 300)
+
+    def test_most_specific_settings_must_win(self):
+        cache = StageCache(method_settings=[
+            {"ResourcePath": "/~1hello~1{name}", "HttpMethod": "GET", "CacheTtlInSeconds": 10},
+            {"ResourcePath": "/*", "HttpMethod": "*", "CachingEnabled": True, "CacheTtlInSeconds": 60},
+            {"ResourcePath": "/~1private", "HttpMethod": "*", "CachingEnabled": False},
+        ])
+
+        self.assertEquals(cache.ttl_for("GET", "/hello/{name}"), 10)
+        self.assertEquals(cache.ttl_for("GET", "/other"), 60)
+        self.assertEquals(cache.ttl_for("GET", "/private"), 0)
+
+    @parameterized.expand([
+        (0, 0),
+        (-5, 0),
+        (7200, 3600),
+        ("invalid", 300),
+    ])
+    def test_must_limit_ttl(self, configured_ttl, expected_ttl):
+        cache = StageCache(method_settings=[{"CachingEnabled": True, "CacheTtlInSeconds": configured_ttl}])
+
+        self.assertEquals(cache.ttl_for("GET", "/"), expected_ttl)
+
+
+class TestStageCache_get_put(TestCase):
+
+    def setUp(self):
+        self.now = 1000
+        self.cache = StageCache(max_size=10, clock=lambda: self.now)
+        self.key = StageCache.make_key("get", "/hello", [("method.request.querystring.id", ["1"])])
+
+    def test_must_return_cached_response(self):
+        self.cache.put(self.key, "response", 60, 5)
+
+        self.assertEquals(self.cache.get(self.key), "response")
+        self.assertEquals(self.cache.get(StageCache.make_key("GET", "/hello")), None)
+
+        stats = self.cache.stats()
+        self.assertEquals(stats["hits"], 1)
+        self.assertEquals(stats["misses"], 1)
+        self.assertEquals(stats["hit_rate"], 0.5)
+        self.assertEquals(stats["entries"], 1)
+        self.assertEquals(stats["bytes_stored"], 5)
+
+    def test_must_expire_responses(self):
+        self.cache.put(self.key, "response", 60, 5)
+        self.now += 60
+
+        self.assertEquals(self.cache.get(self.key), None)
+
+        stats = self.cache.stats()
+        self.assertEquals(stats["expirations"], 1)
+        self.assertEquals(stats["bytes_stored"], 0)
+
+    def test_must_evict_least_recently_used_responses(self):
+        first = StageCache.make_key("GET", "/first")
+        second = StageCache.make_key("GET", "/second")
+        self.cache.put(first, "first", 60, 4)
+        self.cache.put(second, "second", 60, 4)
+        self.cache.get(first)
+
+        self.cache.put(self.key, "response", 60, 4)
+
+        self.assertEquals(self.cache.get(second), None)
+        self.assertEquals(self.cache.get(first), "first")
+        self.assertEquals(self.cache.stats()["evictions"], 1)
+
+    def test_must_not_cache_responses_larger_than_cache(self):
+        self.cache.put(self.key, "response", 60, 11)
+
+        self.assertEquals(self.cache.stats()["entries"], 0)
+
+    def test_must_replace_cached_response(self):
+        self.cache.put(self.key, "old", 60, 5)
+        self.cache.put(self.key, "new", 60, 3)
+
+        self.assertEquals(self.cache.get(self.key), "new")
+        self.assertEquals(self.cache.stats()["bytes_stored"], 3)
+
+    def test_must_invalidate_response(self):
+        self.cache.put(self.key, "response", 60, 5)
+
+        self.cache.invalidate(self.key)
+
+        self.assertEquals(self.cache.get(self.key), None)
+        self.assertEquals(self.cache.stats()["invalidations"], 1)
+
+    def test_hit_rate_must_be_none_before_any_lookup(self):
+        self.assertIsNone(self.cache.stats()["hit_rate"])
+
+
+class TestStageCache_from_api(TestCase):
+
+    def test_must_not_create_cache_without_cache_cluster(self):
+        self.assertIsNone(StageCache.from_api(Api()))
+
+    def test_must_create_cache_of_cluster_size(self):
+        api = Api()
+        api.cache_cluster_enabled = "true"
+        api.cache_cluster_size = "1.6"
+        api.method_settings = [{"CachingEnabled": True}]
+
+        cache = StageCache.from_api(api)
+
+        self.assertEquals(cache.max_size, int(1.6 * 1024 ** 3))
+        self.assertEquals(cache.ttl_for("GET", "/"), 300)
+
+    def test_must_default_to_smallest_cluster(self):
+        api = Mock(cache_cluster_enabled=True, cache_cluster_size=None, method_settings=None)
+
+        self.assertEquals(StageCache.from_api(api).max_size, 1024 ** 3 // 2)
@@ -0,0 +1,163 @@
+import socket
+import struct
+from unittest import TestCase
+
+import docker
+from mock import Mock, patch
+
+from samcli.local.docker.attach_api import attach_socket, read_stream, write_input, supports_input, _read_into
+
+
+def _frame(frame_type, data):
+    return struct.pack('>BxxxL', frame_type, len(data)) + data
+
+
+class TestReadStream(TestCase):
+
+    def setUp(self):
+        self.reader, self.writer = socket.socketpair()
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def _read_all(self, buffer_size):
+        # Data is a view of a buffer that is reused, so it must be copied before reading the next frame
+        return [(frame_type, bytes(data)) for frame_type, data in read_stream(self.reader, buffer_size)]
+
+    def test_must_demux_frames(self):
+        self.writer.sendall(_frame(1, b"out") + _frame(2, b"err") + _frame(1, b"more out"))
+        self.writer.close()
+
+        self.assertEquals(self._read_all(64), [(1, b"out"), (2, b"err"), (1, b"more out")])
+
+    def test_must_split_frames_larger_than_buffer(self):
+        self.writer.sendall(_frame(1, b"0123456789") + _frame(2, b"ab"))
+        self.writer.close()
+
+        frames = self._read_all(8)
+
+        self.assertEquals(b"".join(data for frame_type, data in frames if frame_type == 1), b"0123456789")
+        self.assertTrue(all(len(data) <= 8 for _, data in frames))
+        self.assertEquals(frames[-1], (2, b"ab"))
+
+    def test_must_reuse_buffer(self):
+        self.writer.sendall(_frame(1, b"first") + _frame(1, b"second"))
+        self.writer.close()
+
+        buffers = [data.obj for _, data in read_stream(self.reader, 64)]
+
+        self.assertEquals(len(buffers), 2)
+        self.assertIs(buffers[0], buffers[1])
+
+    def test_must_stop_on_truncated_payload(self):
+        self.writer.sendall(_frame(1, b"complete")[:-3])
+        self.writer.close()
+
+        self.assertEquals(self._read_all(64), [(1, b"compl")])
+
+    def test_must_stop_on_truncated_header(self):
+        self.writer.sendall(b"\x01\x00\x00")
+        self.writer.close()
+
+        self.assertEquals(self._read_all(64), [])
+
+
+class TestReadInto(TestCase):
+
+    @patch("samcli.local.docker.attach_api.select")
+    def test_must_read_into_file_like_socket(self, select_mock):
+        sock = Mock(spec=["readinto", "fileno"])
+        sock.readinto.return_value = 3
+        buffer = memoryview(bytearray(8))
+
+        self.assertEquals(_read_into(sock, buffer), 3)
+        sock.readinto.assert_called_once_with(buffer)
+
+    @patch("samcli.local.docker.attach_api.os")
+    @patch("samcli.local.docker.attach_api.select")
+    def test_must_fall_back_to_reading_file_descriptor(self, select_mock, os_mock):
+        sock = Mock(spec=["fileno"])
+        os_mock.read.return_value = b"abc"
+        buffer = memoryview(bytearray(8))
+
+        self.assertEquals(_read_into(sock, buffer), 3)
+        self.assertEquals(bytes(buffer[:3]), b"abc")
+
+    @patch("samcli.local.docker.attach_api.select")
+    def test_must_return_none_on_recoverable_error(self, select_mock):
+        sock = Mock(spec=["recv_into"])
+        sock.recv_into.side_effect = OSError(11, "Resource temporarily unavailable")
+
+        self.assertIsNone(_read_into(sock, memoryview(bytearray(8))))
+
+
+class TestAttachSocket(TestCase):
+
+    def test_must_attach_with_stdin(self):
+        docker_client = Mock()
+        docker_client.api.base_url = "http+docker://localhost"
+        container = Mock()
+        container.id = "id"
+
+        result = attach_socket(docker_client, container, logs=False, stdin=True)
+
+        self.assertEquals(result, docker_client.api._get_raw_response_socket.return_value)
+        docker_client.api._post.assert_called_once_with(
+            "http+docker://localhost/containers/id/attach",
+            headers={"Connection": "Upgrade", "Upgrade": "tcp"},
+            params={"stdout": 1, "stderr": 1, "logs": 0, "stream": 1, "stdin": 1},
+            stream=True)
+
+    def test_input_is_not_supported_through_named_pipes(self):
+        docker_client = Mock()
+
+        docker_client.api.base_url = "http+docker://localnpipe"
+        self.assertFalse(supports_input(docker_client))
+
+        docker_client.api.base_url = "http+docker://localhost"
+        self.assertTrue(supports_input(docker_client))
+
+    def test_input_is_not_supported_through_tls(self):
+        # The version keeps the client from asking the daemon for it
+        self.assertFalse(supports_input(docker.DockerClient(base_url="tcp://127.0.0.1:2376", tls=True,
+                                                            version="1.35")))
+
+        self.assertTrue(supports_input(docker.DockerClient(base_url="tcp://127.0.0.1:2375", version="1.35")))
+
+
+class TestWriteInput(TestCase):
+
+    def setUp(self):
+        self.container_side, self.client_side = socket.socketpair()
+
+    def tearDown(self):
+        self.container_side.close()
+        self.client_side.close()
+
+    def test_must_send_data_and_end_of_input(self):
+        write_input(self.client_side, b"event")
+
+        received = b""
+        for chunk in iter(lambda: self.container_side.recv(64), b""):
+            received += chunk
+
+        self.assertEquals(received, b"event")
+
+    def test_output_can_be_read_after_input_ends(self):
+        write_input(self.client_side, b"event")
+        self.assertEquals(self.container_side.recv(64), b"event")
+
+        self.container_side.sendall(_frame(1, b"result"))
+        self.container_side.close()
+
+        self.assertEquals([(frame_type, bytes(data)) for frame_type, data in read_stream(self.client_side)],
+                          [(1, b"result")])
+
+    def test_must_write_to_wrapped_socket(self):
+        wrapper = Mock(spec=["_sock"])
+        wrapper._sock = self.client_side
+
+        write_input(wrapper, b"event")
+
+        self.assertEquals(self.container_side.recv(64), b"event")
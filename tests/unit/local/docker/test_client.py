@@ -0,0 +1,137 @@
+"""
+Unit tests for the shared Docker client
+"""
+
+import threading
+from datetime import timedelta
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from samcli.local.docker import client
+from samcli.local.docker.client import configure_docker_client, get_docker_client, reset_docker_client, \
+    docker_api_stats, track_docker_api_calls, DockerApiStats, DEFAULT_MAX_POOL_SIZE
+
+
+def make_response(method, path_url, seconds):
+    response = Mock()
+    response.request.method = method
+    response.request.path_url = path_url
+    response.elapsed = timedelta(seconds=seconds)
+    return response
+
+
+class TestGetDockerClient(TestCase):
+
+    def setUp(self):
+        reset_docker_client()
+
+    def tearDown(self):
+        with patch("samcli.local.docker.client.docker"):
+            reset_docker_client()
+        configure_docker_client()
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_create_client_once(self, docker_mock):
+        docker_mock.from_env.return_value.api.hooks = {"response": []}
+
+        first = get_docker_client()
+        second = get_docker_client()
+
+        self.assertIs(first, second)
+        docker_mock.from_env.assert_called_once_with(max_pool_size=DEFAULT_MAX_POOL_SIZE)
+        self.assertEquals(first.api.hooks["response"], [client._record_response])
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_create_one_client_across_threads(self, docker_mock):
+        docker_mock.from_env.return_value.api.hooks = {"response": []}
+        clients = []
+
+        threads = [threading.Thread(target=lambda: clients.append(get_docker_client())) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEquals(len(clients), 10)
+        docker_mock.from_env.assert_called_once_with(max_pool_size=DEFAULT_MAX_POOL_SIZE)
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_use_configured_pool_size(self, docker_mock):
+        docker_mock.from_env.return_value.api.hooks = {"response": []}
+
+        configure_docker_client(max_pool_size=50)
+        get_docker_client()
+
+        docker_mock.from_env.assert_called_once_with(max_pool_size=50)
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_fall_back_if_pool_size_is_not_supported(self, docker_mock):
+        client_mock = Mock()
+        client_mock.api.hooks = {"response": []}
+        docker_mock.from_env.side_effect = [TypeError("unexpected keyword argument"), client_mock]
+
+        self.assertIs(get_docker_client(), client_mock)
+
+    @patch("samcli.local.docker.client.docker")
+    def test_must_close_client_on_reset(self, docker_mock):
+        docker_mock.from_env.return_value.api.hooks = {"response": []}
+        client_mock = get_docker_client()
+
+        reset_docker_client()
+
+        client_mock.close.assert_called_once_with()
+        get_docker_client()
+        self.assertEquals(docker_mock.from_env.call_count, 2)
+
+
+class TestDockerApiCallTracking(TestCase):
+
+    def test_must_record_calls_grouped_by_endpoint(self):
+        container_id = "a" * 64
+        before = docker_api_stats()["calls"]
+
+        with track_docker_api_calls() as stats:
+            client._record_response(make_response("GET", "/v1.35/containers/{}/json".format(container_id), 0.5))
+            client._record_response(make_response("GET", "/v1.35/containers/{}/json?all=1".format("b" * 64), 0.25))
+            client._record_response(make_response("POST", "/v1.35/containers/create", 1))
+
+        self.assertEquals(stats.to_dict(), {
+            "calls": 3,
+            "total_time": 1.75,
+            "endpoints": {
+                "GET /containers/{id}/json": {"calls": 2, "total_time": 0.75},
+                "POST /containers/create": {"calls": 1, "total_time": 1.0}
+            }
+        })
+        self.assertEquals(docker_api_stats()["calls"], before + 3)
+
+    def test_must_not_record_calls_outside_of_block(self):
+        with track_docker_api_calls() as stats:
+            pass
+
+        client._record_response(make_response("GET", "/_ping", 0.1))
+
+        self.assertEquals(stats.calls, 0)
+
+    def test_must_only_record_calls_of_current_thread(self):
+        with track_docker_api_calls() as stats:
+            thread = threading.Thread(target=client._record_response, args=(make_response("GET", "/_ping", 0.1),))
+            thread.start()
+            thread.join(5)
+
+        self.assertEquals(stats.calls, 0)
+
+    def test_must_record_in_nested_trackers(self):
+        with track_docker_api_calls() as outer:
+            with track_docker_api_calls() as inner:
+                client._record_response(make_response("GET", "/_ping", 0.1))
+
+        self.assertEquals(outer.calls, 1)
+        self.assertEquals(inner.calls, 1)
+
+
+class TestDockerApiStats(TestCase):
+
+    def test_must_start_empty(self):
+        self.assertEquals(DockerApiStats().to_dict(), {"calls": 0, "total_time": 0.0, "endpoints": {}})
@@ -1,11 +1,14 @@
 """
 Unit test for Container class
 """
+import os
+
 from docker.errors import NotFound, APIError
 from unittest import TestCase
 from mock import Mock, call, patch
 
 from samcli.local.docker.container import Container
+from samcli.local.docker.utils import get_host_id
 
 
 class TestContainer_init(TestCase):
@@ -60,6 +63,9 @@ class TestContainer_create(TestCase):
         self.env_vars = {"key": "value"}
         self.container_opts = {"container": "opts"}
         self.additional_volumes = {'/somepath': {"blah": "blah value"}}
+        self.expected_labels = {"sam.cli.container": "true",
+                                "sam.cli.pid": str(os.getpid()),
+                                "sam.cli.host": get_host_id()}
 
         self.mock_docker_client = Mock()
         self.mock_docker_client.containers = Mock()
@@ -98,7 +104,8 @@ class TestContainer_create(TestCase):
                                                                      working_dir=self.working_dir,
                                                                      volumes=expected_volumes,
                                                                      tty=False,
-                                                                     use_config_proxy=True)
+                                                                     use_config_proxy=True,
+                                                                     labels=self.expected_labels)
         self.mock_docker_client.networks.get.assert_not_called()
 
     def test_must_create_container_including_all_optional_values(self):
@@ -130,7 +137,8 @@ class TestContainer_create(TestCase):
                               env_vars=self.env_vars,
                               docker_client=self.mock_docker_client,
                               container_opts=self.container_opts,
-                              additional_volumes=self.additional_volumes
+                              additional_volumes=self.additional_volumes,
+                              stdin_open=True
                               )
 
         container_id = container.create()
@@ -143,10 +151,14 @@ class TestContainer_create(TestCase):
                                                                      volumes=expected_volumes,
                                                                      tty=False,
                                                                      use_config_proxy=True,
+                                                                     labels=self.expected_labels,
                                                                      environment=self.env_vars,
                                                                      ports=self.exposed_ports,
                                                                      entrypoint=self.entrypoint,
                                                                      mem_limit=expected_memory,
+                                                                     cpu_shares=71,
+                                                                     stdin_open=True,
+                                                                     stdin_once=True,
                                                                      container='opts'
                                                                      )
         self.mock_docker_client.networks.get.assert_not_called()
@@ -209,10 +221,12 @@ class TestContainer_create(TestCase):
                                                                      volumes=translated_volumes,
                                                                      tty=False,
                                                                      use_config_proxy=True,
+                                                                     labels=self.expected_labels,
                                                                      environment=self.env_vars,
                                                                      ports=self.exposed_ports,
                                                                      entrypoint=self.entrypoint,
                                                                      mem_limit=expected_memory,
+                                                                     cpu_shares=71,
                                                                      container='opts'
                                                                      )
         self.mock_docker_client.networks.get.assert_not_called()
@@ -254,6 +268,7 @@ class TestContainer_create(TestCase):
                                                                      working_dir=self.working_dir,
                                                                      tty=False,
                                                                      use_config_proxy=True,
+                                                                     labels=self.expected_labels,
                                                                      volumes=expected_volumes
                                                                      )
 
@@ -297,6 +312,7 @@ class TestContainer_create(TestCase):
                                                                      working_dir=self.working_dir,
                                                                      tty=False,
                                                                      use_config_proxy=True,
+                                                                     labels=self.expected_labels,
                                                                      volumes=expected_volumes,
                                                                      network_mode='host'
                                                                      )
@@ -318,6 +334,53 @@ class TestContainer_create(TestCase):
             container.create()
 
 
+class TestContainer_api_config(TestCase):
+
+    def setUp(self):
+        self.docker_client = Mock()
+        self.docker_client.api.api_version = "1.35"
+
+    def test_must_convert_configuration_to_docker_api_format(self):
+        container = Container("image",
+                              ["handler"],
+                              "/var/task",
+                              "/code",
+                              memory_limit_mb=128,
+                              exposed_ports={5858: 5858},
+                              entrypoint=["/entry"],
+                              env_vars={"key": "value"},
+                              docker_client=self.docker_client,
+                              additional_volumes={"/layers": {"bind": "/opt", "mode": "ro"}})
+        container.network_id = "network"
+
+        config = container.api_config()
+
+        self.assertEquals(config["Image"], "image")
+        self.assertEquals(config["Cmd"], ["handler"])
+        self.assertEquals(config["Entrypoint"], ["/entry"])
+        self.assertEquals(config["WorkingDir"], "/var/task")
+        self.assertEquals(config["Env"], ["key=value"])
+        self.assertEquals(config["Labels"], {"sam.cli.container": "true",
+                                             "sam.cli.pid": str(os.getpid()),
+                                             "sam.cli.host": get_host_id()})
+        self.assertEquals(config["ExposedPorts"], {"5858/tcp": {}})
+        self.assertEquals(sorted(config["HostConfig"]["Binds"]), ["/code:/var/task:ro,delegated", "/layers:/opt:ro"])
+        self.assertEquals(config["HostConfig"]["Memory"], 128 * 1024 * 1024)
+        self.assertEquals(config["HostConfig"]["CpuShares"], Container.cpu_shares_for_memory(128))
+        self.assertEquals(config["HostConfig"]["NetworkMode"], "network")
+        self.assertEquals(config["HostConfig"]["PortBindings"], {"5858/tcp": [{"HostIp": "", "HostPort": "5858"}]})
+        self.docker_client.containers.create.assert_not_called()
+
+    def test_must_keep_stdin_open(self):
+        container = Container("image", ["handler"], "/var/task", "/code", docker_client=self.docker_client,
+                              stdin_open=True)
+
+        config = container.api_config()
+
+        self.assertTrue(config["OpenStdin"])
+        self.assertTrue(config["StdinOnce"])
+
+
 class TestContainer_delete(TestCase):
 
     def setUp(self):
@@ -444,12 +507,126 @@ class TestContainer_start(TestCase):
         with self.assertRaises(RuntimeError):
             self.container.start()
 
-    def test_must_not_support_input_data(self):
+    def test_must_not_pass_input_to_container_without_stdin(self):
 
         self.container.is_created.return_value = True
 
         with self.assertRaises(ValueError):
-            self.container.start(input_data="some input data")
+            self.container.start(input_data=b"some input data")
+
+    @patch("samcli.local.docker.container.read_stream")
+    @patch("samcli.local.docker.container.attach_socket")
+    def test_must_attach_before_starting_reused_container(self, attach_socket_mock, read_stream_mock):
+        self.container.id = None
+        self.container.is_created.return_value = False
+        self.container.adopt("warmid")
+        self.container.is_created.return_value = True
+
+        real_container_mock = Mock()
+        self.mock_docker_client.containers.get.return_value = real_container_mock
+
+        output_itr = Mock()
+        read_stream_mock.return_value = output_itr
+        self.container._write_container_output = Mock()
+
+        self.container.start()
+
+        attach_socket_mock.assert_called_with(self.mock_docker_client, container=real_container_mock,
+                                              stdout=True, stderr=True, logs=False, stdin=False)
+        read_stream_mock.assert_called_with(attach_socket_mock.return_value)
+        real_container_mock.start.assert_called_with()
+
+        stdout_mock = Mock()
+        self.container.wait_for_logs(stdout=stdout_mock)
+
+        # Must read from the stream opened before starting, instead of attaching again
+        attach_socket_mock.assert_called_once()
+        self.container._write_container_output.assert_called_with(output_itr, stdout=stdout_mock, stderr=None)
+
+    @patch("samcli.local.docker.container.write_input")
+    @patch("samcli.local.docker.container.read_stream")
+    @patch("samcli.local.docker.container.attach_socket")
+    def test_must_send_input_after_starting_container(self, attach_socket_mock, read_stream_mock, write_input_mock):
+        self.container._stdin_open = True
+        self.container.is_created.return_value = True
+
+        real_container_mock = Mock()
+        self.mock_docker_client.containers.get.return_value = real_container_mock
+
+        calls = Mock()
+        socket = Mock()
+        attach_socket_mock.return_value = socket
+        attach_socket_mock.side_effect = lambda *args, **kwargs: calls.attach(**kwargs) and socket
+        real_container_mock.start.side_effect = calls.start
+        write_input_mock.side_effect = calls.write_input
+
+        self.container.start(input_data=b"event")
+
+        self.assertEquals(calls.mock_calls, [call.attach(container=real_container_mock, stdout=True, stderr=True,
+                                                         logs=False, stdin=True),
+                                             call.start(),
+                                             call.write_input(socket, b"event")])
+        self.assertEquals(self.container._logs_itr, read_stream_mock.return_value)
+
+
+class TestContainer_adopt(TestCase):
+
+    def setUp(self):
+        self.container = Container("image", "cmd", "working_dir", "host_dir", docker_client=Mock())
+
+    def test_must_bind_to_existing_container(self):
+        self.container.adopt("someid")
+
+        self.assertEquals("someid", self.container.id)
+        self.assertTrue(self.container._is_reused)
+
+    def test_must_fail_if_already_created(self):
+        self.container.id = "someid"
+
+        with self.assertRaises(RuntimeError):
+            self.container.adopt("otherid")
+
+
+class TestContainer_config_hash(TestCase):
+
+    def make_container(self, **kwargs):
+        return Container("image", ["cmd"], "working_dir", "host_dir", docker_client=Mock(), **kwargs)
+
+    def test_must_be_equal_for_same_configuration(self):
+        first = self.make_container(memory_limit_mb=128, env_vars={"a": "b", "c": "d"})
+        second = self.make_container(memory_limit_mb=128, env_vars={"c": "d", "a": "b"})
+
+        self.assertEquals(first.config_hash(), second.config_hash())
+
+    def test_must_differ_when_configuration_differs(self):
+        first = self.make_container(memory_limit_mb=128, env_vars={"a": "b"})
+
+        self.assertNotEquals(first.config_hash(), self.make_container(memory_limit_mb=256,
+                                                                      env_vars={"a": "b"}).config_hash())
+        self.assertNotEquals(first.config_hash(), self.make_container(memory_limit_mb=128,
+                                                                      env_vars={"a": "c"}).config_hash())
+
+    def test_must_include_network(self):
+        first = self.make_container()
+        second = self.make_container()
+        second.network_id = "network"
+
+        self.assertNotEquals(first.config_hash(), second.config_hash())
+
+    def test_must_ignore_event_and_credentials(self):
+        first = self.make_container(env_vars={"a": "b", "AWS_LAMBDA_EVENT_BODY": "1", "AWS_ACCESS_KEY_ID": "key1",
+                                              "AWS_SECRET_ACCESS_KEY": "secret1", "AWS_SESSION_TOKEN": "token1"})
+        second = self.make_container(env_vars={"a": "b", "AWS_LAMBDA_EVENT_BODY": "2", "AWS_ACCESS_KEY_ID": "key2",
+                                               "AWS_SECRET_ACCESS_KEY": "secret2", "AWS_SESSION_TOKEN": "token2"})
+
+        self.assertEquals(first.config_hash(), second.config_hash())
+        self.assertNotEquals(first.credentials_hash(), second.credentials_hash())
+
+    def test_credentials_hash_must_ignore_other_variables(self):
+        first = self.make_container(env_vars={"a": "b", "AWS_ACCESS_KEY_ID": "key"})
+        second = self.make_container(env_vars={"a": "c", "AWS_ACCESS_KEY_ID": "key"})
+
+        self.assertEquals(first.credentials_hash(), second.credentials_hash())
 
 
 class TestContainer_wait_for_logs(TestCase):
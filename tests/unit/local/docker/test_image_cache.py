@@ -0,0 +1,82 @@
+"""
+Unit tests for the image state cache
+"""
+
+import threading
+import time
+from unittest import TestCase
+
+from samcli.local.docker.image_cache import ImageStateCache
+
+
+class TestImageStateCache(TestCase):
+
+    def setUp(self):
+        self.now = [100.0]
+        self.cache = ImageStateCache(refresh_interval=10, clock=lambda: self.now[0])
+
+    def test_must_use_default_refresh_interval(self):
+        self.assertEquals(ImageStateCache().refresh_interval, ImageStateCache.DEFAULT_REFRESH_INTERVAL)
+
+    def test_must_return_same_shared_instance(self):
+        self.assertIs(ImageStateCache.shared(), ImageStateCache.shared())
+
+    def test_must_not_know_unseen_image(self):
+        self.assertFalse(self.cache.is_fresh("image"))
+
+    def test_must_know_available_image(self):
+        self.cache.mark_available("image")
+
+        self.assertTrue(self.cache.is_fresh("image"))
+        self.assertFalse(self.cache.is_fresh("image", require_pull=True))
+
+    def test_must_know_pulled_image(self):
+        self.cache.mark_available("image", pulled=True)
+
+        self.assertTrue(self.cache.is_fresh("image", require_pull=True))
+
+    def test_must_keep_pull_time_when_image_is_seen_again(self):
+        self.cache.mark_available("image", pulled=True)
+        self.now[0] += 5
+        self.cache.mark_available("image")
+        self.now[0] += 5
+
+        self.assertTrue(self.cache.is_fresh("image"))
+        self.assertFalse(self.cache.is_fresh("image", require_pull=True))
+
+    def test_must_expire_after_refresh_interval(self):
+        self.cache.mark_available("image", pulled=True)
+        self.now[0] += 10
+
+        self.assertFalse(self.cache.is_fresh("image"))
+
+    def test_must_invalidate(self):
+        self.cache.mark_available("image", pulled=True)
+        self.cache.invalidate("image")
+
+        self.assertFalse(self.cache.is_fresh("image"))
+
+    def test_must_prepare_image_in_one_thread_at_a_time(self):
+        entered = threading.Event()
+        result = {}
+
+        def target():
+            with self.cache.single_flight("image"):
+                result["fresh"] = self.cache.is_fresh("image")
+
+        with self.cache.single_flight("image"):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+            # Other images are not blocked
+            with self.cache.single_flight("other"):
+                entered.set()
+
+            time.sleep(0.01)
+            self.assertEquals(result, {})
+            self.cache.mark_available("image")
+
+        thread.join(5)
+        self.assertTrue(entered.is_set())
+        self.assertTrue(result["fresh"])
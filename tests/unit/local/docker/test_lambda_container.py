@@ -100,6 +100,67 @@ class TestLambdaContainer_init(TestCase):
 
         self.assertEquals(str(context.exception), "Unsupported Lambda runtime foo")
 
+    @patch("samcli.local.docker.container.get_docker_client")
+    @patch.object(LambdaContainer, "_get_image")
+    def test_must_configure_runtime_api_container(self, get_image_mock, get_docker_client_mock):
+        get_image_mock.return_value = "image"
+
+        container = LambdaContainer(Runtime.python37.value,
+                                    self.handler,
+                                    self.code_dir,
+                                    layers=[],
+                                    image_builder=Mock(),
+                                    env_vars=self.env_var,
+                                    runtime_api="host.docker.internal:1234")
+
+        self.assertEquals(container._entrypoint, ["/var/lang/bin/python3.7", "/var/runtime/bootstrap"])
+        self.assertEquals(container._env_vars, {
+            "var": "value",
+            "AWS_LAMBDA_RUNTIME_API": "host.docker.internal:1234",
+            "_HANDLER": self.handler,
+            "LAMBDA_TASK_ROOT": "/var/task",
+            "LAMBDA_RUNTIME_DIR": "/var/runtime"
+        })
+        # Input env vars must not be modified
+        self.assertEquals(self.env_var, {"var": "value"})
+
+    def test_must_fail_runtime_api_for_unsupported_runtime(self):
+
+        with self.assertRaises(ValueError) as context:
+            LambdaContainer(Runtime.java8.value, self.handler, self.code_dir, [], Mock(), runtime_api="host:1234")
+
+        self.assertEquals(str(context.exception), "Runtime java8 cannot be used with the Lambda Runtime API")
+
+
+class TestLambdaContainer_supports_runtime_api(TestCase):
+
+    @parameterized.expand([
+        param(Runtime.python37.value, True),
+        param(Runtime.nodejs10x.value, True),
+        param(Runtime.provided.value, True),
+        param(Runtime.python36.value, False),
+        param(Runtime.java8.value, False),
+    ])
+    def test_must_check_runtime(self, runtime, expected):
+        self.assertEquals(LambdaContainer.supports_runtime_api(runtime), expected)
+
+
+class TestLambdaContainer_get_runtime_api_options(TestCase):
+
+    @patch("samcli.local.docker.lambda_container.sys")
+    def test_must_map_docker_host_on_linux(self, sys_mock):
+        sys_mock.platform = "linux"
+
+        result = LambdaContainer._get_runtime_api_options({"a": "b"})
+
+        self.assertEquals(result, {"a": "b", "extra_hosts": {"host.docker.internal": "host-gateway"}})
+
+    @patch("samcli.local.docker.lambda_container.sys")
+    def test_must_not_map_docker_host_on_other_platforms(self, sys_mock):
+        sys_mock.platform = "darwin"
+
+        self.assertIsNone(LambdaContainer._get_runtime_api_options(None))
+
 
 class TestLambdaContainer_get_exposed_ports(TestCase):
 
@@ -226,3 +287,31 @@ class TestLambdaContainer_get_additional_volumes(TestCase):
 
         result = LambdaContainer._get_additional_volumes(debug_options)
         self.assertEquals(result, expected)
+
+
+class TestLambdaContainer_get_layers_volume(TestCase):
+
+    def test_no_layers_volume_without_layers(self):
+        image_builder_mock = Mock()
+
+        result = LambdaContainer._get_layers_volume(image_builder_mock, [])
+
+        self.assertIsNone(result)
+        image_builder_mock.get_layers_mount.assert_not_called()
+
+    def test_no_layers_volume_when_layers_are_built_into_image(self):
+        image_builder_mock = Mock()
+        image_builder_mock.get_layers_mount.return_value = None
+
+        result = LambdaContainer._get_layers_volume(image_builder_mock, ["layer1"])
+
+        self.assertIsNone(result)
+
+    def test_layers_volume_mounts_merged_layers_at_opt(self):
+        image_builder_mock = Mock()
+        image_builder_mock.get_layers_mount.return_value = "/cache/.overlays/key"
+
+        result = LambdaContainer._get_layers_volume(image_builder_mock, ["layer1"])
+
+        self.assertEquals(result, {"/cache/.overlays/key": {"bind": "/opt", "mode": "ro"}})
+        image_builder_mock.get_layers_mount.assert_called_once_with(["layer1"])
@@ -1,5 +1,9 @@
+import os
+import shutil
+import tempfile
 from unittest import TestCase
-from mock import patch, Mock, mock_open
+from mock import patch, Mock, MagicMock, call
+from parameterized import parameterized
 
 from docker.errors import ImageNotFound, BuildError, APIError
 
@@ -17,10 +21,10 @@ class TestLambdaImage(TestCase):
         self.assertFalse(lambda_image.force_image_build)
         self.assertEquals(lambda_image.docker_client, "docker_client")
 
-    @patch("samcli.local.docker.lambda_image.docker")
-    def test_initialization_with_defaults(self, docker_patch):
+    @patch("samcli.local.docker.lambda_image.get_docker_client")
+    def test_initialization_with_defaults(self, get_docker_client_patch):
         docker_client_mock = Mock()
-        docker_patch.from_env.return_value = docker_client_mock
+        get_docker_client_patch.return_value = docker_client_mock
 
         lambda_image = LambdaImage("layer_downloader", False, False)
 
@@ -36,12 +40,52 @@ class TestLambdaImage(TestCase):
 
         self.assertEquals(lambda_image.build("python3.6", []), "lambci/lambda:python3.6")
 
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    def test_not_building_image_when_layers_are_mounted(self, build_image_patch):
+        docker_client_mock = Mock()
+        layer_downloader_mock = MagicMock()
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, True, docker_client=docker_client_mock,
+                                   mount_layers=True)
+
+        self.assertEquals(lambda_image.build("python3.6", [Mock()]), "lambci/lambda:python3.6")
+        build_image_patch.assert_not_called()
+        layer_downloader_mock.download_all.assert_not_called()
+
+    def test_no_layers_mount_when_layers_are_built_into_image(self):
+        layer_downloader_mock = MagicMock()
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=Mock())
+
+        self.assertIsNone(lambda_image.get_layers_mount([Mock()]))
+        layer_downloader_mock.download_all.assert_not_called()
+
+    @patch("samcli.local.docker.lambda_image.LayerOverlay")
+    @patch("samcli.local.docker.lambda_image.LambdaImage._generate_docker_image_version")
+    def test_layers_mount_merges_downloaded_layers(self, generate_docker_image_version_patch, layer_overlay_patch):
+        layer_downloader_mock = MagicMock()
+        layer_downloader_mock.layer_cache = "/cache"
+        layer_downloader_mock.download_all.return_value = ["downloaded1", "downloaded2"]
+        generate_docker_image_version_patch.return_value = "key"
+        layer_overlay_patch.return_value.merge.return_value = "/cache/.overlays/key"
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=Mock(), mount_layers=True)
+
+        self.assertEquals(lambda_image.get_layers_mount(["layer1", "layer2"]), "/cache/.overlays/key")
+        self.assertEquals(lambda_image.get_layers_mount(["layer1", "layer2"]), "/cache/.overlays/key")
+
+        layer_downloader_mock.download_all.assert_called_with(["layer1", "layer2"], False)
+        layer_downloader_mock.in_use.assert_called_with(["layer1", "layer2"])
+        generate_docker_image_version_patch.assert_called_with(["downloaded1", "downloaded2"], "opt")
+        layer_overlay_patch.assert_called_once_with("/cache", cache_manager=layer_downloader_mock.cache_manager)
+        layer_overlay_patch.return_value.merge.assert_called_with("key", ["downloaded1", "downloaded2"])
+
     @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_docker_image_version")
     def test_not_building_image_that_already_exists(self,
                                                     generate_docker_image_version_patch,
                                                     build_image_patch):
-        layer_downloader_mock = Mock()
+        layer_downloader_mock = MagicMock()
         layer_mock = Mock()
         layer_mock.name = "layers1"
         layer_mock.is_defined_within_template = False
@@ -58,16 +102,68 @@ class TestLambdaImage(TestCase):
         self.assertEquals(actual_image_id, "samcli/lambda:image-version")
 
         layer_downloader_mock.download_all.assert_called_once_with([layer_mock], False)
-        generate_docker_image_version_patch.assert_called_once_with([layer_mock], "python3.6")
-        docker_client_mock.images.get.assert_called_once_with("samcli/lambda:image-version")
+        layer_downloader_mock.in_use.assert_called_once_with([layer_mock])
+        generate_docker_image_version_patch.assert_called_once_with([layer_mock], "python3.6",
+                                                                    docker_client_mock.images.get.return_value.id)
+        docker_client_mock.images.get.assert_has_calls([call("lambci/lambda:python3.6"),
+                                                        call("samcli/lambda:image-version")])
         build_image_patch.assert_not_called()
 
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    @patch("samcli.local.docker.lambda_image.LambdaImage._generate_docker_image_version")
+    def test_not_building_image_of_unchanged_template_layer(self,
+                                                            generate_docker_image_version_patch,
+                                                            build_image_patch):
+        layer_downloader_mock = MagicMock()
+        layer_mock = Mock()
+        layer_mock.name = "layers1"
+        layer_mock.is_defined_within_template = True
+        layer_downloader_mock.download_all.return_value = [layer_mock]
+
+        generate_docker_image_version_patch.return_value = "image-version"
+
+        docker_client_mock = Mock()
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=docker_client_mock)
+
+        self.assertEquals(lambda_image.build("python3.6", [layer_mock]), "samcli/lambda:image-version")
+        build_image_patch.assert_not_called()
+
+    @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
+    @patch("samcli.local.docker.lambda_image.LambdaImage._generate_docker_image_version")
+    def test_must_tag_image_with_base_image_pulled_during_build(self,
+                                                                generate_docker_image_version_patch,
+                                                                build_image_patch):
+        layer_downloader_mock = MagicMock()
+        layer_downloader_mock.download_all.return_value = ["layers1"]
+
+        generate_docker_image_version_patch.side_effect = lambda layers, runtime, base_image_id: \
+            "version-{}".format(base_image_id)
+
+        base_image = Mock()
+        base_image.id = "sha256:base"
+        built_image = Mock()
+
+        # Neither the base image nor the image are there before the build
+        docker_client_mock = Mock()
+        docker_client_mock.images.get.side_effect = [ImageNotFound("base"), ImageNotFound("image"),
+                                                     base_image, built_image]
+
+        lambda_image = LambdaImage(layer_downloader_mock, False, False, docker_client=docker_client_mock)
+        actual_image_id = lambda_image.build("python3.6", ["layers1"])
+
+        self.assertEquals(actual_image_id, "samcli/lambda:version-sha256:base")
+        build_image_patch.assert_called_once_with("lambci/lambda:python3.6", "samcli/lambda:version-None",
+                                                  ["layers1"])
+        docker_client_mock.images.get.assert_called_with("samcli/lambda:version-None")
+        built_image.tag.assert_called_once_with("samcli/lambda", tag="version-sha256:base")
+
     @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_docker_image_version")
     def test_force_building_image_that_doesnt_already_exists(self,
                                                              generate_docker_image_version_patch,
                                                              build_image_patch):
-        layer_downloader_mock = Mock()
+        layer_downloader_mock = MagicMock()
         layer_downloader_mock.download_all.return_value = ["layers1"]
 
         generate_docker_image_version_patch.return_value = "image-version"
@@ -81,8 +177,8 @@ class TestLambdaImage(TestCase):
         self.assertEquals(actual_image_id, "samcli/lambda:image-version")
 
         layer_downloader_mock.download_all.assert_called_once_with(["layers1"], True)
-        generate_docker_image_version_patch.assert_called_once_with(["layers1"], "python3.6")
-        docker_client_mock.images.get.assert_called_once_with("samcli/lambda:image-version")
+        generate_docker_image_version_patch.assert_called_once_with(["layers1"], "python3.6", None)
+        docker_client_mock.images.get.assert_any_call("samcli/lambda:image-version")
         build_image_patch.assert_called_once_with("lambci/lambda:python3.6", "samcli/lambda:image-version", ["layers1"])
 
     @patch("samcli.local.docker.lambda_image.LambdaImage._build_image")
@@ -90,7 +186,7 @@ class TestLambdaImage(TestCase):
     def test_not_force_building_image_that_doesnt_already_exists(self,
                                                                  generate_docker_image_version_patch,
                                                                  build_image_patch):
-        layer_downloader_mock = Mock()
+        layer_downloader_mock = MagicMock()
         layer_downloader_mock.download_all.return_value = ["layers1"]
 
         generate_docker_image_version_patch.return_value = "image-version"
@@ -104,8 +200,8 @@ class TestLambdaImage(TestCase):
         self.assertEquals(actual_image_id, "samcli/lambda:image-version")
 
         layer_downloader_mock.download_all.assert_called_once_with(["layers1"], False)
-        generate_docker_image_version_patch.assert_called_once_with(["layers1"], "python3.6")
-        docker_client_mock.images.get.assert_called_once_with("samcli/lambda:image-version")
+        generate_docker_image_version_patch.assert_called_once_with(["layers1"], "python3.6", None)
+        docker_client_mock.images.get.assert_any_call("samcli/lambda:image-version")
         build_image_patch.assert_called_once_with("lambci/lambda:python3.6", "samcli/lambda:image-version", ["layers1"])
 
     @patch("samcli.local.docker.lambda_image.hashlib")
@@ -116,6 +212,7 @@ class TestLambdaImage(TestCase):
 
         layer_mock = Mock()
         layer_mock.name = 'layer1'
+        layer_mock.is_defined_within_template = False
 
         image_version = LambdaImage._generate_docker_image_version([layer_mock], 'runtime')
 
@@ -123,6 +220,27 @@ class TestLambdaImage(TestCase):
 
         hashlib_patch.sha256.assert_called_once_with(b'layer1')
 
+    def test_generate_docker_image_version_from_layer_content(self):
+        layer_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, layer_dir)
+        layer_file = os.path.join(layer_dir, "lib.py")
+
+        layer_mock = Mock()
+        layer_mock.name = 'layer1'
+        layer_mock.codeuri = layer_dir
+        layer_mock.is_defined_within_template = True
+
+        with open(layer_file, "w") as f:
+            f.write("v1")
+        first = LambdaImage._generate_docker_image_version([layer_mock], 'runtime', "sha256:base")
+
+        self.assertEquals(LambdaImage._generate_docker_image_version([layer_mock], 'runtime', "sha256:base"), first)
+        self.assertNotEqual(LambdaImage._generate_docker_image_version([layer_mock], 'runtime', "sha256:new"), first)
+
+        with open(layer_file, "w") as f:
+            f.write("v2 with a different size")
+        self.assertNotEqual(LambdaImage._generate_docker_image_version([layer_mock], 'runtime', "sha256:base"), first)
+
     @patch("samcli.local.docker.lambda_image.docker")
     def test_generate_dockerfile(self, docker_patch):
         docker_client_mock = Mock()
@@ -135,132 +253,57 @@ class TestLambdaImage(TestCase):
 
         self.assertEquals(LambdaImage._generate_dockerfile("python", [layer_mock]), expected_docker_file)
 
-    @patch("samcli.local.docker.lambda_image.create_tarball")
-    @patch("samcli.local.docker.lambda_image.uuid")
-    @patch("samcli.local.docker.lambda_image.Path")
+    @patch("samcli.local.docker.lambda_image.stream_tarball")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_dockerfile")
-    def test_build_image(self, generate_dockerfile_patch, path_patch, uuid_patch, create_tarball_patch):
-        uuid_patch.uuid4.return_value = "uuid"
+    def test_build_image(self, generate_dockerfile_patch, stream_tarball_patch):
         generate_dockerfile_patch.return_value = "Dockerfile content"
 
-        docker_full_path_mock = Mock()
-        docker_full_path_mock.exists.return_value = True
-        path_patch.return_value = docker_full_path_mock
-
         docker_client_mock = Mock()
-        layer_downloader_mock = Mock()
+        layer_downloader_mock = MagicMock()
         layer_downloader_mock.layer_cache = "cached layers"
 
-        tarball_fileobj = Mock()
-        create_tarball_patch.return_value.__enter__.return_value = tarball_fileobj
+        build_context = Mock()
+        stream_tarball_patch.return_value = build_context
 
         layer_version1 = Mock()
         layer_version1.codeuri = "somevalue"
         layer_version1.name = "name"
 
-        dockerfile_mock = Mock()
-        m = mock_open(dockerfile_mock)
-        with patch("samcli.local.docker.lambda_image.open", m):
-            LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock)\
-                ._build_image("base_image", "docker_tag", [layer_version1])
+        LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock)\
+            ._build_image("base_image", "docker_tag", [layer_version1])
 
-        handle = m()
-        handle.write.assert_called_with("Dockerfile content")
-        path_patch.assert_called_once_with("cached layers", "dockerfile_uuid")
-        docker_client_mock.images.build.assert_called_once_with(fileobj=tarball_fileobj,
+        stream_tarball_patch.assert_called_once_with({"somevalue": "/name"},
+                                                     files={"Dockerfile": b"Dockerfile content"})
+        docker_client_mock.images.build.assert_called_once_with(fileobj=build_context,
                                                                 rm=True,
                                                                 tag="docker_tag",
                                                                 pull=False,
                                                                 custom_context=True)
 
-        docker_full_path_mock.unlink.assert_called_once()
-
-    @patch("samcli.local.docker.lambda_image.create_tarball")
-    @patch("samcli.local.docker.lambda_image.uuid")
-    @patch("samcli.local.docker.lambda_image.Path")
+    @parameterized.expand([
+        (BuildError("buildError", "buildlog"),),
+        (APIError("apiError"),)
+    ])
+    @patch("samcli.local.docker.lambda_image.stream_tarball")
     @patch("samcli.local.docker.lambda_image.LambdaImage._generate_dockerfile")
-    def test_build_image_fails_with_BuildError(self,
-                                               generate_dockerfile_patch,
-                                               path_patch,
-                                               uuid_patch,
-                                               create_tarball_patch):
-        uuid_patch.uuid4.return_value = "uuid"
+    def test_build_image_fails(self, error, generate_dockerfile_patch, stream_tarball_patch):
         generate_dockerfile_patch.return_value = "Dockerfile content"
 
-        docker_full_path_mock = Mock()
-        docker_full_path_mock.exists.return_value = False
-        path_patch.return_value = docker_full_path_mock
-
         docker_client_mock = Mock()
-        docker_client_mock.images.build.side_effect = BuildError("buildError", "buildlog")
-        layer_downloader_mock = Mock()
+        docker_client_mock.images.build.side_effect = error
+        layer_downloader_mock = MagicMock()
         layer_downloader_mock.layer_cache = "cached layers"
 
-        tarball_fileobj = Mock()
-        create_tarball_patch.return_value.__enter__.return_value = tarball_fileobj
-
         layer_version1 = Mock()
         layer_version1.codeuri = "somevalue"
         layer_version1.name = "name"
 
-        dockerfile_mock = Mock()
-        m = mock_open(dockerfile_mock)
-        with patch("samcli.local.docker.lambda_image.open", m):
-            with self.assertRaises(ImageBuildException):
-                LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock) \
-                    ._build_image("base_image", "docker_tag", [layer_version1])
-
-        handle = m()
-        handle.write.assert_called_with("Dockerfile content")
-        path_patch.assert_called_once_with("cached layers", "dockerfile_uuid")
-        docker_client_mock.images.build.assert_called_once_with(fileobj=tarball_fileobj,
-                                                                rm=True,
-                                                                tag="docker_tag",
-                                                                pull=False,
-                                                                custom_context=True)
-
-        docker_full_path_mock.unlink.assert_not_called()
-
-    @patch("samcli.local.docker.lambda_image.create_tarball")
-    @patch("samcli.local.docker.lambda_image.uuid")
-    @patch("samcli.local.docker.lambda_image.Path")
-    @patch("samcli.local.docker.lambda_image.LambdaImage._generate_dockerfile")
-    def test_build_image_fails_with_ApiError(self,
-                                             generate_dockerfile_patch,
-                                             path_patch,
-                                             uuid_patch,
-                                             create_tarball_patch):
-        uuid_patch.uuid4.return_value = "uuid"
-        generate_dockerfile_patch.return_value = "Dockerfile content"
-
-        docker_full_path_mock = Mock()
-        path_patch.return_value = docker_full_path_mock
-
-        docker_client_mock = Mock()
-        docker_client_mock.images.build.side_effect = APIError("apiError")
-        layer_downloader_mock = Mock()
-        layer_downloader_mock.layer_cache = "cached layers"
-
-        tarball_fileobj = Mock()
-        create_tarball_patch.return_value.__enter__.return_value = tarball_fileobj
-
-        layer_version1 = Mock()
-        layer_version1.codeuri = "somevalue"
-        layer_version1.name = "name"
+        with self.assertRaises(ImageBuildException):
+            LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock) \
+                ._build_image("base_image", "docker_tag", [layer_version1])
 
-        dockerfile_mock = Mock()
-        m = mock_open(dockerfile_mock)
-        with patch("samcli.local.docker.lambda_image.open", m):
-            with self.assertRaises(ImageBuildException):
-                LambdaImage(layer_downloader_mock, True, False, docker_client=docker_client_mock) \
-                    ._build_image("base_image", "docker_tag", [layer_version1])
-
-        handle = m()
-        handle.write.assert_called_with("Dockerfile content")
-        path_patch.assert_called_once_with("cached layers", "dockerfile_uuid")
-        docker_client_mock.images.build.assert_called_once_with(fileobj=tarball_fileobj,
+        docker_client_mock.images.build.assert_called_once_with(fileobj=stream_tarball_patch.return_value,
                                                                 rm=True,
                                                                 tag="docker_tag",
                                                                 pull=False,
                                                                 custom_context=True)
-        docker_full_path_mock.unlink.assert_called_once()
@@ -8,8 +8,10 @@ from unittest import TestCase
 import requests
 
 from mock import Mock
-from docker.errors import APIError, ImageNotFound
+from docker.errors import APIError, ImageNotFound, NotFound
+from samcli.local.lambdafn.timing import track_invoke_timings
 from samcli.local.docker.manager import ContainerManager, DockerImagePullFailedException
+from samcli.local.docker.image_cache import ImageStateCache
 
 
 class TestContainerManager_init(TestCase):
@@ -24,7 +26,7 @@ class TestContainerManager_run(TestCase):
 
     def setUp(self):
         self.mock_docker_client = Mock()
-        self.manager = ContainerManager(docker_client=self.mock_docker_client)
+        self.manager = ContainerManager(docker_client=self.mock_docker_client, image_cache=ImageStateCache())
 
         self.image_name = "image name"
         self.container_mock = Mock()
@@ -155,6 +157,16 @@ class TestContainerManager_run(TestCase):
         # Container should be created
         self.container_mock.create.assert_called_with()
 
+    def test_must_time_phases_of_invocation(self):
+        self.manager.has_image = Mock()
+        self.manager.pull_image = Mock()
+        self.container_mock.is_created.return_value = False
+
+        with track_invoke_timings("function") as timings:
+            self.manager.run(self.container_mock)
+
+        self.assertEquals(set(timings.phases.keys()), {"image_build", "create", "start"})
+
     def test_must_not_create_container_if_it_already_exists(self):
         input_data = "input data"
         self.manager.has_image = Mock()
@@ -169,6 +181,177 @@ class TestContainerManager_run(TestCase):
         self.container_mock.create.assert_not_called()
 
 
+class TestContainerManager_run_image_cache(TestCase):
+
+    def setUp(self):
+        self.now = [100.0]
+        self.image_cache = ImageStateCache(refresh_interval=60, clock=lambda: self.now[0])
+        self.manager = ContainerManager(docker_client=Mock(), image_cache=self.image_cache)
+        self.manager.has_image = Mock(return_value=True)
+        self.manager.pull_image = Mock()
+
+        self.container_mock = Mock()
+        self.container_mock.image = "image name"
+        self.container_mock.is_created.return_value = False
+
+    def test_must_use_shared_cache_by_default(self):
+        self.assertIs(ContainerManager(docker_client=Mock()).image_cache, ImageStateCache.shared())
+
+    def test_must_skip_image_lookup_and_pull_once_cached(self):
+        self.manager.run(self.container_mock)
+        self.manager.run(self.container_mock)
+
+        self.manager.has_image.assert_called_once_with("image name")
+        self.manager.pull_image.assert_called_once_with("image name")
+        self.assertEquals(self.container_mock.start.call_count, 2)
+
+    def test_must_pull_again_after_refresh_interval(self):
+        self.manager.run(self.container_mock)
+        self.now[0] += 60
+        self.manager.run(self.container_mock)
+
+        self.assertEquals(self.manager.has_image.call_count, 2)
+        self.assertEquals(self.manager.pull_image.call_count, 2)
+
+    def test_must_not_retry_failed_pull_of_local_image(self):
+        self.manager.pull_image.side_effect = DockerImagePullFailedException("failed")
+
+        self.manager.run(self.container_mock)
+        self.manager.run(self.container_mock)
+
+        self.manager.pull_image.assert_called_once_with("image name")
+
+    def test_must_not_cache_missing_image(self):
+        self.manager.has_image.return_value = False
+        self.manager.pull_image.side_effect = DockerImagePullFailedException("failed")
+
+        for _ in range(2):
+            with self.assertRaises(DockerImagePullFailedException):
+                self.manager.run(self.container_mock)
+
+        self.assertEquals(self.manager.pull_image.call_count, 2)
+
+    def test_must_cache_skipped_pull(self):
+        self.manager.skip_pull_image = True
+
+        self.manager.run(self.container_mock)
+        self.manager.run(self.container_mock)
+
+        self.manager.has_image.assert_called_once_with("image name")
+        self.manager.pull_image.assert_not_called()
+
+    def test_must_prepare_image_again_if_it_was_removed(self):
+        self.manager.run(self.container_mock)
+        self.container_mock.create.side_effect = [ImageNotFound("gone"), None]
+
+        self.manager.run(self.container_mock)
+
+        self.assertEquals(self.manager.pull_image.call_count, 2)
+        self.assertEquals(self.container_mock.create.call_count, 3)
+        self.assertEquals(self.container_mock.start.call_count, 2)
+
+
+class TestContainerManager_run_warm(TestCase):
+
+    def setUp(self):
+        self.mock_docker_client = Mock()
+        self.warm_pool = Mock()
+        self.manager = ContainerManager(docker_client=self.mock_docker_client,
+                                        docker_network_id="network",
+                                        warm_pool=self.warm_pool,
+                                        image_cache=ImageStateCache())
+        self.manager.has_image = Mock()
+        self.manager.pull_image = Mock()
+
+        self.container_mock = Mock()
+        self.container_mock.image = "image name"
+        self.container_mock.is_created.return_value = False
+        self.container_mock.config_hash.return_value = "hash"
+        self.container_mock.credentials_hash.return_value = "credentials"
+        self.manager._warm_credentials["warmid"] = "credentials"
+
+    def test_must_register_eviction_callback(self):
+        self.manager.remove_container = Mock()
+
+        self.warm_pool.on_evict("warmid")
+
+        self.manager.remove_container.assert_called_with("warmid")
+        self.assertEquals(self.manager._warm_credentials, {})
+
+    def test_must_start_warm_container(self):
+        self.warm_pool.acquire.return_value = "warmid"
+
+        self.manager.run(self.container_mock, warm=True)
+
+        self.assertEquals(self.container_mock.network_id, "network")
+        self.warm_pool.acquire.assert_called_with("hash")
+        self.container_mock.adopt.assert_called_with("warmid")
+        self.container_mock.start.assert_called_with(input_data=None)
+        self.container_mock.create.assert_not_called()
+        self.manager.has_image.assert_not_called()
+        self.manager.pull_image.assert_not_called()
+
+    def test_must_create_container_if_pool_has_none(self):
+        self.warm_pool.acquire.return_value = None
+
+        self.manager.run(self.container_mock, warm=True)
+
+        self.container_mock.adopt.assert_not_called()
+        self.container_mock.create.assert_called_with()
+        self.container_mock.start.assert_called_with(input_data=None)
+
+    def test_must_create_container_if_warm_container_was_removed(self):
+        self.warm_pool.acquire.return_value = "warmid"
+        self.container_mock.start.side_effect = [NotFound("gone"), None]
+
+        self.manager.run(self.container_mock, warm=True)
+
+        self.container_mock.delete.assert_called_with()
+        self.container_mock.create.assert_called_with()
+        self.assertEquals(self.container_mock.start.call_count, 2)
+
+    def test_must_create_container_if_warm_container_fails_to_start(self):
+        self.warm_pool.acquire.return_value = "warmid"
+        self.container_mock.start.side_effect = [APIError("bind source path does not exist"), None]
+
+        self.manager.run(self.container_mock, warm=True)
+
+        self.container_mock.delete.assert_called_with()
+        self.container_mock.create.assert_called_with()
+        self.assertEquals(self.container_mock.start.call_count, 2)
+
+    def test_must_remove_warm_container_with_outdated_credentials(self):
+        self.manager._warm_credentials["oldid"] = "old credentials"
+        self.warm_pool.acquire.side_effect = ["oldid", "warmid"]
+        self.manager.remove_container = Mock()
+
+        self.manager.run(self.container_mock, warm=True)
+
+        self.manager.remove_container.assert_called_once_with("oldid")
+        self.container_mock.adopt.assert_called_with("warmid")
+        self.assertEquals(self.manager._warm_credentials, {})
+
+    def test_must_not_use_pool_if_not_warm(self):
+        self.manager.run(self.container_mock)
+
+        self.warm_pool.acquire.assert_not_called()
+        self.container_mock.create.assert_called_with()
+
+
+class TestContainerManager_prepare(TestCase):
+
+    def test_must_prepare_image_and_network(self):
+        manager = ContainerManager(docker_network_id="network", docker_client=Mock())
+        manager._prepare_image = Mock()
+        container = Mock()
+
+        manager.prepare(container)
+
+        self.assertEquals(container.network_id, "network")
+        manager._prepare_image.assert_called_with(container.image)
+        container.create.assert_not_called()
+
+
 class TestContainerManager_pull_image(TestCase):
 
     def setUp(self):
@@ -274,3 +457,89 @@ class TestContainerManager_stop(TestCase):
 
         manager.stop(container)
         container.delete.assert_called_with()
+
+    def test_must_release_warm_container_to_pool(self):
+        warm_pool = Mock()
+        manager = ContainerManager(docker_client=Mock(), warm_pool=warm_pool)
+        container = Mock()
+        container.id = "someid"
+        container.is_created.return_value = True
+        container.config_hash.return_value = "hash"
+        container.credentials_hash.return_value = "credentials"
+
+        manager.stop(container, warm=True)
+
+        warm_pool.release.assert_called_with("hash", "someid")
+        self.assertEquals(manager._warm_credentials, {"someid": "credentials"})
+        container.delete.assert_not_called()
+        self.assertIsNone(container.id)
+
+    def test_must_delete_warm_container_without_pool(self):
+        manager = ContainerManager(docker_client=Mock())
+        container = Mock()
+
+        manager.stop(container, warm=True)
+
+        container.delete.assert_called_with()
+
+    def test_must_skip_pool_if_container_was_already_deleted(self):
+        warm_pool = Mock()
+        manager = ContainerManager(docker_client=Mock(), warm_pool=warm_pool)
+        container = Mock()
+        container.is_created.return_value = False
+
+        manager.stop(container, warm=True)
+
+        warm_pool.release.assert_not_called()
+        container.delete.assert_called_with()
+
+    def test_must_hand_container_to_reaper(self):
+        reaper = Mock()
+        manager = ContainerManager(docker_client=Mock(), reaper=reaper)
+        container = Mock()
+        container.id = "someid"
+        container.is_created.return_value = True
+
+        manager.stop(container)
+
+        reaper.schedule.assert_called_with("someid")
+        container.delete.assert_not_called()
+        self.assertIsNone(container.id)
+
+    def test_must_not_hand_container_that_was_not_created_to_reaper(self):
+        reaper = Mock()
+        manager = ContainerManager(docker_client=Mock(), reaper=reaper)
+        container = Mock()
+        container.is_created.return_value = False
+
+        manager.stop(container)
+
+        reaper.schedule.assert_not_called()
+        container.delete.assert_called_with()
+
+
+class TestContainerManager_remove_container(TestCase):
+
+    def setUp(self):
+        self.mock_docker_client = Mock()
+        self.manager = ContainerManager(docker_client=self.mock_docker_client)
+
+    def test_must_remove_container(self):
+        self.manager.remove_container("someid")
+
+        self.mock_docker_client.containers.get.assert_called_with("someid")
+        self.mock_docker_client.containers.get.return_value.remove.assert_called_with(force=True)
+
+    def test_must_skip_missing_container(self):
+        self.mock_docker_client.containers.get.side_effect = NotFound("not found")
+
+        self.manager.remove_container("someid")
+
+    def test_must_remove_container_through_reaper(self):
+        reaper = Mock()
+        manager = ContainerManager(docker_client=self.mock_docker_client, reaper=reaper)
+
+        manager.remove_container("someid")
+
+        reaper.schedule.assert_called_with("someid")
+        self.mock_docker_client.containers.get.assert_not_called()
@@ -0,0 +1,137 @@
+"""
+Unit tests for the container reaper
+"""
+
+import os
+import errno
+import threading
+from unittest import TestCase
+
+from mock import Mock, patch, call
+from docker.errors import APIError, NotFound
+
+from samcli.local.docker.reaper import ContainerReaper
+
+
+class TestContainerReaper(TestCase):
+
+    def setUp(self):
+        self.docker_client = Mock()
+        self.sleep = Mock()
+        self.reaper = ContainerReaper(docker_client=self.docker_client, retry_delay=1, sleep=self.sleep)
+
+    def tearDown(self):
+        self.reaper.drain()
+
+    def test_must_use_default_values(self):
+        reaper = ContainerReaper(docker_client=Mock())
+        reaper.drain()
+
+        self.assertEquals(reaper.max_workers, ContainerReaper.DEFAULT_MAX_WORKERS)
+        self.assertEquals(reaper.max_retries, ContainerReaper.DEFAULT_MAX_RETRIES)
+        self.assertEquals(reaper.retry_delay, ContainerReaper.DEFAULT_RETRY_DELAY)
+
+    def test_must_remove_container_in_background(self):
+        removing = threading.Event()
+        proceed = threading.Event()
+
+        def remove(force):
+            removing.set()
+            proceed.wait(5)
+
+        self.docker_client.containers.get.return_value.remove.side_effect = remove
+
+        self.reaper.schedule("someid")
+
+        # schedule returned while the removal is still in progress
+        self.assertTrue(removing.wait(5))
+        proceed.set()
+        self.assertTrue(self.reaper.drain())
+
+        self.docker_client.containers.get.assert_called_with("someid")
+        self.docker_client.containers.get.return_value.remove.assert_called_with(force=True)
+
+    def test_must_remove_synchronously_after_drain(self):
+        self.reaper.drain()
+
+        self.reaper.schedule("someid")
+
+        self.docker_client.containers.get.return_value.remove.assert_called_with(force=True)
+
+    def test_must_retry_failed_removal(self):
+        remove_mock = self.docker_client.containers.get.return_value.remove
+        remove_mock.side_effect = [APIError("busy"), APIError("busy"), None]
+
+        self.assertTrue(self.reaper._remove("someid"))
+
+        self.assertEquals(remove_mock.call_count, 3)
+        self.assertEquals(self.sleep.call_args_list, [call(1), call(2)])
+
+    def test_must_give_up_after_max_retries(self):
+        remove_mock = self.docker_client.containers.get.return_value.remove
+        remove_mock.side_effect = APIError("busy")
+
+        self.assertFalse(self.reaper._remove("someid"))
+
+        self.assertEquals(remove_mock.call_count, ContainerReaper.DEFAULT_MAX_RETRIES + 1)
+
+    def test_must_skip_missing_container(self):
+        self.docker_client.containers.get.side_effect = NotFound("not found")
+
+        self.assertTrue(self.reaper._remove("someid"))
+        self.sleep.assert_not_called()
+
+    def test_must_not_retry_removal_in_progress(self):
+        remove_mock = self.docker_client.containers.get.return_value.remove
+        remove_mock.side_effect = APIError("removal of container someid is already in progress")
+
+        self.assertTrue(self.reaper._remove("someid"))
+        remove_mock.assert_called_once_with(force=True)
+
+    @patch("samcli.local.docker.reaper.get_host_id")
+    @patch("samcli.local.docker.reaper.ContainerReaper._is_process_running")
+    def test_must_remove_orphans(self, is_process_running_mock, get_host_id_mock):
+        get_host_id_mock.return_value = "hostid"
+        orphan = Mock(id="orphan", labels={"sam.cli.pid": "1"})
+        alive = Mock(id="alive", labels={"sam.cli.pid": "2"})
+        self.docker_client.containers.list.return_value = [orphan, alive]
+        is_process_running_mock.side_effect = lambda pid: pid == "2"
+
+        self.assertEquals(self.reaper.remove_orphans(), ["orphan"])
+        self.reaper.drain()
+
+        self.docker_client.containers.list.assert_called_with(all=True, filters={
+            "label": ["sam.cli.container", "sam.cli.host=hostid"],
+            "status": ["created", "exited"]
+        })
+        self.docker_client.containers.get.assert_called_once_with("orphan")
+
+    def test_must_ignore_failure_to_list_containers(self):
+        self.docker_client.containers.list.side_effect = APIError("error")
+
+        self.assertEquals(self.reaper.remove_orphans(), [])
+
+
+class TestContainerReaper_is_process_running(TestCase):
+
+    def test_must_treat_invalid_pid_as_not_running(self):
+        self.assertFalse(ContainerReaper._is_process_running(None))
+        self.assertFalse(ContainerReaper._is_process_running("abc"))
+
+    def test_must_treat_current_process_as_running(self):
+        self.assertTrue(ContainerReaper._is_process_running(str(os.getpid())))
+
+    @patch("samcli.local.docker.reaper.os")
+    def test_must_probe_process(self, os_mock):
+        os_mock.getpid.return_value = 1
+        os_mock.name = "posix"
+
+        os_mock.kill.side_effect = OSError(errno.ESRCH, "No such process")
+        self.assertFalse(ContainerReaper._is_process_running("123"))
+
+        os_mock.kill.side_effect = OSError(errno.EPERM, "Operation not permitted")
+        self.assertTrue(ContainerReaper._is_process_running("123"))
+
+        os_mock.kill.side_effect = None
+        self.assertTrue(ContainerReaper._is_process_running("123"))
+        os_mock.kill.assert_called_with(123, 0)
@@ -0,0 +1,117 @@
+import time
+import socket
+from unittest import TestCase
+
+from mock import Mock
+from docker.errors import APIError
+
+from samcli.local.docker.stats import ResourceUsage, ContainerStatsSampler
+
+MB = 1024 * 1024
+
+
+def _v1_sample(usage, max_usage, rss, cpu_ns):
+    return {
+        "memory_stats": {"usage": usage, "max_usage": max_usage, "stats": {"rss": rss}},
+        "cpu_stats": {"cpu_usage": {"total_usage": cpu_ns}}
+    }
+
+
+class TestResourceUsage(TestCase):
+
+    def test_must_track_peaks_of_cgroup_v1_samples(self):
+        usage = ResourceUsage()
+
+        usage.add_sample(_v1_sample(40 * MB, 60 * MB, 30 * MB, 500000000))
+        usage.add_sample(_v1_sample(20 * MB, 64 * MB, 10 * MB, 1250000000))
+
+        self.assertEquals(usage.to_dict(), {
+            "samples": 2,
+            "max_memory_used_mb": 64,
+            "peak_rss_mb": 30,
+            "cpu_seconds": 1.25
+        })
+
+    def test_must_track_peaks_of_cgroup_v2_samples(self):
+        usage = ResourceUsage()
+
+        usage.add_sample({"memory_stats": {"usage": 50 * MB, "stats": {"anon": 45 * MB}},
+                          "cpu_stats": {"cpu_usage": {"total_usage": 100000000}}})
+        usage.add_sample({"memory_stats": {"usage": 30 * MB, "stats": {"anon": 25 * MB}},
+                          "cpu_stats": {"cpu_usage": {"total_usage": 200000000}}})
+
+        self.assertEquals(usage.max_memory_bytes, 50 * MB)
+        self.assertEquals(usage.peak_rss_bytes, 45 * MB)
+        self.assertAlmostEqual(usage.cpu_seconds, 0.2)
+
+    def test_must_ignore_samples_of_stopped_container(self):
+        usage = ResourceUsage()
+
+        usage.add_sample({"memory_stats": {}, "cpu_stats": {"cpu_usage": {}}})
+
+        self.assertEquals(usage.samples, 0)
+
+
+class TestContainerStatsSampler(TestCase):
+
+    def setUp(self):
+        self.docker_client = Mock()
+        self.api = self.docker_client.api
+        self.api._url.return_value = "url"
+        self.response = self.api._get.return_value
+
+    def test_must_sample_until_stream_ends(self):
+        self.api._stream_helper.return_value = iter([_v1_sample(10 * MB, 12 * MB, 8 * MB, 10 ** 9)])
+
+        sampler = ContainerStatsSampler("container-id", self.docker_client)
+        sampler._sample()
+        usage = sampler.stop()
+
+        self.api._url.assert_called_with("/containers/{0}/stats", "container-id")
+        self.api._get.assert_called_with("url", stream=True)
+        self.api._stream_helper.assert_called_with(self.response, decode=True)
+        self.response.close.assert_called_with()
+        self.assertEquals(usage.max_memory_bytes, 12 * MB)
+        self.assertEquals(usage.cpu_seconds, 1.0)
+
+    def test_must_return_none_without_samples(self):
+        self.api._raise_for_status.side_effect = APIError("container is gone")
+
+        sampler = ContainerStatsSampler("container-id", self.docker_client)
+        sampler._sample()
+
+        self.assertIsNone(sampler.stop())
+
+    def test_stop_must_abort_blocked_stream(self):
+        reader, writer = socket.socketpair()
+        self.addCleanup(reader.close)
+        self.addCleanup(writer.close)
+
+        def read_forever(response, decode):
+            while reader.recv(1024):
+                pass
+            return iter([])
+
+        self.api._stream_helper.side_effect = read_forever
+        self.api._get_raw_response_socket.return_value = reader
+
+        sampler = ContainerStatsSampler("container-id", self.docker_client)
+        sampler.start()
+        while sampler._response is None:
+            time.sleep(0.001)
+
+        start = time.time()
+        self.assertIsNone(sampler.stop())
+        self.assertLess(time.time() - start, 1)
+
+        sampler._thread.join(5)
+        self.assertFalse(sampler._thread.is_alive())
+        self.api._get_raw_response_socket.assert_called_with(self.response)
+
+    def test_must_not_read_stream_if_stopped_before_it_opened(self):
+        sampler = ContainerStatsSampler("container-id", self.docker_client)
+        sampler.stop()
+        sampler._sample()
+
+        self.api._stream_helper.assert_not_called()
+        self.response.close.assert_called_with()
@@ -7,7 +7,8 @@ from unittest import TestCase
 
 from mock import patch
 
-from samcli.local.docker.utils import to_posix_path
+from samcli.local.docker import utils
+from samcli.local.docker.utils import to_posix_path, get_host_id
 
 
 class TestUtils(TestCase):
@@ -26,3 +27,29 @@ class TestUtils(TestCase):
     def test_do_not_convert_posix_path(self, mock_os):
         mock_os.name = "posix"
         self.assertEquals(self.current_working_dir, to_posix_path(self.current_working_dir))
+
+
+class TestGetHostId(TestCase):
+
+    def setUp(self):
+        utils._HOST_ID = None
+
+    def tearDown(self):
+        utils._HOST_ID = None
+
+    @patch("samcli.local.docker.utils.socket.gethostname")
+    def test_must_differ_between_hosts(self, gethostname_mock):
+        gethostname_mock.return_value = "host1"
+        first = get_host_id()
+
+        utils._HOST_ID = None
+        gethostname_mock.return_value = "host2"
+
+        self.assertNotEquals(get_host_id(), first)
+
+    @patch("samcli.local.docker.utils.socket.gethostname")
+    def test_must_be_computed_once(self, gethostname_mock):
+        gethostname_mock.return_value = "host"
+
+        self.assertEquals(get_host_id(), get_host_id())
+        gethostname_mock.assert_called_once_with()
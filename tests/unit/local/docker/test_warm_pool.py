@@ -0,0 +1,112 @@
+"""
+Unit tests for the warm container pool
+"""
+
+from unittest import TestCase
+from mock import Mock, call
+
+from samcli.local.docker.warm_pool import WarmContainerPool
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestWarmContainerPool(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.on_evict = Mock()
+        self.pool = WarmContainerPool(max_size=3, idle_ttl=60, on_evict=self.on_evict, clock=self.clock)
+        self.pool._start_reaper = Mock()
+
+    def test_must_use_default_values(self):
+        pool = WarmContainerPool()
+
+        self.assertEquals(pool.max_size, WarmContainerPool.DEFAULT_MAX_SIZE)
+        self.assertEquals(pool.idle_ttl, WarmContainerPool.DEFAULT_IDLE_TTL)
+
+    def test_must_return_none_when_empty(self):
+        self.assertIsNone(self.pool.acquire("key"))
+
+    def test_must_acquire_released_item_with_same_key(self):
+        self.pool.release("key", "container1")
+
+        self.assertIsNone(self.pool.acquire("otherkey"))
+        self.assertEquals(self.pool.acquire("key"), "container1")
+        self.assertIsNone(self.pool.acquire("key"))
+        self.on_evict.assert_not_called()
+
+    def test_must_acquire_most_recently_released_first(self):
+        self.pool.release("key", "container1")
+        self.pool.release("key", "container2")
+
+        self.assertEquals(self.pool.acquire("key"), "container2")
+        self.assertEquals(self.pool.acquire("key"), "container1")
+
+    def test_must_evict_least_recently_released_when_full(self):
+        for index in range(4):
+            self.pool.release("key{}".format(index), "container{}".format(index))
+
+        self.on_evict.assert_called_once_with("container0")
+        self.assertEquals(len(self.pool), 3)
+        self.assertIsNone(self.pool.acquire("key0"))
+
+    def test_must_evict_expired_items(self):
+        self.pool.release("key", "container1")
+        self.clock.now += 30
+        self.pool.release("key", "container2")
+        self.clock.now += 31
+
+        self.pool.evict_expired()
+
+        self.on_evict.assert_called_once_with("container1")
+        self.assertEquals(self.pool.acquire("key"), "container2")
+
+    def test_must_not_return_expired_item(self):
+        self.pool.release("key", "container1")
+        self.clock.now += 61
+
+        self.assertIsNone(self.pool.acquire("key"))
+        self.on_evict.assert_called_once_with("container1")
+
+    def test_must_evict_everything_on_drain(self):
+        self.pool.release("key1", "container1")
+        self.pool.release("key2", "container2")
+
+        self.pool.drain()
+
+        self.on_evict.assert_has_calls([call("container1"), call("container2")])
+        self.assertEquals(len(self.pool), 0)
+
+    def test_must_not_keep_items_after_drain(self):
+        self.pool.drain()
+        self.pool.release("key", "container1")
+
+        self.on_evict.assert_called_once_with("container1")
+        self.assertEquals(len(self.pool), 0)
+
+    def test_must_not_keep_items_if_max_size_is_zero(self):
+        pool = WarmContainerPool(max_size=0, on_evict=self.on_evict)
+
+        pool.release("key", "container1")
+
+        self.on_evict.assert_called_once_with("container1")
+
+    def test_must_ignore_eviction_failures(self):
+        self.on_evict.side_effect = ValueError("failed")
+        self.pool.release("key", "container1")
+
+        self.pool.drain()
+
+        self.on_evict.assert_called_once_with("container1")
+
+    def test_must_start_reaper_on_release(self):
+        self.pool.release("key", "container1")
+
+        self.pool._start_reaper.assert_called_once_with()
@@ -31,6 +31,18 @@ class TestLambdaErrorResponses(TestCase):
             {'x-amzn-errortype': 'InvalidRequestContent', 'Content-Type': 'application/json'},
             400)
 
+    @patch('samcli.local.services.base_local_service.BaseLocalService.service_response')
+    def test_too_many_requests(self, service_response_mock):
+        service_response_mock.return_value = "TooManyRequests"
+
+        response = LambdaErrorResponses.too_many_requests('Rate Exceeded')
+
+        self.assertEquals(response, 'TooManyRequests')
+        service_response_mock.assert_called_once_with(
+            '{"Type": "User", "Message": "Rate Exceeded"}',
+            {'x-amzn-errortype': 'TooManyRequests', 'Content-Type': 'application/json'},
+            429)
+
     @patch('samcli.local.services.base_local_service.BaseLocalService.service_response')
     def test_unsupported_media_type(self, service_response_mock):
         service_response_mock.return_value = "UnsupportedMediaType"
@@ -2,7 +2,7 @@ from unittest import TestCase
 from mock import Mock, patch, ANY, call
 
 from samcli.local.lambda_service.local_lambda_invoke_service import LocalLambdaInvokeService
-from samcli.local.lambdafn.exceptions import FunctionNotFound
+from samcli.local.lambdafn.exceptions import FunctionNotFound, TooManyRequests
 
 
 class TestLocalLambdaService(TestCase):
@@ -80,6 +80,22 @@ class TestLocalLambdaService(TestCase):
 
         lambda_error_responses_mock.resource_not_found.assert_called_once_with('NotFound')
 
+    @patch('samcli.local.lambda_service.local_lambda_invoke_service.LambdaErrorResponses')
+    @patch('samcli.local.lambda_service.local_lambda_invoke_service.request')
+    def test_invoke_request_handler_when_throttled(self, request_mock, lambda_error_responses_mock):
+        request_mock.get_data.return_value = b'{}'
+        lambda_runner_mock = Mock()
+        lambda_runner_mock.invoke.side_effect = TooManyRequests("Rate Exceeded")
+
+        lambda_error_responses_mock.too_many_requests.return_value = "Throttled"
+
+        service = LocalLambdaInvokeService(lambda_runner=lambda_runner_mock, port=3000, host='localhost')
+
+        response = service._invoke_request_handler(function_name='HelloWorld')
+
+        self.assertEquals(response, "Throttled")
+        lambda_error_responses_mock.too_many_requests.assert_called_once_with("Rate Exceeded")
+
     @patch('samcli.local.lambda_service.local_lambda_invoke_service.LocalLambdaInvokeService.service_response')
     @patch('samcli.local.lambda_service.local_lambda_invoke_service.LambdaOutputParser')
     @patch('samcli.local.lambda_service.local_lambda_invoke_service.request')
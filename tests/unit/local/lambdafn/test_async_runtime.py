@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from collections import namedtuple
+from unittest import TestCase, skipIf
+
+from mock import Mock, MagicMock, patch
+
+from samcli.local.lambdafn.config import FunctionConfig
+
+try:
+    import asyncio
+    from mock import AsyncMock
+    from samcli.local.lambdafn.async_runtime import AsyncLambdaRuntime
+except (ImportError, SyntaxError):
+    AsyncLambdaRuntime = None
+
+Message = namedtuple("Message", ["stream", "data"])
+
+
+@skipIf(AsyncLambdaRuntime is None, "Requires Python 3 and aiodocker")
+class TestAsyncLambdaRuntime_invoke_async(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.code_dir = tempfile.mkdtemp()
+
+        self.container_manager = Mock()
+        self.image_builder = Mock()
+
+        self.stream = Mock()
+        self.stream.read_out = AsyncMock(side_effect=[Message(1, b"response"), Message(2, b"logs"), None])
+
+        self.real_container = Mock()
+        self.real_container.start = AsyncMock()
+        self.real_container.delete = AsyncMock()
+        self.real_container.attach.return_value = MagicMock()
+        self.real_container.attach.return_value.__aenter__.return_value = self.stream
+
+        self.docker = Mock()
+        self.docker.containers.create = AsyncMock(return_value=self.real_container)
+
+        self.runtime = AsyncLambdaRuntime(self.container_manager, self.image_builder, docker=self.docker)
+
+        self.function_config = FunctionConfig("name", "python3.7", "app.handler", self.code_dir, [], timeout=3)
+        self.function_config.env_vars = Mock()
+        self.function_config.env_vars.resolve.return_value = {"AWS_LAMBDA_EVENT_BODY": "event"}
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.code_dir)
+
+    @patch("samcli.local.lambdafn.async_runtime.LambdaContainer")
+    def test_must_run_container_through_docker_api(self, LambdaContainerMock):
+        container = LambdaContainerMock.return_value
+        stdout = Mock()
+        stderr = Mock()
+
+        self.loop.run_until_complete(self.runtime.invoke_async(self.function_config, "event", stdout, stderr))
+
+        LambdaContainerMock.assert_called_with("python3.7", "app.handler", self.code_dir, [], self.image_builder,
+                                               memory_mb=128, env_vars={"AWS_LAMBDA_EVENT_BODY": "event"})
+        self.function_config.env_vars.add_lambda_event_body.assert_called_with("event")
+        self.container_manager.prepare.assert_called_with(container)
+
+        self.docker.containers.create.assert_called_with(container.api_config.return_value)
+        self.real_container.attach.assert_called_with(stdout=True, stderr=True, logs=False)
+        self.real_container.start.assert_called_with()
+        self.real_container.delete.assert_called_with(force=True)
+
+        stdout.write.assert_called_with(b"response")
+        stderr.write.assert_called_with(b"logs")
+
+    @patch("samcli.local.lambdafn.async_runtime.LambdaContainer")
+    def test_must_remove_container_of_function_that_timed_out(self, LambdaContainerMock):
+        self.function_config.timeout = 0.01
+        self.stream.read_out = AsyncMock(side_effect=asyncio.Event().wait)
+
+        self.loop.run_until_complete(self.runtime.invoke_async(self.function_config, "event", Mock(), Mock()))
+
+        self.real_container.delete.assert_called_with(force=True)
+
+    @patch("samcli.local.lambdafn.async_runtime.LambdaContainer")
+    def test_must_remove_container_if_it_fails_to_start(self, LambdaContainerMock):
+        self.real_container.start.side_effect = RuntimeError("failed")
+
+        with self.assertRaises(RuntimeError):
+            self.loop.run_until_complete(self.runtime.invoke_async(self.function_config, "event"))
+
+        self.real_container.delete.assert_called_with(force=True)
+
+    def test_close_must_close_docker_client(self):
+        self.docker.close = AsyncMock()
+
+        self.loop.run_until_complete(self.runtime.close())
+
+        self.docker.close.assert_called_with()
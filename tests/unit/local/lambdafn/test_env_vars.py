@@ -4,6 +4,7 @@ Test for environment variable handling
 
 from parameterized import parameterized, param
 from unittest import TestCase
+from mock import patch
 from samcli.local.lambdafn.env_vars import EnvironmentVariables
 
 
@@ -342,3 +343,52 @@ class TestEnvironmentVariables_add_lambda_event_body(TestCase):
         environ.add_lambda_event_body(value)
 
         self.assertEquals(environ.variables.get("AWS_LAMBDA_EVENT_BODY"), value)
+
+
+class TestEnvironmentVariables_add_lambda_event_stdin(TestCase):
+
+    def test_must_replace_event_body_with_stdin_flag(self):
+        environ = EnvironmentVariables(variables={"AWS_LAMBDA_EVENT_BODY": "foobar"})
+        environ.add_lambda_event_stdin()
+
+        self.assertNotIn("AWS_LAMBDA_EVENT_BODY", environ.variables)
+        self.assertEquals(environ.variables.get("DOCKER_LAMBDA_USE_STDIN"), "1")
+
+
+class TestEnvironmentVariables_copy(TestCase):
+
+    def setUp(self):
+        self.environ = EnvironmentVariables(1024, 10, "handler",
+                                            variables={"a": "default", "b": 1},
+                                            shell_env_values={"a": "shell"},
+                                            aws_creds={"key": "key"})
+
+    def test_must_resolve_variables_once(self):
+        self.environ.resolve()
+
+        with patch.object(self.environ, "_stringify_value") as stringify_mock:
+            copy = self.environ.copy(aws_creds={"key": "otherkey"})
+            result = copy.resolve()
+
+        stringify_mock.assert_not_called()
+        self.assertEquals(result["a"], "shell")
+        self.assertEquals(result["b"], "1")
+        self.assertEquals(result["AWS_ACCESS_KEY_ID"], "otherkey")
+
+    def test_values_added_to_copy_must_not_change_original(self):
+        copy = self.environ.copy()
+        copy.add_lambda_event_body("event")
+
+        self.assertEquals(copy.resolve()["AWS_LAMBDA_EVENT_BODY"], "event")
+        self.assertEquals(copy.resolve()["AWS_ACCESS_KEY_ID"], "key")
+        self.assertNotIn("AWS_LAMBDA_EVENT_BODY", self.environ.resolve())
+
+    def test_must_switch_resolved_event_body_to_stdin(self):
+        copy = self.environ.copy()
+        copy.add_lambda_event_body("event")
+        copy.resolve()
+
+        copy.add_lambda_event_stdin()
+
+        self.assertNotIn("AWS_LAMBDA_EVENT_BODY", copy.resolve())
+        self.assertEquals(copy.resolve()["DOCKER_LAMBDA_USE_STDIN"], "1")
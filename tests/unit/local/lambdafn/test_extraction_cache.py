@@ -0,0 +1,186 @@
+"""
+Unit tests for the code extraction cache
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+from mock import Mock, ANY
+
+from samcli.local.lambdafn.extraction_cache import ExtractionCache
+
+
+class TestExtractionCache(TestCase):
+
+    def setUp(self):
+        self.archives_dir = tempfile.mkdtemp()
+        self.extract = Mock(side_effect=self.fake_extract)
+        self.cache = ExtractionCache(max_size=100, extract=self.extract)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.archives_dir)
+
+    @staticmethod
+    def fake_extract(archive_path, output_dir):
+        # The "archive" just holds the content of a single file
+        with open(archive_path, "rb") as archive:
+            content = archive.read()
+        with open(os.path.join(output_dir, "file"), "wb") as extracted:
+            extracted.write(content)
+
+    def make_archive(self, name, content, mtime=None):
+        path = os.path.join(self.archives_dir, name)
+        with open(path, "wb") as archive:
+            archive.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    @staticmethod
+    def read(directory):
+        with open(os.path.join(directory, "file"), "rb") as extracted:
+            return extracted.read()
+
+    def test_must_extract_archive(self):
+        archive = self.make_archive("code.zip", b"hello")
+
+        directory = self.cache.acquire(archive)
+
+        self.assertEquals(self.read(directory), b"hello")
+        self.assertEquals(os.path.dirname(directory), self.cache.cache_dir)
+        self.assertEquals(self.cache.stats(), {"hits": 0, "misses": 1, "evictions": 0, "invalidations": 0,
+                                               "entries": 1, "bytes": 5})
+
+    def test_must_reuse_extracted_archive(self):
+        archive = self.make_archive("code.zip", b"hello")
+
+        first = self.cache.acquire(archive)
+        self.cache.release(first)
+        second = self.cache.acquire(archive)
+
+        self.assertEquals(first, second)
+        self.extract.assert_called_once_with(os.path.realpath(archive), ANY)
+        self.assertEquals(self.cache.stats()["hits"], 1)
+
+    def test_must_share_directory_of_archives_with_same_content(self):
+        first = self.cache.acquire(self.make_archive("one.zip", b"hello"))
+        second = self.cache.acquire(self.make_archive("two.zip", b"hello"))
+
+        self.assertEquals(first, second)
+        self.assertEquals(self.extract.call_count, 1)
+
+    def test_must_extract_changed_archive_again(self):
+        archive = self.make_archive("code.zip", b"hello", mtime=1000)
+        old_directory = self.cache.acquire(archive)
+        self.cache.release(old_directory)
+
+        self.make_archive("code.zip", b"world", mtime=2000)
+        new_directory = self.cache.acquire(archive)
+
+        self.assertNotEquals(old_directory, new_directory)
+        self.assertEquals(self.read(new_directory), b"world")
+        self.assertFalse(os.path.exists(old_directory))
+        self.assertEquals(self.cache.stats()["invalidations"], 1)
+
+    def test_must_keep_changed_archive_while_in_use(self):
+        archive = self.make_archive("code.zip", b"hello", mtime=1000)
+        old_directory = self.cache.acquire(archive)
+
+        self.make_archive("code.zip", b"world", mtime=2000)
+        self.cache.acquire(archive)
+
+        self.assertEquals(self.read(old_directory), b"hello")
+
+        self.cache.release(old_directory)
+        self.assertFalse(os.path.exists(old_directory))
+
+    def test_must_not_hash_unchanged_archive_again(self):
+        archive = self.make_archive("code.zip", b"hello", mtime=1000)
+        directory = self.cache.acquire(archive)
+        self.cache.release(directory)
+
+        # Same size and modification time. The content is assumed to be the same
+        self.make_archive("code.zip", b"jello", mtime=1000)
+
+        self.assertEquals(self.cache.acquire(archive), directory)
+
+    def test_must_evict_least_recently_used(self):
+        first = self.cache.acquire(self.make_archive("one.zip", b"a" * 40))
+        second = self.cache.acquire(self.make_archive("two.zip", b"b" * 40))
+        self.cache.release(first)
+        self.cache.release(second)
+
+        # Use the first one again, the second one is now the least recently used
+        self.cache.release(self.cache.acquire(self.make_archive("one.zip", b"a" * 40)))
+        self.cache.acquire(self.make_archive("three.zip", b"c" * 40))
+
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+        self.assertEquals(self.cache.stats()["evictions"], 1)
+
+    def test_must_not_evict_directories_in_use(self):
+        first = self.cache.acquire(self.make_archive("one.zip", b"a" * 80))
+        second = self.cache.acquire(self.make_archive("two.zip", b"b" * 80))
+
+        self.assertTrue(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+
+        self.cache.release(first)
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+
+    def test_must_extract_once_for_concurrent_invocations(self):
+        archive = self.make_archive("code.zip", b"hello")
+        extracting = threading.Event()
+        proceed = threading.Event()
+
+        def slow_extract(archive_path, output_dir):
+            extracting.set()
+            proceed.wait(5)
+            self.fake_extract(archive_path, output_dir)
+
+        self.extract.side_effect = slow_extract
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(self.cache.acquire(archive))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+
+        self.assertTrue(extracting.wait(5))
+        proceed.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEquals(len(set(results)), 1)
+        self.assertEquals(len(results), 3)
+        self.extract.assert_called_once()
+
+    def test_must_clean_up_failed_extraction(self):
+        self.extract.side_effect = ValueError("corrupt archive")
+
+        with self.assertRaises(ValueError):
+            self.cache.acquire(self.make_archive("code.zip", b"hello"))
+
+        self.assertEquals(os.listdir(self.cache.cache_dir), [])
+
+    def test_must_delete_cache_dir_on_close(self):
+        self.cache.acquire(self.make_archive("code.zip", b"hello"))
+
+        self.cache.close()
+
+        self.assertFalse(os.path.exists(self.cache.cache_dir))
+
+    def test_must_keep_given_cache_dir_on_close(self):
+        cache_dir = os.path.join(self.archives_dir, "cache")
+        os.mkdir(cache_dir)
+        cache = ExtractionCache(cache_dir=cache_dir, extract=self.extract)
+        directory = cache.acquire(self.make_archive("code.zip", b"hello"))
+
+        cache.close()
+
+        self.assertTrue(os.path.exists(cache_dir))
+        self.assertFalse(os.path.exists(directory))
@@ -6,8 +6,9 @@ from unittest import TestCase
 from mock import Mock, patch, MagicMock, ANY
 from parameterized import parameterized
 
-from samcli.local.lambdafn.runtime import LambdaRuntime, _unzip_file
+from samcli.local.lambdafn.runtime import LambdaRuntime, PersistentLambdaRuntime, _RuntimeEnvironment, _unzip_file
 from samcli.local.lambdafn.config import FunctionConfig
+from samcli.local.lambdafn.timing import track_invoke_timings
 
 
 class LambdaRuntime_invoke(TestCase):
@@ -72,16 +73,44 @@ class LambdaRuntime_invoke(TestCase):
         # Make sure the container is created with proper values
         LambdaContainerMock.assert_called_with(self.lang, self.handler, code_dir, self.layers, lambda_image_mock,
                                                memory_mb=self.DEFAULT_MEMORY, env_vars=self.env_var_value,
-                                               debug_options=debug_options)
+                                               debug_options=debug_options, stdin_open=False)
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=None, warm=False)
         self.runtime._configure_interrupt.assert_called_with(self.name, self.DEFAULT_TIMEOUT, container, True)
         container.wait_for_logs.assert_called_with(stdout=stdout, stderr=stderr)
 
         # Finally block
         timer.cancel.assert_called_with()
-        self.manager_mock.stop.assert_called_with(container)
+        self.manager_mock.stop.assert_called_with(container, warm=False)
+
+    @patch("samcli.local.lambdafn.runtime.ContainerStatsSampler")
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_sample_container_stats_of_timed_invocation(self, LambdaContainerMock, SamplerMock):
+        container = Mock()
+        LambdaContainerMock.return_value = container
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), timeout_scheduler=Mock())
+        self.runtime._get_code_dir = MagicMock()
+
+        with track_invoke_timings(self.name) as timings:
+            self.runtime.invoke(self.func_config, "event")
+
+        SamplerMock.assert_called_with(container.id, container.docker_client)
+        SamplerMock.return_value.start.assert_called_with()
+        self.assertEquals(timings.resource_usage, SamplerMock.return_value.stop.return_value)
+        self.assertIn("run", timings.phases)
+        self.assertIn("delete", timings.phases)
+
+    @patch("samcli.local.lambdafn.runtime.ContainerStatsSampler")
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_not_sample_container_stats_if_not_timed(self, LambdaContainerMock, SamplerMock):
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), timeout_scheduler=Mock())
+        self.runtime._get_code_dir = MagicMock()
+
+        self.runtime.invoke(self.func_config, "event")
+
+        SamplerMock.assert_not_called()
 
     @patch("samcli.local.lambdafn.runtime.LambdaContainer")
     def test_exception_from_run_must_trigger_cleanup(self, LambdaContainerMock):
@@ -113,7 +142,7 @@ class LambdaRuntime_invoke(TestCase):
                                 stderr=stderr)
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=None, warm=False)
 
         self.runtime._configure_interrupt.assert_not_called()
 
@@ -121,7 +150,7 @@ class LambdaRuntime_invoke(TestCase):
         # But timer was not yet created. It should not be called
         timer.cancel.assert_not_called()
         # In any case, stop the container
-        self.manager_mock.stop.assert_called_with(container)
+        self.manager_mock.stop.assert_called_with(container, warm=False)
 
     @patch("samcli.local.lambdafn.runtime.LambdaContainer")
     def test_exception_from_wait_for_logs_must_trigger_cleanup(self, LambdaContainerMock):
@@ -154,7 +183,7 @@ class LambdaRuntime_invoke(TestCase):
                                 stderr=stderr)
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=None, warm=False)
 
         self.runtime._configure_interrupt.assert_called_with(self.name, self.DEFAULT_TIMEOUT, container, True)
 
@@ -162,7 +191,7 @@ class LambdaRuntime_invoke(TestCase):
         # Timer was created. So it must be cancelled
         timer.cancel.assert_called_with()
         # In any case, stop the container
-        self.manager_mock.stop.assert_called_with(container)
+        self.manager_mock.stop.assert_called_with(container, warm=False)
 
     @patch("samcli.local.lambdafn.runtime.LambdaContainer")
     def test_keyboard_interrupt_must_not_raise(self, LambdaContainerMock):
@@ -190,12 +219,141 @@ class LambdaRuntime_invoke(TestCase):
                             stderr=stderr)
 
         # Run the container and get results
-        self.manager_mock.run.assert_called_with(container)
+        self.manager_mock.run.assert_called_with(container, input_data=None, warm=False)
 
         self.runtime._configure_interrupt.assert_not_called()
 
         # Finally block must be called
-        self.manager_mock.stop.assert_called_with(container)
+        self.manager_mock.stop.assert_called_with(container, warm=False)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_return_completed_container_to_warm_pool(self, LambdaContainerMock):
+        container = Mock()
+        LambdaContainerMock.return_value = container
+
+        self.manager_mock.docker_client.api.base_url = "http+docker://localhost"
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), warm_containers=True)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, "event")
+
+        self.manager_mock.run.assert_called_with(container, input_data=b"event", warm=True)
+        self.manager_mock.stop.assert_called_with(container, warm=True)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_not_return_failed_container_to_warm_pool(self, LambdaContainerMock):
+        container = Mock()
+        container.wait_for_logs.side_effect = ValueError("some exception")
+        LambdaContainerMock.return_value = container
+
+        self.manager_mock.docker_client.api.base_url = "http+docker://localhost"
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), warm_containers=True)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        with self.assertRaises(ValueError):
+            self.runtime.invoke(self.func_config, "event")
+
+        self.manager_mock.run.assert_called_with(container, input_data=b"event", warm=True)
+        self.manager_mock.stop.assert_called_with(container, warm=False)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_not_use_warm_containers_when_debugging(self, LambdaContainerMock):
+        container = Mock()
+        LambdaContainerMock.return_value = container
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), warm_containers=True)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, "event", debug_context=Mock())
+
+        self.manager_mock.run.assert_called_with(container, input_data=None, warm=False)
+        self.manager_mock.stop.assert_called_with(container, warm=False)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_stream_large_event_through_stdin(self, LambdaContainerMock):
+        event = "x" * (LambdaRuntime.EVENT_ENV_VAR_MAX_SIZE + 1)
+        container = Mock()
+        LambdaContainerMock.return_value = container
+        self.manager_mock.docker_client.api.base_url = "http+docker://localhost"
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock())
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, event)
+
+        self.env_vars.add_lambda_event_stdin.assert_called_with()
+        self.env_vars.add_lambda_event_body.assert_not_called()
+        self.assertTrue(LambdaContainerMock.call_args[1]["stdin_open"])
+        self.manager_mock.run.assert_called_with(container, input_data=event.encode("utf-8"), warm=False)
+
+    @parameterized.expand([
+        ("small event", "x" * LambdaRuntime.EVENT_ENV_VAR_MAX_SIZE, "http+docker://localhost"),
+        ("named pipe", "x" * (LambdaRuntime.EVENT_ENV_VAR_MAX_SIZE + 1), "http+docker://localnpipe"),
+    ])
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_pass_event_in_environment(self, _, event, base_url, LambdaContainerMock):
+        container = Mock()
+        LambdaContainerMock.return_value = container
+        self.manager_mock.docker_client.api.base_url = base_url
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock())
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, event)
+
+        self.env_vars.add_lambda_event_body.assert_called_with(event)
+        self.env_vars.add_lambda_event_stdin.assert_not_called()
+        self.manager_mock.run.assert_called_with(container, input_data=None, warm=False)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_stream_small_event_to_warm_container_through_stdin(self, LambdaContainerMock):
+        container = Mock()
+        LambdaContainerMock.return_value = container
+        self.manager_mock.docker_client.api.base_url = "http+docker://localhost"
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), warm_containers=True)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, "event")
+
+        self.env_vars.add_lambda_event_stdin.assert_called_with()
+        self.env_vars.add_lambda_event_body.assert_not_called()
+        self.manager_mock.run.assert_called_with(container, input_data=b"event", warm=True)
+
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_not_use_warm_containers_without_stdin(self, LambdaContainerMock):
+        container = Mock()
+        LambdaContainerMock.return_value = container
+        self.manager_mock.docker_client.api.base_url = "http+docker://localnpipe"
+
+        self.runtime = LambdaRuntime(self.manager_mock, Mock(), warm_containers=True)
+        self.runtime._get_code_dir = MagicMock()
+        self.runtime._configure_interrupt = Mock()
+
+        self.runtime.invoke(self.func_config, "event")
+
+        self.env_vars.add_lambda_event_body.assert_called_with("event")
+        self.manager_mock.run.assert_called_with(container, input_data=None, warm=False)
+        self.manager_mock.stop.assert_called_with(container, warm=False)
+
+
+class TestLambdaRuntime_prewarm(TestCase):
+
+    def test_must_build_image(self):
+        image_builder_mock = Mock()
+        runtime = LambdaRuntime(Mock(), image_builder_mock)
+
+        runtime.prewarm(FunctionConfig("name", "python3.6", "handler", "code-path", ["layer"]), 2)
+
+        image_builder_mock.build.assert_called_with("python3.6", ["layer"])
 
 
 class TestLambdaRuntime_configure_interrupt(TestCase):
@@ -207,27 +365,25 @@ class TestLambdaRuntime_configure_interrupt(TestCase):
 
         self.manager_mock = Mock()
         self.layer_downloader = Mock()
-        self.runtime = LambdaRuntime(self.manager_mock, self.layer_downloader)
+        self.scheduler_mock = Mock()
+        self.runtime = LambdaRuntime(self.manager_mock, self.layer_downloader, timeout_scheduler=self.scheduler_mock)
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_must_setup_timer(self, SignalMock, ThreadingMock):
+    def test_must_setup_timer(self, SignalMock):
         is_debugging = False  # We are not debugging. So setup timer
         timer_obj = Mock()
-        ThreadingMock.Timer.return_value = timer_obj
+        self.scheduler_mock.schedule.return_value = timer_obj
 
         result = self.runtime._configure_interrupt(self.name, self.timeout, self.container, is_debugging)
 
         self.assertEquals(result, timer_obj)
 
-        ThreadingMock.Timer.assert_called_with(self.timeout, ANY, ())
-        timer_obj.start.assert_called_with()
+        self.scheduler_mock.schedule.assert_called_with(self.timeout, ANY)
 
         SignalMock.signal.assert_not_called()  # must not setup signal handler
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_must_setup_signal_handler(self, SignalMock, ThreadingMock):
+    def test_must_setup_signal_handler(self, SignalMock):
         is_debugging = True  # We are debugging. So setup signal
         SignalMock.SIGTERM = sigterm = "sigterm"
 
@@ -236,11 +392,10 @@ class TestLambdaRuntime_configure_interrupt(TestCase):
         self.assertIsNone(result, "There are no return values when setting up signal handler")
 
         SignalMock.signal.assert_called_with(sigterm, ANY)
-        ThreadingMock.Timer.signal.assert_not_called()  # must not setup timer
+        self.scheduler_mock.schedule.assert_not_called()  # must not setup timer
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_verify_signal_handler(self, SignalMock, ThreadingMock):
+    def test_verify_signal_handler(self, SignalMock):
         """
         Verify the internal implementation of the Signal Handler
         """
@@ -255,20 +410,19 @@ class TestLambdaRuntime_configure_interrupt(TestCase):
         # This method should be called from within the Signal Handler
         self.manager_mock.stop.assert_called_with(self.container)
 
-    @patch("samcli.local.lambdafn.runtime.threading")
     @patch("samcli.local.lambdafn.runtime.signal")
-    def test_verify_timer_handler(self, SignalMock, ThreadingMock):
+    def test_verify_timer_handler(self, SignalMock):
         """
         Verify the internal implementation of the Signal Handler
         """
         is_debugging = False
 
-        def fake_timer(timeout, handler, args):
+        def fake_schedule(timeout, handler):
             handler()
             return Mock()
 
         # Fake the real method with a Lambda. Also run the handler immediately.
-        ThreadingMock.Timer = fake_timer
+        self.scheduler_mock.schedule = fake_schedule
 
         self.runtime._configure_interrupt(self.name, self.timeout, self.container, is_debugging)
 
@@ -329,6 +483,24 @@ class TestLambdaRuntime_get_code_dir(TestCase):
         # Because we never unzipped anything, we should never delete
         shutil_mock.rmtree.assert_not_called()
 
+    @patch("samcli.local.lambdafn.runtime.os")
+    @patch("samcli.local.lambdafn.runtime.shutil")
+    @patch("samcli.local.lambdafn.runtime._unzip_file")
+    def test_must_use_code_cache(self, unzip_file_mock, shutil_mock, os_mock):
+        code_cache = Mock()
+        code_cache.acquire.return_value = "cached-dir"
+        runtime = LambdaRuntime(self.manager_mock, self.layer_downloader, code_cache=code_cache)
+        os_mock.path.isfile.return_value = True
+
+        with runtime._get_code_dir("foo.jar") as result:
+            self.assertEquals(result, "cached-dir")
+            code_cache.release.assert_not_called()
+
+        code_cache.acquire.assert_called_with("foo.jar")
+        code_cache.release.assert_called_with("cached-dir")
+        unzip_file_mock.assert_not_called()
+        shutil_mock.rmtree.assert_not_called()
+
 
 class TestUnzipFile(TestCase):
 
@@ -371,3 +543,245 @@ class TestUnzipFile(TestCase):
         unzip_mock.assert_called_with(inputpath, tmpdir)  # unzip files to temporary directory
         os_mock.path.realpath(tmpdir)  # Return the real path of temporary directory
         os_mock.chmod.assert_called_with(tmpdir, 0o755)  # Assert we do chmod the temporary directory
+
+
+class TestPersistentLambdaRuntime_invoke(TestCase):
+
+    def setUp(self):
+        self.manager_mock = Mock()
+        self.image_builder_mock = Mock()
+
+        self.func_config = FunctionConfig("name", "python3.7", "handler", "code-path", [], timeout=3)
+        self.env_vars = Mock()
+        self.env_vars.resolve.return_value = {"a": "b"}
+        self.func_config.env_vars = self.env_vars
+
+        self.runtime = PersistentLambdaRuntime(self.manager_mock, self.image_builder_mock)
+        self.runtime._environments._start_reaper = Mock()
+
+        self.environment = Mock()
+        self.environment.endpoint.is_closed = False
+        self.runtime._start_environment = Mock(return_value=self.environment)
+
+        self.stdout = Mock()
+
+    def test_must_start_environment_and_return_response(self):
+        self.environment.endpoint.invoke.return_value = Mock(response=b'{ "a" : 1 }')
+
+        self.runtime.invoke(self.func_config, "event", stdout=self.stdout, stderr="stderr")
+
+        self.runtime._start_environment.assert_called_with(self.func_config, "stderr")
+        self.environment.endpoint.invoke.assert_called_with("event", 3)
+        self.stdout.write.assert_called_with(b'{"a": 1}')
+
+        # Event must not be passed through the environment
+        self.env_vars.add_lambda_event_body.assert_not_called()
+
+    def test_must_reuse_environment(self):
+        self.environment.endpoint.invoke.return_value = Mock(response=b"{}")
+
+        self.runtime.invoke(self.func_config, "event1", stdout=self.stdout)
+        self.runtime.invoke(self.func_config, "event2", stdout=self.stdout)
+
+        self.runtime._start_environment.assert_called_once_with(self.func_config, None)
+        self.assertEquals(self.environment.endpoint.invoke.call_count, 2)
+        self.assertEquals(len(self.runtime._environments), 1)
+
+    def test_must_stop_environment_on_timeout(self):
+        self.environment.endpoint.invoke.return_value = None
+        self.runtime._stop_environment = Mock()
+
+        self.runtime.invoke(self.func_config, "event", stdout=self.stdout)
+
+        self.runtime._stop_environment.assert_called_with(self.environment)
+        self.stdout.write.assert_not_called()
+        self.assertEquals(len(self.runtime._environments), 0)
+
+    def test_must_not_reuse_environment_after_runtime_exited(self):
+        self.environment.endpoint.invoke.return_value = Mock(response=b"{}")
+        self.environment.endpoint.is_closed = True
+        self.runtime._stop_environment = Mock()
+
+        self.runtime.invoke(self.func_config, "event", stdout=self.stdout)
+
+        self.runtime._stop_environment.assert_called_with(self.environment)
+        self.assertEquals(len(self.runtime._environments), 0)
+
+    def test_must_write_response_that_is_not_json(self):
+        self.environment.endpoint.invoke.return_value = Mock(response=b"plain")
+
+        self.runtime.invoke(self.func_config, "event", stdout=self.stdout)
+
+        self.stdout.write.assert_called_with(b"plain")
+
+    @patch.object(LambdaRuntime, "invoke")
+    def test_must_fall_back_for_unsupported_runtime(self, invoke_mock):
+        self.func_config.runtime = "java8"
+
+        self.runtime.invoke(self.func_config, "event", stdout="stdout", stderr="stderr")
+
+        invoke_mock.assert_called_with(self.func_config, "event", debug_context=None, stdout="stdout",
+                                       stderr="stderr")
+        self.runtime._start_environment.assert_not_called()
+
+    @patch.object(LambdaRuntime, "invoke")
+    def test_must_fall_back_when_debugging(self, invoke_mock):
+        debug_context = Mock()
+
+        self.runtime.invoke(self.func_config, "event", debug_context=debug_context)
+
+        invoke_mock.assert_called_with(self.func_config, "event", debug_context=debug_context, stdout=None,
+                                       stderr=None)
+
+    def test_must_stop_all_environments_on_shutdown(self):
+        self.environment.endpoint.invoke.return_value = Mock(response=b"{}")
+        self.runtime._environments.on_evict = Mock()
+        self.runtime.invoke(self.func_config, "event", stdout=self.stdout)
+
+        self.runtime.shutdown()
+
+        self.runtime._environments.on_evict.assert_called_with(self.environment)
+
+
+class TestPersistentLambdaRuntime_prewarm(TestCase):
+
+    def setUp(self):
+        self.image_builder_mock = Mock()
+        self.runtime = PersistentLambdaRuntime(Mock(), self.image_builder_mock)
+        self.runtime._environments._start_reaper = Mock()
+        self.runtime._start_environment = Mock(side_effect=lambda config, stderr: Mock())
+
+        self.func_config = FunctionConfig("name", "python3.7", "handler", "code-path", ["layer"])
+        self.func_config.env_vars = Mock()
+        self.func_config.env_vars.resolve.return_value = {}
+
+    def test_must_start_idle_environments(self):
+        self.runtime.prewarm(self.func_config, 3, stderr="stderr")
+
+        self.image_builder_mock.build.assert_called_once_with("python3.7", ["layer"])
+        self.assertEquals(self.runtime._start_environment.call_count, 3)
+        self.runtime._start_environment.assert_called_with(self.func_config, "stderr")
+        self.assertEquals(len(self.runtime._environments), 3)
+
+    def test_must_keep_started_environments_if_one_fails(self):
+        environment = Mock()
+        self.runtime._start_environment.side_effect = [environment, ValueError("failed")]
+
+        with self.assertRaises(ValueError):
+            self.runtime.prewarm(self.func_config, 2)
+
+        self.assertEquals(len(self.runtime._environments), 1)
+
+    def test_must_only_build_image_for_unsupported_runtime(self):
+        self.func_config.runtime = "java8"
+
+        self.runtime.prewarm(self.func_config, 3)
+
+        self.image_builder_mock.build.assert_called_once_with("java8", ["layer"])
+        self.runtime._start_environment.assert_not_called()
+
+
+class TestPersistentLambdaRuntime_start_environment(TestCase):
+
+    def setUp(self):
+        self.manager_mock = Mock()
+        self.image_builder_mock = Mock()
+        self.runtime = PersistentLambdaRuntime(self.manager_mock, self.image_builder_mock)
+
+        self.func_config = FunctionConfig("name", "python3.7", "handler", "code-path", [], memory=256)
+        self.func_config.env_vars = Mock()
+        self.func_config.env_vars.resolve.return_value = {"AWS_REGION": "region"}
+
+    @patch("samcli.local.lambdafn.runtime.get_bind_host")
+    @patch("samcli.local.lambdafn.runtime._RuntimeEnvironment")
+    @patch("samcli.local.lambdafn.runtime.RuntimeApiEndpoint")
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_start_container_with_runtime_api(self, LambdaContainerMock, RuntimeApiEndpointMock,
+                                                   RuntimeEnvironmentMock, get_bind_host_mock):
+        get_bind_host_mock.return_value = "172.17.0.1"
+        endpoint = RuntimeApiEndpointMock.return_value
+        endpoint.address = "host:1234"
+        environment = RuntimeEnvironmentMock.return_value
+        environment.open_code_dir.return_value = "code-dir"
+        self.runtime._get_code_dir = Mock()
+
+        result = self.runtime._start_environment(self.func_config, "stderr")
+
+        self.assertEquals(result, environment)
+        RuntimeApiEndpointMock.assert_called_with("arn:aws:lambda:region:123456789012:function:name",
+                                                  bind_host="172.17.0.1")
+        get_bind_host_mock.assert_called_with(self.manager_mock.docker_client)
+        endpoint.start.assert_called_with()
+        RuntimeEnvironmentMock.assert_called_with(endpoint, self.runtime._get_code_dir.return_value)
+        LambdaContainerMock.assert_called_with("python3.7", "handler", "code-dir", [], self.image_builder_mock,
+                                               memory_mb=256, env_vars={"AWS_REGION": "region"},
+                                               runtime_api="host:1234")
+        self.manager_mock.run.assert_called_with(LambdaContainerMock.return_value)
+        environment.follow_logs.assert_called_with("stderr")
+
+    @patch("samcli.local.lambdafn.runtime._RuntimeEnvironment")
+    @patch("samcli.local.lambdafn.runtime.RuntimeApiEndpoint")
+    @patch("samcli.local.lambdafn.runtime.LambdaContainer")
+    def test_must_stop_environment_if_container_fails_to_start(self, LambdaContainerMock, RuntimeApiEndpointMock,
+                                                               RuntimeEnvironmentMock):
+        self.manager_mock.run.side_effect = ValueError("failed")
+        self.runtime._get_code_dir = Mock()
+        self.runtime._stop_environment = Mock()
+
+        with self.assertRaises(ValueError):
+            self.runtime._start_environment(self.func_config, "stderr")
+
+        self.runtime._stop_environment.assert_called_with(RuntimeEnvironmentMock.return_value)
+
+    def test_must_stop_environment(self):
+        environment = Mock()
+
+        self.runtime._stop_environment(environment)
+
+        environment.endpoint.shutdown.assert_called_with("Container was stopped")
+        self.manager_mock.stop.assert_called_with(environment.container)
+        environment.close_code_dir.assert_called_with()
+
+
+class TestPersistentLambdaRuntime_get_environment_key(TestCase):
+
+    def make_config(self, **kwargs):
+        config = FunctionConfig("name", "python3.7", "handler", "code-path", [], **kwargs)
+        config.env_vars = Mock()
+        config.env_vars.resolve.return_value = {"a": "b"}
+        return config
+
+    def test_must_return_same_key_for_same_config(self):
+        self.assertEquals(PersistentLambdaRuntime._get_environment_key(self.make_config()),
+                          PersistentLambdaRuntime._get_environment_key(self.make_config()))
+
+    def test_must_return_different_key_for_different_config(self):
+        self.assertNotEquals(PersistentLambdaRuntime._get_environment_key(self.make_config(memory=128)),
+                             PersistentLambdaRuntime._get_environment_key(self.make_config(memory=256)))
+
+
+class TestRuntimeEnvironment(TestCase):
+
+    def test_must_keep_code_dir_open_until_closed(self):
+        code_dir_context = MagicMock()
+        code_dir_context.__enter__.return_value = "code-dir"
+        environment = _RuntimeEnvironment(Mock(), code_dir_context)
+
+        self.assertEquals(environment.open_code_dir(), "code-dir")
+        code_dir_context.__exit__.assert_not_called()
+
+        environment.close_code_dir()
+        environment.close_code_dir()
+
+        code_dir_context.__exit__.assert_called_once_with(None, None, None)
+
+    def test_must_close_endpoint_when_logs_end(self):
+        endpoint = Mock()
+        environment = _RuntimeEnvironment(endpoint, MagicMock())
+        environment.container = Mock()
+
+        environment.follow_logs("stream")
+        environment._log_thread.join(5)
+
+        environment.container.wait_for_logs.assert_called_with(stdout="stream", stderr="stream")
+        endpoint.close.assert_called_with("Runtime exited without providing a reason")
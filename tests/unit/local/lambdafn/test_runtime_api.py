@@ -0,0 +1,216 @@
+"""
+Unit tests for the local Lambda Runtime API endpoint
+"""
+
+import json
+import socket
+import threading
+from unittest import TestCase
+from mock import patch, Mock
+
+from docker.errors import APIError
+
+from samcli.local.lambdafn.runtime_api import RuntimeApiEndpoint, Invocation, get_bind_host
+
+NEXT_URL = "/2018-06-01/runtime/invocation/next"
+INIT_ERROR_URL = "/2018-06-01/runtime/init/error"
+
+
+def response_url(request_id):
+    return "/2018-06-01/runtime/invocation/{}/response".format(request_id)
+
+
+def error_url(request_id):
+    return "/2018-06-01/runtime/invocation/{}/error".format(request_id)
+
+
+class TestInvocation(TestCase):
+
+    @patch("samcli.local.lambdafn.runtime_api.time")
+    def test_must_compute_deadline(self, time_mock):
+        time_mock.time.return_value = 100
+
+        invocation = Invocation("event", 3, request_id="id")
+
+        self.assertEquals(invocation.request_id, "id")
+        self.assertEquals(invocation.deadline_ms, 103000)
+
+    def test_must_generate_request_id(self):
+        self.assertTrue(Invocation("event", 3).request_id)
+
+    def test_must_complete(self):
+        invocation = Invocation("event", 3)
+
+        self.assertFalse(invocation.wait(0))
+        invocation.complete(b"result", is_error=True)
+
+        self.assertTrue(invocation.wait(0))
+        self.assertEquals(invocation.response, b"result")
+        self.assertTrue(invocation.is_error)
+
+
+class TestRuntimeApiEndpoint(TestCase):
+
+    def setUp(self):
+        self.endpoint = RuntimeApiEndpoint("arn")
+        self.endpoint._POLL_INTERVAL = 0.01
+        self.client = self.endpoint._app.test_client()
+
+    def invoke_async(self, event, timeout=5):
+        result = {}
+
+        def target():
+            result["invocation"] = self.endpoint.invoke(event, timeout)
+
+        thread = threading.Thread(target=target)
+        thread.daemon = True
+        thread.start()
+        return thread, result
+
+    def test_must_hand_out_invocation_and_return_response(self):
+        thread, result = self.invoke_async('{"key": "value"}')
+
+        next_response = self.client.get(NEXT_URL)
+        request_id = next_response.headers["Lambda-Runtime-Aws-Request-Id"]
+
+        self.assertEquals(next_response.status_code, 200)
+        self.assertEquals(next_response.get_data(), b'{"key": "value"}')
+        self.assertEquals(next_response.headers["Lambda-Runtime-Invoked-Function-Arn"], "arn")
+        self.assertTrue(next_response.headers["Lambda-Runtime-Deadline-Ms"])
+
+        post_response = self.client.post(response_url(request_id), data=b'"hello"')
+        thread.join(5)
+
+        self.assertEquals(post_response.status_code, 202)
+        self.assertEquals(result["invocation"].response, b'"hello"')
+        self.assertFalse(result["invocation"].is_error)
+
+    def test_must_normalize_error(self):
+        thread, result = self.invoke_async("{}")
+
+        request_id = self.client.get(NEXT_URL).headers["Lambda-Runtime-Aws-Request-Id"]
+        self.client.post(error_url(request_id),
+                         data=b'{"errorMessage": "boom"}',
+                         headers={"Lambda-Runtime-Function-Error-Type": "ValueError"})
+        thread.join(5)
+
+        self.assertTrue(result["invocation"].is_error)
+        self.assertEquals(json.loads(result["invocation"].response.decode("utf-8")), {
+            "errorMessage": "boom",
+            "errorType": "ValueError",
+            "stackTrace": []
+        })
+
+    def test_must_normalize_error_that_is_not_json(self):
+        error = json.loads(RuntimeApiEndpoint._normalize_error(b"plain text").decode("utf-8"))
+
+        self.assertEquals(error, {"errorMessage": "plain text", "errorType": "Unhandled", "stackTrace": []})
+
+    def test_must_reject_result_for_unknown_request(self):
+        response = self.client.post(response_url("unknown"), data=b"{}")
+
+        self.assertEquals(response.status_code, 400)
+
+    def test_must_return_none_on_timeout(self):
+        self.assertIsNone(self.endpoint.invoke("{}", 0.01))
+        self.assertEquals(self.endpoint._invocations, {})
+
+    def test_must_fail_pending_invocations_on_close(self):
+        thread, result = self.invoke_async("{}")
+        self.client.get(NEXT_URL)
+
+        self.endpoint.close("exited")
+        thread.join(5)
+
+        self.assertTrue(result["invocation"].is_error)
+        self.assertEquals(json.loads(result["invocation"].response.decode("utf-8"))["errorType"],
+                          "Runtime.ExitError")
+
+    def test_must_fail_invocations_after_close(self):
+        self.endpoint.close("exited")
+
+        invocation = self.endpoint.invoke("{}", 5)
+
+        self.assertTrue(invocation.is_error)
+        self.assertEquals(json.loads(invocation.response.decode("utf-8"))["errorMessage"], "exited")
+
+    def test_must_stop_long_poll_after_close(self):
+        self.endpoint.close("exited")
+
+        self.assertEquals(self.client.get(NEXT_URL).status_code, 410)
+
+    def test_must_close_on_init_error(self):
+        response = self.client.post(INIT_ERROR_URL,
+                                    data=b'{"errorMessage": "bad import", "errorType": "ImportError"}')
+
+        self.assertEquals(response.status_code, 202)
+        self.assertTrue(self.endpoint.is_closed)
+
+        invocation = self.endpoint.invoke("{}", 5)
+        self.assertEquals(json.loads(invocation.response.decode("utf-8")), {
+            "errorMessage": "bad import",
+            "errorType": "ImportError",
+            "stackTrace": []
+        })
+
+    def test_must_require_start_before_address(self):
+        with self.assertRaises(RuntimeError):
+            self.endpoint.address
+
+    @patch("samcli.local.lambdafn.runtime_api.threading.Thread")
+    @patch("samcli.local.lambdafn.runtime_api.make_server")
+    def test_must_start_and_shutdown_server(self, make_server_mock, ThreadMock):
+        server_mock = Mock()
+        server_mock.server_port = 1234
+        make_server_mock.return_value = server_mock
+
+        self.endpoint.start()
+
+        make_server_mock.assert_called_with("127.0.0.1", 0, self.endpoint._app, threaded=True)
+        ThreadMock.return_value.start.assert_called_with()
+        self.assertEquals(self.endpoint.address, "host.docker.internal:1234")
+
+        self.endpoint.shutdown()
+
+        server_mock.shutdown.assert_called_with()
+        self.assertTrue(self.endpoint.is_closed)
+
+
+class TestGetBindHost(TestCase):
+
+    def setUp(self):
+        self.docker_client = Mock()
+        self.docker_client.networks.get.return_value.attrs = {"IPAM": {"Config": [{"Gateway": "172.17.0.1"}]}}
+
+    @patch("samcli.local.lambdafn.runtime_api.socket.socket")
+    @patch("samcli.local.lambdafn.runtime_api.sys")
+    def test_must_bind_to_bridge_gateway_on_linux(self, sys_mock, socket_mock):
+        sys_mock.platform = "linux"
+
+        self.assertEquals(get_bind_host(self.docker_client), "172.17.0.1")
+
+        self.docker_client.networks.get.assert_called_with("bridge")
+        socket_mock.return_value.bind.assert_called_with(("172.17.0.1", 0))
+        socket_mock.return_value.close.assert_called_with()
+
+    @patch("samcli.local.lambdafn.runtime_api.sys")
+    def test_must_bind_to_loopback_on_other_platforms(self, sys_mock):
+        sys_mock.platform = "darwin"
+
+        self.assertEquals(get_bind_host(self.docker_client), "127.0.0.1")
+        self.docker_client.networks.get.assert_not_called()
+
+    @patch("samcli.local.lambdafn.runtime_api.sys")
+    def test_must_fall_back_to_loopback_if_bridge_is_unknown(self, sys_mock):
+        sys_mock.platform = "linux"
+        self.docker_client.networks.get.side_effect = APIError("no bridge")
+
+        self.assertEquals(get_bind_host(self.docker_client), "127.0.0.1")
+
+    @patch("samcli.local.lambdafn.runtime_api.socket.socket")
+    @patch("samcli.local.lambdafn.runtime_api.sys")
+    def test_must_fall_back_to_loopback_if_gateway_is_not_local(self, sys_mock, socket_mock):
+        sys_mock.platform = "linux"
+        socket_mock.return_value.bind.side_effect = socket.error("Cannot assign requested address")
+
+        self.assertEquals(get_bind_host(self.docker_client), "127.0.0.1")
@@ -0,0 +1,172 @@
+"""
+Unit tests for the invocation scheduler
+"""
+
+import threading
+import time
+from unittest import TestCase
+
+from samcli.local.lambdafn.exceptions import TooManyRequests
+from samcli.local.lambdafn.scheduler import InvocationScheduler
+
+
+class TestInvocationScheduler(TestCase):
+
+    def start_waiting(self, scheduler, function_name):
+        """
+        Calls ``acquire`` in a separate thread and waits until the invocation is queued
+        """
+        result = {}
+        depth = scheduler.stats()["queue_depth"]
+
+        def target():
+            try:
+                scheduler.acquire(function_name)
+                result["acquired"] = True
+            except TooManyRequests:
+                result["acquired"] = False
+
+        thread = threading.Thread(target=target)
+        thread.daemon = True
+        thread.start()
+
+        while scheduler.stats()["queue_depth"] == depth and thread.is_alive():
+            time.sleep(0.001)
+
+        return thread, result
+
+    def test_must_use_default_values(self):
+        scheduler = InvocationScheduler()
+
+        self.assertIsNone(scheduler.max_concurrency)
+        self.assertEquals(scheduler.function_limits, {})
+        self.assertEquals(scheduler.max_queue_size, InvocationScheduler.DEFAULT_MAX_QUEUE_SIZE)
+        self.assertEquals(scheduler.queue_timeout, InvocationScheduler.DEFAULT_QUEUE_TIMEOUT)
+
+    def test_must_only_keep_integer_function_limits(self):
+        scheduler = InvocationScheduler(function_limits={"int": 2,
+                                                         "string": "3",
+                                                         "ref": {"Ref": "Concurrency"},
+                                                         "text": "unlimited"})
+
+        self.assertEquals(scheduler.function_limits, {"int": 2, "string": 3})
+
+        for _ in range(5):
+            scheduler.acquire("ref")
+        self.assertEquals(scheduler.stats()["running_per_function"], {"ref": 5})
+
+    def test_must_run_immediately_without_limits(self):
+        scheduler = InvocationScheduler()
+
+        for _ in range(10):
+            scheduler.acquire("function")
+
+        stats = scheduler.stats()
+        self.assertEquals(stats["running"], 10)
+        self.assertEquals(stats["running_per_function"], {"function": 10})
+        self.assertEquals(stats["queued"], 0)
+
+    def test_must_release_slot(self):
+        scheduler = InvocationScheduler(max_concurrency=1)
+
+        with scheduler.slot("function"):
+            self.assertEquals(scheduler.stats()["running"], 1)
+
+        self.assertEquals(scheduler.stats()["running"], 0)
+
+    def test_must_always_throttle_function_without_concurrency(self):
+        scheduler = InvocationScheduler(function_limits={"function": 0})
+
+        with self.assertRaises(TooManyRequests):
+            scheduler.acquire("function")
+
+        self.assertEquals(scheduler.stats()["throttled"], 1)
+
+    def test_must_wait_for_function_limit(self):
+        scheduler = InvocationScheduler(function_limits={"function": 1})
+        scheduler.acquire("function")
+
+        thread, result = self.start_waiting(scheduler, "function")
+        self.assertEquals(scheduler.stats()["queued_per_function"], {"function": 1})
+
+        scheduler.release("function")
+        thread.join(5)
+
+        self.assertTrue(result["acquired"])
+        stats = scheduler.stats()
+        self.assertEquals(stats["queued"], 1)
+        self.assertEquals(stats["queue_depth"], 0)
+        self.assertEquals(stats["running"], 1)
+
+    def test_must_not_hold_back_other_functions(self):
+        scheduler = InvocationScheduler(function_limits={"limited": 1})
+        scheduler.acquire("limited")
+
+        thread, result = self.start_waiting(scheduler, "limited")
+
+        # Not blocked by the invocation of "limited" that is waiting
+        scheduler.acquire("other")
+        self.assertEquals(scheduler.stats()["running_per_function"], {"limited": 1, "other": 1})
+
+        scheduler.release("limited")
+        thread.join(5)
+        self.assertTrue(result["acquired"])
+
+    def test_must_wait_for_global_limit_in_order(self):
+        scheduler = InvocationScheduler(max_concurrency=1)
+        scheduler.acquire("function1")
+
+        thread1, result1 = self.start_waiting(scheduler, "function2")
+        thread2, result2 = self.start_waiting(scheduler, "function3")
+
+        scheduler.release("function1")
+        thread1.join(5)
+
+        self.assertTrue(result1["acquired"])
+        self.assertEquals(result2, {})
+        self.assertEquals(scheduler.stats()["queued_per_function"], {"function3": 1})
+
+        scheduler.release("function2")
+        thread2.join(5)
+        self.assertTrue(result2["acquired"])
+
+    def test_must_throttle_when_queue_is_full(self):
+        scheduler = InvocationScheduler(max_concurrency=1, max_queue_size=1)
+        scheduler.acquire("function")
+        thread, result = self.start_waiting(scheduler, "function")
+
+        with self.assertRaises(TooManyRequests):
+            scheduler.acquire("function")
+
+        stats = scheduler.stats()
+        self.assertEquals(stats["throttled"], 1)
+        self.assertEquals(stats["max_queue_depth"], 1)
+
+        scheduler.release("function")
+        thread.join(5)
+
+    def test_must_throttle_when_wait_times_out(self):
+        scheduler = InvocationScheduler(max_concurrency=1, queue_timeout=0.01)
+        scheduler.acquire("function")
+
+        with self.assertRaises(TooManyRequests):
+            scheduler.acquire("function")
+
+        stats = scheduler.stats()
+        self.assertEquals(stats["timed_out"], 1)
+        self.assertEquals(stats["throttled"], 1)
+        self.assertEquals(stats["queue_depth"], 0)
+
+    def test_must_track_wait_time(self):
+        now = [100.0]
+        scheduler = InvocationScheduler(max_concurrency=1, clock=lambda: now[0])
+        scheduler.acquire("function")
+
+        thread, result = self.start_waiting(scheduler, "function")
+        now[0] += 4
+        scheduler.release("function")
+        thread.join(5)
+
+        stats = scheduler.stats()
+        self.assertEquals(stats["max_wait_time"], 4)
+        self.assertEquals(stats["average_wait_time"], 4)
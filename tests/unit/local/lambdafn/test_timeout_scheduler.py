@@ -0,0 +1,83 @@
+import threading
+from unittest import TestCase
+
+from mock import Mock
+
+from samcli.local.lambdafn.timeout_scheduler import TimeoutScheduler, ScheduledTimeout
+
+
+class TestTimeoutScheduler(TestCase):
+
+    def setUp(self):
+        self.scheduler = TimeoutScheduler()
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_must_fire_in_deadline_order(self):
+        fired = []
+        done = threading.Event()
+
+        def callback(name):
+            fired.append(name)
+            if len(fired) == 3:
+                done.set()
+
+        self.scheduler.schedule(0.3, callback, "third")
+        self.scheduler.schedule(0.1, callback, "first")
+        self.scheduler.schedule(0.2, callback, "second")
+
+        self.assertTrue(done.wait(5))
+        self.assertEquals(fired, ["first", "second", "third"])
+        self.assertEquals(self.scheduler.pending(), 0)
+
+    def test_must_not_fire_cancelled_timeout(self):
+        callback = Mock()
+        fired = threading.Event()
+
+        timeout = self.scheduler.schedule(0.05, callback, "cancelled")
+        self.scheduler.schedule(0.1, fired.set)
+
+        self.assertTrue(timeout.cancel())
+        self.assertTrue(fired.wait(5))
+
+        callback.assert_not_called()
+        self.assertEquals(timeout.state, ScheduledTimeout.CANCELLED)
+        self.assertFalse(timeout.cancel())
+
+    def test_must_not_cancel_fired_timeout(self):
+        fired = threading.Event()
+        timeout = self.scheduler.schedule(0, fired.set)
+
+        self.assertTrue(fired.wait(5))
+        self.assertFalse(timeout.cancel())
+        self.assertEquals(timeout.state, ScheduledTimeout.FIRED)
+
+    def test_must_drop_cancelled_timeouts(self):
+        timeouts = [self.scheduler.schedule(3600, Mock()) for _ in range(1000)]
+        for timeout in timeouts[:900]:
+            timeout.cancel()
+
+        self.assertEquals(self.scheduler.pending(), 100)
+        self.assertLess(len(self.scheduler._heap), 1000)
+
+    def test_must_keep_firing_after_failed_callback(self):
+        fired = threading.Event()
+
+        self.scheduler.schedule(0, Mock(side_effect=ValueError()))
+        self.scheduler.schedule(0.05, fired.set)
+
+        self.assertTrue(fired.wait(5))
+
+    def test_must_not_schedule_after_shutdown(self):
+        callback = Mock()
+        self.scheduler.schedule(3600, callback)
+
+        self.scheduler.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            self.scheduler.schedule(1, callback)
+        callback.assert_not_called()
+
+    def test_must_share_one_scheduler(self):
+        self.assertIs(TimeoutScheduler.shared(), TimeoutScheduler.shared())
@@ -0,0 +1,133 @@
+import json
+from unittest import TestCase
+
+from mock import Mock
+
+from samcli.local.docker.stats import ResourceUsage
+from samcli.local.lambdafn.timing import InvokeTimings, track_invoke_timings, current_timings, record_phase, \
+    record_first_byte, TimingsWriter
+
+
+class TestInvokeTimings(TestCase):
+
+    def setUp(self):
+        self.now = [100.0]
+        self.clock = Mock(side_effect=lambda: self.now[0])
+        self.timings = InvokeTimings("MyFunction", clock=self.clock)
+
+    def advance(self, seconds):
+        self.now[0] += seconds
+
+    def test_must_measure_phases(self):
+        with self.timings.phase("image_build"):
+            self.advance(2)
+        with self.timings.phase("create"):
+            self.advance(0.5)
+        with self.timings.phase("start"):
+            self.advance(0.25)
+        self.advance(0.1)
+        self.timings.first_byte()
+        with self.timings.phase("run"):
+            self.advance(1)
+        with self.timings.phase("delete"):
+            self.advance(0.05)
+        self.timings.finish()
+        self.advance(10)
+
+        self.assertAlmostEqual(self.timings.init_duration, 2.75)
+        self.assertAlmostEqual(self.timings.duration, 1.1 - 0.1)
+        self.assertAlmostEqual(self.timings.overhead, 0.15)
+        self.assertAlmostEqual(self.timings.total, 3.9)
+        self.assertAlmostEqual(self.timings.phases["first_byte"], 0.1)
+
+        result = self.timings.to_dict()
+        self.assertEquals(result["phases_ms"]["layer_download"], None)
+        self.assertEquals(result["phases_ms"]["create"], 500.0)
+        self.assertEquals(result["init_duration_ms"], 2750.0)
+        self.assertEquals(json.loads(json.dumps(result)), result)
+
+        self.assertEquals(self.timings.report_line(),
+                          "REPORT Function: MyFunction\tInit Duration: 2750.00 ms\tDuration: 1000.00 ms\t"
+                          "Overhead: 150.00 ms")
+
+    def test_must_report_resource_usage(self):
+        usage = ResourceUsage()
+        usage.add_sample({"memory_stats": {"usage": 52428800, "stats": {"rss": 41943040}},
+                          "cpu_stats": {"cpu_usage": {"total_usage": 123000000}}})
+        self.timings.resource_usage = usage
+        self.timings.finish()
+
+        self.assertTrue(self.timings.report_line().endswith(
+            "\tMax Memory Used: 50 MB\tPeak RSS: 40 MB\tCPU Time: 0.123 s"))
+        self.assertEquals(self.timings.to_dict()["resource_usage"]["max_memory_used_mb"], 50)
+
+    def test_must_accumulate_repeated_phases(self):
+        with self.timings.phase("create"):
+            self.advance(1)
+        with self.timings.phase("create"):
+            self.advance(2)
+
+        self.assertEquals(self.timings.phases, {"create": 3})
+
+    def test_must_record_phase_of_failed_block(self):
+        with self.assertRaises(ValueError):
+            with self.timings.phase("start"):
+                self.advance(1)
+                raise ValueError()
+
+        self.assertEquals(self.timings.phases, {"start": 1})
+
+    def test_must_only_record_first_byte_once_container_started(self):
+        self.timings.first_byte()
+        self.assertNotIn("first_byte", self.timings.phases)
+
+        with self.timings.phase("start"):
+            self.advance(1)
+        self.advance(2)
+        self.timings.first_byte()
+        self.advance(2)
+        self.timings.first_byte()
+
+        self.assertEquals(self.timings.phases["first_byte"], 2)
+
+
+class TestTrackInvokeTimings(TestCase):
+
+    def test_must_record_phases_of_current_thread(self):
+        self.assertIsNone(current_timings())
+
+        with track_invoke_timings("outer") as outer:
+            with track_invoke_timings("inner") as inner:
+                with record_phase("create"):
+                    pass
+
+            with record_phase("start"):
+                pass
+            record_first_byte()
+
+        self.assertEquals(set(inner.phases.keys()), {"create"})
+        self.assertEquals(set(outer.phases.keys()), {"start", "first_byte"})
+        self.assertIsNone(current_timings())
+
+    def test_must_do_nothing_when_not_tracking(self):
+        with record_phase("create"):
+            pass
+        record_first_byte()
+
+        self.assertIsNone(current_timings())
+
+
+class TestTimingsWriter(TestCase):
+
+    def test_must_write_one_json_object_per_line(self):
+        stream = Mock()
+        writer = TimingsWriter(stream)
+        timings = InvokeTimings("function", clock=Mock(return_value=0))
+        timings.finish()
+
+        writer(timings)
+
+        line = stream.write.call_args[0][0]
+        self.assertTrue(line.endswith("\n"))
+        self.assertEquals(json.loads(line), timings.to_dict())
+        stream.flush.assert_called_with()
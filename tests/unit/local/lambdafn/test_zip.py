@@ -2,6 +2,7 @@ import os
 import platform
 import shutil
 import stat
+import struct
 import zipfile
 from contextlib import contextmanager
 from tempfile import NamedTemporaryFile, mkdtemp
@@ -11,7 +12,7 @@ from unittest import skipIf
 from mock import Mock, patch
 from nose_parameterized import parameterized, param
 
-from samcli.local.lambdafn.zip import unzip, unzip_from_uri, _override_permissions
+from samcli.local.lambdafn.zip import unzip, unzip_from_uri, _override_permissions, _StreamingUnzipper
 
 # On Windows, permissions do not match 1:1 with permissions on Unix systems.
 SKIP_UNZIP_PERMISSION_TESTS = platform.system() == 'Windows'
@@ -48,6 +49,53 @@ class TestUnzipWithPermissions(TestCase):
                                               perm,
                                               "File {} has wrong permission {}".format(key, perm))
 
+    @patch("samcli.local.lambdafn.zip._cpu_count", Mock(return_value=4))
+    @patch("samcli.local.lambdafn.zip.PARALLEL_UNZIP_MIN_FILES", 1)
+    def test_must_unzip_in_parallel(self):
+        files = {"folder{}/{}.txt".format(i % 3, i): 0o600 + i % 8 for i in range(20)}
+
+        with self._create_zip(files) as zip_file_name:
+            with self._temp_dir() as extract_dir:
+
+                unzip(zip_file_name, extract_dir)
+
+                for name, permission in files.items():
+                    filepath = os.path.join(extract_dir, name)
+                    with open(filepath, "rb") as extracted:
+                        self.assertEquals(extracted.read(), b"hello world")
+                    self.assertEquals(stat.S_IMODE(os.stat(filepath).st_mode), permission)
+
+    def test_must_set_permissions_after_extracting(self):
+        files = {"readonly/": 0o500, "readonly/1.txt": 0o400}
+
+        with self._create_zip(files) as zip_file_name:
+            with self._temp_dir() as extract_dir:
+
+                unzip(zip_file_name, extract_dir)
+
+                self.assertEquals(stat.S_IMODE(os.stat(os.path.join(extract_dir, "readonly")).st_mode), 0o500)
+                self.assertEquals(stat.S_IMODE(os.stat(os.path.join(extract_dir, "readonly/1.txt")).st_mode), 0o400)
+
+                # Let the directory be deleted
+                os.chmod(os.path.join(extract_dir, "readonly"), 0o700)
+
+    def test_must_skip_extracted_files(self):
+        files = {"1.txt": 0o644, "2.txt": 0o644}
+
+        with self._create_zip(files) as zip_file_name:
+            with self._temp_dir() as extract_dir:
+                crc = zipfile.ZipFile(zip_file_name).getinfo("1.txt").CRC
+                for name in files:
+                    with open(os.path.join(extract_dir, name), "wb") as extracted:
+                        extracted.write(b"already extracted")
+
+                unzip(zip_file_name, extract_dir, skip={"1.txt": (crc, 11), "2.txt": (0, 11)})
+
+                with open(os.path.join(extract_dir, "1.txt"), "rb") as extracted:
+                    self.assertEquals(extracted.read(), b"already extracted")
+                with open(os.path.join(extract_dir, "2.txt"), "rb") as extracted:
+                    self.assertEquals(extracted.read(), b"hello world")
+
     @contextmanager
     def _create_zip(self, files_with_permissions, add_permissions=True):
 
@@ -86,6 +134,7 @@ class TestUnzipWithPermissions(TestCase):
 
 class TestUnzipFromUri(TestCase):
 
+    @patch('samcli.local.lambdafn.zip._StreamingUnzipper')
     @patch('samcli.local.lambdafn.zip.unzip')
     @patch('samcli.local.lambdafn.zip.Path')
     @patch('samcli.local.lambdafn.zip.progressbar')
@@ -98,7 +147,8 @@ class TestUnzipFromUri(TestCase):
                                          requests_patch,
                                          progressbar_patch,
                                          path_patch,
-                                         unzip_patch):
+                                         unzip_patch,
+                                         streaming_unzipper_patch):
         get_request_mock = Mock()
         get_request_mock.headers = {"Content-length": "200"}
         get_request_mock.iter_content.return_value = [b'data1']
@@ -119,15 +169,18 @@ class TestUnzipFromUri(TestCase):
         unzip_from_uri('uri', 'layer_zip_path', 'output_zip_dir', 'layer_arn')
 
         requests_patch.get.assert_called_with('uri', stream=True, verify=True)
-        get_request_mock.iter_content.assert_called_with(chunk_size=None)
+        get_request_mock.iter_content.assert_called_with(chunk_size=64 * 1024)
         open_patch.assert_called_with('layer_zip_path', 'wb')
         file_mock.write.assert_called_with(b'data1')
         progressbar_mock.update.assert_called_with(5)
+        streaming_unzipper_patch.return_value.feed.assert_called_with(5)
         path_patch.assert_called_with('layer_zip_path')
         path_mock.unlink.assert_called()
-        unzip_patch.assert_called_with('layer_zip_path', 'output_zip_dir', permission=0o700)
+        unzip_patch.assert_called_with('layer_zip_path', 'output_zip_dir', permission=0o700,
+                                       skip=streaming_unzipper_patch.return_value.finish.return_value)
         os_patch.environ.get.assert_called_with('AWS_CA_BUNDLE', True)
 
+    @patch('samcli.local.lambdafn.zip._StreamingUnzipper')
     @patch('samcli.local.lambdafn.zip.unzip')
     @patch('samcli.local.lambdafn.zip.Path')
     @patch('samcli.local.lambdafn.zip.progressbar')
@@ -140,7 +193,8 @@ class TestUnzipFromUri(TestCase):
                                                     requests_patch,
                                                     progressbar_patch,
                                                     path_patch,
-                                                    unzip_patch):
+                                                    unzip_patch,
+                                                    streaming_unzipper_patch):
         get_request_mock = Mock()
         get_request_mock.headers = {"Content-length": "200"}
         get_request_mock.iter_content.return_value = [b'data1']
@@ -161,15 +215,17 @@ class TestUnzipFromUri(TestCase):
         unzip_from_uri('uri', 'layer_zip_path', 'output_zip_dir', 'layer_arn')
 
         requests_patch.get.assert_called_with('uri', stream=True, verify=True)
-        get_request_mock.iter_content.assert_called_with(chunk_size=None)
+        get_request_mock.iter_content.assert_called_with(chunk_size=64 * 1024)
         open_patch.assert_called_with('layer_zip_path', 'wb')
         file_mock.write.assert_called_with(b'data1')
         progressbar_mock.update.assert_called_with(5)
         path_patch.assert_called_with('layer_zip_path')
         path_mock.unlink.assert_not_called()
-        unzip_patch.assert_called_with('layer_zip_path', 'output_zip_dir', permission=0o700)
+        unzip_patch.assert_called_with('layer_zip_path', 'output_zip_dir', permission=0o700,
+                                       skip=streaming_unzipper_patch.return_value.finish.return_value)
         os_patch.environ.get.assert_called_with('AWS_CA_BUNDLE', True)
 
+    @patch('samcli.local.lambdafn.zip._StreamingUnzipper')
     @patch('samcli.local.lambdafn.zip.unzip')
     @patch('samcli.local.lambdafn.zip.Path')
     @patch('samcli.local.lambdafn.zip.progressbar')
@@ -181,7 +237,8 @@ class TestUnzipFromUri(TestCase):
                                                         requests_patch,
                                                         progressbar_patch,
                                                         path_patch,
-                                                        unzip_patch):
+                                                        unzip_patch,
+                                                        streaming_unzipper_patch):
         get_request_mock = Mock()
         get_request_mock.headers = {"Content-length": "200"}
         get_request_mock.iter_content.return_value = [b'data1']
@@ -202,13 +259,14 @@ class TestUnzipFromUri(TestCase):
         unzip_from_uri('uri', 'layer_zip_path', 'output_zip_dir', 'layer_arn')
 
         requests_patch.get.assert_called_with('uri', stream=True, verify='/some/path/on/the/system')
-        get_request_mock.iter_content.assert_called_with(chunk_size=None)
+        get_request_mock.iter_content.assert_called_with(chunk_size=64 * 1024)
         open_patch.assert_called_with('layer_zip_path', 'wb')
         file_mock.write.assert_called_with(b'data1')
         progressbar_mock.update.assert_called_with(5)
         path_patch.assert_called_with('layer_zip_path')
         path_mock.unlink.assert_called()
-        unzip_patch.assert_called_with('layer_zip_path', 'output_zip_dir', permission=0o700)
+        unzip_patch.assert_called_with('layer_zip_path', 'output_zip_dir', permission=0o700,
+                                       skip=streaming_unzipper_patch.return_value.finish.return_value)
         os_patch.environ.get.assert_called_with('AWS_CA_BUNDLE', True)
 
 
@@ -225,3 +283,101 @@ class TestOverridePermissions(TestCase):
         _override_permissions(path="./home", permission=None)
 
         os_patch.chmod.assert_not_called()
+
+
+class TestStreamingUnzipper(TestCase):
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "output")
+        self.zip_path = os.path.join(self.temp_dir, "archive.zip")
+
+        with zipfile.ZipFile(self.zip_path, "w") as zf:
+            zf.writestr(zipfile.ZipInfo("folder/"), b"")
+            zf.writestr("folder/deflated.txt", b"deflated " * 1000, compress_type=zipfile.ZIP_DEFLATED)
+            zf.writestr("stored.txt", b"stored", compress_type=zipfile.ZIP_STORED)
+
+        with open(self.zip_path, "rb") as archive:
+            self.data = archive.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def stream(self, length, chunk_size=100):
+        unzipper = _StreamingUnzipper(self.zip_path, self.output_dir)
+        unzipper.start()
+
+        for offset in range(0, length, chunk_size):
+            unzipper.feed(min(chunk_size, length - offset))
+
+        return unzipper.finish()
+
+    def read(self, name):
+        with open(os.path.join(self.output_dir, name), "rb") as extracted:
+            return extracted.read()
+
+    def test_must_extract_complete_archive(self):
+        extracted = self.stream(len(self.data))
+
+        infos = {info.filename: (info.CRC, info.file_size) for info in zipfile.ZipFile(self.zip_path).infolist()}
+        self.assertEquals(extracted, infos)
+        self.assertEquals(self.read("folder/deflated.txt"), b"deflated " * 1000)
+        self.assertEquals(self.read("stored.txt"), b"stored")
+
+    def test_must_only_extract_complete_files(self):
+        stored_offset = zipfile.ZipFile(self.zip_path).getinfo("stored.txt").header_offset
+
+        extracted = self.stream(stored_offset + 40)
+
+        self.assertEquals(sorted(extracted), ["folder/", "folder/deflated.txt"])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "stored.txt")))
+
+    def test_must_stop_at_corrupt_file(self):
+        info = zipfile.ZipFile(self.zip_path).getinfo("stored.txt")
+        name_length, extra_length = struct.unpack("<2H", self.data[info.header_offset + 26:info.header_offset + 30])
+        data_offset = info.header_offset + 30 + name_length + extra_length
+        with open(self.zip_path, "r+b") as archive:
+            archive.seek(data_offset)
+            archive.write(b"STORED")
+
+        extracted = self.stream(len(self.data))
+
+        self.assertNotIn(info.filename, extracted)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "stored.txt")))
+
+    def test_must_finish_without_data(self):
+        self.assertEquals(self.stream(0), {})
+
+
+@skipIf(SKIP_UNZIP_PERMISSION_TESTS, "Skip UnZip Permissions tests in Windows only")
+class TestUnzipFromUriStreaming(TestCase):
+
+    @patch('samcli.local.lambdafn.zip.progressbar')
+    @patch('samcli.local.lambdafn.zip.requests')
+    def test_must_download_and_extract(self, requests_patch, progressbar_patch):
+        temp_dir = mkdtemp()
+        try:
+            source_zip = os.path.join(temp_dir, "source.zip")
+            with zipfile.ZipFile(source_zip, "w", zipfile.ZIP_DEFLATED) as zf:
+                for index in range(10):
+                    zf.writestr("python/module{}.py".format(index), b"print('hello')\n" * 100)
+            with open(source_zip, "rb") as archive:
+                data = archive.read()
+
+            get_request_mock = Mock()
+            get_request_mock.headers = {"Content-length": str(len(data))}
+            get_request_mock.iter_content.return_value = [data[i:i + 50] for i in range(0, len(data), 50)]
+            requests_patch.get.return_value = get_request_mock
+
+            output_dir = os.path.join(temp_dir, "layer")
+            layer_zip_path = os.path.join(temp_dir, "layer.zip")
+            unzip_from_uri("uri", layer_zip_path, output_dir, "label")
+
+            self.assertFalse(os.path.exists(layer_zip_path))
+            for index in range(10):
+                path = os.path.join(output_dir, "python/module{}.py".format(index))
+                with open(path, "rb") as extracted:
+                    self.assertEquals(extracted.read(), b"print('hello')\n" * 100)
+                self.assertEquals(stat.S_IMODE(os.stat(path).st_mode), 0o700)
+        finally:
+            shutil.rmtree(temp_dir)
@@ -1,6 +1,16 @@
+import io
+import os
+import base64
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import threading
 from unittest import TestCase
-from mock import patch, Mock, call
+from mock import patch, Mock, MagicMock, call
 
+import requests
+from six.moves import BaseHTTPServer
 from botocore.exceptions import NoCredentialsError, ClientError
 try:
     from pathlib import Path
@@ -9,7 +19,8 @@ except ImportError:
 
 
 from samcli.local.layers.layer_downloader import LayerDownloader
-from samcli.commands.local.cli_common.user_exceptions import CredentialsRequired, ResourceNotFound
+from samcli.commands.local.cli_common.user_exceptions import CredentialsRequired, ResourceNotFound, \
+    LayerChecksumMismatch
 
 
 class TestDownloadLayers(TestCase):
@@ -23,9 +34,24 @@ class TestDownloadLayers(TestCase):
         self.assertEquals(download_layers.layer_cache, "/some/path")
         create_cache_patch.assert_called_with("/some/path")
 
+    @patch("samcli.local.layers.layer_downloader.boto3")
+    def test_lambda_client_must_be_created_once_from_own_session(self, boto3_mock):
+        download_layers = LayerDownloader("/home", ".")
+
+        threads = [threading.Thread(target=lambda: download_layers.lambda_client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(download_layers.lambda_client, boto3_mock.session.Session.return_value.client.return_value)
+        boto3_mock.session.Session.assert_called_once_with()
+        boto3_mock.session.Session.return_value.client.assert_called_once_with('lambda')
+        boto3_mock.client.assert_not_called()
+
     @patch("samcli.local.layers.layer_downloader.LayerDownloader.download")
     def test_download_all_without_force(self, download_patch):
-        download_patch.side_effect = ['/home/layer1', '/home/layer2']
+        download_patch.side_effect = lambda layer, force: '/home/' + layer
 
         download_layers = LayerDownloader("/home", ".")
 
@@ -37,7 +63,7 @@ class TestDownloadLayers(TestCase):
 
     @patch("samcli.local.layers.layer_downloader.LayerDownloader.download")
     def test_download_all_with_force(self, download_patch):
-        download_patch.side_effect = ['/home/layer1', '/home/layer2']
+        download_patch.side_effect = lambda layer, force: '/home/' + layer
 
         download_layers = LayerDownloader("/home", ".")
 
@@ -47,6 +73,39 @@ class TestDownloadLayers(TestCase):
 
         download_patch.assert_has_calls([call('layer1', True), call("layer2", True)])
 
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader.download")
+    def test_download_all_keeps_cache_within_budget(self, download_patch):
+        download_patch.side_effect = lambda layer, force: layer
+        cache_manager_mock = Mock()
+
+        layer1 = Mock(is_defined_within_template=False)
+        layer1.name = "layer1"
+        layer2 = Mock(is_defined_within_template=True)
+        layer2.name = "layer2"
+
+        download_layers = LayerDownloader("/home", ".", cache_manager=cache_manager_mock)
+        download_layers.download_all([layer1, layer2])
+
+        cache_manager_mock.evict.assert_called_once_with(in_use=["layer1"])
+
+    def test_in_use_must_keep_downloaded_layers_from_eviction(self):
+        cache_manager_mock = MagicMock()
+
+        layer1 = Mock(is_defined_within_template=False)
+        layer1.name = "layer1"
+        layer2 = Mock(is_defined_within_template=True)
+        layer2.name = "layer2"
+
+        with LayerDownloader("/home", ".", cache_manager=cache_manager_mock).in_use([layer1, layer2]):
+            cache_manager_mock.in_use.assert_called_once_with(["layer1"])
+            cache_manager_mock.in_use.return_value.__exit__.assert_not_called()
+
+        cache_manager_mock.in_use.return_value.__exit__.assert_called_once()
+
+    def test_in_use_without_cache_manager(self):
+        with LayerDownloader("/home", ".").in_use([Mock()]):
+            pass
+
     @patch("samcli.local.layers.layer_downloader.LayerDownloader._create_cache")
     @patch("samcli.local.layers.layer_downloader.LayerDownloader._is_layer_cached")
     def test_download_layer_that_is_cached(self, is_layer_cached_patch, create_cache_patch):
@@ -85,12 +144,15 @@ class TestDownloadLayers(TestCase):
         resolve_code_path_patch.assert_called_once_with(".", "/some/custom/path")
 
     @patch("samcli.local.layers.layer_downloader.unzip_from_uri")
-    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_uri")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._fetch_layer_content")
+    @patch("samcli.local.layers.layer_downloader.LayerDownloader._move_into_cache")
+    @patch("samcli.local.layers.layer_downloader.tempfile")
     @patch("samcli.local.layers.layer_downloader.LayerDownloader._create_cache")
     @patch("samcli.local.layers.layer_downloader.LayerDownloader._is_layer_cached")
-    def test_download_layer(self, is_layer_cached_patch, create_cache_patch,
-                            fetch_layer_uri_patch, unzip_from_uri_patch):
+    def test_download_layer(self, is_layer_cached_patch, create_cache_patch, tempfile_patch, move_into_cache_patch,
+                            fetch_layer_content_patch, unzip_from_uri_patch):
         is_layer_cached_patch.return_value = False
+        tempfile_patch.mkdtemp.return_value = "/home/.layer1.tmp"
 
         download_layers = LayerDownloader("/home", ".")
 
@@ -100,18 +162,21 @@ class TestDownloadLayers(TestCase):
         layer_mock.arn = "arn:layer:layer1:1"
         layer_mock.layer_arn = "arn:layer:layer1"
 
-        fetch_layer_uri_patch.return_value = "layer/uri"
+        fetch_layer_content_patch.return_value = {"Location": "layer/uri"}
 
         actual = download_layers.download(layer_mock)
 
         self.assertEquals(actual.codeuri, str(Path("/home/layer1").resolve()))
 
-        create_cache_patch.assert_called_once_with("/home")
-        fetch_layer_uri_patch.assert_called_once_with(layer_mock)
+        create_cache_patch.assert_called_with("/home")
+        fetch_layer_content_patch.assert_called_once_with(layer_mock)
+        tempfile_patch.mkdtemp.assert_called_once_with(prefix=".layer1.", dir="/home")
         unzip_from_uri_patch.assert_called_once_with("layer/uri",
-                                                     str(Path('/home/layer1.zip').resolve()),
-                                                     unzip_output_dir=str(Path('/home/layer1').resolve()),
-                                                     progressbar_label="Downloading arn:layer:layer1")
+                                                     os.path.join("/home", "layer1.zip"),
+                                                     unzip_output_dir="/home/.layer1.tmp",
+                                                     progressbar_label="Downloading arn:layer:layer1",
+                                                     resume=False)
+        move_into_cache_patch.assert_called_once_with("/home/.layer1.tmp", str(Path("/home/layer1").resolve()))
 
     def test_layer_is_cached(self):
         download_layers = LayerDownloader("/", ".")
@@ -140,9 +205,9 @@ class TestDownloadLayers(TestCase):
         cache_path_mock.mkdir.assert_called_once_with(parents=True, exist_ok=True, mode=0o700)
 
 
-class TestLayerDownloader_fetch_layer_uri(TestCase):
+class TestLayerDownloader_fetch_layer_content(TestCase):
 
-    def test_fetch_layer_uri_is_successful(self):
+    def test_fetch_layer_content_is_successful(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.return_value = {"Content": {"Location": "some/uri"}}
         download_layers = LayerDownloader("/", ".", lambda_client_mock)
@@ -150,11 +215,11 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer = Mock()
         layer.layer_arn = "arn"
         layer.version = 1
-        actual_uri = download_layers._fetch_layer_uri(layer=layer)
+        actual_content = download_layers._fetch_layer_content(layer=layer)
 
-        self.assertEquals(actual_uri, "some/uri")
+        self.assertEquals(actual_content, {"Location": "some/uri"})
 
-    def test_fetch_layer_uri_fails_with_no_creds(self):
+    def test_fetch_layer_content_fails_with_no_creds(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = NoCredentialsError()
         download_layers = LayerDownloader("/", ".", lambda_client_mock)
@@ -164,9 +229,9 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(CredentialsRequired):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
 
-    def test_fetch_layer_uri_fails_with_AccessDeniedException(self):
+    def test_fetch_layer_content_fails_with_AccessDeniedException(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = ClientError(
             error_response={'Error': {'Code': 'AccessDeniedException'}}, operation_name="lambda")
@@ -177,9 +242,9 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(CredentialsRequired):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
 
-    def test_fetch_layer_uri_fails_with_ResourceNotFoundException(self):
+    def test_fetch_layer_content_fails_with_ResourceNotFoundException(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = ClientError(
             error_response={'Error': {'Code': 'ResourceNotFoundException'}}, operation_name="lambda")
@@ -190,9 +255,9 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(ResourceNotFound):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
 
-    def test_fetch_layer_uri_re_raises_client_error(self):
+    def test_fetch_layer_content_re_raises_client_error(self):
         lambda_client_mock = Mock()
         lambda_client_mock.get_layer_version.side_effect = ClientError(
             error_response={'Error': {'Code': 'Unknown'}}, operation_name="lambda")
@@ -203,4 +268,153 @@ class TestLayerDownloader_fetch_layer_uri(TestCase):
         layer.version = 1
 
         with self.assertRaises(ClientError):
-            download_layers._fetch_layer_uri(layer=layer)
+            download_layers._fetch_layer_content(layer=layer)
+
+
+class _LayerContentHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Serves the content of a layer like the presigned url of S3 does, with support for ranges
+    """
+
+    def do_GET(self):
+        content = self.server.content
+        range_header = self.headers.get("Range")
+        self.server.requests.append(range_header)
+
+        start = int(range_header[len("bytes="):-1]) if range_header else 0
+        body = content[start:]
+
+        self.send_response(206 if range_header else 200)
+        self.send_header("Content-length", str(len(body)))
+        self.end_headers()
+
+        if self.server.interrupt_after is not None:
+            # Cut the connection in the middle of the content
+            body = body[:self.server.interrupt_after]
+            self.server.interrupt_after = None
+            self.close_connection = True
+
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLayerDownloader_download_from_server(TestCase):
+
+    def setUp(self):
+        self.layer_cache = tempfile.mkdtemp()
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for index in range(40):
+                zip_file.writestr("python/module{}.py".format(index), os.urandom(4096))
+        self.content = archive.getvalue()
+
+        self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _LayerContentHandler)
+        self.server.content = self.content
+        self.server.requests = []
+        self.server.interrupt_after = None
+
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.lambda_client = Mock()
+        self.set_code_sha256(hashlib.sha256(self.content).digest())
+
+        self.downloader = LayerDownloader(self.layer_cache, ".", self.lambda_client)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.layer_cache, ignore_errors=True)
+
+    def set_code_sha256(self, digest):
+        self.lambda_client.get_layer_version.return_value = {
+            "Content": {
+                "Location": "http://127.0.0.1:{}/layer.zip".format(self.server.server_address[1]),
+                "CodeSha256": base64.b64encode(digest).decode("ascii")
+            }
+        }
+
+    def make_layer(self):
+        layer = Mock()
+        layer.is_defined_within_template = False
+        layer.name = "layer1-1-abcdef"
+        layer.arn = "arn:aws:lambda:us-east-1:123456789012:layer:layer1:1"
+        layer.layer_arn = "arn:aws:lambda:us-east-1:123456789012:layer:layer1"
+        layer.version = 1
+        return layer
+
+    def assert_layer_extracted(self):
+        layer_dir = os.path.join(self.layer_cache, "layer1-1-abcdef")
+        self.assertEquals(sorted(os.listdir(os.path.join(layer_dir, "python"))),
+                          sorted("module{}.py".format(index) for index in range(40)))
+
+        # Nothing but the layer and the SHA256 of its content are left behind
+        self.assertEquals(sorted(os.listdir(self.layer_cache)), [".layer1-1-abcdef.sha256", "layer1-1-abcdef"])
+
+    def test_must_record_use_of_cache(self):
+        cache_manager_mock = Mock()
+        self.downloader.cache_manager = cache_manager_mock
+
+        self.downloader.download(self.make_layer())
+        self.downloader.download(self.make_layer())
+        self.downloader.download(self.make_layer(), force=True)
+
+        cache_manager_mock.record_miss.assert_called_once_with("layer1-1-abcdef")
+        self.assertEquals(cache_manager_mock.record_hit.call_args_list, [call("layer1-1-abcdef")] * 2)
+
+    def test_must_download_layer_shared_by_functions_once(self):
+        layers = [self.make_layer() for _ in range(4)]
+
+        result = self.downloader.download_all(layers)
+
+        self.assertEquals(result, layers)
+        self.assertEquals(self.server.requests, [None])
+        self.lambda_client.get_layer_version.assert_called_once_with(LayerName=layers[0].layer_arn, VersionNumber=1)
+        self.assert_layer_extracted()
+
+    def test_must_skip_forced_download_when_content_is_unchanged(self):
+        self.downloader.download(self.make_layer())
+        self.downloader.download(self.make_layer(), force=True)
+
+        self.assertEquals(self.server.requests, [None])
+        self.assertEquals(self.lambda_client.get_layer_version.call_count, 2)
+        self.assert_layer_extracted()
+
+    def test_must_download_again_when_content_changed(self):
+        self.downloader.download(self.make_layer())
+
+        self.server.content = self.content = self.content + b"\0"
+        self.set_code_sha256(hashlib.sha256(self.content).digest())
+        self.downloader.download(self.make_layer(), force=True)
+
+        self.assertEquals(self.server.requests, [None, None])
+        self.assert_layer_extracted()
+
+    def test_must_fail_when_content_does_not_match_code_sha256(self):
+        self.set_code_sha256(hashlib.sha256(b"other content").digest())
+
+        with self.assertRaises(LayerChecksumMismatch):
+            self.downloader.download(self.make_layer())
+
+        self.assertEquals(os.listdir(self.layer_cache), [])
+
+    def test_must_resume_interrupted_download(self):
+        self.server.interrupt_after = len(self.content) * 3 // 4
+
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.downloader.download(self.make_layer())
+
+        self.assertFalse(os.path.exists(os.path.join(self.layer_cache, "layer1-1-abcdef")))
+        partial_files = [name for name in os.listdir(self.layer_cache) if name.endswith(".zip")]
+        self.assertEquals(len(partial_files), 1)
+        downloaded = os.path.getsize(os.path.join(self.layer_cache, partial_files[0]))
+        self.assertTrue(0 < downloaded < len(self.content))
+
+        self.downloader.download(self.make_layer())
+
+        self.assertEquals(self.server.requests, [None, "bytes={}-".format(downloaded)])
+        self.assert_layer_extracted()
@@ -0,0 +1,188 @@
+import os
+import time
+import shutil
+import tempfile
+from unittest import TestCase
+from mock import Mock
+
+import docker
+
+from samcli.local.layers.layer_cache import LayerCacheManager
+
+
+class TestLayerCacheManager(TestCase):
+
+    def setUp(self):
+        self.layer_cache = tempfile.mkdtemp()
+        self.docker_client = Mock()
+        self.docker_client.containers.list.return_value = []
+
+    def tearDown(self):
+        shutil.rmtree(self.layer_cache, ignore_errors=True)
+
+    def make_entry(self, name, size, age=0):
+        path = os.path.join(self.layer_cache, name)
+        os.makedirs(path)
+        with open(os.path.join(path, "content"), "wb") as f:
+            f.write(b"\0" * size)
+
+        modified = time.time() - age
+        os.utime(path, (modified, modified))
+        return path
+
+    def make_manager(self, max_size=None):
+        return LayerCacheManager(self.layer_cache, max_size=max_size, docker_client=self.docker_client)
+
+    def test_must_report_hits_misses_and_bytes_stored(self):
+        self.make_entry("layer1", 100)
+        self.make_entry("layer2", 50)
+        manager = self.make_manager()
+
+        manager.record_miss("layer1")
+        manager.record_hit("layer1")
+        manager.record_hit("layer1")
+        manager.record_hit("layer2")
+
+        stats = manager.stats()
+
+        self.assertEquals(stats["hits"], 3)
+        self.assertEquals(stats["misses"], 1)
+        self.assertEquals(stats["hit_rate"], 0.75)
+        self.assertEquals(stats["entries"], 2)
+        self.assertEquals(stats["bytes_stored"], 150)
+        self.assertEquals(stats["evictions"], 0)
+
+    def test_statistics_are_shared_through_the_cache(self):
+        self.make_entry("layer1", 100)
+        self.make_manager().record_hit("layer1")
+
+        self.assertEquals(self.make_manager().stats()["hits"], 1)
+
+    def test_hit_rate_is_unknown_before_first_use(self):
+        self.assertIsNone(self.make_manager().stats()["hit_rate"])
+
+    def test_must_not_evict_without_budget(self):
+        self.make_entry("layer1", 100)
+
+        self.assertEquals(self.make_manager().evict(), [])
+        self.assertTrue(os.path.isdir(os.path.join(self.layer_cache, "layer1")))
+
+    def test_must_evict_least_recently_used_entries_until_within_budget(self):
+        self.make_entry("old", 100, age=300)
+        self.make_entry("older", 100, age=600)
+        self.make_entry("recent", 100)
+        manager = self.make_manager(max_size=150)
+
+        evicted = manager.evict()
+
+        self.assertEquals(evicted, ["older", "old"])
+        self.assertEquals(sorted(os.listdir(self.layer_cache)), [".index.json", ".index.lock", "recent"])
+
+        stats = manager.stats()
+        self.assertEquals(stats["evictions"], 2)
+        self.assertEquals(stats["evicted_bytes"], 200)
+        self.assertEquals(stats["bytes_stored"], 100)
+
+    def test_use_makes_entry_recent(self):
+        self.make_entry("layer1", 100, age=600)
+        self.make_entry("layer2", 100, age=300)
+        manager = self.make_manager(max_size=150)
+
+        manager.record_hit("layer1")
+
+        self.assertEquals(manager.evict(), ["layer2"])
+
+    def test_must_not_evict_entries_in_use(self):
+        self.make_entry("layer1", 100, age=600)
+        self.make_entry("layer2", 100, age=300)
+        manager = self.make_manager(max_size=150)
+
+        self.assertEquals(manager.evict(in_use=["layer1"]), ["layer2"])
+
+    def test_must_not_evict_entries_mounted_by_running_containers(self):
+        overlay = self.make_entry(os.path.join(".overlays", "key"), 100, age=600)
+        self.make_entry("layer1", 100, age=300)
+
+        container = Mock()
+        container.attrs = {"Mounts": [{"Source": overlay, "Destination": "/opt"}]}
+        self.docker_client.containers.list.return_value = [container]
+
+        manager = self.make_manager(max_size=150)
+
+        self.assertEquals(manager.evict(), ["layer1"])
+        self.assertTrue(os.path.isdir(overlay))
+
+    def test_must_not_evict_entries_mounted_by_stopped_containers(self):
+        overlay = self.make_entry(os.path.join(".overlays", "key"), 100, age=600)
+
+        # Stopped containers are kept in the warm pool, to be started again
+        container = Mock()
+        container.attrs = {"State": {"Status": "exited"}, "Mounts": [{"Source": overlay, "Destination": "/opt"}]}
+        self.docker_client.containers.list.side_effect = lambda all=False, filters=None: [container] if all else []
+
+        self.assertEquals(self.make_manager(max_size=0).evict(), [])
+        self.assertTrue(os.path.isdir(overlay))
+        self.docker_client.containers.list.assert_called_with(all=True, filters={"label": "sam.cli.container"})
+
+    def test_must_evict_when_docker_is_not_reachable(self):
+        self.make_entry("layer1", 100)
+        self.docker_client.containers.list.side_effect = docker.errors.DockerException("not running")
+
+        self.assertEquals(self.make_manager(max_size=0).evict(), ["layer1"])
+
+    def test_must_not_evict_entries_used_by_other_invocations(self):
+        self.make_entry("layer1", 100, age=600)
+        self.make_entry("layer2", 100, age=300)
+
+        with self.make_manager().in_use(["layer1"]):
+            self.assertEquals(self.make_manager(max_size=150).evict(), ["layer2"])
+
+        self.assertEquals(self.make_manager(max_size=0).evict(), ["layer1"])
+
+    def test_must_remove_hash_and_partial_downloads_of_evicted_layer(self):
+        self.make_entry("layer1", 100)
+        other_files = [".layer10.sha256", "layer1.1.zip", "layer1.1.0123456789abcdef.zip"]
+        for name in [".layer1.sha256", "layer1.zip", "layer1.0123456789abcdef.zip"] + other_files:
+            open(os.path.join(self.layer_cache, name), "w").close()
+
+        self.make_manager(max_size=0).evict()
+
+        self.assertEquals(sorted(os.listdir(self.layer_cache)), sorted([".index.json", ".index.lock"] + other_files))
+
+    def test_uses_must_not_be_written_until_flush_interval_passed(self):
+        self.make_entry("layer1", 100)
+        manager = self.make_manager()
+
+        manager.record_hit("layer1")
+        manager.record_hit("layer1")
+
+        self.assertEquals(self.make_manager().stats()["hits"], 1)
+
+        manager.flush()
+
+        self.assertEquals(self.make_manager().stats()["hits"], 2)
+
+    def test_must_merge_updates_of_other_managers(self):
+        self.make_entry("layer1", 100)
+        first = self.make_manager()
+        second = self.make_manager()
+        first.record_hit("layer1")
+        second.record_hit("layer1")
+
+        first.record_hit("layer1")
+        second.record_miss("layer1")
+        first.flush()
+        second.flush()
+
+        stats = self.make_manager().stats()
+        self.assertEquals(stats["hits"], 3)
+        self.assertEquals(stats["misses"], 1)
+
+    def test_must_forget_entries_removed_from_disk(self):
+        path = self.make_entry("layer1", 100)
+        manager = self.make_manager()
+        manager.record_miss("layer1")
+
+        shutil.rmtree(path)
+
+        self.assertEquals(manager.stats()["entries"], 0)
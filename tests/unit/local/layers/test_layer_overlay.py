@@ -0,0 +1,124 @@
+import os
+import stat
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from mock import Mock, patch
+
+from samcli.local.layers.layer_overlay import LayerOverlay
+
+
+class TestLayerOverlay(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.overlay = LayerOverlay(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _make_layer(self, name, files, defined_within_template=False):
+        codeuri = os.path.join(self.cache_dir, name)
+        for relative_path, content in files.items():
+            path = os.path.join(codeuri, relative_path)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "w") as f:
+                f.write(content)
+
+        layer = Mock()
+        layer.codeuri = codeuri
+        layer.is_defined_within_template = defined_within_template
+        return layer
+
+    def _read(self, directory, relative_path):
+        with open(os.path.join(directory, relative_path)) as f:
+            return f.read()
+
+    def test_must_merge_layers_in_order(self):
+        layer1 = self._make_layer("layer1", {"python/a.py": "a1", "python/b.py": "b1"})
+        layer2 = self._make_layer("layer2", {"python/b.py": "b2", "bin/tool": "tool"}, defined_within_template=True)
+
+        result = self.overlay.merge("key", [layer1, layer2])
+
+        self.assertEquals(result, os.path.join(self.cache_dir, ".overlays", "key"))
+        self.assertEquals(self._read(result, "python/a.py"), "a1")
+        self.assertEquals(self._read(result, "python/b.py"), "b2")
+        self.assertEquals(self._read(result, "bin/tool"), "tool")
+
+    def test_later_layer_replaces_directory_with_file(self):
+        layer1 = self._make_layer("layer1", {"lib/nested/file": "nested"})
+        layer2 = self._make_layer("layer2", {"lib": "file now"})
+
+        result = self.overlay.merge("key", [layer1, layer2])
+
+        self.assertEquals(self._read(result, "lib"), "file now")
+
+    def test_must_not_modify_template_layers_through_merged_directory(self):
+        layer = self._make_layer("layer", {"file": "original"}, defined_within_template=True)
+
+        result = self.overlay.merge("key", [layer])
+
+        self.assertNotEquals(os.stat(os.path.join(result, "file")).st_ino,
+                             os.stat(os.path.join(layer.codeuri, "file")).st_ino)
+
+    def test_merged_layers_must_be_readable_by_everybody(self):
+        layer = self._make_layer("layer", {"bin/tool": "tool", "data": "data"})
+        os.chmod(os.path.join(layer.codeuri, "bin", "tool"), 0o700)
+        os.chmod(os.path.join(layer.codeuri, "data"), 0o600)
+
+        result = self.overlay.merge("key", [layer])
+
+        self.assertEquals(stat.S_IMODE(os.stat(os.path.join(result, "bin", "tool")).st_mode), 0o755)
+        self.assertEquals(stat.S_IMODE(os.stat(os.path.join(result, "data")).st_mode), 0o644)
+        self.assertEquals(stat.S_IMODE(os.stat(result).st_mode), 0o755)
+
+    def test_must_not_change_permissions_of_cached_layers(self):
+        layer = self._make_layer("layer", {"data": "data", "public": "public"})
+        os.chmod(os.path.join(layer.codeuri, "data"), 0o600)
+        os.chmod(os.path.join(layer.codeuri, "public"), 0o644)
+
+        result = self.overlay.merge("key", [layer])
+
+        self.assertEquals(stat.S_IMODE(os.stat(os.path.join(layer.codeuri, "data")).st_mode), 0o600)
+        self.assertNotEquals(os.stat(os.path.join(result, "data")).st_ino,
+                             os.stat(os.path.join(layer.codeuri, "data")).st_ino)
+
+        # Files that are readable already can be shared
+        self.assertEquals(os.stat(os.path.join(result, "public")).st_ino,
+                          os.stat(os.path.join(layer.codeuri, "public")).st_ino)
+
+    def test_must_reuse_merged_layers_with_same_key(self):
+        layer = self._make_layer("layer", {"file": "content"})
+
+        with patch.object(self.overlay, "_merge_into", wraps=self.overlay._merge_into) as merge_into_mock:
+            first = self.overlay.merge("key", [layer])
+            second = self.overlay.merge("key", [layer])
+
+        self.assertEquals(first, second)
+        self.assertEquals(merge_into_mock.call_count, 1)
+
+    def test_concurrent_merges_of_same_key_merge_once(self):
+        layer = self._make_layer("layer", {"file": "content"})
+        results = []
+
+        with patch.object(self.overlay, "_merge_into", wraps=self.overlay._merge_into) as merge_into_mock:
+            threads = [threading.Thread(target=lambda: results.append(self.overlay.merge("key", [layer])))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEquals(len(set(results)), 1)
+        self.assertEquals(merge_into_mock.call_count, 1)
+
+    def test_must_not_leave_partial_directory_when_merge_fails(self):
+        layer = self._make_layer("layer", {"file": "content"})
+
+        with patch("samcli.local.layers.layer_overlay._make_readable", side_effect=OSError("failed")):
+            with self.assertRaises(OSError):
+                self.overlay.merge("key", [layer])
+
+        self.assertEquals(os.listdir(os.path.join(self.cache_dir, ".overlays")), [])
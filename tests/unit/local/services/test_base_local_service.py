@@ -4,6 +4,7 @@ from mock import Mock, patch
 from parameterized import parameterized, param
 
 from samcli.local.services.base_local_service import BaseLocalService, LambdaOutputParser
+from samcli.lib.utils.output_buffer import OutputBuffer
 
 
 class TestLocalHostRunner(TestCase):
@@ -39,6 +40,26 @@ class TestLocalHostRunner(TestCase):
 
         app_run_mock.assert_called_once_with(threaded=False, host='127.0.0.1', port=3000)
 
+    def test_run_starts_service_on_server(self):
+        server = Mock()
+        service = BaseLocalService(is_debugging=False, port=3000, host='127.0.0.1', server=server)
+        service._app = Mock()
+
+        service.run()
+
+        server.serve.assert_called_once_with(service._app, '127.0.0.1', 3000)
+        service._app.run.assert_not_called()
+
+    def test_run_stays_singlethreaded_on_server_when_debugging(self):
+        server = Mock()
+        service = BaseLocalService(is_debugging=True, port=3000, host='127.0.0.1', server=server)
+        service._app = Mock()
+
+        service.run()
+
+        server.serve.assert_not_called()
+        service._app.run.assert_called_once_with(threaded=False, host='127.0.0.1', port=3000)
+
     @patch('samcli.local.services.base_local_service.Response')
     def test_service_response(self, flask_response_patch):
         flask_response_mock = Mock()
@@ -128,3 +149,15 @@ class TestLambdaOutputParser(TestCase):
     ])
     def test_is_lambda_error_response(self, input, exected_result):
         self.assertEquals(LambdaOutputParser.is_lambda_error_response(input), exected_result)
+
+    def test_get_lambda_output_from_output_buffer(self):
+        stdout = OutputBuffer()
+        stdout.write(b'log line\n')
+        stdout.write(memoryview(b'{"a": "\xc3\xa9"}\n'))
+
+        response, logs, is_customer_error = LambdaOutputParser.get_lambda_output(stdout)
+
+        self.assertEquals(logs, b'log line')
+        self.assertIsInstance(logs, bytes)
+        self.assertEquals(response, u'{"a": "\xe9"}')
+        self.assertFalse(is_customer_error)
@@ -0,0 +1,109 @@
+import socket
+import threading
+from unittest import TestCase
+
+from mock import Mock, patch
+from flask import Flask
+
+from samcli.local.services.http_servers import WerkzeugServer, WaitressServer, ServerNotAvailable, create_server, \
+    _ThreadPoolWSGIServer, _request_handler
+
+
+class TestCreateServer(TestCase):
+
+    def test_must_create_werkzeug_server(self):
+        server = create_server("werkzeug", threads=2, keep_alive=0, backlog=10)
+
+        self.assertIsInstance(server, WerkzeugServer)
+        self.assertEquals((server.threads, server.keep_alive, server.backlog), (2, 0, 10))
+
+    def test_must_fail_for_unknown_server(self):
+        with self.assertRaises(ValueError):
+            create_server("unknown")
+
+    @patch.dict("sys.modules", {"waitress": None})
+    def test_must_fail_if_waitress_is_not_installed(self):
+        with self.assertRaises(ServerNotAvailable):
+            create_server("waitress")
+
+    def test_must_serve_on_waitress(self):
+        waitress_mock = Mock()
+        app = Mock()
+
+        with patch.dict("sys.modules", {"waitress": waitress_mock}):
+            server = WaitressServer(threads=2, keep_alive=0, backlog=10)
+
+        server.serve(app, "127.0.0.1", 3000)
+
+        waitress_mock.serve.assert_called_once_with(app, host="127.0.0.1", port=3000, threads=2, channel_timeout=1,
+                                                    backlog=10, _quiet=True)
+
+
+class TestThreadPoolWSGIServer(TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.app = Flask(__name__)
+
+        @self.app.route("/")
+        def index():
+            return "hello"
+
+        @self.app.route("/slow")
+        def slow():
+            self.release.wait(5)
+            return "slow"
+
+    def start_server(self, threads=2, keep_alive=5):
+        server = _ThreadPoolWSGIServer("127.0.0.1", 0, self.app, handler=_request_handler(keep_alive),
+                                       threads=threads, backlog=16)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        def stop():
+            self.release.set()
+            server.shutdown()
+            server.server_close()
+        self.addCleanup(stop)
+
+        return server.server_address[1]
+
+    def request(self, connection, path):
+        connection.sendall("GET {} HTTP/1.1\r\nHost: localhost\r\n\r\n".format(path).encode("ascii"))
+
+        response = b""
+        while b"\r\n\r\n" not in response:
+            response += connection.recv(4096)
+
+        headers, body = response.split(b"\r\n\r\n", 1)
+        length = int([line.split(b":")[1] for line in headers.split(b"\r\n")
+                      if line.lower().startswith(b"content-length")][0])
+        while len(body) < length:
+            body += connection.recv(4096)
+
+        return headers, body
+
+    def test_must_serve_several_requests_on_one_connection(self):
+        port = self.start_server()
+        connection = socket.create_connection(("127.0.0.1", port))
+        self.addCleanup(connection.close)
+
+        for _ in range(3):
+            headers, body = self.request(connection, "/")
+            self.assertTrue(headers.startswith(b"HTTP/1.1 200"))
+            self.assertEquals(body, b"hello")
+
+    def test_must_serve_requests_concurrently(self):
+        port = self.start_server(threads=2, keep_alive=0)
+
+        slow_connection = socket.create_connection(("127.0.0.1", port))
+        self.addCleanup(slow_connection.close)
+        slow_connection.sendall(b"GET /slow HTTP/1.0\r\n\r\n")
+
+        connection = socket.create_connection(("127.0.0.1", port))
+        self.addCleanup(connection.close)
+
+        # Served by the second thread while the first one is busy
+        self.assertEquals(self.request(connection, "/")[1], b"hello")
+        self.release.set()